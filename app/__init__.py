@@ -71,6 +71,34 @@ def create_app(config_name=None):
     # Initialize extensions
     init_extensions(app)
 
+    # Keep per-stop financial snapshots in sync with their source rows
+    from app.services.financial_snapshots import register_snapshot_listeners
+    register_snapshot_listeners()
+
+    # Keep the global search index in sync with tours, venues, bands and guests
+    from app.services.search_index import register_search_listeners
+    register_search_listeners()
+
+    # Keep the per-user calendar feed index in sync with stops and assignments
+    from app.services.calendar_index import register_calendar_index_listeners
+    register_calendar_index_listeners()
+
+    # Version guestlist changes per stop for offline check-in sync
+    from app.services.guestlist_sync import register_guestlist_sync_listeners
+    register_guestlist_sync_listeners()
+
+    # Invalidate user / org cached data (context processors, plans) on commit
+    from app.utils.cache_generations import register_cache_generation_listeners
+    register_cache_generation_listeners()
+
+    # Drop the per-request authorization context when memberships change
+    from app.utils.authz import register_authz_listeners
+    register_authz_listeners()
+
+    # Async emails / push notifications (bounded queue, drained on worker exit)
+    from app.services.notification_dispatcher import dispatcher
+    dispatcher.init_app(app)
+
     # Enable response compression (gzip)
     from flask_compress import Compress
     Compress(app)
@@ -100,6 +128,10 @@ def create_app(config_name=None):
         except Exception as e:
             app.logger.debug(f'Mail config from DB not available (expected during initial migration): {e}')
 
+    # Per-request query count / DB time (Server-Timing, request log, /admin/perf)
+    from app.utils.perf import init_perf
+    init_perf(app)
+
     # Register blueprints
     register_blueprints(app)
 
@@ -389,11 +421,13 @@ def register_cli_commands(app):
         print("Database initialized with default roles.")
 
     @app.cli.command('geocode-venues')
-    def geocode_venues():
-        """Géocode toutes les salles sans coordonnées GPS."""
+    @click.option('--workers', type=int, default=None, help='Concurrent HTTP workers (default GEOCODING_WORKERS)')
+    @click.option('--chunk-size', type=int, default=100, help='Provider results per commit')
+    @click.option('--rate', type=float, default=None, help='Requests/second (default GEOCODING_RATE_LIMIT)')
+    def geocode_venues(workers, chunk_size, rate):
+        """Géocode toutes les salles sans coordonnées GPS (cache + workers concurrents)."""
         from app.models.venue import Venue
-        from app.utils.geocoding import batch_geocode_venues
-        from app.extensions import db
+        from app.services.geocoding_service import GeocodingService
 
         venues = Venue.query.filter(
             (Venue.latitude.is_(None)) | (Venue.longitude.is_(None))
@@ -405,25 +439,69 @@ def register_cli_commands(app):
 
         print(f"Géocodage de {len(venues)} salle(s) en cours...")
 
-        stats = batch_geocode_venues(
-            venues,
-            commit_callback=lambda: db.session.commit()
+        stats = GeocodingService.geocode_venues(
+            venues, workers=workers, chunk_size=chunk_size, rate=rate
         )
 
-        print(f"Terminé: {stats['success']} succès, {stats['failed']} échecs, {stats['skipped']} ignorées")
+        print(f"Terminé: {stats['success']} succès, {stats['failed']} échecs, {stats['skipped']} ignorées "
+              f"({stats['cache_hits']} depuis le cache, {stats['requests']} requête(s), {stats['errors']} erreur(s))")
+
+    @app.cli.command('rebuild-financial-snapshots')
+    def rebuild_financial_snapshots():
+        """Recalcule tous les snapshots financiers par date (backfill)."""
+        from app.services.financial_snapshots import FinancialSnapshotService
+
+        count = FinancialSnapshotService.rebuild_all()
+        click.echo(f'{count} snapshot(s) financier(s) recalculé(s).')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Reconstruit l'index de recherche globale (tournées, salles, groupes, invités)."""
+        from app.services.search_index import SearchIndexService
+
+        count = SearchIndexService.rebuild_all()
+        click.echo(f'{count} document(s) indexé(s).')
+
+    @app.cli.command('rebuild-calendar-index')
+    def rebuild_calendar_index():
+        """Reconstruit l'index des calendriers personnels (dates, créneaux, logistique)."""
+        from app.services.calendar_index import CalendarIndexService
+
+        count = CalendarIndexService.rebuild_all()
+        click.echo(f'{count} événement(s) indexé(s).')
+
+    @app.cli.command('db-index-report')
+    @click.option('--min-rows', type=int, default=None, help='Large table threshold (default INDEX_AUDIT_MIN_ROWS)')
+    @click.option('--query', 'queries', multiple=True, help='Only explain this catalog query (repeatable)')
+    @click.option('--verbose', is_flag=True, help='Print the full plan of every query')
+    def db_index_report(min_rows, queries, verbose):
+        """EXPLAIN des requêtes critiques: signale les scans séquentiels sur les grosses tables."""
+        from app.services.index_audit import IndexAuditService
+
+        results = IndexAuditService.run_report(min_rows=min_rows, only=list(queries) or None)
+        flagged = 0
+        for result in results:
+            if result['flagged']:
+                flagged += 1
+                tables = ', '.join(f"{f['table']} ({f['rows']} lignes)" for f in result['flagged'])
+                click.echo(f"SEQ SCAN  {result['name']}: {tables}")
+            elif result['seq_scans']:
+                click.echo(f"ok (petite table)  {result['name']}: {', '.join(result['seq_scans'])}")
+            else:
+                click.echo(f"ok        {result['name']}")
+            if verbose or result['flagged']:
+                for line in result['plan']:
+                    click.echo(f'    {line}')
+
+        click.echo(f'{len(results)} requête(s) analysée(s), {flagged} scan(s) séquentiel(s) signalé(s).')
+        if flagged:
+            raise SystemExit(1)
 
     @app.cli.command('send-reminders')
-    @click.option('--dry-run', is_flag=True, help='Preview without sending emails')
+    @click.option('--dry-run', is_flag=True, help='Preview without queueing emails')
     def send_reminders(dry_run):
-        """Send tour stop reminder emails (J-7 and J-1)."""
-        from app.services.reminders import (
-            get_stops_needing_j7_reminders,
-            get_stops_needing_j1_reminders,
-            get_users_for_reminder
-        )
-        from app.models.reminder import TourStopReminder
-        from app.utils.email import send_tour_reminder_email
-        from app.extensions import db
+        """Queue tour stop reminder emails (J-7 and J-1) for `flask worker`."""
+        from app.services.reminders import enqueue_due_reminders
 
         print("=" * 50)
         print("TOUR STOP REMINDERS")
@@ -433,73 +511,48 @@ def register_cli_commands(app):
             print("[DRY RUN] Aucun email ne sera envoye")
             print()
 
-        stats = {'j7_sent': 0, 'j1_sent': 0, 'skipped': 0, 'errors': 0}
-
-        # Process J-7 reminders
-        j7_stops = get_stops_needing_j7_reminders()
-        print(f"\nJ-7 Reminders: {len(j7_stops)} tour stop(s) found")
-
-        for tour_stop in j7_stops:
-            users = get_users_for_reminder(tour_stop)
-            for user in users:
-                if TourStopReminder.already_sent(tour_stop.id, user.id, 'j7'):
-                    stats['skipped'] += 1
-                    continue
-
-                if dry_run:
-                    print(f"  [DRY RUN] Would send J-7 to {user.email} for {tour_stop.event_label}")
-                else:
-                    try:
-                        if send_tour_reminder_email(user, tour_stop, 'j7'):
-                            TourStopReminder.mark_sent(tour_stop.id, user.id, 'j7')
-                            stats['j7_sent'] += 1
-                            print(f"  [OK] J-7 sent to {user.email}")
-                        else:
-                            stats['errors'] += 1
-                            print(f"  [ERROR] Failed to send to {user.email}")
-                    except Exception as e:
-                        stats['errors'] += 1
-                        print(f"  [ERROR] {user.email}: {e}")
-
-        # Process J-1 reminders
-        j1_stops = get_stops_needing_j1_reminders()
-        print(f"\nJ-1 Reminders: {len(j1_stops)} tour stop(s) found")
-
-        for tour_stop in j1_stops:
-            users = get_users_for_reminder(tour_stop)
-            for user in users:
-                if TourStopReminder.already_sent(tour_stop.id, user.id, 'j1'):
-                    stats['skipped'] += 1
-                    continue
-
-                if dry_run:
-                    print(f"  [DRY RUN] Would send J-1 to {user.email} for {tour_stop.event_label}")
-                else:
-                    try:
-                        if send_tour_reminder_email(user, tour_stop, 'j1'):
-                            TourStopReminder.mark_sent(tour_stop.id, user.id, 'j1')
-                            stats['j1_sent'] += 1
-                            print(f"  [OK] J-1 sent to {user.email}")
-                        else:
-                            stats['errors'] += 1
-                            print(f"  [ERROR] Failed to send to {user.email}")
-                    except Exception as e:
-                        stats['errors'] += 1
-                        print(f"  [ERROR] {user.email}: {e}")
-
-        # Commit all reminder records
-        if not dry_run:
-            db.session.commit()
+        stats = enqueue_due_reminders(dry_run=dry_run)
+        if dry_run:
+            for reminder_type, user, tour_stop in stats['planned']:
+                print(f"  [DRY RUN] Would send {reminder_type.upper()} to {user.email} for {tour_stop.event_label}")
 
         # Summary
         print()
         print("=" * 50)
         print("SUMMARY")
         print("=" * 50)
-        print(f"J-7 reminders sent: {stats['j7_sent']}")
-        print(f"J-1 reminders sent: {stats['j1_sent']}")
-        print(f"Skipped (already sent): {stats['skipped']}")
-        print(f"Errors: {stats['errors']}")
+        print(f"J-7 reminders queued: {stats['j7']}")
+        print(f"J-1 reminders queued: {stats['j1']}")
+        print(f"Skipped (already sent or queued): {stats['skipped']}")
+
+    @app.cli.command('worker')
+    @click.option('--once', is_flag=True, help='Run the due jobs then exit (cron mode)')
+    @click.option('--batch-size', type=int, default=None, help='Jobs claimed per query (default JOB_WORKER_BATCH_SIZE)')
+    @click.option('--max-jobs', type=int, default=None, help='Exit after this many jobs')
+    @click.option('--poll-interval', type=float, default=None, help='Seconds between polls when idle (default JOB_POLL_INTERVAL)')
+    def worker(once, batch_size, max_jobs, poll_interval):
+        """Process background jobs (reminders, invoice emails, notifications)."""
+        import signal
+        from app.services.job_queue import JobQueue
+
+        stopping = []
+
+        def request_stop(signum, frame):
+            click.echo('Arrêt demandé, fin du job en cours...')
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        stats = JobQueue.work(
+            batch_size=batch_size or app.config['JOB_WORKER_BATCH_SIZE'],
+            max_jobs=max_jobs,
+            poll_interval=poll_interval or app.config['JOB_POLL_INTERVAL'],
+            once=once,
+            should_stop=lambda: bool(stopping),
+        )
+        click.echo(f"{stats['done']} job(s) terminé(s), {stats['failed']} en échec, "
+                   f"{stats['requeued']} remis en file.")
 
     @app.cli.command('seed-professions')
     @click.option('--force', is_flag=True, help='Force reseed even if professions exist')
@@ -1200,6 +1253,12 @@ def register_org_context(app):
     from flask_login import current_user
     from flask import session
 
+    @app.before_request
+    def reset_authz_context():
+        """Start each request with a fresh authorization context (see app.utils.authz)."""
+        from app.utils.authz import reset_authz
+        reset_authz()
+
     @app.before_request
     def ensure_org_context():
         """Auto-set organization context in session for authenticated users.
@@ -1312,22 +1371,32 @@ def register_context_processors(app):
         }
         if current_user.is_authenticated:
             try:
-                from app.utils.org_context import get_current_org
-                ctx['current_org'] = get_current_org()
+                ctx['current_org'] = _current_org_summary()
             except Exception:
                 pass
         return ctx
 
-    # Per-user context cache (30s TTL) to avoid DB queries on every page render
-    import time as _ctx_time
-    _user_ctx_cache = {}  # {user_id: {'data': dict, 'ts': float}}
-    _CTX_CACHE_TTL = 30  # seconds
+    def _current_org_summary():
+        """Current organization as a small dict (navbar), shared across workers."""
+        from app.utils.cache_generations import cached_value
+        from app.utils.org_context import get_current_org, get_current_org_id
+
+        def load():
+            org = get_current_org()
+            return {'id': org.id, 'name': org.name, 'slug': org.slug} if org else {}
+
+        org_id = get_current_org_id()
+        if not org_id:
+            return None
+        return cached_value('org_summary', load, org_id=org_id) or None
 
     @app.context_processor
     def user_context_processor():
         """Provide pending registrations, notifications, and billing to templates.
 
-        Cached per-user for 30 seconds to avoid 3-4 DB queries per page render.
+        Cached per user in the shared cache; the key embeds the user and org
+        cache generations, so any committed change to notifications, users
+        or subscriptions is visible on the next render in every worker.
         """
         defaults = {
             'pending_registrations_count': 0,
@@ -1338,43 +1407,49 @@ def register_context_processors(app):
         if not current_user.is_authenticated:
             return defaults
 
-        uid = current_user.id
-        now = _ctx_time.monotonic()
-        cached = _user_ctx_cache.get(uid)
-        if cached and (now - cached['ts']) < _CTX_CACHE_TTL:
-            return cached['data']
+        from app.utils.cache_generations import cached_value
 
-        data = dict(defaults)
-        try:
-            # Pending registrations (managers only, org-scoped)
-            if current_user.is_manager_or_above():
-                from app.models.user import User
-                from app.utils.org_context import get_org_users
-                data['pending_registrations_count'] = get_org_users(active_only=False).filter(
-                    User.is_active == False,
-                    User.invitation_token.is_(None)
-                ).count()
-
-            # Notifications
-            from app.models.notification import Notification
-            data['unread_notifications_count'] = Notification.get_unread_count(uid)
-            data['recent_notifications'] = Notification.get_recent(uid, limit=5)
-
-            # Billing
-            data['current_plan'] = current_user.current_plan
-        except Exception:
-            pass  # Table might not exist or DB connection issue
+        uid = current_user.id
 
-        _user_ctx_cache[uid] = {'data': data, 'ts': now}
+        def load():
+            data = dict(defaults)
+            try:
+                # Pending registrations (managers only, org-scoped)
+                if current_user.is_manager_or_above():
+                    from app.models.user import User
+                    from app.utils.org_context import get_org_users
+                    data['pending_registrations_count'] = get_org_users(active_only=False).filter(
+                        User.is_active == False,
+                        User.invitation_token.is_(None)
+                    ).count()
+
+                # Notifications (plain dicts: cached values outlive the session)
+                from app.models.notification import Notification
+                data['unread_notifications_count'] = Notification.get_unread_count(uid)
+                data['recent_notifications'] = [
+                    {
+                        'id': n.id,
+                        'type': n.type,
+                        'title': n.title,
+                        'message': n.message,
+                        'link': n.link,
+                        'is_read': n.is_read,
+                        'created_at': n.created_at,
+                    }
+                    for n in Notification.get_recent(uid, limit=5)
+                ]
 
-        # Evict stale entries (keep cache bounded)
-        if len(_user_ctx_cache) > 100:
-            cutoff = now - _CTX_CACHE_TTL * 2
-            stale = [k for k, v in _user_ctx_cache.items() if v['ts'] < cutoff]
-            for k in stale:
-                del _user_ctx_cache[k]
+                # Billing
+                data['current_plan'] = current_user.current_plan
+            except Exception:
+                pass  # Table might not exist or DB connection issue
+            return data
 
-        return data
+        try:
+            return cached_value('user_ctx', load, user_id=uid, org_id=current_user.current_org_id,
+                                timeout=app.config.get('USER_CONTEXT_CACHE_TTL', 300))
+        except Exception:
+            return load()
 
     @app.context_processor
     def pdf_availability_processor():
@@ -1442,6 +1517,10 @@ class JSONFormatter(logging.Formatter):
             log_entry['request_id'] = g.get('request_id', '-')
         except RuntimeError:
             pass  # Outside request context
+        # Request figures (query count, DB time, slowest statement)
+        perf = getattr(record, 'perf', None)
+        if perf:
+            log_entry.update(perf)
         # Add exception info
         if record.exc_info and record.exc_info[0]:
             log_entry['exception'] = self.formatException(record.exc_info)
@@ -1467,12 +1546,20 @@ def configure_logging(app):
     def log_request(response):
         if request.path.startswith('/static'):
             return response
+        from app.utils.perf import current_request_stats
+        stats = current_request_stats()
+        if stats is None:
+            app.logger.info('%s %s %s', request.method, request.path, response.status_code)
+            return response
         app.logger.info(
-            '%s %s %s %dms',
+            '%s %s %s %dms %dq %dms-db',
             request.method,
             request.path,
             response.status_code,
-            int((response.headers.get('X-Response-Time', 0)) or 0),
+            stats.elapsed * 1000,
+            stats.query_count,
+            stats.db_time * 1000,
+            extra={'perf': dict(stats.as_dict(), endpoint=request.endpoint, status=response.status_code)},
         )
         return response
 
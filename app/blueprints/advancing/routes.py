@@ -341,14 +341,14 @@ def export_pdf(stop_id):
     data = AdvancingService.get_stop_advancing_data(stop_id)
 
     try:
-        from app.utils.pdf_generator import PDF_AVAILABLE
+        from app.utils.pdf_generator import PDF_AVAILABLE, get_stylesheet
         if not PDF_AVAILABLE:
             flash('Export PDF non disponible (ReportLab non installé).', 'warning')
             return redirect(url_for('advancing.stop_detail', stop_id=stop_id))
 
         from reportlab.lib.pagesizes import A4
         from reportlab.lib.units import mm
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.styles import ParagraphStyle
         from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
         from reportlab.lib import colors
         from io import BytesIO
@@ -356,7 +356,7 @@ def export_pdf(stop_id):
 
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=20*mm, bottomMargin=20*mm)
-        styles = getSampleStyleSheet()
+        styles = get_stylesheet()
         elements = []
 
         # Title
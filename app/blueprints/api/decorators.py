@@ -8,6 +8,7 @@ import jwt
 from flask import request, jsonify, current_app
 
 from app.models.user import User, AccessLevel, ACCESS_HIERARCHY
+from app.utils.authz import get_authz
 
 
 def create_access_token(user_id, expires_minutes=60):
@@ -121,6 +122,9 @@ def jwt_required(f):
         if not session.get('current_org_id') and user.org_memberships:
             session['current_org_id'] = user.org_memberships[0].org_id
 
+        # Band / tour checks of this request share one context for the API user
+        get_authz(user)
+
         return f(*args, **kwargs)
     return decorated
 
@@ -137,10 +141,10 @@ def requires_api_access(min_level):
             if error:
                 return error
 
+            request.api_user = user
+
             # Check access level hierarchy
-            user_index = ACCESS_HIERARCHY.index(user.access_level)
-            required_index = ACCESS_HIERARCHY.index(min_level)
-            if user_index > required_index:
+            if not get_authz(user).has_level(min_level):
                 return jsonify({
                     'error': {
                         'code': 'forbidden',
@@ -148,7 +152,6 @@ def requires_api_access(min_level):
                     }
                 }), 403
 
-            request.api_user = user
             return f(*args, **kwargs)
         return decorated
     return decorator
@@ -1,8 +1,16 @@
 """
-API helper functions — pagination, error formatting, response builders.
+API helper functions — pagination, sparse fieldsets, error formatting, response builders.
 """
-from flask import request, jsonify
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from functools import lru_cache
+
+from flask import request, jsonify, abort
+from marshmallow import fields as ma_fields
 from markupsafe import escape as _escape
+from sqlalchemy import Date, DateTime, tuple_
 
 
 def sanitize_string(value):
@@ -24,26 +32,147 @@ def sanitize_dict(data, fields):
     return data
 
 
+def _abort_api_error(code, message, status=400):
+    """Abort the request with a standard API error response."""
+    response, status = api_error(code, message, status)
+    response.status_code = status
+    abort(response)
+
+
+def _arg_list(name):
+    """Comma-separated query param as a list (None if the param is absent)."""
+    if name not in request.args:
+        return None
+    return [item.strip() for item in request.args.get(name, '').split(',') if item.strip()]
 
 
-def paginate_query(query, schema, default_per_page=20, max_per_page=100):
-    """Apply offset-based pagination to a SQLAlchemy query.
+@lru_cache(maxsize=256)
+def _compiled_schema(schema_cls, only):
+    """Schema instance restricted to `only` (built once per schema / field set)."""
+    return schema_cls(only=only) if only is not None else schema_cls()
+
+
+def sparse_fieldset(query, schema_cls, loaders=None):
+    """Apply the ?fields= / ?include= query params to a list query and its schema.
 
     Query params:
+        fields (str): Comma-separated fields to return (e.g. fields=id,date,city),
+            nested objects included.
+        include (str): Comma-separated nested objects to return (e.g. include=venue).
+            Without fields=, every plain field is returned plus these objects
+            (include= alone drops every nested object).
+
+    Without either param the full schema is returned, as before.
+
+    Args:
+        query: List query; only the loader options of the returned fields are added.
+        schema_cls: Marshmallow schema class of the items.
+        loaders: Field name -> loader option(s) needed to serialize the field
+            (e.g. {'venue': joinedload(TourStop.venue)}).
+
+    Returns:
+        (query, schema) tuple; the schema instance is shared, do not mutate it.
+    """
+    requested = _arg_list('fields') or None
+    include = _arg_list('include')
+    declared = schema_cls._declared_fields
+    nested = {name for name, field in declared.items() if isinstance(field, ma_fields.Nested)}
+
+    unknown = [name for name in (requested or []) if name not in declared]
+    unknown += [name for name in (include or []) if name not in nested]
+    if unknown:
+        _abort_api_error('invalid_fields', f'Unknown fields: {", ".join(unknown)}')
+
+    if requested is None and include is None:
+        only = None
+        selected = declared.keys()
+    else:
+        plain = {name for name in (requested or declared) if name not in nested}
+        relations = {name for name in (requested or []) if name in nested} | set(include or [])
+        selected = plain | relations
+        only = tuple(name for name in declared if name in selected)
+
+    options = []
+    for name, option in (loaders or {}).items():
+        if name not in selected:
+            continue
+        for opt in option if isinstance(option, (list, tuple)) else [option]:
+            if not any(opt is existing for existing in options):
+                options.append(opt)
+    if options:
+        query = query.options(*options)
+
+    return query, _compiled_schema(schema_cls, only)
+
+
+def _arg_is_false(name):
+    """True if a boolean query param is explicitly disabled (false/0/no)."""
+    return request.args.get(name, '').lower() in ('false', '0', 'no')
+
+
+def encode_cursor(sort_value, row_id):
+    """Encode a (sort_key, id) position as an opaque URL-safe cursor."""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_column):
+    """Decode a cursor built by encode_cursor.
+
+    Returns:
+        (sort_value, row_id) tuple, or None if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(row_id, int):
+            return None
+        if sort_value is not None:
+            if isinstance(sort_column.type, DateTime):
+                sort_value = datetime.fromisoformat(sort_value)
+            elif isinstance(sort_column.type, Date):
+                sort_value = date.fromisoformat(sort_value)
+        return sort_value, row_id
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def paginate_query(query, schema, default_per_page=20, max_per_page=100, cursor_columns=None):
+    """Apply pagination to a SQLAlchemy query.
+
+    Offset mode (default):
         page (int): Page number (1-indexed, default 1)
         per_page (int): Items per page (default 20, max 100)
 
+    Keyset mode (opt-in, only when cursor_columns is given):
+        cursor (str): Opaque cursor from links.next_cursor (empty = first page).
+            Rows are ordered by (sort_key, id) descending and fetched with
+            WHERE (sort_key, id) < (...), so deep pages cost no OFFSET scan.
+
+    Both modes:
+        include_total (bool): Set to false to skip the COUNT(*) query.
+
+    Args:
+        cursor_columns: (sort_column, id_column) enabling keyset mode.
+
     Returns:
         JSON-ready dict with data, meta, and links.
     """
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', default_per_page, type=int)
+    per_page = max(1, min(per_page, max_per_page))
+    include_total = not _arg_is_false('include_total')
+
+    if cursor_columns is not None and 'cursor' in request.args:
+        return _paginate_keyset(query, schema, per_page, include_total, cursor_columns)
+
+    page = request.args.get('page', 1, type=int)
 
     # Clamp values
     page = max(1, page)
-    per_page = max(1, min(per_page, max_per_page))
 
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=include_total)
 
     total_pages = pagination.pages if pagination.pages else 1
 
@@ -52,20 +181,72 @@ def paginate_query(query, schema, default_per_page=20, max_per_page=100):
     links = {
         'self': f'{base_url}?page={page}&per_page={per_page}',
     }
-    if pagination.has_next:
+    if include_total:
+        has_next = pagination.has_next
+    else:
+        # No total: a full page means there may be more
+        has_next = len(pagination.items) == per_page
+    if has_next:
         links['next'] = f'{base_url}?page={page + 1}&per_page={per_page}'
     if pagination.has_prev:
         links['prev'] = f'{base_url}?page={page - 1}&per_page={per_page}'
     links['first'] = f'{base_url}?page=1&per_page={per_page}'
-    links['last'] = f'{base_url}?page={total_pages}&per_page={per_page}'
+    if include_total:
+        links['last'] = f'{base_url}?page={total_pages}&per_page={per_page}'
+
+    meta = {
+        'total': pagination.total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': total_pages if include_total else None,
+    }
 
     return {
         'data': schema.dump(pagination.items, many=True),
+        'meta': meta,
+        'links': links,
+    }
+
+
+def _paginate_keyset(query, schema, per_page, include_total, cursor_columns):
+    """Keyset (cursor) pagination — see paginate_query."""
+    sort_column, id_column = cursor_columns
+    cursor = request.args.get('cursor', '')
+
+    total = None
+    if include_total:
+        total = query.order_by(None).count()
+
+    query = query.order_by(None).order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        position = decode_cursor(cursor, sort_column)
+        if position is None:
+            _abort_api_error('invalid_cursor', 'Invalid pagination cursor.')
+        query = query.filter(tuple_(sort_column, id_column) < position)
+
+    # Fetch one extra row to know whether another page exists
+    items = query.limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    base_url = request.base_url
+    links = {
+        'self': f'{base_url}?cursor={cursor}&per_page={per_page}',
+        'first': f'{base_url}?cursor=&per_page={per_page}',
+    }
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+        links['next'] = f'{base_url}?cursor={next_cursor}&per_page={per_page}'
+        links['next_cursor'] = next_cursor
+    else:
+        links['next_cursor'] = None
+
+    return {
+        'data': schema.dump(items, many=True),
         'meta': {
-            'total': pagination.total,
-            'page': page,
+            'total': total,
             'per_page': per_page,
-            'total_pages': total_pages,
         },
         'links': links,
     }
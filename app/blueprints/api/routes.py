@@ -6,7 +6,7 @@ from datetime import datetime, date, timedelta
 
 from flask import request, jsonify
 from sqlalchemy import desc, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.blueprints.api import api_bp
 from app.blueprints.api.decorators import jwt_required, requires_api_access
@@ -21,7 +21,9 @@ from app.blueprints.api.schemas import (
     DocumentSchema, InvoiceSchema, InvoiceLineSchema, InvoiceMinimalSchema,
     ProfessionSchema, UserProfessionSchema, PlanningSlotSchema,
 )
-from app.blueprints.api.helpers import paginate_query, api_error, api_success, sanitize_string
+from app.blueprints.api.helpers import (
+    paginate_query, sparse_fieldset, api_error, api_success, sanitize_string,
+)
 from app.extensions import db, limiter
 from app.utils.org_context import get_current_org_id
 from app.models.user import AccessLevel
@@ -44,6 +46,12 @@ from app.models.document import Document, DocumentType, DocumentShare, ShareType
 from app.models.invoices import Invoice, InvoiceStatus, InvoiceType, InvoiceLine, InvoicePayment
 from app.models.planning_slot import PlanningSlot, PLANNING_ROLES, CATEGORY_COLORS, CATEGORY_LABELS
 from app.models.ticket_tier import TicketTier
+from app.services.financial_snapshots import FinancialSnapshotService
+from app.services.search_index import SearchIndexService
+from app.services.route_optimization import RouteOptimizationService
+from app.services.guestlist_sync import GuestlistSyncService, MAX_BATCH_SIZE as MAX_CHECKIN_BATCH_SIZE
+from app.utils.authz import get_authz
+from app.utils.perf import query_budget
 
 
 # ── Version check (deploy verification) ─────────────────────
@@ -164,10 +172,11 @@ def api_list_tours():
     Query params:
         status (str): Filter by tour status (draft, planning, confirmed, active, completed, cancelled)
         band_id (int): Filter by band
+        fields, include: Sparse fieldset (see sparse_fieldset)
         page, per_page: Pagination
     """
     user = request.api_user
-    query = Tour.query.options(joinedload(Tour.band))
+    query = Tour.query
 
     # Org-scoped: only tours from bands in user's org
     org_id = get_current_org_id()
@@ -199,7 +208,14 @@ def api_list_tours():
     # Sort by start_date descending (most recent first)
     query = query.order_by(desc(Tour.start_date))
 
-    return jsonify(paginate_query(query, TourSchema())), 200
+    stop_counts = Tour.with_stop_counts()
+    query, schema = sparse_fieldset(query, TourSchema, {
+        'band': joinedload(Tour.band),
+        'stops_count': stop_counts,
+        'upcoming_stops_count': stop_counts,
+        'past_stops_count': stop_counts,
+    })
+    return jsonify(paginate_query(query, schema)), 200
 
 
 @api_bp.route('/tours/<int:tour_id>', methods=['GET'])
@@ -342,6 +358,34 @@ def api_delete_tour(tour_id):
     return api_success({'deleted': True})
 
 
+@api_bp.route('/tours/<int:tour_id>/route-optimization', methods=['GET'])
+@jwt_required
+def api_tour_route_optimization(tour_id):
+    """Suggest a stop ordering minimizing total km and drive time.
+
+    Confirmed dates stay in place; draft/pending stops may swap dates.
+
+    Query params:
+        window_days (int): max date shift for open dates (default: anywhere in the tour)
+
+    Cached per tour version: any change to the tour or its stops recomputes it.
+    """
+    tour = Tour.query.options(joinedload(Tour.band)).get(tour_id)
+    if not tour or not tour.can_view(request.api_user):
+        return api_error('not_found', 'Tour not found.', 404)
+
+    window_days = request.args.get('window_days')
+    if window_days is not None:
+        try:
+            window_days = int(window_days)
+        except ValueError:
+            return api_error('invalid_filter', 'window_days must be an integer.', 422)
+        if window_days < 0:
+            return api_error('invalid_filter', 'window_days must be positive.', 422)
+
+    return api_success(RouteOptimizationService.optimize_tour(tour, window_days=window_days))
+
+
 @api_bp.route('/tours/<int:tour_id>/status', methods=['POST'])
 @jwt_required
 def api_transition_tour_status(tour_id):
@@ -376,6 +420,15 @@ def api_transition_tour_status(tour_id):
 
 # ── Tour Stops ──────────────────────────────────────────────
 
+def _stop_list_loaders():
+    """Eager loads of the nested objects of TourStopSchema (see sparse_fieldset)."""
+    return {
+        'venue': joinedload(TourStop.venue),
+        'band': joinedload(TourStop.band),
+        'tour': joinedload(TourStop.tour),
+    }
+
+
 @api_bp.route('/tours/<int:tour_id>/stops', methods=['GET'])
 @jwt_required
 def api_list_tour_stops(tour_id):
@@ -383,17 +436,14 @@ def api_list_tour_stops(tour_id):
 
     Query params:
         status (str): Filter by stop status
+        fields, include: Sparse fieldset (e.g. fields=id,date,city for calendars)
         page, per_page: Pagination
     """
     tour = Tour.query.get(tour_id)
     if not tour or not tour.can_view(request.api_user):
         return api_error('not_found', 'Tour not found.', 404)
 
-    query = TourStop.query.options(
-        joinedload(TourStop.venue),
-        joinedload(TourStop.band),
-        joinedload(TourStop.tour),
-    ).filter(TourStop.tour_id == tour_id)
+    query = TourStop.query.filter(TourStop.tour_id == tour_id)
 
     status = request.args.get('status')
     if status:
@@ -405,7 +455,8 @@ def api_list_tour_stops(tour_id):
 
     query = query.order_by(TourStop.date)
 
-    return jsonify(paginate_query(query, TourStopSchema())), 200
+    query, schema = sparse_fieldset(query, TourStopSchema, _stop_list_loaders())
+    return jsonify(paginate_query(query, schema)), 200
 
 
 @api_bp.route('/stops/<int:stop_id>', methods=['GET'])
@@ -737,6 +788,7 @@ def api_list_guestlist(stop_id):
     Query params:
         status (str): Filter by entry status (pending, approved, denied, checked_in, no_show)
         q (str): Search by guest name
+        fields, include: Sparse fieldset (see sparse_fieldset)
         page, per_page: Pagination
     """
     stop = TourStop.query.options(joinedload(TourStop.tour)).get(stop_id)
@@ -760,7 +812,10 @@ def api_list_guestlist(stop_id):
 
     query = query.order_by(desc(GuestlistEntry.created_at))
 
-    return jsonify(paginate_query(query, GuestlistEntrySchema())), 200
+    query, schema = sparse_fieldset(query, GuestlistEntrySchema, {
+        'requested_by': joinedload(GuestlistEntry.requested_by),
+    })
+    return jsonify(paginate_query(query, schema)), 200
 
 
 @api_bp.route('/guestlist/<int:entry_id>/checkin', methods=['POST'])
@@ -791,6 +846,75 @@ def api_checkin_guest(entry_id):
     return api_success(GuestlistEntrySchema().dump(entry))
 
 
+@api_bp.route('/stops/<int:stop_id>/guestlist/snapshot', methods=['GET'])
+@jwt_required
+def api_guestlist_snapshot(stop_id):
+    """Offline sync: guestlist entries changed since a version.
+
+    Query params:
+        since (int): guestlist version of the client's last sync
+            (omitted or 0 = full snapshot)
+
+    Returns:
+        version: current guestlist version of the stop (pass it as ?since next time)
+        full: true when every entry is returned (client should replace its copy)
+        entries: entries created or modified since `since`
+        deleted: IDs of entries deleted since `since`
+    """
+    stop = TourStop.query.options(joinedload(TourStop.tour)).get(stop_id)
+    if not stop or not stop.can_view(request.api_user):
+        return api_error('not_found', 'Tour stop not found.', 404)
+
+    since = request.args.get('since', 0)
+    try:
+        since = int(since)
+    except (TypeError, ValueError):
+        return api_error('invalid_filter', 'since must be an integer version.', 422)
+
+    snapshot = GuestlistSyncService.snapshot(stop, since)
+    snapshot['entries'] = GuestlistEntrySchema(many=True).dump(snapshot['entries'])
+    return api_success(snapshot)
+
+
+@api_bp.route('/stops/<int:stop_id>/guestlist/checkins', methods=['POST'])
+@jwt_required
+def api_guestlist_batch_checkin(stop_id):
+    """Offline sync: apply check-ins queued by a scanner app.
+
+    Body:
+        checkins (list): items {entry_id, client_id, plus_ones, scanned_at}
+            client_id: idempotency key of the scan (replays return "duplicate")
+            scanned_at: ISO 8601 time of the offline scan (defaults to now)
+
+    Each item gets its own result: checked_in, duplicate, conflict
+    (already checked in by another scanner, not approved...), not_found or
+    invalid. The response also carries the new guestlist version.
+    """
+    stop = TourStop.query.options(joinedload(TourStop.tour)).get(stop_id)
+    if not stop or not stop.can_view(request.api_user):
+        return api_error('not_found', 'Tour stop not found.', 404)
+    if not stop.can_check_in_guests(request.api_user):
+        return api_error('forbidden', 'No permission to check in guests.', 403)
+
+    data = request.get_json(silent=True) or {}
+    items = data.get('checkins')
+    if not isinstance(items, list) or not items:
+        return api_error('validation_error', 'checkins must be a non-empty list.', 422)
+    if len(items) > MAX_CHECKIN_BATCH_SIZE:
+        return api_error(
+            'validation_error',
+            f'Too many check-ins in one request (max {MAX_CHECKIN_BATCH_SIZE}).',
+            422,
+        )
+
+    outcome = GuestlistSyncService.apply_checkins(stop, items)
+    schema = GuestlistEntrySchema()
+    for result in outcome['results']:
+        if 'entry' in result:
+            result['entry'] = schema.dump(result['entry'])
+    return api_success(outcome)
+
+
 @api_bp.route('/stops/<int:stop_id>/guestlist', methods=['POST'])
 @jwt_required
 def api_create_guestlist_entry(stop_id):
@@ -983,6 +1107,7 @@ def api_my_schedule():
     Query params:
         from_date (str): Start date filter (YYYY-MM-DD, default: today)
         to_date (str): End date filter (YYYY-MM-DD)
+        fields, include: Sparse fieldset (e.g. fields=id,date,city for calendars)
         page, per_page: Pagination
     """
     user = request.api_user
@@ -991,10 +1116,6 @@ def api_my_schedule():
         TourStopMember, TourStopMember.tour_stop_id == TourStop.id
     ).filter(
         TourStopMember.user_id == user.id,
-    ).options(
-        joinedload(TourStop.venue),
-        joinedload(TourStop.band),
-        joinedload(TourStop.tour),
     )
 
     # Date filters
@@ -1019,7 +1140,8 @@ def api_my_schedule():
 
     query = query.order_by(TourStop.date)
 
-    return jsonify(paginate_query(query, TourStopSchema())), 200
+    query, schema = sparse_fieldset(query, TourStopSchema, _stop_list_loaders())
+    return jsonify(paginate_query(query, schema)), 200
 
 
 # ── My Payments ─────────────────────────────────────────────
@@ -1031,7 +1153,9 @@ def api_my_payments():
 
     Query params:
         status (str): Filter by payment status
-        page, per_page: Pagination
+        fields, include: Sparse fieldset (see sparse_fieldset)
+        page, per_page: Pagination (or cursor= for keyset pagination)
+        include_total (bool): include_total=false skips the total count
     """
     user = request.api_user
 
@@ -1047,7 +1171,14 @@ def api_my_payments():
         except (ValueError, AttributeError):
             return api_error('invalid_filter', f'Invalid status: {status}', 422)
 
-    return jsonify(paginate_query(query, PaymentSchema())), 200
+    query, schema = sparse_fieldset(query, PaymentSchema, {
+        'user': joinedload(TeamMemberPayment.user),
+        'tour_stop': joinedload(TeamMemberPayment.tour_stop),
+    })
+    return jsonify(paginate_query(
+        query, schema,
+        cursor_columns=(TeamMemberPayment.created_at, TeamMemberPayment.id),
+    )), 200
 
 
 # ── Notifications ───────────────────────────────────────────
@@ -1059,7 +1190,9 @@ def api_list_notifications():
 
     Query params:
         unread (bool): Filter unread only (unread=true)
-        page, per_page: Pagination
+        fields: Sparse fieldset (see sparse_fieldset)
+        page, per_page: Pagination (or cursor= for keyset pagination)
+        include_total (bool): include_total=false skips the total count
     """
     user = request.api_user
 
@@ -1071,7 +1204,11 @@ def api_list_notifications():
     if unread == 'true':
         query = query.filter(Notification.is_read == False)
 
-    return jsonify(paginate_query(query, NotificationSchema())), 200
+    query, schema = sparse_fieldset(query, NotificationSchema)
+    return jsonify(paginate_query(
+        query, schema,
+        cursor_columns=(Notification.created_at, Notification.id),
+    )), 200
 
 
 @api_bp.route('/notifications/<int:notif_id>/read', methods=['POST'])
@@ -1114,10 +1251,11 @@ def api_list_bands():
 
     Query params:
         q (str): Search by band name
+        fields, include: Sparse fieldset (see sparse_fieldset)
         page, per_page: Pagination
     """
     user = request.api_user
-    query = Band.query.options(joinedload(Band.manager))
+    query = Band.query
 
     # Org-scoped: only bands in user's org
     org_id = get_current_org_id()
@@ -1138,7 +1276,11 @@ def api_list_bands():
 
     query = query.order_by(Band.name)
 
-    return jsonify(paginate_query(query, BandSchema())), 200
+    query, schema = sparse_fieldset(query, BandSchema, {
+        'manager': joinedload(Band.manager),
+        'tours_count': Band.with_tour_counts(),
+    })
+    return jsonify(paginate_query(query, schema)), 200
 
 
 @api_bp.route('/bands', methods=['POST'])
@@ -1189,6 +1331,7 @@ def api_list_venues():
         q (str): Search by venue name or city
         city (str): Filter by city
         country (str): Filter by country
+        fields: Sparse fieldset (see sparse_fieldset)
         page, per_page: Pagination
     """
     # Org-scoped venue list (get_current_org_id may return None for API/JWT auth — Phase 2)
@@ -1214,7 +1357,8 @@ def api_list_venues():
 
     query = query.order_by(Venue.name)
 
-    return jsonify(paginate_query(query, VenueSchema())), 200
+    query, schema = sparse_fieldset(query, VenueSchema)
+    return jsonify(paginate_query(query, schema)), 200
 
 
 @api_bp.route('/bands/<int:band_id>', methods=['GET'])
@@ -2699,6 +2843,8 @@ def api_list_documents():
     """List documents accessible to the current user.
 
     Filters: type, owner_type (user/band/tour), expiring (true = expiring_soon + expired)
+    Fields: fields= / include= sparse fieldset (see sparse_fieldset)
+    Pagination: page/per_page, or cursor= for keyset pagination (include_total=false skips the count)
     """
     user = request.api_user
     org_id = get_current_org_id()
@@ -2743,7 +2889,13 @@ def api_list_documents():
         )
 
     query = query.order_by(desc(Document.created_at))
-    return paginate_query(query, DocumentSchema())
+    query, schema = sparse_fieldset(query, DocumentSchema, {
+        'uploaded_by': joinedload(Document.uploaded_by),
+    })
+    return paginate_query(
+        query, schema,
+        cursor_columns=(Document.created_at, Document.id),
+    )
 
 
 @api_bp.route('/documents', methods=['POST'])
@@ -2995,6 +3147,7 @@ def api_list_invoices():
     """List invoices.
 
     Filters: status, tour_id, from_date, to_date
+    Fields: fields= / include= sparse fieldset (see sparse_fieldset)
     """
     user = request.api_user
     query = Invoice.query.filter(
@@ -3030,7 +3183,11 @@ def api_list_invoices():
             pass
 
     query = query.order_by(desc(Invoice.created_at))
-    return paginate_query(query, InvoiceSchema())
+    query, schema = sparse_fieldset(query, InvoiceSchema, {
+        'tour': joinedload(Invoice.tour),
+        'lines': selectinload(Invoice.lines),
+    })
+    return paginate_query(query, schema)
 
 
 @api_bp.route('/invoices', methods=['POST'])
@@ -3441,7 +3598,11 @@ def api_tour_map_data(tour_id):
 @api_bp.route('/payments', methods=['GET'])
 @jwt_required
 def api_list_payments():
-    """List payments with optional filters (status, tour_id, user_id)."""
+    """List payments with optional filters (status, tour_id, user_id).
+
+    Fields: fields= / include= sparse fieldset (see sparse_fieldset)
+    Pagination: page/per_page, or cursor= for keyset pagination (include_total=false skips the count)
+    """
     from app.models.payments import PaymentStatus as PS
     query = TeamMemberPayment.query.filter(
         TeamMemberPayment.user_id == request.api_user.id
@@ -3458,12 +3619,16 @@ def api_list_payments():
     if tour_id:
         query = query.filter(TeamMemberPayment.tour_id == tour_id)
 
-    query = query.options(
-        joinedload(TeamMemberPayment.user),
-        joinedload(TeamMemberPayment.tour_stop),
-    ).order_by(desc(TeamMemberPayment.created_at))
+    query = query.order_by(desc(TeamMemberPayment.created_at))
 
-    return api_success(paginate_query(query, PaymentSchema()))
+    query, schema = sparse_fieldset(query, PaymentSchema, {
+        'user': joinedload(TeamMemberPayment.user),
+        'tour_stop': joinedload(TeamMemberPayment.tour_stop),
+    })
+    return api_success(paginate_query(
+        query, schema,
+        cursor_columns=(TeamMemberPayment.created_at, TeamMemberPayment.id),
+    ))
 
 
 @api_bp.route('/payments/<int:payment_id>', methods=['GET'])
@@ -3708,23 +3873,23 @@ def api_reports_summary():
         return api_error('forbidden', 'Manager access required.', 403)
 
     user = request.api_user
-    user_bands = user.bands + user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = list(get_authz(user).band_ids)
 
-    tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).all()
-    stops = TourStop.query.join(Tour).filter(Tour.band_id.in_(user_band_ids)).all()
+    total_tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).count()
+    totals = FinancialSnapshotService.summary_totals(user_band_ids)
 
-    total_revenue = sum(float(s.guarantee or 0) for s in stops)
-    total_guestlist = sum(len(s.guestlist_entries) for s in stops)
-    total_checked_in = sum(
-        1 for s in stops for e in s.guestlist_entries
-        if e.status == GuestlistStatus.CHECKED_IN
-    )
+    guestlist_base = db.session.query(GuestlistEntry).join(
+        TourStop, GuestlistEntry.tour_stop_id == TourStop.id
+    ).join(Tour, TourStop.tour_id == Tour.id).filter(Tour.band_id.in_(user_band_ids))
+    total_guestlist = guestlist_base.count()
+    total_checked_in = guestlist_base.filter(
+        GuestlistEntry.status == GuestlistStatus.CHECKED_IN
+    ).count()
 
     return api_success({
-        'total_tours': len(tours),
-        'total_stops': len(stops),
-        'total_revenue': total_revenue,
+        'total_tours': total_tours,
+        'total_stops': totals['total_stops'],
+        'total_revenue': totals['total_guarantee'],
         'total_guestlist': total_guestlist,
         'total_checked_in': total_checked_in,
         'fill_rate': round(total_checked_in / total_guestlist * 100, 1) if total_guestlist > 0 else 0,
@@ -3790,8 +3955,7 @@ def api_report_guestlist():
         return api_error('forbidden', 'Manager access required.', 403)
 
     user = request.api_user
-    user_bands = user.bands + user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz(user).band_ids
 
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).all()
     tour_stats = []
@@ -5029,47 +5193,42 @@ def api_my_assignments(stop_id):
 
 @api_bp.route('/search', methods=['GET'])
 @jwt_required
+@query_budget(10)
 def api_search():
-    """Global search across tours, venues, bands, guestlist entries."""
+    """Global search across tours, venues, bands, guestlist entries.
+
+    Query params:
+        q (str): Search text (min 2 chars, accent/case-insensitive, typo-tolerant)
+    """
     query = request.args.get('q', '').strip()
     if not query or len(query) < 2:
         return api_error('invalid_query', 'Query must be at least 2 characters.', 400)
 
     user = request.api_user
-    user_bands = user.bands + user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = list(get_authz(user).band_ids)
 
-    # Search tours
-    tours = Tour.query.filter(
-        Tour.band_id.in_(user_band_ids),
-        Tour.name.ilike(f'%{query}%')
-    ).limit(10).all()
+    # Single accent-insensitive query over the search index, best 10 of each type
+    matches = SearchIndexService.search(query, user_band_ids, org_id=get_current_org_id(), per_type=10)
 
-    # Search venues (scoped to current org)
-    org_id = get_current_org_id()
-    venue_query = Venue.query.filter_by(org_id=org_id) if org_id else Venue.query
-    venues = venue_query.filter(
-        Venue.name.ilike(f'%{query}%') |
-        Venue.city.ilike(f'%{query}%')
-    ).limit(10).all()
-
-    # Search bands
-    bands = Band.query.filter(
-        Band.id.in_(user_band_ids),
-        Band.name.ilike(f'%{query}%')
-    ).limit(10).all()
-
-    # Search guestlist entries
-    guests = GuestlistEntry.query.join(TourStop).join(Tour).filter(
-        Tour.band_id.in_(user_band_ids),
-        GuestlistEntry.guest_name.ilike(f'%{query}%')
-    ).limit(10).all()
+    grouped = {'tour': [], 'venue': [], 'band': [], 'guest': []}
+    for doc, _score in matches:
+        grouped[doc.entity_type].append(doc)
 
     return api_success({
-        'tours': [{'id': t.id, 'name': t.name, 'status': t.status.value if t.status else None} for t in tours],
-        'venues': [{'id': v.id, 'name': v.name, 'city': v.city} for v in venues],
-        'bands': [{'id': b.id, 'name': b.name} for b in bands],
-        'guests': [{'id': g.id, 'guest_name': g.guest_name, 'status': g.status.value if g.status else None} for g in guests],
+        'tours': [{'id': d.entity_id, 'name': d.title, 'status': d.subtitle} for d in grouped['tour']],
+        'venues': [{'id': d.entity_id, 'name': d.title, 'city': d.subtitle} for d in grouped['venue']],
+        'bands': [{'id': d.entity_id, 'name': d.title} for d in grouped['band']],
+        'guests': [{'id': d.entity_id, 'guest_name': d.title, 'status': d.subtitle} for d in grouped['guest']],
+        'results': [
+            {
+                'type': doc.entity_type,
+                'id': doc.entity_id,
+                'title': doc.title,
+                'subtitle': doc.subtitle,
+                'score': round(score, 3),
+            }
+            for doc, score in matches
+        ],
     })
 
 
@@ -5085,8 +5244,7 @@ def api_settlements_list():
         return api_error('forbidden', 'Manager access required.', 403)
 
     user = request.api_user
-    user_bands = user.bands + user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz(user).band_ids
 
     from sqlalchemy.orm import selectinload
     from app.utils.reports import calculate_settlement
@@ -5147,8 +5305,7 @@ def api_settlement_detail(stop_id):
 
     # Check access
     user = request.api_user
-    user_bands = user.bands + user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz(user).band_ids
 
     if stop.tour and stop.tour.band_id not in user_band_ids:
         return api_error('forbidden', 'Access denied.', 403)
@@ -4,6 +4,9 @@ Converts SQLAlchemy models to JSON-safe dictionaries.
 """
 from marshmallow import Schema, fields, post_dump
 
+from app.models.band import Band
+from app.models.tour import Tour
+
 
 # ── Shared helpers ──────────────────────────────────────────
 
@@ -117,8 +120,15 @@ class BandSchema(BaseSchema):
     tours_count = fields.Method('get_tours_count')
     created_at = fields.DateTime(format='iso')
 
+    def dump(self, obj, *, many=None):
+        # Counts missing from the query (see Band.with_tour_counts): one grouped query
+        many = self.many if many is None else bool(many)
+        if 'tours_count' in self.fields:
+            Band.load_tour_counts(obj if many else [obj])
+        return super().dump(obj, many=many)
+
     def get_tours_count(self, obj):
-        return len(obj.tours) if hasattr(obj, 'tours') and obj.tours else 0
+        return obj.tours_count or 0
 
 
 class BandMembershipSchema(BaseSchema):
@@ -215,6 +225,9 @@ class VenueMinimalSchema(BaseSchema):
 
 # ── Tour ────────────────────────────────────────────────────
 
+STOP_COUNT_FIELDS = {'stops_count', 'upcoming_stops_count', 'past_stops_count'}
+
+
 class TourSchema(BaseSchema):
     """Tour representation."""
     id = fields.Int(dump_only=True)
@@ -235,14 +248,21 @@ class TourSchema(BaseSchema):
     def get_status(self, obj):
         return obj.status.value if obj.status else None
 
+    def dump(self, obj, *, many=None):
+        # Counts missing from the query (see Tour.with_stop_counts): one grouped query
+        many = self.many if many is None else bool(many)
+        if self.fields.keys() & STOP_COUNT_FIELDS:
+            Tour.load_stop_counts(obj if many else [obj])
+        return super().dump(obj, many=many)
+
     def get_stops_count(self, obj):
-        return len(obj.stops) if hasattr(obj, 'stops') and obj.stops else 0
+        return obj.stops_count or 0
 
     def get_upcoming_stops_count(self, obj):
-        return len(obj.upcoming_stops) if hasattr(obj, 'stops') and obj.stops else 0
+        return obj.upcoming_stops_count or 0
 
     def get_past_stops_count(self, obj):
-        return len(obj.past_stops) if hasattr(obj, 'stops') and obj.stops else 0
+        return obj.past_stops_count or 0
 
 
 class TourMinimalSchema(BaseSchema):
@@ -347,6 +367,8 @@ class GuestlistEntrySchema(BaseSchema):
     requested_by = fields.Nested(UserMinimalSchema, dump_only=True)
     notes = fields.Str()
     checked_in_at = fields.DateTime(format='iso')
+    checked_in_plus_ones = fields.Int(dump_only=True)
+    sync_version = fields.Int(dump_only=True)
     created_at = fields.DateTime(format='iso')
 
     def get_entry_type(self, obj):
@@ -4,7 +4,7 @@ from functools import wraps
 
 from flask import (
     render_template, redirect, url_for, flash, request,
-    abort, jsonify, Response
+    abort, jsonify
 )
 from flask_login import login_required, current_user
 
@@ -572,22 +572,21 @@ def delete_contact(id):
 @login_required
 @crew_view_required
 def export_ical(stop_id):
-    """Export crew schedule as iCal."""
+    """Export crew schedule as iCal (ETag: 304 when the schedule did not change)."""
     from app.utils.ical import generate_crew_schedule_ical
+    from app.utils.ical_feed import crew_feed_state, feed_etag, ical_response, not_modified
 
     tour_stop = TourStop.query.get_or_404(stop_id)
 
     # If staff, export only their slots
-    if not _can_edit_crew_schedule(tour_stop, current_user):
-        ical_data = generate_crew_schedule_ical(tour_stop, user=current_user)
-    else:
-        ical_data = generate_crew_schedule_ical(tour_stop)
-
-    return Response(
-        ical_data,
-        mimetype='text/calendar',
-        headers={'Content-Disposition': f'attachment; filename=planning-{stop_id}.ics'}
-    )
+    only_user = None if _can_edit_crew_schedule(tour_stop, current_user) else current_user
+    etag = feed_etag('crew', crew_feed_state(stop_id), only_user.id if only_user else None)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    ical_data = generate_crew_schedule_ical(tour_stop, user=only_user)
+    return ical_response(ical_data, etag, filename=f'planning-{stop_id}.ics')
 
 
 # =============================================================================
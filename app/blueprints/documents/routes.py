@@ -21,6 +21,8 @@ from app.models.user import User
 from app.models.band import Band
 from app.models.tour import Tour
 from app.decorators.auth import requires_manager
+from app.utils.authz import get_authz
+from app.utils.perf import query_budget
 from app.blueprints.documents import documents_bp
 from app.blueprints.documents.forms import (
     DocumentUploadForm, DocumentEditForm, DocumentFilterForm
@@ -54,20 +56,15 @@ def can_access_document(document, user):
     if document.uploaded_by_id == user.id:
         return True
 
-    # Get user's bands
-    user_bands = user.bands + user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    authz = get_authz(user)
 
     # Band documents
-    if document.band_id and document.band_id in user_band_ids:
+    if document.band_id and authz.can_access_band(document.band_id):
         return True
 
     # Tour documents (check if tour belongs to user's band)
-    if document.tour_id:
-        for band in user_bands:
-            tour_ids = [t.id for t in band.tours]
-            if document.tour_id in tour_ids:
-                return True
+    if document.tour_id and authz.can_access_tour(document.tour_id):
+        return True
 
     # Documents partagés avec l'utilisateur
     if DocumentShare.is_shared_with(document.id, user.id):
@@ -85,23 +82,20 @@ def can_manage_document(document, user):
         return True
 
     # Manager du groupe
-    user_bands = user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-    if document.band_id and document.band_id in user_band_ids:
+    authz = get_authz(user)
+    if document.band_id and authz.manages_band(document.band_id):
         return True
 
     # Manager d'une tournée
-    if document.tour_id:
-        for band in user_bands:
-            tour_ids = [t.id for t in band.tours]
-            if document.tour_id in tour_ids:
-                return True
+    if document.tour_id and document.tour and authz.manages_band(document.tour.band_id):
+        return True
 
     return False
 
 
 @documents_bp.route('/')
 @login_required
+@query_budget(10)
 def index():
     """List all documents with filtering."""
     form = DocumentFilterForm(request.args, meta={'csrf': False})
@@ -113,19 +107,13 @@ def index():
     ]
 
     # Get user's bands for filtering (security: only show documents from user's bands)
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-
-    # Get tour IDs from user's bands
-    user_tour_ids = []
-    for band in user_bands:
-        user_tour_ids.extend([t.id for t in band.tours])
+    authz = get_authz()
 
     # Base query - filter by user's access
     query = Document.query.filter(
         db.or_(
-            Document.band_id.in_(user_band_ids),           # Band documents
-            Document.tour_id.in_(user_tour_ids),           # Tour documents
+            Document.band_id.in_(authz.band_ids),          # Band documents
+            Document.tour_id.in_(authz.tour_ids),          # Tour documents
             Document.user_id == current_user.id,           # User's own documents
             Document.uploaded_by_id == current_user.id     # Documents user uploaded
         )
@@ -440,9 +428,7 @@ def by_band(band_id):
     band = Band.query.filter_by(id=band_id, **org_filter_kwargs()).first_or_404()
 
     # Security: verify user is member of this band
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-    if band_id not in user_band_ids:
+    if not get_authz().can_access_band(band_id):
         abort(403)
 
     documents = Document.query.filter_by(band_id=band_id).order_by(Document.created_at.desc()).all()
@@ -463,9 +449,7 @@ def by_tour(tour_id):
     tour = Tour.query.get_or_404(tour_id)
 
     # Security: verify user has access to this tour's band
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-    if tour.band_id not in user_band_ids:
+    if not get_authz().can_access_band(tour.band_id):
         abort(403)
 
     documents = Document.query.filter_by(tour_id=tour_id).order_by(Document.created_at.desc()).all()
@@ -485,15 +469,7 @@ def expiring():
     """List documents expiring within 90 days."""
     from datetime import timedelta
 
-    # Get user's bands for filtering
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-
-    # Get tour IDs from user's bands
-    user_tour_ids = []
-    for band in user_bands:
-        user_tour_ids.extend([t.id for t in band.tours])
-
+    authz = get_authz()
     soon = datetime.now().date() + timedelta(days=90)
 
     # Security: only show expiring documents user has access to
@@ -501,8 +477,8 @@ def expiring():
         Document.expiry_date.isnot(None),
         Document.expiry_date <= soon,
         db.or_(
-            Document.band_id.in_(user_band_ids),
-            Document.tour_id.in_(user_tour_ids),
+            Document.band_id.in_(authz.band_ids),
+            Document.tour_id.in_(authz.tour_ids),
             Document.user_id == current_user.id,
             Document.uploaded_by_id == current_user.id
         )
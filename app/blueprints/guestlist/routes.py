@@ -1,9 +1,7 @@
 """
 Guestlist management routes.
 """
-import csv
-from io import StringIO
-from flask import render_template, redirect, url_for, flash, request, jsonify, Response, current_app
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 
 from sqlalchemy.orm import joinedload, selectinload
@@ -23,14 +21,15 @@ from app.decorators import (
 )
 from app.utils.audit import log_create, log_update, log_delete
 from app.utils.email import send_guestlist_notification
+from app.utils.authz import get_authz
+from app.utils.exports import export_format, export_response, stream_batches
 
 
 @guestlist_bp.route('/')
 @login_required
 def index():
     """Guestlist overview - select a tour stop to manage."""
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Get all tours for user's bands
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).order_by(Tour.start_date.desc()).all()
@@ -46,8 +45,7 @@ def check_in_select():
         flash('Vous n\'avez pas la permission d\'effectuer des check-ins.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Get all tours for user's bands
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).order_by(Tour.start_date.desc()).all()
@@ -63,8 +61,7 @@ def manage(stop_id):
     tour = stop.tour
 
     # Check access to tour
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -176,8 +173,7 @@ def add_entry(stop_id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -274,8 +270,7 @@ def entry_detail(id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -297,8 +292,7 @@ def edit_entry(id):
         return redirect(url_for('guestlist.entry_detail', id=id))
 
     # Check access and permission
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -379,8 +373,7 @@ def approve_entry(id):
     tour = stop.tour
 
     # Check access and permission
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -413,8 +406,7 @@ def deny_entry(id):
     tour = stop.tour
 
     # Check access and permission
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -452,8 +444,7 @@ def delete_entry(id):
         return redirect(url_for('guestlist.entry_detail', id=id))
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -525,22 +516,12 @@ def do_check_in(id):
 
     log_update('GuestlistEntry', entry.id, {'status': 'checked_in', 'plus_ones_arrived': plus_ones})
 
-    # Send check-in confirmation email (non-blocking)
+    # Send check-in confirmation email (rendered here, sent by the notification dispatcher)
     if entry.guest_email:
-        import threading
-        app = current_app._get_current_object()
-        entry_id = entry.id
-
-        def send_email_async():
-            with app.app_context():
-                try:
-                    e = GuestlistEntry.query.get(entry_id)
-                    if e:
-                        send_guestlist_notification(e, 'checked_in')
-                except Exception as ex:
-                    app.logger.error(f'Email check-in guestlist échoué: {ex}')
-
-        threading.Thread(target=send_email_async, daemon=True).start()
+        try:
+            send_guestlist_notification(entry, 'checked_in', deferred=True)
+        except Exception as ex:
+            current_app.logger.error(f'Email check-in guestlist échoué: {ex}')
 
     # Return JSON for AJAX requests
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -660,8 +641,7 @@ def export_csv(stop_id):
     tour = stop.tour
 
     # Check access and permission
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -685,45 +665,31 @@ def export_csv(stop_id):
         except ValueError:
             pass
 
-    entries = query.options(
+    query = query.options(
         joinedload(GuestlistEntry.requested_by)
-    ).order_by(GuestlistEntry.guest_name).all()
-
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
-        'Nom', 'Email', 'Téléphone', 'Type', '+1', 'Affiliation',
-        'Statut', 'Demandé par', 'Notes'
-    ])
-
-    # Data
-    for entry in entries:
-        writer.writerow([
-            entry.guest_name,
-            entry.guest_email or '',
-            entry.guest_phone or '',
-            entry.entry_type.value,
-            entry.plus_ones or 0,
-            entry.company or '',
-            entry.status.value,
-            entry.requested_by.full_name if entry.requested_by else '',
-            entry.notes or ''
-        ])
-
-    output.seek(0)
-
-    # Filename
-    filename = f"guestlist_{tour.name}_{stop.date}_{status_filter}.csv"
-    filename = filename.replace(' ', '_').replace('/', '-')
-
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-    )
+    ).order_by(GuestlistEntry.guest_name, GuestlistEntry.id)
+
+    def rows():
+        yield [
+            'Nom', 'Email', 'Téléphone', 'Type', '+1', 'Affiliation',
+            'Statut', 'Demandé par', 'Notes'
+        ]
+        for batch in stream_batches(query):
+            for entry in batch:
+                yield [
+                    entry.guest_name,
+                    entry.guest_email or '',
+                    entry.guest_phone or '',
+                    entry.entry_type.value,
+                    entry.plus_ones or 0,
+                    entry.company or '',
+                    entry.status.value,
+                    entry.requested_by.full_name if entry.requested_by else '',
+                    entry.notes or ''
+                ]
+
+    filename = f"guestlist_{tour.name}_{stop.date}_{status_filter}"
+    return export_response(rows(), filename, export_format(), sheet_name='Guestlist')
 
 
 # API Endpoints for AJAX
@@ -196,87 +196,17 @@ def google_callback():
 @integrations_bp.route('/google/sync', methods=['POST'])
 @login_required
 def google_sync():
-    """Sync tour events with Google Calendar."""
+    """Queue an incremental sync of tour events with Google Calendar."""
     from flask import jsonify
+    from app.services.calendar_sync import CalendarSyncService
 
     token = OAuthToken.get_for_user(current_user.id, OAuthProvider.GOOGLE.value)
     if not token:
         return jsonify({'success': False, 'error': 'Not connected to Google Calendar'}), 400
 
-    try:
-        from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
-
-        creds = get_google_credentials()
-
-        # Build credentials object
-        credentials = Credentials(
-            token=token.access_token,
-            refresh_token=token.refresh_token,
-            token_uri='https://oauth2.googleapis.com/token',
-            client_id=creds['client_id'],
-            client_secret=creds['client_secret'],
-            scopes=token.scopes
-        )
-
-        # Refresh if expired
-        if token.is_expired and token.refresh_token:
-            from google.auth.transport.requests import Request
-            credentials.refresh(Request())
-
-            # Update stored tokens
-            token.update_tokens(
-                access_token=credentials.token,
-                refresh_token=credentials.refresh_token,
-                expires_at=credentials.expiry
-            )
-            db.session.commit()
-
-        # Build calendar service
-        service = build('calendar', 'v3', credentials=credentials)
-
-        # Get user's tour stops to sync
-        from app.models.band import Band
-        user_bands = current_user.bands + current_user.managed_bands
-        band_ids = [b.id for b in user_bands]
-
-        # Get upcoming tour stops
-        stops = TourStop.query.filter(
-            TourStop.band_id.in_(band_ids),
-            TourStop.date >= datetime.utcnow().date()
-        ).all()
-
-        synced_count = 0
-        error_count = 0
-
-        for stop in stops:
-            try:
-                event = create_google_event_from_stop(stop)
-                # Insert or update event
-                service.events().insert(
-                    calendarId=token.calendar_id or 'primary',
-                    body=event
-                ).execute()
-                synced_count += 1
-            except Exception as e:
-                current_app.logger.error(f'Error syncing stop {stop.id}: {e}')
-                error_count += 1
-
-        # Mark sync complete
-        token.mark_sync_complete()
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'synced': synced_count,
-            'errors': error_count
-        })
-
-    except Exception as e:
-        current_app.logger.error(f'Google sync error: {e}')
-        token.mark_sync_error(str(e))
-        db.session.commit()
-        return jsonify({'success': False, 'error': str(e)}), 500
+    # Batched API calls run in `flask worker`, not in the request
+    CalendarSyncService.enqueue(current_user.id, OAuthProvider.GOOGLE.value)
+    return jsonify({'success': True, 'queued': True})
 
 
 @integrations_bp.route('/google/disconnect', methods=['POST'])
@@ -307,12 +237,59 @@ def google_disconnect():
     return jsonify({'success': False, 'error': 'Not connected to Google Calendar'}), 400
 
 
-def create_google_event_from_stop(stop):
+def refresh_google_token(token):
+    """
+    Refresh a Google access token using the refresh token.
+
+    Args:
+        token: OAuthToken instance
+
+    Returns:
+        bool: True if refresh successful
+    """
+    import requests
+
+    if not token.refresh_token:
+        return False
+
+    try:
+        # Environment read directly: get_google_credentials() needs a request for the redirect URI
+        response = requests.post(
+            'https://oauth2.googleapis.com/token',
+            data={
+                'client_id': os.environ.get('GOOGLE_CLIENT_ID'),
+                'client_secret': os.environ.get('GOOGLE_CLIENT_SECRET'),
+                'refresh_token': token.refresh_token,
+                'grant_type': 'refresh_token',
+            },
+            timeout=30,
+        )
+        if response.status_code != 200:
+            current_app.logger.error(f'Google token refresh failed: {response.text}')
+            return False
+
+        result = response.json()
+        expires_at = datetime.utcnow() + timedelta(seconds=result.get('expires_in', 3600))
+        token.update_tokens(
+            access_token=result['access_token'],
+            refresh_token=result.get('refresh_token'),
+            expires_at=expires_at
+        )
+        db.session.commit()
+        return True
+
+    except Exception as e:
+        current_app.logger.error(f'Google token refresh error: {e}')
+        return False
+
+
+def create_google_event_from_stop(stop, user=None):
     """
     Create a Google Calendar event object from a TourStop.
 
     Args:
         stop: TourStop instance
+        user: User whose timezone preference applies (default: current_user)
 
     Returns:
         dict: Google Calendar event format
@@ -332,8 +309,8 @@ def create_google_event_from_stop(stop):
         description_parts.append(f"Venue: {stop.venue.name}")
         if stop.venue.city:
             description_parts.append(f"City: {stop.venue.city}")
-    if stop.capacity:
-        description_parts.append(f"Capacity: {stop.capacity}")
+    if stop.venue and stop.venue.capacity:
+        description_parts.append(f"Capacity: {stop.venue.capacity}")
     if stop.guarantee:
         description_parts.append(f"Guarantee: {stop.guarantee} {stop.currency or 'EUR'}")
     if stop.notes:
@@ -369,7 +346,7 @@ def create_google_event_from_stop(stop):
         end_datetime = datetime.combine(stop.date, stop.curfew_time) if stop.curfew_time else start_datetime + timedelta(hours=2)
 
         # Get timezone from venue or user preferences
-        event_timezone = get_timezone_for_event(stop=stop, user=current_user)
+        event_timezone = get_timezone_for_event(stop=stop, user=user or current_user)
 
         return {
             'summary': summary,
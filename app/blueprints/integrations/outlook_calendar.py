@@ -45,12 +45,13 @@ def get_msal_app():
     """Create MSAL ConfidentialClientApplication."""
     try:
         import msal
-        creds = get_microsoft_credentials()
 
+        # Read the environment directly: also called from `flask worker`,
+        # where there is no request to build the redirect URI from
         return msal.ConfidentialClientApplication(
-            client_id=creds['client_id'],
-            client_credential=creds['client_secret'],
-            authority=f"https://login.microsoftonline.com/{creds['tenant_id']}"
+            client_id=os.environ.get('MICROSOFT_CLIENT_ID'),
+            client_credential=os.environ.get('MICROSOFT_CLIENT_SECRET'),
+            authority=f"https://login.microsoftonline.com/{os.environ.get('MICROSOFT_TENANT_ID', 'common')}"
         )
     except ImportError:
         return None
@@ -181,72 +182,17 @@ def outlook_callback():
 @integrations_bp.route('/outlook/sync', methods=['POST'])
 @login_required
 def outlook_sync():
-    """Sync tour events with Outlook Calendar."""
+    """Queue an incremental sync of tour events with Outlook Calendar."""
     from flask import jsonify
-    import requests
+    from app.services.calendar_sync import CalendarSyncService
 
     token = OAuthToken.get_for_user(current_user.id, OAuthProvider.MICROSOFT.value)
     if not token:
         return jsonify({'success': False, 'error': 'Not connected to Outlook Calendar'}), 400
 
-    try:
-        # Refresh token if expired
-        if token.is_expired and token.refresh_token:
-            if not refresh_microsoft_token(token):
-                return jsonify({'success': False, 'error': 'Failed to refresh token'}), 401
-
-        headers = {
-            'Authorization': f'Bearer {token.access_token}',
-            'Content-Type': 'application/json'
-        }
-
-        # Get user's tour stops to sync
-        from app.models.band import Band
-        user_bands = current_user.bands + current_user.managed_bands
-        band_ids = [b.id for b in user_bands]
-
-        # Get upcoming tour stops
-        stops = TourStop.query.filter(
-            TourStop.band_id.in_(band_ids),
-            TourStop.date >= datetime.utcnow().date()
-        ).all()
-
-        synced_count = 0
-        error_count = 0
-
-        for stop in stops:
-            try:
-                event = create_outlook_event_from_stop(stop)
-                # Create event in Outlook
-                response = requests.post(
-                    f'{GRAPH_API_ENDPOINT}/me/calendar/events',
-                    headers=headers,
-                    json=event
-                )
-                if response.status_code in [200, 201]:
-                    synced_count += 1
-                else:
-                    current_app.logger.error(f'Outlook sync error for stop {stop.id}: {response.text}')
-                    error_count += 1
-            except Exception as e:
-                current_app.logger.error(f'Error syncing stop {stop.id}: {e}')
-                error_count += 1
-
-        # Mark sync complete
-        token.mark_sync_complete()
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'synced': synced_count,
-            'errors': error_count
-        })
-
-    except Exception as e:
-        current_app.logger.error(f'Outlook sync error: {e}')
-        token.mark_sync_error(str(e))
-        db.session.commit()
-        return jsonify({'success': False, 'error': str(e)}), 500
+    # Batched Graph calls run in `flask worker`, not in the request
+    CalendarSyncService.enqueue(current_user.id, OAuthProvider.MICROSOFT.value)
+    return jsonify({'success': True, 'queued': True})
 
 
 @integrations_bp.route('/outlook/disconnect', methods=['POST'])
@@ -306,12 +252,13 @@ def refresh_microsoft_token(token):
         return False
 
 
-def create_outlook_event_from_stop(stop):
+def create_outlook_event_from_stop(stop, user=None):
     """
     Create a Microsoft Graph Calendar event object from a TourStop.
 
     Args:
         stop: TourStop instance
+        user: User whose timezone preference applies (default: current_user)
 
     Returns:
         dict: Microsoft Graph Calendar event format
@@ -331,8 +278,8 @@ def create_outlook_event_from_stop(stop):
         body_parts.append(f"<strong>Venue:</strong> {stop.venue.name}")
         if stop.venue.city:
             body_parts.append(f"<strong>City:</strong> {stop.venue.city}")
-    if stop.capacity:
-        body_parts.append(f"<strong>Capacity:</strong> {stop.capacity}")
+    if stop.venue and stop.venue.capacity:
+        body_parts.append(f"<strong>Capacity:</strong> {stop.venue.capacity}")
     if stop.guarantee:
         body_parts.append(f"<strong>Guarantee:</strong> {stop.guarantee} {stop.currency or 'EUR'}")
 
@@ -375,7 +322,7 @@ def create_outlook_event_from_stop(stop):
         end_datetime = datetime.combine(stop.date, stop.curfew_time) if stop.curfew_time else start_datetime + timedelta(hours=2)
 
         # Get timezone from venue or user preferences
-        event_timezone = get_timezone_for_event(stop=stop, user=current_user)
+        event_timezone = get_timezone_for_event(stop=stop, user=user or current_user)
 
         return {
             'subject': subject,
@@ -397,7 +344,7 @@ def create_outlook_event_from_stop(stop):
     else:
         # All-day event
         # Get timezone from venue or user preferences
-        event_timezone = get_timezone_for_event(stop=stop, user=current_user)
+        event_timezone = get_timezone_for_event(stop=stop, user=user or current_user)
 
         return {
             'subject': subject,
@@ -8,7 +8,7 @@ from functools import wraps
 
 from flask import (
     render_template, redirect, url_for, flash, request,
-    jsonify, abort, current_app, make_response
+    jsonify, abort, current_app
 )
 from flask_login import login_required, current_user
 
@@ -631,21 +631,15 @@ def download_pdf(invoice_id):
     """Generate and download invoice as PDF."""
     invoice = _get_org_invoice_or_404(invoice_id)
 
-    from app.utils.pdf_generator import generate_invoice_pdf, PDF_AVAILABLE
+    from app.utils.pdf_generator import PDF_AVAILABLE
     if not PDF_AVAILABLE:
         flash('Generation PDF non disponible (reportlab manquant).', 'danger')
         return redirect(url_for('invoices.view', invoice_id=invoice.id))
 
-    pdf_bytes = generate_invoice_pdf(invoice)
-
-    # Build filename: FACT-2026-00001.pdf
-    safe_number = invoice.number.replace('/', '-')
-    filename = f"{safe_number}.pdf"
-
-    response = make_response(pdf_bytes)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    # Filename FACT-2026-00001.pdf; served from the render cache until the invoice changes
+    from app.blueprints.reports.routes import pdf_document_response
+    from app.services.pdf_render_cache import PdfRenderCache
+    return pdf_document_response(PdfRenderCache.document('invoice', invoice.id))
 
 
 # ============================================================================
@@ -668,19 +662,17 @@ def send_email_invoice(invoice_id):
         flash('Aucune adresse email pour le destinataire.', 'danger')
         return redirect(url_for('invoices.view', invoice_id=invoice.id))
 
-    from app.utils.email import send_invoice_email
-    success = send_invoice_email(invoice)
-
-    if success:
-        # Mark as sent if not already
-        if invoice.status == InvoiceStatus.VALIDATED:
-            invoice.mark_as_sent()
-            db.session.commit()
+    # Sent by the background worker (PDF + SMTP), which marks the invoice as sent
+    from app.services.job_tasks import enqueue_invoice_email
+    try:
+        enqueue_invoice_email(invoice)
+    except Exception as e:
+        current_app.logger.error(f'Envoi facture {invoice.number} échoué: {e}')
+        flash('Erreur lors de l\'envoi de l\'email.', 'danger')
+    else:
         log_action('send_email', 'invoice', invoice.id,
                    details=f'Facture envoyee par email a {recipient_email}')
-        flash(f'Facture envoyee par email a {recipient_email}.', 'success')
-    else:
-        flash('Erreur lors de l\'envoi de l\'email.', 'danger')
+        flash(f'Facture en cours d\'envoi par email a {recipient_email}.', 'success')
 
     return redirect(url_for('invoices.view', invoice_id=invoice.id))
 
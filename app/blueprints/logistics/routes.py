@@ -2,7 +2,7 @@
 Logistics management routes.
 """
 from datetime import datetime, time, timedelta
-from flask import render_template, redirect, url_for, flash, request, make_response, Response
+from flask import render_template, redirect, url_for, flash, request, make_response, abort
 from flask_login import login_required, current_user
 
 from sqlalchemy.orm import joinedload, selectinload
@@ -18,6 +18,7 @@ from app.extensions import db
 from app.decorators import tour_access_required, tour_edit_required
 from app.utils.audit import log_create, log_update, log_delete
 from app.utils.org_context import get_org_users
+from app.utils.authz import get_authz
 
 
 def get_visible_logistics(stop, user):
@@ -57,8 +58,7 @@ def manage(stop_id):
     tour = stop.tour
 
     # Check access to tour
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -623,8 +623,7 @@ def day_sheet(stop_id):
     tour = stop.tour
 
     # Check access to tour
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -735,8 +734,7 @@ def travel_itinerary(stop_id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -856,8 +854,7 @@ def mobile_daysheet(stop_id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -992,8 +989,7 @@ def export_ical(stop_id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -1149,7 +1145,9 @@ def export_ical(stop_id):
 @login_required
 def export_tour_pdf(tour_id):
     """Export tour schedule as PDF file."""
-    from app.utils.pdf_generator import generate_tour_pdf, PDF_AVAILABLE
+    from app.blueprints.reports.routes import pdf_document_response
+    from app.services.pdf_render_cache import PdfRenderCache
+    from app.utils.pdf_generator import PDF_AVAILABLE
 
     if not PDF_AVAILABLE:
         flash('Module reportlab non installe. Executez: pip install reportlab', 'error')
@@ -1158,21 +1156,13 @@ def export_tour_pdf(tour_id):
     tour = Tour.query.get_or_404(tour_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
 
     try:
-        pdf_bytes = generate_tour_pdf(tour)
-        filename = f"{tour.name.replace(' ', '_')}_schedule.pdf"
-
-        return Response(
-            pdf_bytes,
-            mimetype='application/pdf',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
+        return pdf_document_response(PdfRenderCache.document('tour', tour_id))
     except Exception as e:
         current_app.logger.error(f'PDF generation failed: {e}')
         flash('Erreur lors de la génération du PDF.', 'error')
@@ -1183,7 +1173,9 @@ def export_tour_pdf(tour_id):
 @login_required
 def export_stop_pdf(stop_id):
     """Export day sheet as PDF file."""
-    from app.utils.pdf_generator import generate_daysheet_pdf, PDF_AVAILABLE
+    from app.blueprints.reports.routes import pdf_document_response
+    from app.services.pdf_render_cache import PdfRenderCache
+    from app.utils.pdf_generator import PDF_AVAILABLE
 
     if not PDF_AVAILABLE:
         flash('Module reportlab non installe. Executez: pip install reportlab', 'error')
@@ -1193,48 +1185,79 @@ def export_stop_pdf(stop_id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
 
     try:
-        pdf_bytes = generate_daysheet_pdf(stop)
-        date_str = stop.date.strftime('%Y%m%d') if stop.date else 'TBA'
-        venue_name = stop.venue.name.replace(' ', '_') if stop.venue else 'TBA'
-        filename = f"daysheet_{date_str}_{venue_name}.pdf"
-
-        return Response(
-            pdf_bytes,
-            mimetype='application/pdf',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
+        return pdf_document_response(PdfRenderCache.document('daysheet', stop_id))
     except Exception as e:
         current_app.logger.error(f'PDF generation failed: {e}')
         flash('Erreur lors de la génération du PDF.', 'error')
         return redirect(url_for('logistics.day_sheet', stop_id=stop_id))
 
 
+def _tour_show_event(stop, tour):
+    """iCal event for one show of the tour schedule export."""
+    from icalendar import Event
+
+    event = Event()
+    event.add('uid', f'show-{stop.id}@gigroute.app')
+
+    venue_name = stop.venue.name if stop.venue else 'TBA'
+    event.add('summary', f'{tour.band_name} @ {venue_name}')
+
+    show_time = stop.set_time or time(20, 30)
+    event.add('dtstart', datetime.combine(stop.date, show_time))
+
+    if stop.venue:
+        location = f"{stop.venue.name}, {stop.venue.city}, {stop.venue.country}"
+        event.add('location', location)
+
+    # Build description
+    desc_lines = []
+    if stop.doors_time:
+        desc_lines.append(f"Doors: {stop.doors_time.strftime('%H:%M')}")
+    if stop.set_time:
+        desc_lines.append(f"Show: {stop.set_time.strftime('%H:%M')}")
+    if stop.status:
+        desc_lines.append(f"Status: {stop.status.value}")
+
+    event.add('description', '\n'.join(desc_lines))
+    event.add('dtstamp', datetime.utcnow())
+    return event
+
+
 @logistics_bp.route('/tour/<int:tour_id>/ical')
 @login_required
 def export_tour_ical(tour_id):
-    """Export entire tour schedule as iCal file."""
+    """Export entire tour schedule as iCal file (ETag: 304 when nothing changed)."""
     try:
-        from icalendar import Calendar, Event
+        from icalendar import Calendar
     except ImportError:
         flash('Module icalendar non installe. Executez: pip install icalendar', 'error')
         return redirect(url_for('tours.detail', id=tour_id))
+    from app.utils.ical import event_blob, serialize_calendar, stop_event_version
+    from app.utils.ical_feed import feed_etag, ical_response, not_modified, tour_feed_state
 
-    tour = Tour.query.get_or_404(tour_id)
+    state = tour_feed_state(tour_id)
+    if state is None:
+        abort(404)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-    if tour.band_id not in user_band_ids:
+    user_band_ids = get_authz().band_ids
+    if state.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
 
+    etag = feed_etag('logistics', state)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    tour = db.session.get(Tour, tour_id)
+
     # Create calendar
     cal = Calendar()
     cal.add('prodid', '-//GigRoute//GigRoute//FR')
@@ -1243,41 +1266,16 @@ def export_tour_ical(tour_id):
     cal.add('method', 'PUBLISH')
     cal.add('x-wr-calname', f'{tour.band_name} - {tour.name}')
 
-    # Add each stop as an event
-    for stop in sorted(tour.stops, key=lambda s: s.date):
-        event = Event()
-        event.add('uid', f'show-{stop.id}@gigroute.app')
-
-        venue_name = stop.venue.name if stop.venue else 'TBA'
-        event.add('summary', f'{tour.band_name} @ {venue_name}')
-
-        show_time = stop.set_time or time(20, 30)
-        event.add('dtstart', datetime.combine(stop.date, show_time))
-
-        if stop.venue:
-            location = f"{stop.venue.name}, {stop.venue.city}, {stop.venue.country}"
-            event.add('location', location)
-
-        # Build description
-        desc_lines = []
-        if stop.doors_time:
-            desc_lines.append(f"Doors: {stop.doors_time.strftime('%H:%M')}")
-        if stop.set_time:
-            desc_lines.append(f"Show: {stop.set_time.strftime('%H:%M')}")
-        if stop.status:
-            desc_lines.append(f"Status: {stop.status.value}")
-
-        event.add('description', '\n'.join(desc_lines))
-        event.add('dtstamp', datetime.utcnow())
-
-        cal.add_component(event)
-
-    # Generate response
-    response = make_response(cal.to_ical())
-    response.headers['Content-Type'] = 'text/calendar; charset=utf-8'
-    response.headers['Content-Disposition'] = f'attachment; filename=tour_{tour.id}_{tour.name.replace(" ", "_")}.ics'
+    # Add each stop as an event (serialized events cached per stop)
+    stops = (TourStop.query.options(selectinload(TourStop.venue))
+             .filter_by(tour_id=tour.id).order_by(TourStop.date).all())
+    blobs = [
+        event_blob(stop_event_version('logistics', stop, tour), lambda stop=stop: _tour_show_event(stop, tour))
+        for stop in stops
+    ]
 
-    return response
+    return ical_response(serialize_calendar(cal, blobs), etag,
+                         filename=f'tour_{tour.id}_{tour.name.replace(" ", "_")}.ics')
 
 
 # =============================================================================
@@ -1536,8 +1534,7 @@ def list_assignments(id):
     tour = stop.tour
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         return jsonify({'success': False, 'error': 'Accès non autorisé'}), 403
 
@@ -9,6 +9,7 @@ from app.blueprints.main import main_bp
 from app.blueprints.main.forms import StandaloneEventForm
 from app.extensions import db
 from app.utils.org_context import get_current_org_id, org_filter_kwargs, org_scope
+from app.utils.authz import get_authz
 
 
 @main_bp.route('/sw.js')
@@ -30,6 +31,29 @@ def ping():
     return f"PONG - {datetime.utcnow().isoformat()} - v2026-02-01-v2", 200, {'Content-Type': 'text/plain'}
 
 
+@main_bp.route('/admin/perf')
+@login_required
+def admin_perf():
+    """Per-endpoint latency and query counts (p50 / p95) of this worker. SUPERADMIN only.
+
+    ?format=json returns the raw figures. Samples are kept in memory per
+    worker (last PERF_SAMPLE_SIZE requests per endpoint).
+    """
+    if not getattr(current_user, 'is_superadmin', False):
+        abort(403)
+
+    from app.utils.perf import get_registry
+    registry = get_registry()
+    rows = registry.summary()
+    if request.args.get('format') == 'json':
+        return jsonify({'endpoints': rows, 'sample_size': registry.sample_size})
+
+    sort = request.args.get('sort', 'p95_ms')
+    if rows and sort in rows[0]:
+        rows.sort(key=lambda r: r[sort], reverse=sort != 'endpoint')
+    return render_template('main/admin_perf.html', rows=rows, sort=sort, sample_size=registry.sample_size)
+
+
 @main_bp.route('/admin/full-reset', methods=['POST'])
 @login_required
 def admin_full_reset():
@@ -293,6 +317,58 @@ def global_calendar():
     )
 
 
+@main_bp.route('/calendar/feed/<int:user_id>.ics')
+def user_calendar_feed(user_id):
+    """
+    Personal calendar subscription feed (token authentication, no login).
+
+    Contains every stop, crew slot, planning slot and logistics item the
+    user is assigned to, read from the precomputed user_calendar_events
+    index in a single query. Polls carrying the current ETag get a 304.
+    """
+    from app.services.calendar_index import CalendarIndexService
+    from app.utils.ical import create_calendar, serialize_calendar
+    from app.utils.ical_feed import feed_etag, ical_response, not_modified
+
+    token = request.args.get('token')
+    if not token:
+        abort(401, description="Token requis pour accès au calendrier.")
+    if not CalendarIndexService.check_feed_token(user_id, token):
+        abort(403, description="Token invalide")
+
+    rows = CalendarIndexService.feed_events(user_id)
+    cache_control = 'private, max-age=900'
+    etag = feed_etag('user-feed', [(row.id, row.updated_at) for row in rows], user_id)
+    response = not_modified(etag, cache_control)
+    if response is not None:
+        return response
+
+    cal = create_calendar('GigRoute - Mon planning', 'Dates, créneaux et logistique qui me sont assignés')
+    content = serialize_calendar(cal, [row.ical.encode('utf-8') for row in rows])
+    return ical_response(content, etag, cache_control=cache_control)
+
+
+@main_bp.route('/calendar/feed-url')
+@login_required
+def user_calendar_feed_url():
+    """Subscription URL of the current user's personal calendar feed (JSON)."""
+    from app.services.calendar_index import CalendarIndexService
+
+    feed_url = url_for(
+        'main.user_calendar_feed', user_id=current_user.id,
+        token=CalendarIndexService.feed_token(current_user.id), _external=True
+    )
+    return jsonify({
+        'success': True,
+        'feed_url': feed_url,
+        'instructions': {
+            'google': 'Google Calendar → Autres agendas → À partir de l\'URL → Coller l\'URL',
+            'apple': 'Calendrier → Fichier → Nouvel abonnement → Coller l\'URL',
+            'outlook': 'Outlook → Ajouter un calendrier → À partir d\'Internet → Coller l\'URL'
+        }
+    })
+
+
 @main_bp.route('/calendar/events')
 @login_required
 def global_calendar_events():
@@ -515,8 +591,7 @@ def search():
         return render_template('main/search.html', query=query, results=None)
 
     # Get user's bands
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     results = {
         'tours': [],
@@ -170,6 +170,7 @@ class PerDiemBatchForm(FlaskForm):
 
     notes = TextAreaField('Notes', validators=[Length(max=500)])
 
+    preview = SubmitField('Previsualiser')
     submit = SubmitField('Generer les per diems')
 
 
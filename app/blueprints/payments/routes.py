@@ -4,12 +4,10 @@ CRUD operations, approval workflow, batch operations, exports.
 """
 from datetime import datetime, date
 from decimal import Decimal
-import csv
-import io
 
 from flask import (
     render_template, redirect, url_for, flash, request,
-    jsonify, abort, Response, current_app
+    jsonify, abort, current_app
 )
 from flask_login import login_required, current_user
 
@@ -30,7 +28,9 @@ from app.models.user import User
 from app.models.organization import OrganizationMembership
 from app.models.tour import Tour
 from app.models.tour_stop import TourStop
+from app.services.payment_service import PaymentService
 from app.utils.audit import log_action, log_create, log_update
+from app.utils.exports import export_format, export_response, stream_batches
 from app.utils.org_context import get_org_users, get_org_tours, get_current_org_id
 
 
@@ -525,74 +525,37 @@ def batch_per_diems():
 
     if form.validate_on_submit():
         tour = Tour.query.get_or_404(form.tour_id.data)
+        per_diem_amount = form.per_diem_amount.data
+        dry_run = bool(form.preview.data)
+
+        summary = PaymentService.generate_tour_per_diems(
+            tour_id=tour.id,
+            per_diem_amount=per_diem_amount,
+            created_by_id=current_user.id,
+            include_travel_days=form.include_travel_days.data,
+            include_day_offs=form.include_day_offs.data,
+            notes=form.notes.data,
+            dry_run=dry_run
+        )
 
-        # Get all tour stops
-        tour_stops = TourStop.query.filter_by(tour_id=tour.id).order_by(TourStop.date).all()
-
-        if not tour_stops:
+        if not summary['stops']:
             flash('Cette tournée n\'a pas de dates.', 'warning')
             return redirect(url_for('payments.batch_per_diems'))
-
-        # Get team members with payment config (those who get per diems)
-        members_with_config = UserPaymentConfig.query.filter(
-            UserPaymentConfig.per_diem > 0
-        ).all()
-
-        if not members_with_config:
+        if not summary['members']:
             flash('Aucun membre n\'a de configuration de per diem.', 'warning')
             return redirect(url_for('payments.batch_per_diems'))
 
-        created_count = 0
-        per_diem_amount = form.per_diem_amount.data
-
-        for stop in tour_stops:
-            # Skip if not show day and option not selected
-            if stop.event_type == 'travel' and not form.include_travel_days.data:
-                continue
-            if stop.event_type == 'day_off' and not form.include_day_offs.data:
-                continue
-
-            for config in members_with_config:
-                # Check if payment already exists
-                existing = TeamMemberPayment.query.filter_by(
-                    user_id=config.user_id,
-                    tour_stop_id=stop.id,
-                    payment_type=PaymentType.PER_DIEM
-                ).first()
-
-                if existing:
-                    continue
-
-                # Create per diem payment
-                payment = TeamMemberPayment(
-                    user_id=config.user_id,
-                    tour_id=tour.id,
-                    tour_stop_id=stop.id,
-                    staff_category=config.staff_category,
-                    staff_role=config.staff_role,
-                    payment_type=PaymentType.PER_DIEM,
-                    description=f"Per diem - {stop.date.strftime('%d/%m/%Y')}",
-                    amount=per_diem_amount,
-                    currency='EUR',
-                    work_date=stop.date,
-                    status=PaymentStatus.DRAFT,
-                    created_by_id=current_user.id,
-                    notes=form.notes.data
-                )
-                payment.reference = TeamMemberPayment.generate_reference()
-                db.session.add(payment)
-                created_count += 1
-
-        db.session.commit()
+        if dry_run:
+            return render_template('payments/batch_per_diems.html', form=form, preview=summary, tour=tour)
 
         log_action('CREATE', 'TeamMemberPayment', None, {
             'batch': 'per_diems',
             'tour_id': tour.id,
-            'count': created_count,
+            'count': summary['created'],
             'amount_each': str(per_diem_amount)
         })
 
-        flash(f'{created_count} per diems générés pour la tournée {tour.name}.', 'success')
+        flash(f'{summary["created"]} per diems générés pour la tournée {tour.name}.', 'success')
         return redirect(url_for('payments.index', tour_id=tour.id))
 
     return render_template('payments/batch_per_diems.html', form=form)
@@ -663,55 +626,46 @@ def export_csv():
     if date_to:
         query = query.filter(TeamMemberPayment.work_date <= date_to)
 
-    payments = query.options(
+    query = query.options(
         joinedload(TeamMemberPayment.user),
         joinedload(TeamMemberPayment.tour),
         joinedload(TeamMemberPayment.tour_stop),
-    ).order_by(TeamMemberPayment.work_date).all()
-
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # Header
-    writer.writerow([
-        'Référence', 'Date travail', 'Bénéficiaire', 'Email',
-        'Catégorie', 'Rôle', 'Type', 'Description',
-        'Montant', 'Devise', 'Statut', 'Date paiement',
-        'Tournée', 'Concert'
-    ])
-
-    for p in payments:
-        writer.writerow([
-            p.reference,
-            p.work_date.strftime('%d/%m/%Y') if p.work_date else '',
-            p.user.full_name if p.user else '',
-            p.user.email if p.user else '',
-            p.staff_category.value if p.staff_category else '',
-            p.staff_role.value if p.staff_role else '',
-            p.payment_type.value if p.payment_type else '',
-            p.description or '',
-            str(p.amount),
-            p.currency,
-            p.status.value if p.status else '',
-            p.paid_date.strftime('%d/%m/%Y') if p.paid_date else '',
-            p.tour.name if p.tour else '',
-            p.tour_stop.date.strftime('%d/%m/%Y') if p.tour_stop else ''
-        ])
+    ).order_by(TeamMemberPayment.work_date, TeamMemberPayment.id)
 
     log_action('EXPORT_CSV', 'TeamMemberPayment', None, {
-        'count': len(payments),
+        'count': query.order_by(None).count(),
         'filters': {'tour_id': tour_id, 'status': status}
     })
 
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=paiements_{datetime.now().strftime("%Y%m%d")}.csv'
-        }
-    )
+    def rows():
+        yield [
+            'Référence', 'Date travail', 'Bénéficiaire', 'Email',
+            'Catégorie', 'Rôle', 'Type', 'Description',
+            'Montant', 'Devise', 'Statut', 'Date paiement',
+            'Tournée', 'Concert'
+        ]
+        # Server-side cursor: one batch of payments in memory at a time
+        for batch in stream_batches(query):
+            for p in batch:
+                yield [
+                    p.reference,
+                    p.work_date.strftime('%d/%m/%Y') if p.work_date else '',
+                    p.user.full_name if p.user else '',
+                    p.user.email if p.user else '',
+                    p.staff_category.value if p.staff_category else '',
+                    p.staff_role.value if p.staff_role else '',
+                    p.payment_type.value if p.payment_type else '',
+                    p.description or '',
+                    p.amount,
+                    p.currency,
+                    p.status.value if p.status else '',
+                    p.paid_date.strftime('%d/%m/%Y') if p.paid_date else '',
+                    p.tour.name if p.tour else '',
+                    p.tour_stop.date.strftime('%d/%m/%Y') if p.tour_stop else ''
+                ]
+
+    filename = f'paiements_{datetime.now().strftime("%Y%m%d")}'
+    return export_response(rows(), filename, export_format(), delimiter=';', sheet_name='Paiements')
 
 
 @payments_bp.route('/export/sepa')
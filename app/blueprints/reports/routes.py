@@ -2,7 +2,7 @@
 Reports routes for GigRoute.
 Includes general stats and financial reports.
 """
-from flask import render_template, redirect, url_for, flash, Response, request, abort
+from flask import render_template, redirect, url_for, flash, Response, request, abort, current_app, jsonify
 from flask_login import login_required, current_user
 
 from sqlalchemy.orm import selectinload, joinedload
@@ -16,12 +16,17 @@ from app.models.user import User
 from app.utils.reports import (
     calculate_tour_financials,
     calculate_multi_tour_summary,
-    calculate_dashboard_kpis,
     calculate_settlement,
-    generate_csv_report,
+    tour_report_rows,
     format_currency
 )
-from app.utils.pdf_generator import generate_settlement_pdf, WEASYPRINT_AVAILABLE
+from app.utils.pdf_generator import WEASYPRINT_AVAILABLE
+from app.services.financial_snapshots import FinancialSnapshotService
+from app.services.pdf_render_cache import PdfRenderCache, STATUS_READY
+from app.utils.authz import get_authz
+from app.utils.org_context import get_current_org_id
+from app.utils.exports import export_format, export_response
+from app.utils.perf import query_budget
 
 # Import services for accounting exports
 try:
@@ -40,8 +45,7 @@ def index():
         flash('Acces reserve aux managers.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Get tours for stats (eager-load stops + guestlist to avoid N+1)
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).options(
@@ -75,8 +79,7 @@ def financial():
         flash('Acces reserve aux managers.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Get all tours (eager-load stops + venue/tiers for financial calcs)
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).options(
@@ -100,8 +103,7 @@ def financial_tour(tour_id):
     ).get_or_404(tour_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -130,8 +132,7 @@ def export_financial_csv(tour_id):
     ).get_or_404(tour_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -140,19 +141,12 @@ def export_financial_csv(tour_id):
         flash('Acces reserve aux managers.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    # Generate CSV
+    # Generate CSV (or XLSX with ?format=xlsx)
     tour_data = calculate_tour_financials(tour)
-    csv_content = generate_csv_report(tour_data)
+    filename = f"rapport_financier_{tour.name}_{tour.start_date.strftime('%Y%m%d')}"
 
-    # Create filename
-    filename = f"rapport_financier_{tour.name}_{tour.start_date.strftime('%Y%m%d')}.csv"
-    filename = filename.replace(' ', '_').replace('/', '-')
-
-    return Response(
-        csv_content,
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-    )
+    return export_response(tour_report_rows(tour_data), filename, export_format(),
+                           sheet_name='Rapport financier')
 
 
 @reports_bp.route('/guestlist')
@@ -163,8 +157,7 @@ def guestlist_analytics():
         flash('Acces reserve aux managers.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Get all tours (eager-load stops + guestlist to avoid N+1)
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).options(
@@ -211,42 +204,34 @@ def guestlist_analytics():
 
 @reports_bp.route('/dashboard')
 @login_required
+@query_budget(15)
 def financial_dashboard():
     """Advanced financial dashboard with KPIs and charts."""
     if not current_user.is_manager_or_above():
         flash('Acces reserve aux managers.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = list(get_authz().band_ids)
 
-    # Get all tours (eager-load stops + venue/tiers/expenses for KPIs + settlements)
-    tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).options(
-        selectinload(Tour.stops).joinedload(TourStop.venue),
-        selectinload(Tour.stops).selectinload(TourStop.ticket_tiers),
-        selectinload(Tour.stops).joinedload(TourStop.promotor_expenses),
-    ).order_by(Tour.start_date.desc()).all()
-
-    # Calculate advanced KPIs
-    kpis = calculate_dashboard_kpis(tours)
+    # KPIs aggregated in SQL from the per-stop financial snapshots
+    kpis = FinancialSnapshotService.dashboard_kpis(user_band_ids)
+    tour_count = Tour.query.filter(Tour.band_id.in_(user_band_ids)).count()
 
     # Get upcoming shows that need settlement (with tickets sold via single or multi-tier)
     from datetime import date
-    upcoming_settlements = []
-    for tour in tours:
-        for stop in tour.stops:
-            if stop.date and stop.date >= date.today() and stop.total_sold_tickets > 0:
-                settlement = calculate_settlement(stop)
-                upcoming_settlements.append(settlement)
-
-    # Sort by date
-    upcoming_settlements.sort(key=lambda x: x['date'])
-    upcoming_settlements = upcoming_settlements[:10]  # Top 10
+    upcoming_settlements = FinancialSnapshotService.settlement_rows(
+        user_band_ids,
+        date_from=date.today(),
+        only_with_venue=False,
+        only_with_sales=True,
+        newest_first=False,
+        limit=10,
+    )
 
     return render_template(
         'reports/dashboard.html',
         kpis=kpis,
-        tours=tours,
+        tour_count=tour_count,
         upcoming_settlements=upcoming_settlements,
         format_currency=format_currency
     )
@@ -260,36 +245,19 @@ def settlements_list():
         flash('Acces reserve aux managers.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
-
-    # Get all tours (eager-load stops + venue/tiers/expenses for settlements)
-    tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).options(
-        selectinload(Tour.stops).joinedload(TourStop.venue),
-        selectinload(Tour.stops).selectinload(TourStop.ticket_tiers),
-        selectinload(Tour.stops).joinedload(TourStop.promotor_expenses),
-    ).order_by(Tour.start_date.desc()).all()
-
-    # Collecter TOUS les stops (sans filtre de date)
-    all_settlements = []
-    for tour in tours:
-        for stop in tour.stops:
-            if stop.venue:  # Seulement les stops avec salle
-                settlement_data = calculate_settlement(stop)
-                all_settlements.append(settlement_data)
-
-    # Trier par date (plus récent d'abord)
-    all_settlements.sort(key=lambda x: x['date'] if x['date'] else '', reverse=True)
+    user_band_ids = get_authz().band_ids
 
     # Filter param
     filter_type = request.args.get('filter', 'all')
     from datetime import date
     today = date.today()
 
-    if filter_type == 'past':
-        all_settlements = [s for s in all_settlements if s['date'] and s['date'] < today]
-    elif filter_type == 'future':
-        all_settlements = [s for s in all_settlements if s['date'] and s['date'] >= today]
+    # Stops avec salle uniquement, plus récent d'abord (lu depuis les snapshots)
+    all_settlements = FinancialSnapshotService.settlement_rows(
+        user_band_ids,
+        date_from=today if filter_type == 'future' else None,
+        date_to=today if filter_type == 'past' else None,
+    )
 
     return render_template(
         'reports/settlements_list.html',
@@ -307,8 +275,7 @@ def settlement(stop_id):
     stop = TourStop.query.get_or_404(stop_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Check if user has access to this stop (via tour or direct band)
     if stop.tour:
@@ -342,8 +309,7 @@ def settlement_pdf(stop_id):
     stop = TourStop.query.get_or_404(stop_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Check if user has access to this stop (via tour or direct band)
     if stop.tour:
@@ -364,27 +330,84 @@ def settlement_pdf(stop_id):
         flash('La generation PDF n\'est pas disponible. Veuillez installer WeasyPrint.', 'error')
         return redirect(url_for('reports.settlement', stop_id=stop_id))
 
-    # Calculate settlement
-    settlement_data = calculate_settlement(stop)
-
-    # Generate PDF
+    # Settlement PDF, keyed by the settlement data (re-downloads are served from the cache)
     try:
-        pdf_bytes = generate_settlement_pdf(settlement_data)
+        return pdf_document_response(PdfRenderCache.document('settlement', stop_id))
     except Exception as e:
         current_app.logger.error(f'Settlement PDF generation failed for stop {stop_id}: {e}')
         flash('Erreur lors de la génération du PDF.', 'error')
         return redirect(url_for('reports.settlement', stop_id=stop_id))
 
-    # Create filename
-    venue_name = settlement_data['venue_name'].replace(' ', '_').replace('/', '-')
-    date_str = settlement_data['date'].strftime('%Y%m%d') if settlement_data['date'] else 'NA'
-    filename = f"settlement_{venue_name}_{date_str}.pdf"
 
-    return Response(
+def pdf_document_response(document):
+    """
+    Download a PDF document through the render cache.
+
+    Large documents (and tour books) not cached yet are rendered by the
+    job queue: the response is a waiting page (202) polling reports.pdf_status.
+
+    Args:
+        document: PdfDocument (see PdfRenderCache.document)
+
+    Returns:
+        PDF download, 304 if the client has it, or the waiting page
+    """
+    if PdfRenderCache.needs_background(document) and PdfRenderCache.submit(document) != STATUS_READY:
+        return render_template('reports/pdf_pending.html', key=document.key, filename=document.filename), 202
+    return _pdf_download(PdfRenderCache.render(document), document.filename, document.key, document.mimetype)
+
+
+def _pdf_download(pdf_bytes, filename, key, mimetype='application/pdf'):
+    """PDF (or tour book archive) attachment whose ETag is its content key."""
+    response = Response(
         pdf_bytes,
-        mimetype='application/pdf',
+        mimetype=mimetype,
         headers={'Content-Disposition': f'attachment; filename="{filename}"'}
     )
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def _cached_pdf_or_404(key):
+    """Current key and metadata of a background PDF the user may download."""
+    if not PdfRenderCache.is_key(key):
+        abort(404)
+    key, meta = PdfRenderCache.status(key)
+    if meta is None:
+        abort(404)
+    if meta['band_id'] is not None and meta['band_id'] not in get_authz().band_ids:
+        abort(404)
+    # Invoices are scoped by org (entries written before org_ids existed: nobody)
+    org_ids = meta.get('org_ids', [] if meta['kind'] == 'invoice' else None)
+    if org_ids is not None and get_current_org_id() not in org_ids:
+        abort(404)
+    if meta['manager_only'] and not current_user.is_manager_or_above():
+        abort(404)
+    return key, meta
+
+
+@reports_bp.route('/pdf/<key>/status')
+@login_required
+def pdf_status(key):
+    """Rendering status of a background PDF (polled by the waiting page)."""
+    key, meta = _cached_pdf_or_404(key)
+    return jsonify({
+        'status': meta['status'],
+        'progress': meta.get('progress'),
+        'download_url': url_for('reports.pdf_download', key=key) if meta['status'] == STATUS_READY else None,
+    })
+
+
+@reports_bp.route('/pdf/<key>')
+@login_required
+def pdf_download(key):
+    """Download a PDF rendered in the background."""
+    key, meta = _cached_pdf_or_404(key)
+    pdf_bytes = PdfRenderCache.get(key) if meta['status'] == STATUS_READY else None
+    if pdf_bytes is None:
+        abort(404)
+    return _pdf_download(pdf_bytes, meta['filename'], key, meta.get('mimetype', 'application/pdf'))
 
 
 @reports_bp.route('/dashboard/api/chart-data')
@@ -396,15 +419,9 @@ def dashboard_chart_data():
     if not current_user.is_manager_or_above():
         return {'error': 'Unauthorized'}, 403
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = list(get_authz().band_ids)
 
-    tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).options(
-        selectinload(Tour.stops).joinedload(TourStop.venue),
-        selectinload(Tour.stops).selectinload(TourStop.ticket_tiers),
-    ).order_by(Tour.start_date.desc()).all()
-
-    kpis = calculate_dashboard_kpis(tours)
+    kpis = FinancialSnapshotService.dashboard_kpis(user_band_ids)
 
     return {
         'monthly_revenue': kpis['monthly_revenue'],
@@ -439,8 +456,7 @@ def accounting_index():
         flash('Les services d\'export ne sont pas disponibles.', 'error')
         return redirect(url_for('reports.index'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
 
     # Get tours for selection
     tours = Tour.query.filter(Tour.band_id.in_(user_band_ids)).order_by(
@@ -474,25 +490,13 @@ def accounting_bordereau(tour_id):
     tour = Tour.query.get_or_404(tour_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
 
     try:
-        pdf_bytes = ReportService.generate_bordereau_paiement(tour_id)
-
-        # Create filename
-        tour_name = tour.name.replace(' ', '_').replace('/', '-')
-        date_str = tour.start_date.strftime('%Y%m%d') if tour.start_date else 'NA'
-        filename = f"bordereau_paiement_{tour_name}_{date_str}.pdf"
-
-        return Response(
-            pdf_bytes,
-            mimetype='application/pdf',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
+        return pdf_document_response(PdfRenderCache.document('bordereau', tour_id))
     except Exception as e:
         current_app.logger.error(f'Bordereau PDF generation failed: {e}')
         flash('Erreur lors de la génération du bordereau.', 'error')
@@ -514,25 +518,21 @@ def accounting_masse_salariale(tour_id):
     tour = Tour.query.get_or_404(tour_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
 
     try:
-        csv_content = ReportService.export_masse_salariale_csv(tour_id)
+        rows = ReportService.masse_salariale_rows(tour_id)
 
         # Create filename
         tour_name = tour.name.replace(' ', '_').replace('/', '-')
         date_str = tour.start_date.strftime('%Y%m%d') if tour.start_date else 'NA'
-        filename = f"masse_salariale_{tour_name}_{date_str}.csv"
+        filename = f"masse_salariale_{tour_name}_{date_str}"
 
-        return Response(
-            csv_content,
-            mimetype='text/csv; charset=utf-8',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
+        # Streamed: rows are read and written while the response is sent
+        return export_response(rows, filename, export_format(), delimiter=';', sheet_name='Masse salariale')
     except Exception as e:
         current_app.logger.error(f'CSV export failed: {e}')
         flash('Erreur lors de l\'export CSV.', 'error')
@@ -551,22 +551,17 @@ def accounting_paiements_a_effectuer():
         flash('Les services d\'export ne sont pas disponibles.', 'error')
         return redirect(url_for('reports.index'))
 
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = list(get_authz().band_ids)
 
     try:
         from datetime import date
-        csv_content = ReportService.export_paiements_a_effectuer_csv(user_band_ids)
+        rows = ReportService.paiements_a_effectuer_rows(user_band_ids)
 
         # Create filename
         today = date.today().strftime('%Y%m%d')
-        filename = f"paiements_a_effectuer_{today}.csv"
+        filename = f"paiements_a_effectuer_{today}"
 
-        return Response(
-            csv_content,
-            mimetype='text/csv; charset=utf-8',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
+        return export_response(rows, filename, export_format(), delimiter=';', sheet_name='Paiements')
     except Exception as e:
         current_app.logger.error(f'CSV export failed: {e}')
         flash('Erreur lors de l\'export CSV.', 'error')
@@ -588,7 +583,6 @@ def accounting_fiche_membre(user_id):
     user = User.query.get_or_404(user_id)
 
     # Verify user belongs to current org
-    from app.utils.org_context import get_current_org_id
     from app.models.organization import OrganizationMembership
     current_org = get_current_org_id()
     if current_org:
@@ -640,25 +634,13 @@ def accounting_budget(tour_id):
     tour = Tour.query.get_or_404(tour_id)
 
     # Check access
-    user_bands = current_user.bands + current_user.managed_bands
-    user_band_ids = [b.id for b in user_bands]
+    user_band_ids = get_authz().band_ids
     if tour.band_id not in user_band_ids:
         flash('Acces non autorise.', 'error')
         return redirect(url_for('main.dashboard'))
 
     try:
-        pdf_bytes = ReportService.generate_budget_tournee(tour_id)
-
-        # Create filename
-        tour_name = tour.name.replace(' ', '_').replace('/', '-')
-        date_str = tour.start_date.strftime('%Y%m%d') if tour.start_date else 'NA'
-        filename = f"budget_tournee_{tour_name}_{date_str}.pdf"
-
-        return Response(
-            pdf_bytes,
-            mimetype='application/pdf',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-        )
+        return pdf_document_response(PdfRenderCache.document('budget', tour_id))
     except Exception as e:
         current_app.logger.error(f'Budget PDF generation failed: {e}')
         flash('Erreur lors de la génération du budget.', 'error')
@@ -681,8 +663,7 @@ def accounting_attestation(payment_id):
 
     # Check access via tour
     if payment.tour:
-        user_bands = current_user.bands + current_user.managed_bands
-        user_band_ids = [b.id for b in user_bands]
+        user_band_ids = get_authz().band_ids
         if payment.tour.band_id not in user_band_ids:
             flash('Acces non autorise.', 'error')
             return redirect(url_for('main.dashboard'))
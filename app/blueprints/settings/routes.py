@@ -30,6 +30,7 @@ from app.models.guestlist import GuestlistEntry
 from app.models.payments import UserPaymentConfig, StaffCategory, StaffRole, ContractType, PaymentFrequency
 from app.decorators import requires_manager, requires_admin
 from app.models.organization import OrganizationMembership, OrgRole
+from app.services.media_store import MediaStore
 from app.utils.org_context import get_current_org_id
 from app.utils.email import send_invitation_email, send_registration_notification, send_approval_email, send_rejection_email
 
@@ -419,37 +420,10 @@ def delete_profile_document(doc_id):
 # PROFILE PICTURE
 # =============================================================================
 
-def resize_profile_picture(file_data, max_size=200):
-    """
-    Resize image to max_size x max_size pixels.
-    Returns tuple (image_bytes, mime_type).
-    """
-    from PIL import Image
-    import io
-
-    img = Image.open(io.BytesIO(file_data))
-
-    # Convert RGBA to RGB if necessary (for JPEG)
-    if img.mode == 'RGBA':
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[3])
-        img = background
-    elif img.mode != 'RGB':
-        img = img.convert('RGB')
-
-    # Resize maintaining aspect ratio
-    img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-
-    # Save to bytes
-    output = io.BytesIO()
-    img.save(output, format='JPEG', quality=85, optimize=True)
-    return output.getvalue(), 'image/jpeg'
-
-
 @settings_bp.route('/profile/picture', methods=['POST'])
 @login_required
 def upload_profile_picture():
-    """Upload and resize profile picture to database."""
+    """Upload a profile picture into the media store (all sizes pre-generated)."""
     if 'picture' not in request.files:
         flash('Aucun fichier sélectionné.', 'error')
         return redirect(url_for('settings.profile'))
@@ -491,16 +465,16 @@ def upload_profile_picture():
     file_data = file.read()
 
     try:
-        # Resize image to 200x200 max
-        resized_data, mime_type = resize_profile_picture(file_data)
-
-        # Store in database
-        current_user.profile_picture_data = resized_data
-        current_user.profile_picture_mime = mime_type
+        # 48/96/200 px in WebP and JPEG, stored once per content hash
+        previous_hash = current_user.profile_picture_hash
+        current_user.profile_picture_hash = MediaStore.store_image(file_data)
+        if previous_hash != current_user.profile_picture_hash:
+            MediaStore.release(previous_hash)
         db.session.commit()
 
         flash('Photo de profil mise à jour.', 'success')
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f'Error resizing profile picture: {e}')
         flash('Erreur lors du traitement de l\'image.', 'error')
 
@@ -510,9 +484,10 @@ def upload_profile_picture():
 @settings_bp.route('/profile/picture/delete', methods=['POST'])
 @login_required
 def delete_profile_picture():
-    """Delete profile picture from database."""
-    current_user.profile_picture_data = None
-    current_user.profile_picture_mime = None
+    """Delete profile picture (and its variants if no one else uses the image)."""
+    previous_hash = current_user.profile_picture_hash
+    current_user.profile_picture_hash = None
+    MediaStore.release(previous_hash)
     db.session.commit()
     flash('Photo de profil supprimée.', 'success')
     return redirect(url_for('settings.profile'))
@@ -521,19 +496,44 @@ def delete_profile_picture():
 @settings_bp.route('/profile/picture/<int:user_id>')
 @login_required
 def serve_profile_picture(user_id):
-    """Serve profile picture from database with caching."""
-    user = User.query.get_or_404(user_id)
-    if not user.profile_picture_data:
+    """
+    Serve a profile picture from the media store.
+
+    ?size= picks the smallest pre-generated size covering it (48, 96, 200),
+    ?format=webp|jpeg overrides the Accept negotiation. Only the picture
+    hash is read from users; a matching If-None-Match gets a 304 without
+    reading the image.
+    """
+    content_hash = db.session.query(User.profile_picture_hash).filter_by(id=user_id).scalar()
+    if not content_hash:
         abort(404)
 
-    return Response(
-        user.profile_picture_data,
-        mimetype=user.profile_picture_mime,
-        headers={
-            'Cache-Control': 'public, max-age=86400',  # Cache 24h
-            'Content-Length': str(len(user.profile_picture_data))
-        }
-    )
+    size = MediaStore.variant_size(request.args.get('size', type=int))
+    fmt = MediaStore.negotiate_format(request.accept_mimetypes, request.args.get('format'))
+
+    headers = {'Cache-Control': 'public, max-age=86400', 'Vary': 'Accept'}  # Cache 24h
+    etag = MediaStore.etag(content_hash, size, fmt)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    variant = MediaStore.load(content_hash, size, fmt)
+    if variant is None and fmt != 'jpeg':
+        # Stored without WebP (Pillow built without it at upload time)
+        fmt = 'jpeg'
+        etag = MediaStore.etag(content_hash, size, fmt)
+        variant = MediaStore.load(content_hash, size, fmt)
+    if variant is None:
+        # Variants released under a concurrent upload: drop the dangling hash
+        MediaStore.forget(user_id, content_hash)
+        db.session.commit()
+        abort(404)
+
+    data, mime_type = variant
+    response = Response(data, mimetype=mime_type, headers=headers)
+    response.set_etag(etag)
+    return response
 
 
 @settings_bp.route('/password', methods=['GET', 'POST'])
@@ -1868,8 +1868,9 @@ def delete_account():
             user.health_data_consent_date = None
 
             # Clear profile picture
-            user.profile_picture_data = None
-            user.profile_picture_mime = None
+            previous_hash = user.profile_picture_hash
+            user.profile_picture_hash = None
+            MediaStore.release(previous_hash)
 
             # Deactivate account
             user.is_active = False
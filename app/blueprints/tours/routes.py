@@ -23,9 +23,11 @@ from app.decorators import tour_access_required, tour_edit_required
 from app.decorators.billing import check_tour_limit, check_stop_limit
 from app.utils.audit import log_create, log_update, log_delete
 from app.utils.email import send_tour_stop_notification
+from app.services.job_tasks import enqueue_tour_stop_notification
 from app.utils.geo import calculate_stops_distances, get_tour_total_distance
 from app.utils.geocoding import geocode_address
 from app.utils.org_context import get_current_org_id, org_filter_kwargs, get_org_users
+from app.utils.perf import query_budget
 from app.blueprints.logistics.routes import get_visible_logistics
 
 
@@ -124,6 +126,7 @@ def get_users_by_category(users_list=None, assigned_ids=None):
 
 @tours_bp.route('/')
 @login_required
+@query_budget(10)
 def index():
     """List all tours for user's bands."""
     # Admin voit toutes les tournées de l'org
@@ -490,7 +493,7 @@ def add_stop(id, tour=None):
 
         # Send notification for new tour stop
         try:
-            send_tour_stop_notification(stop, 'created')
+            enqueue_tour_stop_notification(stop, 'created')
         except Exception as e:
             current_app.logger.error(f'Email notification tour stop créé échoué: {e}')
 
@@ -770,7 +773,7 @@ def edit_stop(id, stop_id, tour=None):
 
         # Send notification for updated tour stop
         try:
-            send_tour_stop_notification(stop, 'updated')
+            enqueue_tour_stop_notification(stop, 'updated')
         except Exception as e:
             current_app.logger.error(f'Email notification tour stop modifié échoué: {e}')
 
@@ -886,7 +889,7 @@ def delete_stop(id, stop_id, tour=None):
     """Delete a tour stop."""
     stop = TourStop.query.filter_by(id=stop_id, tour_id=id).first_or_404()
 
-    # Send notification before deletion
+    # Sent inline: the stop no longer exists when a worker would pick the job up
     try:
         send_tour_stop_notification(stop, 'cancelled')
     except Exception as e:
@@ -953,7 +956,7 @@ def reschedule_stop(id, stop_id, tour=None):
 
             # Notification du report
             try:
-                send_tour_stop_notification(stop, 'rescheduled')
+                enqueue_tour_stop_notification(stop, 'rescheduled')
             except Exception as e:
                 current_app.logger.error(f'Email notification report échoué: {e}')
 
@@ -1379,6 +1382,39 @@ def export_stop_ical(id, stop_id, tour=None):
     return response
 
 
+@tours_bp.route('/<int:id>/tour-book')
+@login_required
+@tour_access_required
+def tour_book(id, tour=None):
+    """
+    Export the tour book: day sheet, settlement and itinerary of every stop.
+
+    ?format=zip (one folder per stop, default) or ?format=pdf (merged, with
+    bookmarks). Rendered by the job queue: the response is the waiting page
+    showing the progress, then the download.
+    """
+    from app.blueprints.reports.routes import pdf_document_response
+    from app.services.pdf_render_cache import PdfRenderCache
+    from app.services.tour_book import TourBookService
+    from app.utils.pdf_generator import PDF_AVAILABLE
+
+    if not current_user.is_manager_or_above():
+        flash('Acces reserve aux managers.', 'error')
+        return redirect(url_for('tours.detail', id=id))
+
+    if not PDF_AVAILABLE:
+        flash('Module reportlab non installe. Executez: pip install reportlab', 'error')
+        return redirect(url_for('tours.detail', id=id))
+
+    fmt = TourBookService.book_format(request.args.get('format'))
+    try:
+        return pdf_document_response(PdfRenderCache.document('tour_book_pdf' if fmt == 'pdf' else 'tour_book', id))
+    except Exception as e:
+        current_app.logger.error(f'Tour book generation failed for tour {id}: {e}')
+        flash('Erreur lors de la génération du tour book.', 'error')
+        return redirect(url_for('tours.detail', id=id))
+
+
 @tours_bp.route('/<int:id>/calendar.ics')
 def calendar_feed(id):
     """
@@ -1391,16 +1427,22 @@ def calendar_feed(id):
         1. Copy the URL with token: /tours/123/calendar.ics?token=xxx
         2. In Google Calendar: Add calendar → From URL → Paste URL
         3. Calendar will auto-sync updates
+
+    Polls carrying the current ETag (If-None-Match) get a 304 after a single
+    aggregate query; otherwise only the stops that changed are re-serialized.
     """
     from app.utils.ical import generate_tour_ical
+    from app.utils.ical_feed import feed_etag, ical_response, not_modified, tour_feed_state
 
     # Check token authentication for public access
     token = request.args.get('token')
-    tour = Tour.query.get_or_404(id)
+    state = tour_feed_state(id)
+    if state is None:
+        abort(404)
 
     # If user is logged in, allow access
     if current_user.is_authenticated:
-        if not tour.can_view(current_user):
+        if not db.session.get(Tour, id).can_view(current_user):
             abort(403)
     else:
         # For anonymous access, require valid token
@@ -1408,21 +1450,23 @@ def calendar_feed(id):
             abort(401, description="Token requis pour accès au calendrier. Connectez-vous ou utilisez un lien avec token.")
 
         # Validate token (simple hash of tour_id + band_id + secret)
-        expected_token = _generate_calendar_token(tour)
+        expected_token = _generate_calendar_token(state)
         if token != expected_token:
             abort(403, description="Token invalide")
 
-    ical_content = generate_tour_ical(tour, include_alarms=False)  # No alarms for feeds
+    # Allow caching for 1 hour (feeds are polled periodically), then revalidate
+    cache_control = 'public, max-age=3600'
+    etag = feed_etag('tour-feed', state)
+    response = not_modified(etag, cache_control)
+    if response is not None:
+        return response
 
-    response = Response(ical_content, mimetype='text/calendar')
-    response.headers['Content-Type'] = 'text/calendar; charset=utf-8'
-    # Allow caching for 1 hour (feeds are polled periodically)
-    response.headers['Cache-Control'] = 'public, max-age=3600'
-    return response
+    ical_content = generate_tour_ical(db.session.get(Tour, id), include_alarms=False)  # No alarms for feeds
+    return ical_response(ical_content, etag, cache_control=cache_control)
 
 
 def _generate_calendar_token(tour):
-    """Generate a simple token for calendar feed authentication."""
+    """Generate a simple token for calendar feed authentication (uses tour.id and tour.band_id)."""
     import hashlib
     from flask import current_app
 
@@ -3,6 +3,7 @@ Configuration classes for GigRoute application.
 Supports Development, Testing, and Production environments.
 """
 import os
+import tempfile
 from datetime import timedelta
 
 
@@ -60,9 +61,59 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@gigroute.app')
 
+    # Notification dispatcher (async emails + push: bounded queue, fixed worker pool)
+    NOTIFICATION_QUEUE_SIZE = int(os.environ.get('NOTIFICATION_QUEUE_SIZE', 1000))
+    NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS', 2))
+    NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 50))  # jobs coalesced per worker pass
+    NOTIFICATION_ENQUEUE_TIMEOUT = float(os.environ.get('NOTIFICATION_ENQUEUE_TIMEOUT', 0.5))  # then caller runs it
+    NOTIFICATION_SMTP_IDLE_TIMEOUT = int(os.environ.get('NOTIFICATION_SMTP_IDLE_TIMEOUT', 30))  # seconds
+    NOTIFICATION_DISPATCH_SYNC = False
+
+    # Persistent job queue (flask worker: reminders, invoice emails, tour stop notifications)
+    JOB_WORKER_BATCH_SIZE = int(os.environ.get('JOB_WORKER_BATCH_SIZE', 10))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 5))  # seconds
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+    JOB_RETRY_BASE_DELAY = int(os.environ.get('JOB_RETRY_BASE_DELAY', 60))  # seconds, doubled per attempt
+    JOB_RETRY_MAX_DELAY = int(os.environ.get('JOB_RETRY_MAX_DELAY', 3600))
+    JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT', 900))  # running longer = worker died
+    # No `flask worker` deployed (single web service): run handlers in the enqueuing process
+    JOBS_INLINE = os.environ.get('JOBS_INLINE', 'false').lower() == 'true'
+
+    # Calendar sync (batched Google Calendar / Microsoft Graph calls, run by flask worker)
+    GOOGLE_CALENDAR_API_URL = os.environ.get('GOOGLE_CALENDAR_API_URL', 'https://www.googleapis.com')
+    MICROSOFT_GRAPH_API_URL = os.environ.get('MICROSOFT_GRAPH_API_URL', 'https://graph.microsoft.com/v1.0')
+    CALENDAR_SYNC_TIMEOUT = int(os.environ.get('CALENDAR_SYNC_TIMEOUT', 30))  # seconds per batch call
+
+    # Request instrumentation (query count / DB time per request, /admin/perf)
+    PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION', 'true').lower() == 'true'
+    # Server-Timing header exposes query counts / DB time to every visitor: off unless enabled
+    PERF_SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING', 'false').lower() == 'true'
+    PERF_SAMPLE_SIZE = int(os.environ.get('PERF_SAMPLE_SIZE', 500))  # recent requests kept per endpoint
+    PERF_ENFORCE_BUDGETS = False  # @query_budget overruns recorded as violations (tests)
+
+    # iCal exports: serialized VEVENTs cached per stop / crew slot (keys change with the rows)
+    ICAL_EVENT_CACHE_TIMEOUT = int(os.environ.get('ICAL_EVENT_CACHE_TIMEOUT', 7 * 24 * 3600))
+
+    # flask db-index-report: sequential scans flagged on tables with at least this many rows
+    INDEX_AUDIT_MIN_ROWS = int(os.environ.get('INDEX_AUDIT_MIN_ROWS', 1000))
+
+    # CSV / XLSX exports: rows fetched per server-side cursor batch (lookups preloaded per batch)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 500))
+
+    # PDF render cache (app/services/pdf_render_cache.py): content-addressed files on local disk
+    PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR')  # default: <tmp>/gigroute-pdf-cache
+    PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # LRU eviction above
+    PDF_ASYNC_MIN_ROWS = int(os.environ.get('PDF_ASYNC_MIN_ROWS', 150))  # larger documents rendered by `flask worker`
+    # Tour book (app/services/tour_book.py): processes rendering the per-stop documents (1: no pool)
+    TOUR_BOOK_WORKERS = int(os.environ.get('TOUR_BOOK_WORKERS', min(4, os.cpu_count() or 1)))
+
     # Caching
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300
+    # Shared SQLite cache (app.utils.shared_cache.SQLiteCache): one file for all workers on the host
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')  # default: <tmp>/gigroute-cache.sqlite
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 5000))  # entries before LRU eviction
+    USER_CONTEXT_CACHE_TTL = 300  # seconds (navbar counters; invalidated on change anyway)
 
     # Pagination
     ITEMS_PER_PAGE = 20
@@ -74,6 +125,14 @@ class Config:
     # France uses API Adresse (free, unlimited), international uses Geoapify (3000/day free)
     GEOAPIFY_API_KEY = os.environ.get('GEOAPIFY_API_KEY')
 
+    # Geocoding (Nominatim) - bulk pipeline (flask geocode-venues)
+    # Public Nominatim allows 1 req/s: raise the rate only for a self-hosted instance
+    GEOCODING_BASE_URL = os.environ.get('GEOCODING_BASE_URL', 'https://nominatim.openstreetmap.org')
+    GEOCODING_RATE_LIMIT = float(os.environ.get('GEOCODING_RATE_LIMIT', 1.0))  # requests/second
+    GEOCODING_WORKERS = int(os.environ.get('GEOCODING_WORKERS', 4))
+    GEOCODE_CACHE_TTL_DAYS = int(os.environ.get('GEOCODE_CACHE_TTL_DAYS', 180))
+    GEOCODE_NEGATIVE_TTL_DAYS = int(os.environ.get('GEOCODE_NEGATIVE_TTL_DAYS', 14))
+
     # JWT (separate key for API tokens — falls back to SECRET_KEY if not set)
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
 
@@ -102,6 +161,9 @@ class DevelopmentConfig(Config):
     # More verbose logging in development
     SQLALCHEMY_ECHO = False
 
+    # Query count / DB time in the browser devtools
+    PERF_SERVER_TIMING = True
+
 
 class TestingConfig(Config):
     """Testing configuration."""
@@ -127,14 +189,35 @@ class TestingConfig(Config):
     STRIPE_PRO_PRICE_ID = 'price_test_pro_monthly'
     APP_URL = 'http://localhost'
 
+    # Render tour books in-process (tests opt into the process pool)
+    TOUR_BOOK_WORKERS = 1
+
     # Use in-memory cache for tests
     CACHE_TYPE = 'SimpleCache'
 
+    # Deliver notifications inline (no worker threads in tests)
+    NOTIFICATION_DISPATCH_SYNC = True
+
+    # A view running more queries than its @query_budget fails the test
+    PERF_ENFORCE_BUDGETS = True
+    PERF_SERVER_TIMING = True
+
     # Server name for url_for in tests
     SERVER_NAME = 'localhost'
     PREFERRED_URL_SCHEME = 'http'
 
 
+class BenchmarkConfig(TestingConfig):
+    """Benchmark suite (benchmarks/): file SQLite by default, or a local Postgres."""
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(tempfile.gettempdir(), 'gigroute-bench.sqlite')
+
+    # Measure the views, not the budget bookkeeping or debug toolbars
+    DEBUG = False
+    PERF_ENFORCE_BUDGETS = False
+
+
 class ProductionConfig(Config):
     """Production configuration."""
 
@@ -154,9 +237,10 @@ class ProductionConfig(Config):
     # Redis for rate limiting (REQUIRED in production for multi-worker consistency)
     RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
 
-    # Redis for caching (REQUIRED in production for multi-worker consistency)
+    # Redis for caching when available, otherwise the shared SQLite cache
+    # (SimpleCache would give each Gunicorn worker its own cache and invalidations)
     _redis_url = os.environ.get('REDIS_URL')
-    CACHE_TYPE = 'RedisCache' if _redis_url else 'SimpleCache'
+    CACHE_TYPE = 'RedisCache' if _redis_url else 'app.utils.shared_cache.SQLiteCache'
     CACHE_REDIS_URL = _redis_url
     CACHE_DEFAULT_TIMEOUT = 600
 
@@ -194,9 +278,9 @@ class ProductionConfig(Config):
         # Warn about Redis (critical for multi-worker deployments)
         if not os.environ.get('REDIS_URL'):
             logger.warning(
-                "REDIS_URL not set — cache and rate limiter use in-memory storage. "
-                "Each Gunicorn worker has independent counters and cache. "
-                "Set REDIS_URL for production multi-worker consistency."
+                "REDIS_URL not set — cache uses the shared SQLite file, rate limiter uses "
+                "in-memory storage (each Gunicorn worker has independent counters). "
+                "Set REDIS_URL for multi-host consistency."
             )
 
         # Warn about Sentry
@@ -218,6 +302,7 @@ class ProductionConfig(Config):
 config = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
+    'benchmark': BenchmarkConfig,
     'production': ProductionConfig,
     'default': DevelopmentConfig
 }
@@ -7,6 +7,7 @@ from flask import abort, flash, redirect, url_for, request
 from flask_login import current_user, login_required
 
 from app.models.user import AccessLevel
+from app.utils.authz import get_authz
 from app.utils.org_context import get_current_org_id
 
 
@@ -17,7 +18,7 @@ def _verify_org_owns_band(band):
     """
     current_org = get_current_org_id()
     if current_org and band and band.org_id and band.org_id != current_org:
-        if not getattr(current_user, 'is_superadmin', False):
+        if not get_authz().is_superadmin:
             abort(404)
 
 
@@ -169,23 +170,23 @@ def band_access_required(f):
     @login_required
     def decorated_function(*args, **kwargs):
         from app.models.band import Band
-        from app.utils.org_context import get_current_org_id
 
         band_id = kwargs.get('band_id') or kwargs.get('id')
         if not band_id:
             abort(400)
 
         band = Band.query.get_or_404(band_id)
+        authz = get_authz()
 
         # Verify band belongs to user's current org (tenant isolation)
         current_org = get_current_org_id()
         if current_org and band.org_id and band.org_id != current_org:
             # Superadmins can bypass org check
-            if not getattr(current_user, 'is_superadmin', False):
+            if not authz.is_superadmin:
                 abort(404)  # 404 not 403 — don't leak existence
 
         # Allow access if user is admin, manager, member, or has manage_band permission
-        if not (band.has_access(current_user) or
+        if not (authz.can_access_band(band.id) or
                 current_user.has_permission('manage_band') or
                 current_user.is_admin()):
             flash('Vous n\'avez pas accès à ce groupe.', 'error')
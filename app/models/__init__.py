@@ -25,7 +25,7 @@ from app.models.tour_stop import (
 )
 from app.models.lineup import LineupSlot, PerformerType, PERFORMER_TYPE_LABELS
 from app.models.ticket_tier import TicketTier
-from app.models.guestlist import GuestlistEntry
+from app.models.guestlist import GuestlistEntry, GuestlistTombstone
 from app.models.logistics import LogisticsInfo, LocalContact, PromotorExpenses, LogisticsAssignment
 from app.models.document import Document, DocumentType, DocumentShare, ShareType
 from app.models.notification import Notification, NotificationType, NotificationCategory
@@ -90,6 +90,22 @@ from app.models.subscription import (
 )
 # Security Breach (RGPD Art. 33-34)
 from app.models.security_breach import SecurityBreach, BreachSeverity, BreachStatus
+# Reporting — materialized per-stop financial figures
+from app.models.financial_snapshot import StopFinancialSnapshot
+# Global search index
+from app.models.search_document import SearchDocument
+# Geocoding cache (bulk venue geocoding)
+from app.models.geocode_cache import GeocodeCache
+# Background jobs (flask worker)
+from app.models.job import Job, JobStatus
+# External calendar sync state (Google / Outlook)
+from app.models.calendar_sync_state import CalendarSyncState
+# Gap-free numbering (payment references, invoice numbers)
+from app.models.document_sequence import DocumentSequence
+# Per-user calendar feed index
+from app.models.user_calendar_event import UserCalendarEvent
+# Content-addressed images (profile pictures)
+from app.models.media import MediaVariant
 # AuditLog is in app/utils/audit.py (enriched existing model)
 
 __all__ = [
@@ -139,6 +155,7 @@ __all__ = [
     'TicketTier',
     # Guestlist
     'GuestlistEntry',
+    'GuestlistTombstone',
     # Logistics
     'LogisticsInfo',
     'LocalContact',
@@ -213,4 +230,21 @@ __all__ = [
     'SecurityBreach',
     'BreachSeverity',
     'BreachStatus',
+    # === REPORTING ===
+    'StopFinancialSnapshot',
+    # === SEARCH ===
+    'SearchDocument',
+    # === GEOCODING ===
+    'GeocodeCache',
+    # === BACKGROUND JOBS ===
+    'Job',
+    'JobStatus',
+    # === CALENDAR SYNC ===
+    'CalendarSyncState',
+    # === NUMBERING ===
+    'DocumentSequence',
+    # === CALENDAR FEED ===
+    'UserCalendarEvent',
+    # === MEDIA ===
+    'MediaVariant',
 ]
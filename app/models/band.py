@@ -4,8 +4,12 @@ Band and BandMembership models.
 from datetime import datetime
 
 from flask import url_for
+from sqlalchemy import func, select
+from sqlalchemy.orm import query_expression, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.extensions import db
+from app.utils.authz import authz_for
 
 
 class Band(db.Model):
@@ -61,9 +65,50 @@ class Band(db.Model):
         cascade='all, delete-orphan'
     )
 
+    # Tour count for list serialization: computed in the listing query
+    # (Band.with_tour_counts) or for a batch of bands (Band.load_tour_counts).
+    # None until loaded; reading it never loads the tours.
+    tours_count = query_expression()
+
     def __repr__(self):
         return f'<Band {self.name}>'
 
+    @classmethod
+    def with_tour_counts(cls):
+        """
+        Loader options computing the tour count in the listing query.
+
+        Usage:
+            Band.query.options(*Band.with_tour_counts())
+        """
+        from app.models.tour import Tour
+        return [with_expression(
+            cls.tours_count,
+            select(func.count(Tour.id)).where(Tour.band_id == cls.id).correlate(cls).scalar_subquery()
+        )]
+
+    @classmethod
+    def load_tour_counts(cls, bands):
+        """
+        Fill the tour count of the bands that lack it, in one grouped query.
+
+        Args:
+            bands: Band instances (those already carrying a count are skipped)
+        """
+        from app.models.tour import Tour
+        missing = [band for band in bands if band.tours_count is None]
+        if not missing:
+            return
+
+        ids = [band.id for band in missing if band.id is not None]
+        counts = {}
+        if ids:
+            counts = dict(db.session.execute(
+                select(Tour.band_id, func.count(Tour.id)).where(Tour.band_id.in_(ids)).group_by(Tour.band_id)
+            ).all())
+        for band in missing:
+            set_committed_value(band, 'tours_count', counts.get(band.id, 0))
+
     @property
     def members(self):
         """Get all members of the band."""
@@ -85,6 +130,9 @@ class Band(db.Model):
 
     def is_member(self, user):
         """Check if a user is a member of the band."""
+        authz = authz_for(user) if self.id is not None else None
+        if authz is not None:
+            return authz.is_member(self.id)
         return any(m.user_id == user.id for m in self.memberships)
 
     def is_manager(self, user):
@@ -93,6 +141,9 @@ class Band(db.Model):
 
     def has_access(self, user):
         """Check if user has any access to this band."""
+        authz = authz_for(user) if self.id is not None else None
+        if authz is not None:
+            return authz.can_access_band(self.id)
         return self.is_manager(user) or self.is_member(user)
 
     @property
@@ -0,0 +1,35 @@
+"""
+Calendar sync state model - one row per tour stop pushed to an external
+calendar (Google / Outlook) for a user.
+Stores the remote event ID and a hash of the last pushed event body, so a
+sync only inserts new stops, patches changed ones and deletes removed ones.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class CalendarSyncState(db.Model):
+    """Remote calendar event mirroring a TourStop for one user and provider."""
+
+    __tablename__ = 'calendar_sync_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    provider = db.Column(db.String(20), nullable=False)  # OAuthProvider value
+
+    # No FK: the row must outlive a deleted stop so its remote event can be deleted
+    tour_stop_id = db.Column(db.Integer, nullable=False)
+
+    remote_event_id = db.Column(db.String(1024), nullable=False)
+    # SHA-256 of the pushed event body (see app.services.calendar_sync.event_content_hash)
+    content_hash = db.Column(db.String(64), nullable=False)
+
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'provider', 'tour_stop_id', name='uq_calendar_sync_state_stop'),
+    )
+
+    def __repr__(self):
+        return f'<CalendarSyncState {self.provider} user={self.user_id} stop={self.tour_stop_id}>'
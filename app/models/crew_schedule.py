@@ -183,6 +183,7 @@ class CrewAssignment(db.Model):
     assigned_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
     confirmed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     slot = db.relationship('CrewScheduleSlot', back_populates='assignments')
@@ -0,0 +1,31 @@
+"""
+Document sequence model - per (prefix, year, org) numbering counters for
+payment references (PAY-YYYY-NNNNN) and invoice numbers (FACT / AV).
+Numbers are taken by incrementing next_value inside the caller's
+transaction: the row stays locked until commit, and a rollback gives the
+numbers back, so the series has no gaps and no duplicates.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class DocumentSequence(db.Model):
+    """Next number to hand out for one document series."""
+
+    __tablename__ = 'document_sequences'
+
+    id = db.Column(db.Integer, primary_key=True)
+    prefix = db.Column(db.String(10), nullable=False)   # PAY, FACT, AV
+    year = db.Column(db.Integer, nullable=False)
+    # 0 = numbering shared by all organizations (references are globally unique today)
+    org_id = db.Column(db.Integer, nullable=False, default=0)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('prefix', 'year', 'org_id', name='uq_document_sequences_scope'),
+    )
+
+    def __repr__(self):
+        return f'<DocumentSequence {self.prefix}-{self.year} org={self.org_id} next={self.next_value}>'
@@ -0,0 +1,88 @@
+"""
+StopFinancialSnapshot model - materialized per-stop financial figures.
+
+One row per TourStop, recomputed whenever the stop or one of the rows
+feeding its financials (TicketTier, PromotorExpenses, LogisticsInfo, Venue)
+changes. The reports dashboard, settlements list and API summary aggregate
+these rows in SQL instead of recomputing every stop in Python.
+
+Maintenance logic lives in app/services/financial_snapshots.py.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class StopFinancialSnapshot(db.Model):
+    """Pre-computed financial figures for a single tour stop."""
+
+    __tablename__ = 'stop_financial_snapshot'
+
+    # One snapshot per stop (removed with the stop)
+    tour_stop_id = db.Column(
+        db.Integer,
+        db.ForeignKey('tour_stops.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+    # Scoping (denormalized for GROUP BY / filtering without joins)
+    tour_id = db.Column(db.Integer, db.ForeignKey('tours.id', ondelete='CASCADE'), nullable=True, index=True)
+    band_id = db.Column(db.Integer, db.ForeignKey('bands.id', ondelete='CASCADE'), nullable=True, index=True)
+
+    # Event info (copied for list display)
+    stop_date = db.Column(db.Date, nullable=True, index=True)
+    month_key = db.Column(db.String(7), nullable=True, index=True)  # 'YYYY-MM'
+    status = db.Column(db.String(20))
+    has_venue = db.Column(db.Boolean, default=False, nullable=False)
+    venue_name = db.Column(db.String(100))
+    venue_city = db.Column(db.String(100))
+    venue_country = db.Column(db.String(100))
+    currency = db.Column(db.String(3), default='EUR')
+
+    # Deal structure
+    guarantee = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    venue_rental_cost = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    door_deal_percentage = db.Column(db.Numeric(5, 2), default=0, nullable=False)
+    ticketing_fee_percentage = db.Column(db.Numeric(5, 2), default=0, nullable=False)
+
+    # Box office
+    capacity = db.Column(db.Integer, default=0, nullable=False)
+    sold_tickets = db.Column(db.Integer, default=0, nullable=False)
+    fill_rate = db.Column(db.Float, default=0, nullable=False)
+    ticket_price = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    has_tiers = db.Column(db.Boolean, default=False, nullable=False)
+    ticket_revenue = db.Column(db.Numeric(14, 4), default=0, nullable=False)  # GBOR
+    ticketing_fees = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    net_ticket_revenue = db.Column(db.Numeric(14, 4), default=0, nullable=False)  # NBOR
+    door_deal_revenue = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    total_estimated_revenue = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+
+    # Settlement
+    promoter_expenses_total = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    artist_payment = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    payment_type = db.Column(db.String(20))  # 'guarantee', 'door_deal', 'split_point'
+
+    # Logistics costs (informatif)
+    logistics_transport = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    logistics_accommodation = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    logistics_equipment = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    logistics_services = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    logistics_total = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+    logistics_unpaid = db.Column(db.Numeric(14, 4), default=0, nullable=False)
+
+    # Timestamps
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    tour_stop = db.relationship(
+        'TourStop',
+        backref=db.backref(
+            'financial_snapshot',
+            uselist=False,
+            cascade='all, delete-orphan',
+            passive_deletes=True
+        )
+    )
+
+    def __repr__(self):
+        return f'<StopFinancialSnapshot stop={self.tour_stop_id} total={self.total_estimated_revenue}>'
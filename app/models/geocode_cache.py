@@ -0,0 +1,42 @@
+"""
+Geocode cache model - persistent Nominatim results.
+One row per normalized address, storing hits and negative results
+(address unknown) until expires_at, so bulk imports never query the
+provider twice for the same address.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class GeocodeCache(db.Model):
+    """Cached geocoding result for a normalized address."""
+
+    __tablename__ = 'geocode_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # SHA-256 of the normalized query (see app.utils.geocoding.address_cache_key)
+    address_key = db.Column(db.String(64), nullable=False, unique=True)
+    normalized_query = db.Column(db.Text, nullable=False)  # For debugging
+
+    # NULL coordinates = negative result (provider found nothing)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        status = f'({self.latitude}, {self.longitude})' if self.found else 'not found'
+        return f'<GeocodeCache {self.normalized_query!r} {status}>'
+
+    @property
+    def found(self):
+        """True if the provider returned coordinates for this address."""
+        return self.latitude is not None and self.longitude is not None
+
+    @property
+    def is_expired(self):
+        """Check if the cached result should be refreshed."""
+        return self.expires_at <= datetime.utcnow()
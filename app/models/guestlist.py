@@ -99,6 +99,12 @@ class GuestlistEntry(db.Model):
     # Check-in details
     checked_in_at = db.Column(db.DateTime)
     checked_in_plus_ones = db.Column(db.Integer, default=0)
+    # Clé d'idempotence du scan hors-ligne ayant validé l'entrée
+    checkin_client_id = db.Column(db.String(64))
+
+    # Offline sync: stop guestlist_version at which this entry last changed
+    # (assigned by app/services/guestlist_sync.py on flush)
+    sync_version = db.Column(db.Integer, default=0, nullable=False, server_default='0')
 
     # Notes
     notes = db.Column(db.Text)
@@ -108,6 +114,11 @@ class GuestlistEntry(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_guestlist_entries_stop_sync_version', 'tour_stop_id', 'sync_version'),
+        db.Index('ix_guestlist_entries_stop_status', 'tour_stop_id', 'status'),
+    )
+
     # Relationships
     tour_stop = db.relationship('TourStop', back_populates='guestlist_entries')
 
@@ -261,3 +272,31 @@ class GuestlistEntry(db.Model):
     def allowed_transitions(self):
         """Get list of allowed status transitions from current state."""
         return GUESTLIST_STATUS_TRANSITIONS.get(self.status, [])
+
+
+class GuestlistTombstone(db.Model):
+    """
+    Deleted guestlist entry marker for offline sync.
+
+    Lets /guestlist/snapshot?since=<version> tell scanner apps which
+    entries disappeared since their last sync.
+    """
+
+    __tablename__ = 'guestlist_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tour_stop_id = db.Column(
+        db.Integer,
+        db.ForeignKey('tour_stops.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    entry_id = db.Column(db.Integer, nullable=False)
+    sync_version = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_guestlist_tombstones_stop_sync_version', 'tour_stop_id', 'sync_version'),
+    )
+
+    def __repr__(self):
+        return f'<GuestlistTombstone entry={self.entry_id} v{self.sync_version}>'
@@ -164,21 +164,12 @@ class Invoice(db.Model):
     @staticmethod
     def generate_number(invoice_type=InvoiceType.INVOICE):
         """Generate unique invoice number: FACT-YYYY-NNNNN or AV-YYYY-NNNNN"""
-        year = datetime.utcnow().year
-        prefix = 'AV' if invoice_type == InvoiceType.CREDIT_NOTE else 'FACT'
+        from app.services.document_sequences import (
+            DocumentSequenceService, PREFIX_CREDIT_NOTE, PREFIX_INVOICE,
+        )
 
-        last_invoice = Invoice.query.filter(
-            Invoice.number.like(f'{prefix}-{year}-%'),
-            Invoice.type == invoice_type
-        ).order_by(Invoice.id.desc()).first()
-
-        if last_invoice:
-            last_num = int(last_invoice.number.split('-')[2])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-
-        return f'{prefix}-{year}-{new_num:05d}'
+        prefix = PREFIX_CREDIT_NOTE if invoice_type == InvoiceType.CREDIT_NOTE else PREFIX_INVOICE
+        return DocumentSequenceService.next_numbers(prefix)[0]
 
     @property
     def is_overdue(self):
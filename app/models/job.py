@@ -0,0 +1,55 @@
+"""
+Background job model - persistent queue processed by `flask worker`.
+Reminders, invoice emails and mass notifications are enqueued here
+instead of being sent inline, so a crash halfway is resumed (not
+replayed) and failures are retried with backoff.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class JobStatus:
+    """Statuts d'un job."""
+    PENDING = 'pending'    # Waiting for run_at
+    RUNNING = 'running'    # Claimed by a worker
+    DONE = 'done'
+    FAILED = 'failed'      # max_attempts reached (dead letter)
+
+
+class Job(db.Model):
+    """A unit of background work (task name + JSON payload)."""
+
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+
+    # Same key = same job: enqueueing twice is a no-op (e.g. reminder:<stop>:<user>:j7)
+    idempotency_key = db.Column(db.String(255), unique=True)
+
+    status = db.Column(db.String(20), nullable=False, default=JobStatus.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Claim
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Claim query: WHERE status = 'pending' AND run_at <= now ORDER BY run_at
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.task} {self.status} attempt={self.attempts}>'
+
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
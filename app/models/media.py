@@ -0,0 +1,35 @@
+"""
+Media variant model - content-addressed image store.
+One row per (image hash, size, format): every size of an uploaded image is
+pre-generated in WebP and JPEG (see app.services.media_store). Rows that
+reference an image (users.profile_picture_hash) only keep the hash; the
+bytes are deferred and read only when a variant is served.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class MediaVariant(db.Model):
+    """One pre-generated size/format of a stored image."""
+
+    __tablename__ = 'media_variants'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # SHA-256 of the uploaded file (see MediaStore.content_hash)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)  # Bounding box in pixels (48, 96, 200)
+    format = db.Column(db.String(10), nullable=False)  # webp | jpeg
+    mime_type = db.Column(db.String(50), nullable=False)
+    byte_size = db.Column(db.Integer, nullable=False)
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'size', 'format', name='uq_media_variants_hash_size_format'),
+    )
+
+    def __repr__(self):
+        return f'<MediaVariant {self.content_hash[:12]} {self.size}px {self.format}>'
@@ -50,6 +50,11 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read_at = db.Column(db.DateTime)
 
+    # Unread badge and notification list: WHERE user_id = ? AND is_read = ? ORDER BY created_at DESC
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
     # Relations
     user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic',
                                                        order_by='Notification.created_at.desc()'))
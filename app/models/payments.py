@@ -213,6 +213,11 @@ class TeamMemberPayment(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
 
+    __table_args__ = (
+        db.Index('ix_team_member_payments_tour_status', 'tour_id', 'status'),
+        db.Index('ix_team_member_payments_user_work_date', 'user_id', 'work_date'),
+    )
+
     # Relations
     user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('payments_received', lazy='dynamic'))
     tour = db.relationship('Tour', backref=db.backref('team_payments', lazy='dynamic'))
@@ -227,18 +232,9 @@ class TeamMemberPayment(db.Model):
     @staticmethod
     def generate_reference():
         """Generate unique payment reference: PAY-YYYY-NNNNN"""
-        year = datetime.utcnow().year
-        last_payment = TeamMemberPayment.query.filter(
-            TeamMemberPayment.reference.like(f'PAY-{year}-%')
-        ).order_by(TeamMemberPayment.id.desc()).first()
-
-        if last_payment:
-            last_num = int(last_payment.reference.split('-')[2])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-
-        return f'PAY-{year}-{new_num:05d}'
+        from app.services.document_sequences import DocumentSequenceService, PREFIX_PAYMENT
+
+        return DocumentSequenceService.next_numbers(PREFIX_PAYMENT)[0]
 
     @property
     def total_amount(self):
@@ -0,0 +1,43 @@
+"""
+Search document model - unified global search index.
+One row per searchable entity (tour, venue, band, guestlist entry),
+holding accent-stripped, lowercased text for fast ranked matching.
+
+On PostgreSQL, normalized_text carries a pg_trgm GIN index (created by
+migration). Maintenance and querying live in app/services/search_index.py.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class SearchDocument(db.Model):
+    """Denormalized search entry for a tour, venue, band or guest."""
+
+    __tablename__ = 'search_documents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # tour, venue, band, guest
+    entity_id = db.Column(db.Integer, nullable=False)
+
+    # Scoping: venues by organization, everything else by band
+    org_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='CASCADE'), nullable=True)
+    band_id = db.Column(db.Integer, db.ForeignKey('bands.id', ondelete='CASCADE'), nullable=True)
+
+    # Display fields returned by the search API
+    title = db.Column(db.String(255), nullable=False)
+    subtitle = db.Column(db.String(255))  # city (venue) or status (tour, guest)
+
+    # Accent-free, lowercased text matched against the query
+    normalized_text = db.Column(db.Text, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+        db.Index('ix_search_documents_org', 'org_id'),
+        db.Index('ix_search_documents_band', 'band_id'),
+    )
+
+    def __repr__(self):
+        return f'<SearchDocument {self.entity_type}:{self.entity_id} {self.title!r}>'
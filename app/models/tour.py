@@ -1,10 +1,15 @@
 """
 Tour model with state machine for status transitions.
 """
-from datetime import datetime
+from datetime import date, datetime
 import enum
 
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import query_expression, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+
 from app.extensions import db
+from app.utils.authz import authz_for
 
 
 class TourStatus(enum.Enum):
@@ -55,6 +60,10 @@ class Tour(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_tours_band_start_date', 'band_id', 'start_date'),
+    )
+
     # Relationships
     band = db.relationship('Band', back_populates='tours')
 
@@ -65,9 +74,77 @@ class Tour(db.Model):
         order_by='TourStop.date'
     )
 
+    # Stop counts for list serialization: computed in the listing query
+    # (Tour.with_stop_counts) or for a batch of tours (Tour.load_stop_counts).
+    # None until loaded; reading them never loads the stops.
+    stops_count = query_expression()
+    upcoming_stops_count = query_expression()
+    past_stops_count = query_expression()
+
     def __repr__(self):
         return f'<Tour {self.name}>'
 
+    # ============================================================
+    # STOP COUNTS
+    # ============================================================
+
+    @staticmethod
+    def _stop_count_columns(today):
+        """(total, upcoming, past) aggregates over TourStop, same split as upcoming_stops / past_stops."""
+        from app.models.tour_stop import TourStop
+        return (
+            func.count(TourStop.id),
+            func.coalesce(func.sum(case((TourStop.date >= today, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((TourStop.date < today, 1), else_=0)), 0),
+        )
+
+    @classmethod
+    def with_stop_counts(cls):
+        """
+        Loader options computing the stop counts in the listing query.
+
+        Each count is a correlated subquery on ix_tour_stops_tour_date.
+
+        Usage:
+            Tour.query.options(*Tour.with_stop_counts())
+        """
+        from app.models.tour_stop import TourStop
+        attributes = (cls.stops_count, cls.upcoming_stops_count, cls.past_stops_count)
+        return [
+            with_expression(attribute, select(column).where(TourStop.tour_id == cls.id)
+                            .correlate(cls).scalar_subquery())
+            for attribute, column in zip(attributes, cls._stop_count_columns(date.today()))
+        ]
+
+    @classmethod
+    def load_stop_counts(cls, tours):
+        """
+        Fill the stop counts of the tours that lack them, in one grouped query.
+
+        Args:
+            tours: Tour instances (those already carrying counts are skipped)
+        """
+        from app.models.tour_stop import TourStop
+        missing = [tour for tour in tours if tour.stops_count is None]
+        if not missing:
+            return
+
+        ids = [tour.id for tour in missing if tour.id is not None]
+        counts = {}
+        if ids:
+            counts = {
+                row[0]: tuple(row[1:]) for row in db.session.execute(
+                    select(TourStop.tour_id, *cls._stop_count_columns(date.today()))
+                    .where(TourStop.tour_id.in_(ids))
+                    .group_by(TourStop.tour_id)
+                )
+            }
+        for tour in missing:
+            total, upcoming, past = counts.get(tour.id, (0, 0, 0))
+            set_committed_value(tour, 'stops_count', total)
+            set_committed_value(tour, 'upcoming_stops_count', upcoming)
+            set_committed_value(tour, 'past_stops_count', past)
+
     # ============================================================
     # SAFE BAND ACCESS PROPERTIES (handle orphaned tours)
     # ============================================================
@@ -111,14 +188,12 @@ class Tour(db.Model):
     @property
     def upcoming_stops(self):
         """Get upcoming tour stops."""
-        from datetime import date
         today = date.today()
         return [stop for stop in self.stops if stop.date >= today]
 
     @property
     def past_stops(self):
         """Get past tour stops."""
-        from datetime import date
         today = date.today()
         return [stop for stop in self.stops if stop.date < today]
 
@@ -130,6 +205,9 @@ class Tour(db.Model):
 
     def can_edit(self, user):
         """Check if user can edit this tour."""
+        authz = authz_for(user) if self.band_id is not None else None
+        if authz is not None:
+            return authz.manages_band(self.band_id) or user.is_manager_or_above()
         # Defensive: handle case where band relationship is broken
         if self.band is None:
             return user.is_manager_or_above()
@@ -138,6 +216,9 @@ class Tour(db.Model):
 
     def can_view(self, user):
         """Check if user can view this tour."""
+        authz = authz_for(user) if self.band_id is not None else None
+        if authz is not None:
+            return authz.can_access_band(self.band_id) or user.is_staff_or_above()
         # Defensive: handle case where band relationship is broken
         if self.band is None:
             return user.is_staff_or_above()
@@ -327,6 +327,10 @@ class TourStop(db.Model):
             'tour_id IS NOT NULL OR band_id IS NOT NULL',
             name='check_tour_or_band_required'
         ),
+        # Stops are listed per tour / band in date order
+        db.Index('ix_tour_stops_tour_date', 'tour_id', 'date'),
+        db.Index('ix_tour_stops_band_date', 'band_id', 'date'),
+        db.Index('ix_tour_stops_venue_id', 'venue_id'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -439,6 +443,9 @@ class TourStop(db.Model):
     reschedule_count = db.Column(db.Integer, default=0)  # Nombre de reports
     rescheduled_at = db.Column(db.DateTime, nullable=True)  # Timestamp du report
 
+    # Offline guestlist sync: bumped on every guestlist change (monotonic per stop)
+    guestlist_version = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+
     # Relationships
     tour = db.relationship('Tour', back_populates='stops')
     band = db.relationship('Band', back_populates='standalone_events', foreign_keys=[band_id])
@@ -785,23 +792,25 @@ class TourStop(db.Model):
 
     def can_view(self, user):
         """Check if user can view this tour stop."""
+        if user.is_staff_or_above():
+            return True
         if self.tour:
-            return (self.tour.can_view(user) or
-                    user.is_staff_or_above())
+            return self.tour.can_view(user)
         # Standalone event: check band membership
         if self.band:
-            return self.band.is_member(user) or user.is_staff_or_above()
-        return user.is_staff_or_above()
+            return self.band.is_member(user)
+        return False
 
     def can_manage_guestlist(self, user):
         """Check if user can manage guestlist for this stop."""
+        if user.is_staff_or_above():
+            return True
         if self.tour:
-            return (self.tour.can_edit(user) or
-                    user.is_staff_or_above())
+            return self.tour.can_edit(user)
         # Standalone event: check band permissions
         if self.band:
-            return self.band.is_manager(user) or user.is_staff_or_above()
-        return user.is_staff_or_above()
+            return self.band.is_manager(user)
+        return False
 
     def can_check_in_guests(self, user):
         """Check if user can check in guests at this stop."""
@@ -156,9 +156,8 @@ class User(UserMixin, db.Model):
     # Master email preference (overrides all notification settings)
     receive_emails = db.Column(db.Boolean, default=True)
 
-    # Profile picture (stored in database for production portability)
-    profile_picture_data = db.Column(db.LargeBinary, nullable=True)
-    profile_picture_mime = db.Column(db.String(50), nullable=True)
+    # Profile picture: SHA-256 of the image in the media store (media_variants)
+    profile_picture_hash = db.Column(db.String(64), nullable=True)
 
     # Stripe billing
     stripe_customer_id = db.Column(db.String(255), unique=True, nullable=True)
@@ -515,7 +514,15 @@ class User(UserMixin, db.Model):
 
         Delegates to org subscription when available (multi-tenancy),
         falls back to user subscription for backward compatibility.
+        Cached in the shared cache until the user or org subscription changes.
         """
+        if self.id is None:
+            return self._resolve_current_plan()
+        from app.utils.cache_generations import cached_value
+        return cached_value('plan', self._resolve_current_plan, user_id=self.id, org_id=self.current_org_id)
+
+    def _resolve_current_plan(self):
+        """Uncached plan lookup (see current_plan)."""
         # Try org-level subscription first
         org = self.current_org
         if org and hasattr(org, 'subscription') and org.subscription and org.subscription.is_active:
@@ -0,0 +1,41 @@
+"""
+User calendar event model - precomputed per-user calendar feed.
+One row per (user, event source): tour stops, crew slots, planning slots
+and logistics items the user is assigned to, each holding its serialized
+VEVENT, so a user's feed is a single indexed SELECT.
+
+Maintenance lives in app/services/calendar_index.py.
+"""
+from datetime import datetime
+
+from app.extensions import db
+
+
+class UserCalendarEvent(db.Model):
+    """Serialized calendar event for one user."""
+
+    __tablename__ = 'user_calendar_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    # Event source: stop, crew_slot, planning_slot, logistics
+    source_type = db.Column(db.String(20), nullable=False)
+    source_id = db.Column(db.Integer, nullable=False)
+    # Stop the source belongs to (deleting a stop drops all its events)
+    tour_stop_id = db.Column(db.Integer, nullable=True)
+
+    event_date = db.Column(db.Date, nullable=False)
+    ical = db.Column(db.Text, nullable=False)  # BEGIN:VEVENT ... END:VEVENT
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'source_type', 'source_id', name='uq_user_calendar_events_source'),
+        db.Index('ix_user_calendar_events_user_date', 'user_id', 'event_date'),
+        db.Index('ix_user_calendar_events_source', 'source_type', 'source_id'),
+        db.Index('ix_user_calendar_events_stop', 'tour_stop_id'),
+    )
+
+    def __repr__(self):
+        return f'<UserCalendarEvent u{self.user_id} {self.source_type}:{self.source_id}>'
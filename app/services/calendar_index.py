@@ -0,0 +1,402 @@
+"""
+Per-user calendar index for GigRoute.
+Maintains the user_calendar_events table behind the personal calendar
+feed (/calendar/feed/<user_id>.ics): one serialized VEVENT per user and
+event source, so serving a feed is a single indexed SELECT instead of the
+multi-join lookup the global calendar does.
+
+Event sources and who gets them:
+- stop: active members and manager of the band, plus members assigned to
+  the stop (tour_stop_members, tour_stop_members_v2 unless declined)
+- crew_slot: users with a (non-declined) crew assignment on the slot
+- planning_slot: the slot's user
+- logistics: users assigned to the logistics item
+
+Rows are refreshed through SQLAlchemy session events (collected after
+flush, written before commit): a changed source is re-rendered once and
+written for each of its users; a membership change rebuilds that user.
+"""
+import hashlib
+import hmac
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import event, inspect as sa_inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.band import Band, BandMembership
+from app.models.crew_schedule import AssignmentStatus, CrewAssignment, CrewScheduleSlot
+from app.models.logistics import LogisticsAssignment, LogisticsInfo
+from app.models.planning_slot import PlanningSlot
+from app.models.tour import Tour
+from app.models.tour_stop import MemberAssignmentStatus, TourStop, TourStopMember, tour_stop_members
+from app.models.user import User
+from app.models.user_calendar_event import UserCalendarEvent
+from app.models.venue import Venue
+from app.utils.schema import session_has_table
+
+# session.info key for (kind, id) pairs touched since the last refresh
+_PENDING_KEY = 'calendar_index_pending'
+
+SOURCE_MODELS = {
+    'stop': TourStop,
+    'crew_slot': CrewScheduleSlot,
+    'planning_slot': PlanningSlot,
+    'logistics': LogisticsInfo,
+}
+
+_DECLINED_MEMBER = (MemberAssignmentStatus.DECLINED, MemberAssignmentStatus.CANCELED)
+
+_listeners_registered = False
+
+
+class CalendarIndexService:
+    """Service for maintaining and serving the per-user calendar index."""
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def source_users(source_type: str, obj) -> Set[int]:
+        """
+        Users whose feed contains an event source.
+
+        Args:
+            source_type: Key of SOURCE_MODELS
+            obj: Source instance
+
+        Returns:
+            Set of user IDs
+        """
+        if source_type == 'stop':
+            band = obj.tour.band if obj.tour else obj.band
+            users: Set[int] = set()
+            if band is not None:
+                users.add(band.manager_id)
+                users.update(m.user_id for m in band.memberships if m.is_active)
+            users.update(u.id for u in obj.assigned_members)
+            users.update(m.user_id for m in obj.member_assignments if m.status not in _DECLINED_MEMBER)
+            users.discard(None)
+            return users
+        if source_type == 'crew_slot':
+            return {a.user_id for a in obj.assignments
+                    if a.user_id is not None and a.status != AssignmentStatus.DECLINED}
+        if source_type == 'planning_slot':
+            return {obj.user_id} if obj.user_id is not None else set()
+        if source_type == 'logistics':
+            return {a.user_id for a in obj.assignments}
+        return set()
+
+    @staticmethod
+    def render(source_type: str, obj) -> Optional[Dict]:
+        """
+        Index columns of an event source (without user_id).
+
+        Returns:
+            Dict (source_type, source_id, tour_stop_id, event_date, ical),
+            or None if the source has no date to show
+        """
+        from app.utils.ical import (
+            create_crew_slot_event,
+            create_event,
+            create_logistics_event,
+            create_planning_slot_event,
+        )
+
+        if source_type == 'stop':
+            stop, event_date = obj, obj.date
+            vevent = create_event(obj, obj.tour, include_alarm=False)
+        elif source_type == 'crew_slot':
+            stop, event_date = obj.tour_stop, obj.tour_stop.date
+            vevent = create_crew_slot_event(obj, stop)
+        elif source_type == 'planning_slot':
+            stop, event_date = obj.tour_stop, obj.tour_stop.date
+            vevent = create_planning_slot_event(obj)
+        else:
+            stop = obj.tour_stop
+            event_date = obj.start_datetime.date() if obj.start_datetime else stop.date
+            vevent = create_logistics_event(obj)
+
+        if event_date is None:
+            return None
+        return {
+            'source_type': source_type,
+            'source_id': obj.id,
+            'tour_stop_id': stop.id,
+            'event_date': event_date,
+            'ical': vevent.to_ical().decode('utf-8'),
+        }
+
+    @staticmethod
+    def stop_sources(stop_ids: Iterable[int], session: Optional[Session] = None) -> Set[Tuple[str, int]]:
+        """The stops and every source hanging off them (their date / venue is in each event)."""
+        session = session or db.session
+        stop_ids = list(stop_ids)
+        if not stop_ids:
+            return set()
+        sources = {('stop', stop_id) for stop_id in stop_ids}
+        for source_type, model in (('crew_slot', CrewScheduleSlot), ('planning_slot', PlanningSlot),
+                                   ('logistics', LogisticsInfo)):
+            sources.update(
+                (source_type, source_id) for source_id in
+                session.execute(select(model.id).where(model.tour_stop_id.in_(stop_ids))).scalars()
+            )
+        return sources
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def sync_sources(sources: Set[Tuple[str, int]], session: Optional[Session] = None) -> int:
+        """
+        Re-render event sources and rewrite their rows for every user who gets them.
+
+        Sources that no longer exist (or lost all their users) are removed.
+
+        Args:
+            sources: (source_type, id) pairs
+            session: Session to use (defaults to db.session)
+
+        Returns:
+            Number of rows written
+        """
+        session = session or db.session
+        by_type: Dict[str, Set[int]] = {}
+        for source_type, source_id in sources:
+            by_type.setdefault(source_type, set()).add(source_id)
+
+        written = 0
+        for source_type, ids in by_type.items():
+            session.query(UserCalendarEvent).filter(
+                UserCalendarEvent.source_type == source_type,
+                UserCalendarEvent.source_id.in_(ids),
+            ).delete(synchronize_session=False)
+
+            model = SOURCE_MODELS[source_type]
+            for obj in session.query(model).filter(model.id.in_(ids)):
+                users = CalendarIndexService.source_users(source_type, obj)
+                fields = CalendarIndexService.render(source_type, obj) if users else None
+                if fields is None:
+                    continue
+                session.add_all(UserCalendarEvent(user_id=user_id, **fields) for user_id in users)
+                written += len(users)
+        return written
+
+    @staticmethod
+    def user_sources(user_id: int, session: Optional[Session] = None) -> Set[Tuple[str, int]]:
+        """Every event source a user gets (see the module docstring)."""
+        session = session or db.session
+        band_ids = select(BandMembership.band_id).where(
+            BandMembership.user_id == user_id, BandMembership.is_active.is_(True)
+        ).union(select(Band.id).where(Band.manager_id == user_id))
+
+        stop_ids = session.execute(
+            select(TourStop.id)
+            .outerjoin(Tour, Tour.id == TourStop.tour_id)
+            .where(or_(
+                Tour.band_id.in_(band_ids),
+                TourStop.band_id.in_(band_ids),
+                TourStop.id.in_(select(tour_stop_members.c.tour_stop_id)
+                                .where(tour_stop_members.c.user_id == user_id)),
+                TourStop.id.in_(select(TourStopMember.tour_stop_id).where(
+                    TourStopMember.user_id == user_id, TourStopMember.status.notin_(_DECLINED_MEMBER))),
+            ))
+        ).scalars()
+        sources = {('stop', stop_id) for stop_id in stop_ids}
+
+        sources.update(('crew_slot', slot_id) for slot_id in session.execute(
+            select(CrewAssignment.slot_id).where(
+                CrewAssignment.user_id == user_id,
+                or_(CrewAssignment.status.is_(None), CrewAssignment.status != AssignmentStatus.DECLINED),
+            )
+        ).scalars())
+        sources.update(('planning_slot', slot_id) for slot_id in session.execute(
+            select(PlanningSlot.id).where(PlanningSlot.user_id == user_id)
+        ).scalars())
+        sources.update(('logistics', info_id) for info_id in session.execute(
+            select(LogisticsAssignment.logistics_info_id).where(LogisticsAssignment.user_id == user_id)
+        ).scalars())
+        return sources
+
+    @staticmethod
+    def rebuild_user(user_id: int, session: Optional[Session] = None) -> int:
+        """
+        Recompute all rows of one user (memberships / band manager changed).
+
+        Returns:
+            Number of rows written
+        """
+        session = session or db.session
+        session.query(UserCalendarEvent).filter(
+            UserCalendarEvent.user_id == user_id
+        ).delete(synchronize_session=False)
+
+        written = 0
+        by_type: Dict[str, Set[int]] = {}
+        for source_type, source_id in CalendarIndexService.user_sources(user_id, session=session):
+            by_type.setdefault(source_type, set()).add(source_id)
+        for source_type, ids in by_type.items():
+            model = SOURCE_MODELS[source_type]
+            for obj in session.query(model).filter(model.id.in_(ids)):
+                fields = CalendarIndexService.render(source_type, obj)
+                if fields is not None:
+                    session.add(UserCalendarEvent(user_id=user_id, **fields))
+                    written += 1
+        return written
+
+    @staticmethod
+    def remove_stops(stop_ids: Iterable[int], session: Optional[Session] = None) -> None:
+        """Delete the rows of deleted stops and of everything that hung off them."""
+        session = session or db.session
+        session.query(UserCalendarEvent).filter(
+            UserCalendarEvent.tour_stop_id.in_(list(stop_ids))
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def rebuild_all(batch_size: int = 200) -> int:
+        """
+        Rebuild the whole index (backfill after migration).
+
+        Returns:
+            Number of rows written
+        """
+        db.session.query(UserCalendarEvent).delete(synchronize_session=False)
+        written = 0
+        for source_type, model in SOURCE_MODELS.items():
+            ids = list(db.session.execute(select(model.id).order_by(model.id)).scalars())
+            for start in range(0, len(ids), batch_size):
+                batch = {(source_type, source_id) for source_id in ids[start:start + batch_size]}
+                written += CalendarIndexService.sync_sources(batch)
+                db.session.flush()
+        db.session.commit()
+        return written
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def feed_token(user_id: int) -> str:
+        """Secret token of a user's feed URL."""
+        secret = current_app.config['SECRET_KEY']
+        return hmac.new(secret.encode(), f'user-calendar-{user_id}'.encode(), hashlib.sha256).hexdigest()[:32]
+
+    @staticmethod
+    def check_feed_token(user_id: int, token: Optional[str]) -> bool:
+        """Constant-time check of a feed token."""
+        return bool(token) and hmac.compare_digest(token, CalendarIndexService.feed_token(user_id))
+
+    @staticmethod
+    def feed_events(user_id: int) -> List[Tuple[int, object, str]]:
+        """
+        (id, updated_at, ical) of a user's events in date order, in one query.
+
+        Inactive users get an empty feed (checked in the same query).
+        """
+        return db.session.execute(
+            select(UserCalendarEvent.id, UserCalendarEvent.updated_at, UserCalendarEvent.ical)
+            .join(User, User.id == UserCalendarEvent.user_id)
+            .where(UserCalendarEvent.user_id == user_id, User.is_active.is_(True))
+            .order_by(UserCalendarEvent.event_date, UserCalendarEvent.id)
+        ).all()
+
+
+# ======================================================================
+# Session event hooks
+# ======================================================================
+
+def _columns_changed(obj, extra_keys: Tuple[str, ...] = ()) -> bool:
+    """
+    True if a column of obj (or one of extra_keys) changed.
+
+    Appending to an unrelated collection (a stop's guestlist...) also marks
+    the parent dirty: that must not re-render its events.
+    """
+    state = sa_inspect(obj)
+    keys = [attr.key for attr in state.mapper.column_attrs] + list(extra_keys)
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+
+def _collect_changes(session, flush_context):
+    """after_flush: remember which sources / users need their rows refreshed."""
+    pending: Set[Tuple[str, int]] = session.info.setdefault(_PENDING_KEY, set())
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        deleted = obj in session.deleted
+        if isinstance(obj, TourStop):
+            if deleted:
+                pending.add(('stop_deleted', obj.id))
+            elif obj in session.new or _columns_changed(obj, ('assigned_members',)):
+                pending.add(('stop_tree', obj.id))
+        elif isinstance(obj, (CrewScheduleSlot, PlanningSlot, LogisticsInfo)):
+            source_type = next(k for k, m in SOURCE_MODELS.items() if isinstance(obj, m))
+            pending.add((source_type, obj.id))
+        elif isinstance(obj, CrewAssignment):
+            pending.add(('crew_slot', obj.slot_id))
+        elif isinstance(obj, LogisticsAssignment):
+            pending.add(('logistics', obj.logistics_info_id))
+        elif isinstance(obj, TourStopMember):
+            pending.add(('stop', obj.tour_stop_id))
+        elif isinstance(obj, BandMembership):
+            pending.add(('user', obj.user_id))
+        elif isinstance(obj, (Band, Tour, Venue)) and not deleted and obj in session.dirty \
+                and _columns_changed(obj):
+            # Names / addresses appear in the events of their stops
+            pending.add((type(obj).__name__.lower(), obj.id))
+
+
+def _refresh_pending(session):
+    """before_commit: rewrite the index rows touched by this transaction."""
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, set())
+    if not pending:
+        return
+    if not session_has_table(session, UserCalendarEvent.__tablename__):
+        return
+
+    deleted_stops = {i for kind, i in pending if kind == 'stop_deleted'}
+    users = {i for kind, i in pending if kind == 'user' and i is not None}
+    sources = {(kind, i) for kind, i in pending if kind in SOURCE_MODELS and i is not None}
+
+    # Related rows whose text shows up in the events of their stops
+    stop_ids = {i for kind, i in pending if kind == 'stop_tree'}
+    for kind, model, column in (('venue', TourStop, TourStop.venue_id), ('tour', TourStop, TourStop.tour_id)):
+        ids = {i for k, i in pending if k == kind}
+        if ids:
+            stop_ids.update(session.execute(select(model.id).where(column.in_(ids))).scalars())
+    band_ids = {i for kind, i in pending if kind == 'band'}
+    if band_ids:
+        stop_ids.update(session.execute(
+            select(TourStop.id).outerjoin(Tour, Tour.id == TourStop.tour_id)
+            .where(or_(Tour.band_id.in_(band_ids), TourStop.band_id.in_(band_ids)))
+        ).scalars())
+    sources |= CalendarIndexService.stop_sources(stop_ids - deleted_stops, session=session)
+
+    if deleted_stops:
+        CalendarIndexService.remove_stops(deleted_stops, session=session)
+    if sources:
+        CalendarIndexService.sync_sources(sources, session=session)
+    for user_id in users:
+        CalendarIndexService.rebuild_user(user_id, session=session)
+    session.flush()
+    # The flush above re-collects nothing new: clear leftovers
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _discard_pending(session, previous_transaction=None):
+    """after_rollback: forget uncommitted changes."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_calendar_index_listeners():
+    """Attach the calendar index maintenance hooks to all ORM sessions (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'after_flush', _collect_changes)
+    event.listen(Session, 'before_commit', _refresh_pending)
+    event.listen(Session, 'after_rollback', _discard_pending)
+    _listeners_registered = True
@@ -0,0 +1,376 @@
+"""
+Incremental calendar sync for GigRoute (Google Calendar / Outlook).
+
+Each pushed stop is recorded in calendar_sync_state with its remote event
+ID and a hash of the event body. A sync diffs the user's upcoming stops
+against those rows and only sends what changed:
+
+- insert: stop never pushed
+- patch:  event body changed since the last push (hash differs)
+- delete: stop deleted, or still upcoming but no longer in the user's bands
+  (past stops keep their event)
+
+Requests go through the providers' batch endpoints: Google's
+multipart/mixed batch (up to 50 requests per call) and Microsoft Graph
+`$batch` (20 per call). Syncs run in `flask worker` (job queue), never in
+the HTTP request. Base URLs come from GOOGLE_CALENDAR_API_URL /
+MICROSOFT_GRAPH_API_URL so tests can point them at a local stub server.
+"""
+import hashlib
+import json
+import logging
+import uuid
+from datetime import date
+from email.parser import BytesParser
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+from flask import current_app
+from sqlalchemy import or_
+
+from app.extensions import db
+from app.models.calendar_sync_state import CalendarSyncState
+from app.models.oauth_token import OAuthProvider, OAuthToken
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop
+from app.services.job_tasks import TASK_CALENDAR_SYNC
+
+logger = logging.getLogger(__name__)
+
+# (HTTP status, JSON body or None) per batched request
+BatchResult = Tuple[int, Optional[Dict[str, Any]]]
+
+
+def event_content_hash(event: Dict[str, Any]) -> str:
+    """Stable hash of an event body (key order independent)."""
+    payload = json.dumps(event, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SyncOperation:
+    """One insert / patch / delete to send to the provider."""
+
+    def __init__(self, action: str, tour_stop_id: int, event: Optional[Dict[str, Any]] = None,
+                 remote_event_id: Optional[str] = None, content_hash: Optional[str] = None):
+        self.action = action
+        self.tour_stop_id = tour_stop_id
+        self.event = event
+        self.remote_event_id = remote_event_id
+        self.content_hash = content_hash
+
+    def __repr__(self):
+        return f'<SyncOperation {self.action} stop={self.tour_stop_id}>'
+
+
+# ======================================================================
+# Provider clients
+# ======================================================================
+
+class GoogleCalendarClient:
+    """Google Calendar API v3 through the batch endpoint (multipart/mixed)."""
+
+    batch_size = 50
+
+    def __init__(self, access_token: str, calendar_id: Optional[str] = None,
+                 base_url: Optional[str] = None, timeout: Optional[float] = None):
+        self.access_token = access_token
+        self.calendar_id = calendar_id or 'primary'
+        self.base_url = (base_url or current_app.config['GOOGLE_CALENDAR_API_URL']).rstrip('/')
+        self.timeout = timeout or current_app.config.get('CALENDAR_SYNC_TIMEOUT', 30)
+        self.http = requests.Session()
+
+    def _path(self, op: SyncOperation) -> Tuple[str, str]:
+        events = f"/calendar/v3/calendars/{quote(self.calendar_id, safe='')}/events"
+        if op.action == 'insert':
+            return 'POST', events
+        method = 'PATCH' if op.action == 'patch' else 'DELETE'
+        return method, f"{events}/{quote(op.remote_event_id, safe='')}"
+
+    def execute(self, ops: List[SyncOperation]) -> List[BatchResult]:
+        """Send up to batch_size operations in one HTTP call."""
+        boundary = f'batch_{uuid.uuid4().hex}'
+        parts = []
+        for index, op in enumerate(ops):
+            method, path = self._path(op)
+            request_lines = [f'{method} {path} HTTP/1.1']
+            body = ''
+            if op.event is not None and op.action != 'delete':
+                request_lines.append('Content-Type: application/json; charset=UTF-8')
+                body = json.dumps(op.event)
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <item{index}>\r\n\r\n'
+                + '\r\n'.join(request_lines) + '\r\n\r\n' + body + '\r\n'
+            )
+        payload = ''.join(parts) + f'--{boundary}--\r\n'
+
+        response = self.http.post(
+            f'{self.base_url}/batch/calendar/v3',
+            data=payload.encode('utf-8'),
+            headers={
+                'Authorization': f'Bearer {self.access_token}',
+                'Content-Type': f'multipart/mixed; boundary={boundary}',
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return self._parse(response.headers.get('Content-Type', ''), response.content, len(ops))
+
+    @staticmethod
+    def _parse(content_type: str, content: bytes, count: int) -> List[BatchResult]:
+        """Map the multipart response parts back to the request order (Content-ID)."""
+        message = BytesParser().parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode() + content)
+        results: List[BatchResult] = [(0, None)] * count
+        for part in message.walk():
+            if part.is_multipart():
+                continue
+            content_id = (part.get('Content-ID') or '').strip('<> ')
+            if not content_id.startswith('response-item'):
+                continue
+            index = int(content_id[len('response-item'):])
+            http_response = part.get_payload(decode=True).decode('utf-8')
+            head, _, body = http_response.partition('\r\n\r\n')
+            if not body and '\n\n' in http_response:
+                head, _, body = http_response.partition('\n\n')
+            status = int(head.split()[1])
+            try:
+                results[index] = (status, json.loads(body) if body.strip() else None)
+            except ValueError:
+                results[index] = (status, None)
+        return results
+
+
+class OutlookCalendarClient:
+    """Microsoft Graph calendar through JSON `$batch` (20 requests per call)."""
+
+    batch_size = 20
+
+    def __init__(self, access_token: str, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        self.access_token = access_token
+        self.base_url = (base_url or current_app.config['MICROSOFT_GRAPH_API_URL']).rstrip('/')
+        self.timeout = timeout or current_app.config.get('CALENDAR_SYNC_TIMEOUT', 30)
+        self.http = requests.Session()
+
+    def execute(self, ops: List[SyncOperation]) -> List[BatchResult]:
+        """Send up to batch_size operations in one HTTP call."""
+        batch = []
+        for index, op in enumerate(ops):
+            item = {'id': str(index)}
+            if op.action == 'insert':
+                item.update(method='POST', url='/me/calendar/events')
+            else:
+                item.update(method='PATCH' if op.action == 'patch' else 'DELETE',
+                            url=f"/me/events/{quote(op.remote_event_id, safe='')}")
+            if op.action != 'delete':
+                item.update(body=op.event, headers={'Content-Type': 'application/json'})
+            batch.append(item)
+
+        response = self.http.post(
+            f'{self.base_url}/$batch',
+            json={'requests': batch},
+            headers={'Authorization': f'Bearer {self.access_token}'},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        results: List[BatchResult] = [(0, None)] * len(ops)
+        for item in response.json().get('responses', []):
+            body = item.get('body')
+            results[int(item['id'])] = (int(item.get('status', 0)), body if isinstance(body, dict) else None)
+        return results
+
+
+# ======================================================================
+# Sync
+# ======================================================================
+
+class CalendarSyncService:
+    """Diff tour stops against calendar_sync_state and push the changes."""
+
+    @staticmethod
+    def stops_for_user(user) -> List[TourStop]:
+        """Upcoming stops of the user's bands (tour stops and standalone events)."""
+        band_ids = list({b.id for b in user.bands + user.managed_bands})
+        if not band_ids:
+            return []
+        return TourStop.query.outerjoin(Tour, TourStop.tour_id == Tour.id).filter(
+            or_(TourStop.band_id.in_(band_ids), Tour.band_id.in_(band_ids)),
+            TourStop.date >= date.today(),
+        ).order_by(TourStop.date, TourStop.id).all()
+
+    @staticmethod
+    def plan(user_id: int, provider: str, stops: List[TourStop],
+             build_event: Callable[[TourStop], Dict[str, Any]]) -> Tuple[List[SyncOperation], int]:
+        """
+        Compute the operations needed to bring the remote calendar up to date.
+
+        Returns:
+            (operations, unchanged_count)
+        """
+        states = {
+            state.tour_stop_id: state
+            for state in CalendarSyncState.query.filter_by(user_id=user_id, provider=provider)
+        }
+        ops: List[SyncOperation] = []
+        unchanged = 0
+        wanted = set()
+
+        for stop in stops:
+            wanted.add(stop.id)
+            event = build_event(stop)
+            content_hash = event_content_hash(event)
+            state = states.get(stop.id)
+            if state is None:
+                ops.append(SyncOperation('insert', stop.id, event, content_hash=content_hash))
+            elif state.content_hash != content_hash:
+                ops.append(SyncOperation('patch', stop.id, event, state.remote_event_id, content_hash))
+            else:
+                unchanged += 1
+
+        gone = [stop_id for stop_id in states if stop_id not in wanted]
+        if gone:
+            past = {
+                stop_id for (stop_id,) in db.session.query(TourStop.id).filter(
+                    TourStop.id.in_(gone), TourStop.date < date.today()
+                )
+            }
+            for stop_id in gone:
+                if stop_id not in past:
+                    ops.append(SyncOperation('delete', stop_id, remote_event_id=states[stop_id].remote_event_id))
+
+        return ops, unchanged
+
+    @staticmethod
+    def apply(user_id: int, provider: str, client, ops: List[SyncOperation]) -> Dict[str, int]:
+        """
+        Send the operations in batches and record the outcome in calendar_sync_state.
+
+        A patch on an event deleted remotely (404/410) is re-sent as an insert.
+        Failed operations leave their state untouched: the next sync retries them.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'errors': 0}
+        states = {
+            state.tour_stop_id: state
+            for state in CalendarSyncState.query.filter_by(user_id=user_id, provider=provider)
+        }
+
+        pending = list(ops)
+        while pending:
+            retry_inserts = []
+            for start in range(0, len(pending), client.batch_size):
+                chunk = pending[start:start + client.batch_size]
+                for op, (status, body) in zip(chunk, client.execute(chunk)):
+                    state = states.get(op.tour_stop_id)
+                    if op.action == 'delete':
+                        if status in (200, 204, 404, 410):
+                            if state is not None:
+                                db.session.delete(state)
+                                states.pop(op.tour_stop_id)
+                            stats['deleted'] += 1
+                            continue
+                    elif op.action == 'patch' and status in (404, 410):
+                        # Deleted in the remote calendar: push it again
+                        db.session.delete(state)
+                        states.pop(op.tour_stop_id)
+                        retry_inserts.append(SyncOperation('insert', op.tour_stop_id, op.event,
+                                                           content_hash=op.content_hash))
+                        continue
+                    elif 200 <= status < 300 and (op.action == 'patch' or (body or {}).get('id')):
+                        if op.action == 'insert':
+                            state = CalendarSyncState(user_id=user_id, provider=provider,
+                                                      tour_stop_id=op.tour_stop_id, remote_event_id=body['id'],
+                                                      content_hash=op.content_hash)
+                            db.session.add(state)
+                            states[op.tour_stop_id] = state
+                            stats['inserted'] += 1
+                        else:
+                            state.content_hash = op.content_hash
+                            stats['updated'] += 1
+                        continue
+
+                    stats['errors'] += 1
+                    logger.warning(f"[CALENDAR] {provider} {op.action} stop {op.tour_stop_id} en échec "
+                                   f"(HTTP {status}): {body}")
+                # Record each batch: a crash later on does not re-insert what was created
+                db.session.commit()
+            pending = retry_inserts
+
+        return stats
+
+    @staticmethod
+    def sync(user_id: int, provider: str, client=None) -> Dict[str, int]:
+        """
+        Run an incremental sync for one user and provider.
+
+        Args:
+            user_id: User ID
+            provider: OAuthProvider value ('google' or 'microsoft')
+            client: Provider client (default: built from the user's OAuth token)
+
+        Returns:
+            dict: {'inserted', 'updated', 'deleted', 'unchanged', 'errors'}
+        """
+        from app.models.user import User
+
+        user = db.session.get(User, user_id)
+        token = OAuthToken.get_for_user(user_id, provider)
+        if user is None or token is None:
+            return {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'errors': 0}
+
+        if provider == OAuthProvider.GOOGLE.value:
+            from app.blueprints.integrations.google_calendar import (
+                create_google_event_from_stop, refresh_google_token,
+            )
+            build_event = create_google_event_from_stop
+            refresh = refresh_google_token
+        else:
+            from app.blueprints.integrations.outlook_calendar import (
+                create_outlook_event_from_stop, refresh_microsoft_token,
+            )
+            build_event = create_outlook_event_from_stop
+            refresh = refresh_microsoft_token
+
+        try:
+            if client is None:
+                if token.is_expired and token.refresh_token and not refresh(token):
+                    raise RuntimeError('Failed to refresh token')
+                if provider == OAuthProvider.GOOGLE.value:
+                    client = GoogleCalendarClient(token.access_token, token.calendar_id)
+                else:
+                    client = OutlookCalendarClient(token.access_token)
+
+            stops = CalendarSyncService.stops_for_user(user)
+            ops, unchanged = CalendarSyncService.plan(
+                user_id, provider, stops, lambda stop: build_event(stop, user=user)
+            )
+            stats = CalendarSyncService.apply(user_id, provider, client, ops)
+        except Exception as e:
+            db.session.rollback()
+            token = OAuthToken.get_for_user(user_id, provider)
+            token.mark_sync_error(str(e))
+            db.session.commit()
+            raise
+
+        stats['unchanged'] = unchanged
+        token.mark_sync_complete()
+        db.session.commit()
+        logger.info(f"[CALENDAR] {provider} user {user_id}: {stats}")
+        return stats
+
+    @staticmethod
+    def enqueue(user_id: int, provider: str):
+        """Queue a sync for `flask worker` (no-op if one is already waiting)."""
+        from app.models.job import Job, JobStatus
+        from app.services.job_queue import JobQueue
+
+        payload = {'user_id': user_id, 'provider': provider}
+        waiting = Job.query.filter(
+            Job.task == TASK_CALENDAR_SYNC,
+            Job.status == JobStatus.PENDING,
+        ).all()
+        for job in waiting:
+            if job.payload == payload:
+                return job
+        return JobQueue.enqueue(TASK_CALENDAR_SYNC, payload, max_attempts=3)
@@ -0,0 +1,163 @@
+"""
+Gap-free document numbering for GigRoute.
+Payment references (PAY-YYYY-NNNNN) and invoice numbers (FACT-YYYY-NNNNN,
+AV-YYYY-NNNNN) are taken from the document_sequences counters instead of
+scanning the last reference with LIKE ... ORDER BY, which slows down as the
+tables grow and hands the same number to two concurrent requests.
+
+- PostgreSQL: a single `UPDATE ... RETURNING` increments the counter; the
+  row lock is held until the caller commits, so concurrent allocations
+  queue up instead of colliding.
+- SQLite: the UPDATE takes the database write lock for the rest of the
+  transaction, then the new value is read back.
+
+Numbers are allocated in the caller's transaction: a rollback returns
+them, so the series stays gap-free. Counters missing for a new year (or
+after the migration) are seeded from the highest existing reference.
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.document_sequence import DocumentSequence
+from app.utils.schema import session_has_table
+
+logger = logging.getLogger(__name__)
+
+PREFIX_PAYMENT = 'PAY'
+PREFIX_INVOICE = 'FACT'
+PREFIX_CREDIT_NOTE = 'AV'
+
+
+class DocumentSequenceService:
+    """Allocate consecutive document numbers per (prefix, year, org)."""
+
+    @staticmethod
+    def format_number(prefix: str, year: int, value: int) -> str:
+        """PAY-2026-00042"""
+        return f'{prefix}-{year}-{value:05d}'
+
+    @staticmethod
+    def next_numbers(prefix: str, count: int = 1, year: Optional[int] = None, org_id: int = 0,
+                     reserve: bool = True) -> List[str]:
+        """
+        Get the next `count` formatted numbers of a series.
+
+        Args:
+            prefix: Series prefix (PAY, FACT, AV)
+            count: How many consecutive numbers
+            year: Series year (default: current UTC year)
+            org_id: Organization scope (0 = shared numbering)
+            reserve: False to only preview them (nothing is written)
+
+        Returns:
+            Formatted numbers, in order
+        """
+        year = year or datetime.utcnow().year
+        if reserve:
+            first = DocumentSequenceService.reserve(prefix, count, year=year, org_id=org_id)
+        else:
+            first = DocumentSequenceService.peek(prefix, year=year, org_id=org_id)
+        return [DocumentSequenceService.format_number(prefix, year, n) for n in range(first, first + count)]
+
+    @staticmethod
+    def reserve(prefix: str, count: int = 1, year: Optional[int] = None, org_id: int = 0) -> int:
+        """
+        Atomically reserve `count` consecutive values in the current transaction.
+
+        Returns:
+            The first reserved value
+        """
+        if count < 1:
+            raise ValueError('count must be >= 1')
+        year = year or datetime.utcnow().year
+        session = db.session
+
+        if not session_has_table(session, DocumentSequence.__tablename__):
+            # Not migrated yet: legacy scan (not safe under concurrency)
+            return DocumentSequenceService._last_used(prefix, year) + 1
+
+        value = DocumentSequenceService._increment(session, prefix, year, org_id, count)
+        if value is None:
+            DocumentSequenceService._create(session, prefix, year, org_id)
+            value = DocumentSequenceService._increment(session, prefix, year, org_id, count)
+        return value - count
+
+    @staticmethod
+    def peek(prefix: str, year: Optional[int] = None, org_id: int = 0) -> int:
+        """Next value that reserve() would return (no lock, nothing written)."""
+        year = year or datetime.utcnow().year
+        session = db.session
+        if session_has_table(session, DocumentSequence.__tablename__):
+            value = session.execute(
+                select(DocumentSequence.next_value).where(*DocumentSequenceService._scope(prefix, year, org_id))
+            ).scalar()
+            if value is not None:
+                return value
+        return DocumentSequenceService._last_used(prefix, year) + 1
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _scope(prefix: str, year: int, org_id: int):
+        return (
+            DocumentSequence.prefix == prefix,
+            DocumentSequence.year == year,
+            DocumentSequence.org_id == org_id,
+        )
+
+    @staticmethod
+    def _increment(session, prefix: str, year: int, org_id: int, count: int) -> Optional[int]:
+        """Add `count` to the counter; return the new next_value (None if no row)."""
+        stmt = update(DocumentSequence).where(
+            *DocumentSequenceService._scope(prefix, year, org_id)
+        ).values(
+            next_value=DocumentSequence.next_value + count,
+            updated_at=datetime.utcnow(),
+        ).execution_options(synchronize_session=False)
+
+        if session.get_bind().dialect.name == 'postgresql':
+            return session.execute(stmt.returning(DocumentSequence.next_value)).scalar()
+
+        # SQLite: the UPDATE holds the write lock until commit, the read below is ours
+        if session.execute(stmt).rowcount == 0:
+            return None
+        return session.execute(
+            select(DocumentSequence.next_value).where(*DocumentSequenceService._scope(prefix, year, org_id))
+        ).scalar()
+
+    @staticmethod
+    def _create(session, prefix: str, year: int, org_id: int) -> None:
+        """Create the counter, seeded after the highest existing number."""
+        start = DocumentSequenceService._last_used(prefix, year) + 1
+        try:
+            with session.begin_nested():
+                session.add(DocumentSequence(prefix=prefix, year=year, org_id=org_id, next_value=start))
+        except IntegrityError:
+            # Created concurrently: use theirs
+            pass
+        logger.info(f"[SEQUENCE] Compteur {prefix}-{year} (org {org_id}) initialisé à {start}")
+
+    @staticmethod
+    def _last_used(prefix: str, year: int) -> int:
+        """Highest number already used in the series (legacy references)."""
+        from app.models.invoices import Invoice
+        from app.models.payments import TeamMemberPayment
+
+        column = TeamMemberPayment.reference if prefix == PREFIX_PAYMENT else Invoice.number
+        # Zero-padded numbers: the string maximum is the numeric one
+        last = db.session.execute(
+            select(func.max(column)).where(column.like(f'{prefix}-{year}-%'))
+        ).scalar()
+        if not last:
+            return 0
+        try:
+            return int(last.split('-')[-1])
+        except (ValueError, IndexError):
+            return 0
@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 # Lazy-initialized Firebase app
 _firebase_app = None
 
+# FCM multicast limit (tokens per send_each_for_multicast call)
+MULTICAST_BATCH_SIZE = 500
+
 
 def _init_firebase():
     """Initialize Firebase Admin SDK (once)."""
@@ -88,13 +91,7 @@ def send_push_notification(tokens, title, body, data=None):
             notification=notification,
             data=clean_data,
             token=tokens[0],
-            android=messaging.AndroidConfig(
-                priority='high',
-                notification=messaging.AndroidNotification(
-                    channel_id='gigroute_notifications',
-                    icon='ic_notification',
-                ),
-            ),
+            android=_android_config(messaging),
         )
         try:
             messaging.send(message)
@@ -106,38 +103,43 @@ def send_push_notification(tokens, title, body, data=None):
             logger.error('FCM send error: %s', e)
             return {'success_count': 0, 'failure_count': 1}
     else:
-        # Batch send for multiple tokens
-        messages = [
-            messaging.Message(
+        # Multicast by chunks of MULTICAST_BATCH_SIZE tokens
+        success_count = failure_count = 0
+        for start in range(0, len(tokens), MULTICAST_BATCH_SIZE):
+            chunk = tokens[start:start + MULTICAST_BATCH_SIZE]
+            message = messaging.MulticastMessage(
                 notification=notification,
                 data=clean_data,
-                token=token,
-                android=messaging.AndroidConfig(
-                    priority='high',
-                    notification=messaging.AndroidNotification(
-                        channel_id='gigroute_notifications',
-                        icon='ic_notification',
-                    ),
-                ),
+                tokens=chunk,
+                android=_android_config(messaging),
             )
-            for token in tokens
-        ]
-        try:
-            response = messaging.send_each(messages)
+            try:
+                response = messaging.send_each_for_multicast(message)
+            except Exception as e:
+                logger.error('FCM batch send error: %s', e)
+                failure_count += len(chunk)
+                continue
+
             # Deactivate tokens that got UnregisteredError
             for i, send_response in enumerate(response.responses):
                 if send_response.exception and isinstance(
                     send_response.exception, messaging.UnregisteredError
                 ):
-                    _deactivate_token(tokens[i])
+                    _deactivate_token(chunk[i])
+            success_count += response.success_count
+            failure_count += response.failure_count
 
-            return {
-                'success_count': response.success_count,
-                'failure_count': response.failure_count,
-            }
-        except Exception as e:
-            logger.error('FCM batch send error: %s', e)
-            return {'success_count': 0, 'failure_count': len(tokens)}
+        return {'success_count': success_count, 'failure_count': failure_count}
+
+
+def _android_config(messaging):
+    return messaging.AndroidConfig(
+        priority='high',
+        notification=messaging.AndroidNotification(
+            channel_id='gigroute_notifications',
+            icon='ic_notification',
+        ),
+    )
 
 
 def send_push_to_user(user_id, title, body, data=None):
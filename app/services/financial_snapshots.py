@@ -0,0 +1,376 @@
+"""
+Financial snapshot service for GigRoute.
+Maintains the stop_financial_snapshot table and serves pre-aggregated
+report figures (dashboard KPIs, settlements list, API summary) from it.
+
+Snapshots are refreshed incrementally through SQLAlchemy session events:
+any flushed change to a TourStop, TicketTier, PromotorExpenses, LogisticsInfo
+or Venue marks the affected stops, and their snapshot rows are recomputed
+right before the transaction commits.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, func, inspect as sa_inspect, literal
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.extensions import db
+from app.models.band import Band
+from app.models.financial_snapshot import StopFinancialSnapshot
+from app.models.logistics import LogisticsInfo, PromotorExpenses
+from app.models.ticket_tier import TicketTier
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop
+from app.models.venue import Venue
+from app.services.report_queries import ReportQueries
+from app.utils.schema import session_has_table
+from app.utils.reports import (
+    calculate_logistics_costs,
+    calculate_settlement,
+    calculate_stop_financials,
+)
+
+# session.info keys for stops / venues touched since the last refresh
+_PENDING_STOPS_KEY = 'financial_snapshot_pending_stops'
+_PENDING_VENUES_KEY = 'financial_snapshot_pending_venues'
+
+_listeners_registered = False
+
+
+class FinancialSnapshotService:
+    """Service for maintaining and querying per-stop financial snapshots."""
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh_stops(stop_ids: Iterable[int], session: Optional[Session] = None) -> int:
+        """
+        Recompute snapshot rows for the given stops (insert, update or delete).
+
+        Args:
+            stop_ids: TourStop IDs to recompute
+            session: Session to use (defaults to db.session)
+
+        Returns:
+            Number of snapshot rows written
+        """
+        session = session or db.session
+        stop_ids = {sid for sid in stop_ids if sid is not None}
+        if not stop_ids:
+            return 0
+
+        stops = session.query(TourStop).options(
+            joinedload(TourStop.venue),
+            joinedload(TourStop.tour),
+            joinedload(TourStop.promotor_expenses),
+            selectinload(TourStop.ticket_tiers),
+            selectinload(TourStop.logistics),
+        ).filter(
+            TourStop.id.in_(stop_ids)
+        ).execution_options(populate_existing=True).all()
+
+        existing = {
+            snap.tour_stop_id: snap
+            for snap in session.query(StopFinancialSnapshot).filter(
+                StopFinancialSnapshot.tour_stop_id.in_(stop_ids)
+            )
+        }
+
+        written = 0
+        for stop in stops:
+            snapshot = existing.pop(stop.id, None)
+            if snapshot is None:
+                snapshot = StopFinancialSnapshot(tour_stop_id=stop.id)
+                session.add(snapshot)
+            FinancialSnapshotService._fill_snapshot(snapshot, stop)
+            written += 1
+
+        # Remaining rows belong to stops that no longer exist
+        for orphan in existing.values():
+            session.delete(orphan)
+
+        return written
+
+    @staticmethod
+    def rebuild_all(batch_size: int = 500) -> int:
+        """
+        Rebuild every snapshot row (backfill after migration or data repair).
+
+        Args:
+            batch_size: Number of stops recomputed per flush
+
+        Returns:
+            Number of snapshot rows written
+        """
+        stop_ids = [row[0] for row in db.session.query(TourStop.id).order_by(TourStop.id)]
+        written = 0
+        for start in range(0, len(stop_ids), batch_size):
+            written += FinancialSnapshotService.refresh_stops(stop_ids[start:start + batch_size])
+            db.session.flush()
+
+        # Drop rows left behind by bulk deletes
+        db.session.query(StopFinancialSnapshot).filter(
+            ~StopFinancialSnapshot.tour_stop_id.in_(db.session.query(TourStop.id))
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return written
+
+    @staticmethod
+    def ensure_snapshots(band_ids: List[int]) -> int:
+        """
+        Compute snapshots for stops of the given bands that have none yet.
+
+        Covers rows created before the snapshot table existed, or written
+        through bulk operations that bypass session events. One indexed
+        anti-join when everything is up to date.
+        """
+        if not band_ids:
+            return 0
+        missing = [
+            row[0] for row in db.session.query(TourStop.id).join(
+                Tour, TourStop.tour_id == Tour.id
+            ).outerjoin(
+                StopFinancialSnapshot, StopFinancialSnapshot.tour_stop_id == TourStop.id
+            ).filter(
+                Tour.band_id.in_(band_ids),
+                StopFinancialSnapshot.tour_stop_id.is_(None),
+            )
+        ]
+        if not missing:
+            return 0
+        written = FinancialSnapshotService.refresh_stops(missing)
+        db.session.commit()
+        return written
+
+    @staticmethod
+    def _fill_snapshot(snapshot: StopFinancialSnapshot, stop: TourStop) -> None:
+        """Copy the figures computed by app.utils.reports onto a snapshot row."""
+        fin = calculate_stop_financials(stop)
+        settlement = calculate_settlement(stop)
+        logistics = calculate_logistics_costs(stop)
+
+        snapshot.tour_id = stop.tour_id
+        snapshot.band_id = stop.associated_band_id
+        snapshot.stop_date = stop.date
+        snapshot.month_key = stop.date.strftime('%Y-%m') if stop.date else None
+        snapshot.status = fin['status']
+        snapshot.has_venue = stop.venue is not None
+        snapshot.venue_name = fin['venue_name']
+        snapshot.venue_city = fin['venue_city']
+        snapshot.venue_country = settlement['venue_country']
+        snapshot.currency = fin['currency']
+
+        snapshot.guarantee = fin['guarantee']
+        snapshot.venue_rental_cost = fin['venue_rental_cost']
+        snapshot.door_deal_percentage = settlement['door_deal_percentage']
+        snapshot.ticketing_fee_percentage = fin['ticketing_fee_percentage']
+
+        snapshot.capacity = fin['capacity']
+        snapshot.sold_tickets = fin['sold_tickets']
+        snapshot.fill_rate = fin['fill_rate']
+        snapshot.ticket_price = fin['ticket_price']
+        snapshot.has_tiers = fin['has_tiers']
+        snapshot.ticket_revenue = fin['ticket_revenue']
+        snapshot.ticketing_fees = fin['ticketing_fees']
+        snapshot.net_ticket_revenue = fin['net_ticket_revenue']
+        snapshot.door_deal_revenue = fin['door_deal_revenue']
+        snapshot.total_estimated_revenue = fin['total_estimated_revenue']
+
+        snapshot.promoter_expenses_total = settlement['promoter_expenses']['total']
+        snapshot.artist_payment = settlement['artist_payment']
+        snapshot.payment_type = settlement['payment_type']
+
+        snapshot.logistics_transport = logistics['transport']
+        snapshot.logistics_accommodation = logistics['accommodation']
+        snapshot.logistics_equipment = logistics['equipment']
+        snapshot.logistics_services = logistics['services']
+        snapshot.logistics_total = logistics['total']
+        snapshot.logistics_unpaid = logistics['unpaid_total']
+
+    # ------------------------------------------------------------------
+    # Aggregated reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _tour_snapshots(band_ids: List[int]):
+        """Base query: snapshots of tour stops belonging to the given bands."""
+        return db.session.query(StopFinancialSnapshot).join(
+            Tour, StopFinancialSnapshot.tour_id == Tour.id
+        ).filter(Tour.band_id.in_(band_ids))
+
+    @staticmethod
+    def dashboard_kpis(band_ids: List[int]) -> Dict[str, Any]:
+        """
+        Dashboard KPIs aggregated in SQL from snapshot rows.
+
+        Returns the same dict shape as app.utils.reports.calculate_dashboard_kpis.
+        """
+        FinancialSnapshotService.ensure_snapshots(band_ids)
+        return ReportQueries.dashboard_kpis(band_ids, figures=StopFinancialSnapshot.__table__)
+
+    @staticmethod
+    def settlement_rows(
+        band_ids: List[int],
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        only_with_venue: bool = True,
+        only_with_sales: bool = False,
+        newest_first: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Settlement summaries for list views, read from snapshot rows.
+
+        Args:
+            band_ids: Bands whose tour stops are listed
+            date_from: Inclusive lower date bound
+            date_to: Exclusive upper date bound
+            only_with_venue: Skip stops without a venue
+            only_with_sales: Skip stops without sold tickets
+            newest_first: Sort by date descending (ascending otherwise)
+            limit: Maximum number of rows
+
+        Returns:
+            List of dicts with the keys used by the settlement list templates
+        """
+        FinancialSnapshotService.ensure_snapshots(band_ids)
+        S = StopFinancialSnapshot
+        query = db.session.query(S, Tour.name, Band.name).join(
+            Tour, S.tour_id == Tour.id
+        ).outerjoin(
+            Band, Tour.band_id == Band.id
+        ).filter(Tour.band_id.in_(band_ids))
+
+        if only_with_venue:
+            query = query.filter(S.has_venue.is_(True))
+        if only_with_sales:
+            query = query.filter(S.sold_tickets > 0)
+        if date_from is not None:
+            query = query.filter(S.stop_date >= date_from)
+        if date_to is not None:
+            query = query.filter(S.stop_date < date_to)
+
+        order = S.stop_date.desc() if newest_first else S.stop_date.asc()
+        query = query.order_by(order, S.tour_stop_id)
+        if limit:
+            query = query.limit(limit)
+
+        rows = []
+        for snapshot, tour_name, band_name in query.all():
+            row = FinancialSnapshotService._stop_row(snapshot)
+            row.update({
+                'tour_name': tour_name or 'Événement Libre',
+                'band_name': band_name or 'N/A',
+            })
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def summary_totals(band_ids: List[int]) -> Dict[str, Any]:
+        """Stop count and guarantee total for the given bands (API summary)."""
+        FinancialSnapshotService.ensure_snapshots(band_ids)
+        S = StopFinancialSnapshot
+        total_stops, total_guarantee = FinancialSnapshotService._tour_snapshots(band_ids).with_entities(
+            func.count(S.tour_stop_id),
+            func.coalesce(func.sum(S.guarantee), literal(0)),
+        ).one()
+        return {
+            'total_stops': int(total_stops),
+            'total_guarantee': float(total_guarantee),
+        }
+
+    @staticmethod
+    def _stop_row(snapshot: StopFinancialSnapshot) -> Dict[str, Any]:
+        """Flatten a snapshot row into the dict shape used by report templates."""
+        return {
+            'stop_id': snapshot.tour_stop_id,
+            'tour_id': snapshot.tour_id,
+            'date': snapshot.stop_date,
+            'venue_name': snapshot.venue_name,
+            'venue_city': snapshot.venue_city,
+            'venue_country': snapshot.venue_country,
+            'status': snapshot.status,
+            'currency': snapshot.currency or 'EUR',
+            'guarantee': float(snapshot.guarantee or 0),
+            'venue_rental_cost': float(snapshot.venue_rental_cost or 0),
+            'ticket_price': float(snapshot.ticket_price or 0),
+            'ticket_revenue': float(snapshot.ticket_revenue or 0),
+            'gross_revenue': float(snapshot.ticket_revenue or 0),
+            'ticketing_fees': float(snapshot.ticketing_fees or 0),
+            'net_ticket_revenue': float(snapshot.net_ticket_revenue or 0),
+            'nbor': float(snapshot.net_ticket_revenue or 0),
+            'door_deal_revenue': float(snapshot.door_deal_revenue or 0),
+            'total_estimated_revenue': float(snapshot.total_estimated_revenue or 0),
+            'capacity': snapshot.capacity or 0,
+            'sold_tickets': snapshot.sold_tickets or 0,
+            'fill_rate': snapshot.fill_rate or 0,
+            'has_tiers': bool(snapshot.has_tiers),
+            'artist_payment': float(snapshot.artist_payment or 0),
+            'payment_type': snapshot.payment_type,
+        }
+
+
+# ======================================================================
+# Session event hooks
+# ======================================================================
+
+def _collect_changes(session, flush_context):
+    """after_flush: remember which stops / venues were touched."""
+    stop_ids: Set[int] = session.info.setdefault(_PENDING_STOPS_KEY, set())
+    venue_ids: Set[int] = session.info.setdefault(_PENDING_VENUES_KEY, set())
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TourStop):
+            stop_ids.add(obj.id)
+        elif isinstance(obj, (TicketTier, PromotorExpenses, LogisticsInfo)):
+            stop_ids.add(obj.tour_stop_id)
+            # Row moved to another stop: refresh the previous one too
+            history = sa_inspect(obj).attrs.tour_stop_id.history
+            stop_ids.update(v for v in (history.deleted or ()) if v is not None)
+        elif isinstance(obj, Venue) and obj in session.dirty:
+            venue_ids.add(obj.id)
+
+    stop_ids.discard(None)
+
+
+def _refresh_pending(session):
+    """before_commit: recompute snapshots for everything touched in this transaction."""
+    # Flush outstanding changes first so they are collected and visible
+    session.flush()
+    stop_ids = session.info.pop(_PENDING_STOPS_KEY, set())
+    venue_ids = session.info.pop(_PENDING_VENUES_KEY, set())
+    if not stop_ids and not venue_ids:
+        return
+
+    if not session_has_table(session, StopFinancialSnapshot.__tablename__):
+        return
+
+    if venue_ids:
+        stop_ids.update(
+            row[0] for row in session.query(TourStop.id).filter(TourStop.venue_id.in_(venue_ids))
+        )
+
+    FinancialSnapshotService.refresh_stops(stop_ids, session=session)
+    session.flush()
+    # The flushes above re-collect the same stops: nothing left to do
+    session.info.pop(_PENDING_STOPS_KEY, None)
+    session.info.pop(_PENDING_VENUES_KEY, None)
+
+
+def _discard_pending(session, previous_transaction=None):
+    """after_rollback / after_soft_rollback: forget uncommitted changes."""
+    session.info.pop(_PENDING_STOPS_KEY, None)
+    session.info.pop(_PENDING_VENUES_KEY, None)
+
+
+def register_snapshot_listeners():
+    """Attach the snapshot maintenance hooks to all ORM sessions (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'after_flush', _collect_changes)
+    event.listen(Session, 'before_commit', _refresh_pending)
+    event.listen(Session, 'after_rollback', _discard_pending)
+    _listeners_registered = True
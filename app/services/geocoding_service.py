@@ -0,0 +1,210 @@
+"""
+Bulk geocoding service for GigRoute.
+Geocodes large venue lists through a persistent cache and a pool of
+concurrent HTTP workers sharing one token-bucket rate limiter.
+
+Pipeline:
+    1. Venues without coordinates are grouped by normalized address
+       (each distinct address is resolved once).
+    2. Cache hits (geocode_cache, positive or negative, not expired) are
+       applied immediately.
+    3. Misses go to the provider through the worker pool; results are
+       cached and committed in chunks. Transport errors are not cached,
+       so those addresses are retried on the next run.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from flask import current_app
+
+from app.extensions import db
+from app.models.geocode_cache import GeocodeCache
+from app.utils.geocoding import (
+    TokenBucket,
+    address_cache_key,
+    build_query,
+    nominatim_search,
+    normalize_address,
+)
+
+logger = logging.getLogger(__name__)
+
+# Max keys per IN (...) clause when reading the cache
+_LOOKUP_CHUNK = 500
+
+
+class GeocodingService:
+    """Service for cached, concurrent bulk geocoding."""
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def lookup_cache(keys: Iterable[str]) -> Dict[str, GeocodeCache]:
+        """
+        Load cache rows (expired or not) for address keys.
+
+        Returns:
+            Dict address_key -> GeocodeCache
+        """
+        keys = list(keys)
+        rows: Dict[str, GeocodeCache] = {}
+        for start in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[start:start + _LOOKUP_CHUNK]
+            for row in GeocodeCache.query.filter(GeocodeCache.address_key.in_(chunk)):
+                rows[row.address_key] = row
+        return rows
+
+    @staticmethod
+    def store_result(key: str, query: str, coords: Optional[Tuple[float, float]],
+                     existing: Optional[GeocodeCache] = None) -> GeocodeCache:
+        """
+        Insert or refresh a cache row (coords None = negative result).
+
+        Hits and negative results have separate TTLs
+        (GEOCODE_CACHE_TTL_DAYS / GEOCODE_NEGATIVE_TTL_DAYS).
+        """
+        config = current_app.config
+        if coords:
+            ttl = timedelta(days=config.get('GEOCODE_CACHE_TTL_DAYS', 180))
+        else:
+            ttl = timedelta(days=config.get('GEOCODE_NEGATIVE_TTL_DAYS', 14))
+
+        row = existing or GeocodeCache(address_key=key)
+        row.normalized_query = normalize_address(query)
+        row.latitude, row.longitude = coords if coords else (None, None)
+        row.created_at = datetime.utcnow()
+        row.expires_at = row.created_at + ttl
+        if existing is None:
+            db.session.add(row)
+        return row
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Delete expired cache rows. Returns the number of rows deleted."""
+        count = GeocodeCache.query.filter(
+            GeocodeCache.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def geocode_venues(
+        venues: List,
+        workers: Optional[int] = None,
+        chunk_size: int = 100,
+        base_url: Optional[str] = None,
+        rate: Optional[float] = None,
+        limiter: Optional[TokenBucket] = None,
+    ) -> Dict[str, int]:
+        """
+        Geocode venues without coordinates (cache first, then provider).
+
+        Args:
+            venues: Venue objects (already geocoded ones are skipped)
+            workers: Concurrent HTTP workers (default GEOCODING_WORKERS)
+            chunk_size: Provider results per commit
+            base_url: Nominatim base URL (default GEOCODING_BASE_URL)
+            rate: Requests per second, all workers combined (default GEOCODING_RATE_LIMIT)
+            limiter: Rate limiter to share with other callers (overrides rate)
+
+        Returns:
+            Dict with stats: success, failed, skipped, cache_hits, requests, errors
+        """
+        config = current_app.config
+        workers = workers or config.get('GEOCODING_WORKERS', 4)
+        base_url = base_url or config.get('GEOCODING_BASE_URL')
+        limiter = limiter or TokenBucket(rate=rate or config.get('GEOCODING_RATE_LIMIT', 1.0))
+
+        stats = {'success': 0, 'failed': 0, 'skipped': 0, 'cache_hits': 0, 'requests': 0, 'errors': 0}
+
+        # 1. Group by normalized address
+        pending: Dict[str, Tuple[str, List]] = {}
+        for venue in venues:
+            if venue.latitude is not None and venue.longitude is not None:
+                stats['skipped'] += 1
+                continue
+            query = build_query(venue.address, venue.city, venue.country, getattr(venue, 'state', None))
+            if not query:
+                stats['failed'] += 1
+                continue
+            key = address_cache_key(query)
+            pending.setdefault(key, (query, []))[1].append(venue)
+
+        # 2. Cache hits
+        cached = GeocodingService.lookup_cache(pending)
+        misses: Dict[str, Tuple[str, List]] = {}
+        for key, (query, group) in pending.items():
+            row = cached.get(key)
+            if row is not None and not row.is_expired:
+                stats['cache_hits'] += 1
+                GeocodingService._apply(group, (row.latitude, row.longitude) if row.found else None, stats)
+            else:
+                misses[key] = (query, group)
+        db.session.commit()
+
+        if not misses:
+            logger.info(f"Bulk geocoding complete (cache only): {stats}")
+            return stats
+
+        # 3. Provider lookups (workers only do HTTP; DB writes stay on this thread)
+        local = threading.local()
+        sessions: List[requests.Session] = []
+        sessions_lock = threading.Lock()
+
+        def fetch(query: str) -> Optional[Tuple[float, float]]:
+            http = getattr(local, 'http', None)
+            if http is None:
+                http = local.http = requests.Session()
+                with sessions_lock:
+                    sessions.append(http)
+            limiter.acquire()
+            return nominatim_search(query, base_url=base_url, http=http)
+
+        done = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='geocode') as executor:
+                futures = {executor.submit(fetch, query): key for key, (query, _group) in misses.items()}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    query, group = misses[key]
+                    stats['requests'] += 1
+                    try:
+                        coords = future.result()
+                    except (requests.RequestException, KeyError, ValueError, IndexError) as e:
+                        logger.error(f"Geocoding error for '{query}': {e}")
+                        stats['errors'] += 1
+                        stats['failed'] += len(group)
+                    else:
+                        GeocodingService.store_result(key, query, coords, existing=cached.get(key))
+                        GeocodingService._apply(group, coords, stats)
+
+                    done += 1
+                    if done % chunk_size == 0:
+                        db.session.commit()
+        finally:
+            db.session.commit()
+            for http in sessions:
+                http.close()
+
+        logger.info(f"Bulk geocoding complete: {stats}")
+        return stats
+
+    @staticmethod
+    def _apply(group: List, coords: Optional[Tuple[float, float]], stats: Dict[str, int]) -> None:
+        """Set coordinates on every venue sharing an address."""
+        if coords:
+            for venue in group:
+                venue.latitude, venue.longitude = coords
+            stats['success'] += len(group)
+        else:
+            stats['failed'] += len(group)
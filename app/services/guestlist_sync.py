@@ -0,0 +1,300 @@
+"""
+Guestlist sync service for GigRoute.
+Lets door scanner apps work offline: delta snapshots of a stop's guestlist
+and idempotent batch check-ins.
+
+Every guestlist change bumps tour_stops.guestlist_version (a monotonic,
+per-stop counter) and stamps the entry's sync_version with the new value;
+deleted entries leave a GuestlistTombstone. A client that last synced at
+version N fetches only rows with sync_version > N.
+
+Versions are assigned in a before_flush session hook, so every code path
+going through the ORM (web views, API, bulk actions) is covered.
+
+Two scanners may sync the same guest at once: check-ins lock their entries
+(SELECT ... FOR UPDATE in id order on PostgreSQL) and each one is claimed
+with a conditional UPDATE on the status read, so only one of them wins
+and the other gets a 'conflict' (databases without row locks included).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.extensions import db
+from app.models.guestlist import GuestlistEntry, GuestlistStatus, GuestlistTombstone
+from app.models.tour_stop import TourStop
+
+# Maximum check-ins accepted in one sync request
+MAX_BATCH_SIZE = 500
+
+# Per-entry outcomes of a batch check-in
+RESULT_CHECKED_IN = 'checked_in'    # Applied now
+RESULT_DUPLICATE = 'duplicate'      # Replay of an already applied scan (same client_id)
+RESULT_CONFLICT = 'conflict'        # Server state forbids it (already in, denied...)
+RESULT_NOT_FOUND = 'not_found'      # No such entry on this stop
+RESULT_INVALID = 'invalid'          # Malformed item
+
+_listeners_registered = False
+
+
+class GuestlistSyncService:
+    """Service for offline guestlist snapshots and batch check-ins."""
+
+    @staticmethod
+    def current_version(stop_id: int) -> int:
+        """Read the stop's guestlist version from the database (never stale)."""
+        table = TourStop.__table__
+        version = db.session.execute(
+            select(table.c.guestlist_version).where(table.c.id == stop_id)
+        ).scalar()
+        return version or 0
+
+    @staticmethod
+    def snapshot(stop: TourStop, since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Guestlist entries changed since a version.
+
+        Args:
+            stop: Tour stop
+            since: Last version seen by the client (None/0 = full snapshot).
+                A version ahead of the server (e.g. after a restore) also
+                yields a full snapshot.
+
+        Returns:
+            Dict with version, full flag, changed entries and deleted entry IDs
+        """
+        version = GuestlistSyncService.current_version(stop.id)
+        full = not since or since < 0 or since > version
+
+        query = GuestlistEntry.query.filter(GuestlistEntry.tour_stop_id == stop.id)
+        deleted: List[int] = []
+        if not full:
+            query = query.filter(GuestlistEntry.sync_version > since)
+            deleted = [
+                row.entry_id for row in GuestlistTombstone.query.filter(
+                    GuestlistTombstone.tour_stop_id == stop.id,
+                    GuestlistTombstone.sync_version > since,
+                ).order_by(GuestlistTombstone.sync_version, GuestlistTombstone.id)
+            ]
+
+        entries = query.order_by(GuestlistEntry.sync_version, GuestlistEntry.id).all()
+        return {
+            'stop_id': stop.id,
+            'version': version,
+            'since': 0 if full else since,
+            'full': full,
+            'entries': entries,
+            'deleted': deleted,
+        }
+
+    @staticmethod
+    def _parse_scanned_at(value) -> Optional[datetime]:
+        """Parse an ISO 8601 scan time to naive UTC, clamped to now."""
+        if not value:
+            return None
+        try:
+            scanned_at = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if scanned_at.tzinfo is not None:
+            scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return min(scanned_at, datetime.utcnow())
+
+    @staticmethod
+    def _refusal(entry: GuestlistEntry, client_id: Optional[str]) -> Optional[Dict[str, str]]:
+        """Result fields if the entry's state forbids the check-in, else None."""
+        if entry.status == GuestlistStatus.CHECKED_IN:
+            if client_id and client_id == entry.checkin_client_id:
+                return {'result': RESULT_DUPLICATE}
+            return {'result': RESULT_CONFLICT, 'reason': 'already_checked_in'}
+        if not entry.can_check_in:
+            return {'result': RESULT_CONFLICT, 'reason': 'invalid_state'}
+        return None
+
+    @staticmethod
+    def _claim(entry: GuestlistEntry) -> bool:
+        """
+        Check an entry in only if its status is still the one read.
+
+        The row lock taken by the UPDATE is held until commit: a concurrent
+        claim waits, then matches no row.
+
+        Returns:
+            True if this transaction owns the check-in
+        """
+        return db.session.execute(
+            update(GuestlistEntry)
+            .where(GuestlistEntry.id == entry.id, GuestlistEntry.status == entry.status)
+            .values(status=GuestlistStatus.CHECKED_IN)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+
+    @staticmethod
+    def _lock_entries(stop: TourStop, entry_ids: set) -> Dict[int, GuestlistEntry]:
+        """Load a stop's entries by ID for update (locked in id order, fresh state)."""
+        if not entry_ids:
+            return {}
+        query = GuestlistEntry.query.filter(
+            GuestlistEntry.tour_stop_id == stop.id,
+            GuestlistEntry.id.in_(entry_ids),
+        ).order_by(GuestlistEntry.id).with_for_update().populate_existing()
+        return {entry.id: entry for entry in query}
+
+    @staticmethod
+    def _apply_one(item: Any, entries: Dict[int, GuestlistEntry]) -> Tuple[Dict[str, Any], Optional[GuestlistEntry]]:
+        """Apply one queued check-in. Returns (result dict, entry or None)."""
+        if not isinstance(item, dict):
+            return {'result': RESULT_INVALID, 'reason': 'Item must be an object.'}, None
+
+        entry_id = item.get('entry_id')
+        client_id = item.get('client_id')
+        result: Dict[str, Any] = {'entry_id': entry_id, 'client_id': client_id}
+
+        if not isinstance(entry_id, int) or isinstance(entry_id, bool):
+            return {**result, 'result': RESULT_INVALID, 'reason': 'entry_id must be an integer.'}, None
+        if client_id is not None and (not isinstance(client_id, str) or len(client_id) > 64):
+            return {**result, 'result': RESULT_INVALID,
+                    'reason': 'client_id must be a string of at most 64 characters.'}, None
+        plus_ones = item.get('plus_ones')
+        if plus_ones is not None and (not isinstance(plus_ones, int) or isinstance(plus_ones, bool)
+                                      or plus_ones < 0):
+            return {**result, 'result': RESULT_INVALID,
+                    'reason': 'plus_ones must be a non-negative integer.'}, None
+
+        entry = entries.get(entry_id)
+        if entry is None:
+            return {**result, 'result': RESULT_NOT_FOUND}, None
+
+        refused = GuestlistSyncService._refusal(entry, client_id)
+        if refused is None and not GuestlistSyncService._claim(entry):
+            # Another scanner changed it since it was read: report its state
+            db.session.refresh(entry)
+            refused = GuestlistSyncService._refusal(entry, client_id) or {
+                'result': RESULT_CONFLICT, 'reason': 'invalid_state'}
+        if refused is not None:
+            return {**result, **refused}, entry
+
+        entry.check_in(plus_ones_arrived=plus_ones)
+        entry.checked_in_at = GuestlistSyncService._parse_scanned_at(item.get('scanned_at')) or entry.checked_in_at
+        entry.checkin_client_id = client_id
+        return {**result, 'result': RESULT_CHECKED_IN}, entry
+
+    @staticmethod
+    def apply_checkins(stop: TourStop, items: List[Any]) -> Dict[str, Any]:
+        """
+        Apply queued check-ins in one transaction.
+
+        Each item: {entry_id, client_id?, plus_ones?, scanned_at?}. Replaying
+        an item with the same client_id is a no-op reported as 'duplicate';
+        checking in an entry that is already in (other scanner, even one
+        syncing at the same time), denied or pending is reported as a
+        'conflict' with the server's entry.
+
+        Returns:
+            Dict with new version, per-item results and outcome counts
+        """
+        wanted = {item.get('entry_id') for item in items
+                  if isinstance(item, dict) and isinstance(item.get('entry_id'), int)}
+        entries = GuestlistSyncService._lock_entries(stop, wanted)
+
+        applied = []
+        # One flush at commit: one version bump for the whole batch
+        with db.session.no_autoflush:
+            for item in items:
+                applied.append(GuestlistSyncService._apply_one(item, entries))
+        db.session.commit()
+
+        results = []
+        summary: Dict[str, int] = {}
+        for result, entry in applied:
+            if entry is not None:
+                result['entry'] = entry
+            results.append(result)
+            summary[result['result']] = summary.get(result['result'], 0) + 1
+
+        return {
+            'stop_id': stop.id,
+            'version': GuestlistSyncService.current_version(stop.id),
+            'results': results,
+            'summary': summary,
+        }
+
+
+# ======================================================================
+# Session event hooks
+# ======================================================================
+
+def _stop_key(entry: GuestlistEntry):
+    """Stop ID of an entry, or the pending TourStop object if not flushed yet."""
+    if entry.tour_stop_id is not None:
+        return entry.tour_stop_id
+    stop = entry.tour_stop
+    if stop is None:
+        return None
+    return stop.id if stop.id is not None else stop
+
+
+def _next_version(session: Session, stop_ref) -> int:
+    """Increment a stop's guestlist version and return the new value."""
+    if isinstance(stop_ref, TourStop):
+        # New stop, not inserted yet: the ORM writes the counter with it
+        stop_ref.guestlist_version = (stop_ref.guestlist_version or 0) + 1
+        return stop_ref.guestlist_version
+
+    # Atomic in-database increment (row lock serializes concurrent writers);
+    # updated_at is kept as-is, a guestlist change is not a stop edit.
+    table = TourStop.__table__
+    session.execute(
+        table.update().where(table.c.id == stop_ref).values(
+            guestlist_version=table.c.guestlist_version + 1,
+            updated_at=table.c.updated_at,
+        )
+    )
+    version = session.execute(
+        select(table.c.guestlist_version).where(table.c.id == stop_ref)
+    ).scalar() or 0
+
+    stop = session.identity_map.get(identity_key(TourStop, stop_ref))
+    if stop is not None:
+        set_committed_value(stop, 'guestlist_version', version)
+    return version
+
+
+def _assign_versions(session, flush_context, instances):
+    """before_flush: version changed guestlist entries, tombstone deleted ones."""
+    changed: Dict[Any, List[GuestlistEntry]] = {}
+    removed: Dict[int, List[int]] = {}
+
+    for obj in session.new:
+        if isinstance(obj, GuestlistEntry):
+            changed.setdefault(_stop_key(obj), []).append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, GuestlistEntry) and session.is_modified(obj, include_collections=False):
+            changed.setdefault(_stop_key(obj), []).append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, GuestlistEntry) and obj.id is not None and obj.tour_stop_id is not None:
+            stop = obj.tour_stop
+            if stop is not None and stop in session.deleted:
+                continue  # Whole stop goes away, tombstones would cascade anyway
+            removed.setdefault(obj.tour_stop_id, []).append(obj.id)
+
+    changed.pop(None, None)
+    for stop_ref in set(changed) | set(removed):
+        version = _next_version(session, stop_ref)
+        for entry in changed.get(stop_ref, ()):
+            entry.sync_version = version
+        for entry_id in removed.get(stop_ref, ()):
+            session.add(GuestlistTombstone(tour_stop_id=stop_ref, entry_id=entry_id, sync_version=version))
+
+
+def register_guestlist_sync_listeners():
+    """Attach the guestlist versioning hook to all ORM sessions (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'before_flush', _assign_versions)
+    _listeners_registered = True
@@ -0,0 +1,247 @@
+"""
+Index audit service for GigRoute.
+Runs EXPLAIN on a catalog of the app's hot queries and flags the ones that
+read a large table sequentially (missing or unusable index).
+
+The catalog lists the filters the hot pages actually issue (stops of a tour
+in date order, guestlist of a stop by status, unread notifications...).
+Modules that add a new list / filter page should register their query with
+@hot_query so `flask db-index-report` keeps covering them.
+
+Supported plans: SQLite (EXPLAIN QUERY PLAN) and PostgreSQL
+(EXPLAIN (FORMAT JSON)).
+"""
+import json
+import re
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.sql import Select
+
+from app.extensions import db
+from app.models.band import BandMembership
+from app.models.document import Document
+from app.models.guestlist import GuestlistEntry, GuestlistStatus
+from app.models.logistics import LogisticsInfo
+from app.models.notification import Notification
+from app.models.payments import PaymentStatus, TeamMemberPayment
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop
+
+# name -> callable returning the SELECT to explain
+HOT_QUERIES: Dict[str, Callable[[], Select]] = {}
+
+# SQLite: "SCAN tour_stops" (full table) vs "SCAN tour_stops USING INDEX ..."
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(.*)$')
+
+
+def hot_query(name: str):
+    """Register a query builder in the index audit catalog."""
+    def decorator(builder: Callable[[], Select]) -> Callable[[], Select]:
+        HOT_QUERIES[name] = builder
+        return builder
+    return decorator
+
+
+# ======================================================================
+# Catalog
+# ======================================================================
+# Parameter values are placeholders: only the plan shape matters.
+
+@hot_query('tour_stops.by_tour_date')
+def _stops_by_tour():
+    return (select(TourStop).where(TourStop.tour_id == 1, TourStop.date >= date(2026, 1, 1))
+            .order_by(TourStop.date))
+
+
+@hot_query('tour_stops.by_band_date')
+def _stops_by_band():
+    return (select(TourStop).where(TourStop.band_id == 1, TourStop.date >= date(2026, 1, 1))
+            .order_by(TourStop.date))
+
+
+@hot_query('tour_stops.by_venue')
+def _stops_by_venue():
+    return select(TourStop).where(TourStop.venue_id == 1)
+
+
+@hot_query('tours.by_band')
+def _tours_by_band():
+    return select(Tour).where(Tour.band_id.in_([1, 2, 3])).order_by(Tour.start_date.desc())
+
+
+@hot_query('band_memberships.by_user')
+def _memberships_by_user():
+    return select(BandMembership.band_id).where(BandMembership.user_id == 1)
+
+
+@hot_query('guestlist_entries.by_stop_status')
+def _guestlist_by_status():
+    return select(GuestlistEntry).where(
+        GuestlistEntry.tour_stop_id == 1, GuestlistEntry.status == GuestlistStatus.APPROVED
+    )
+
+
+@hot_query('notifications.unread_by_user')
+def _unread_notifications():
+    return (select(Notification).where(Notification.user_id == 1, Notification.is_read.is_(False))
+            .order_by(Notification.created_at.desc()).limit(20))
+
+
+@hot_query('team_member_payments.by_tour_status')
+def _payments_by_tour():
+    return select(TeamMemberPayment).where(
+        TeamMemberPayment.tour_id == 1, TeamMemberPayment.status == PaymentStatus.APPROVED
+    )
+
+
+@hot_query('team_member_payments.by_user_work_date')
+def _payments_by_user():
+    return (select(TeamMemberPayment)
+            .where(TeamMemberPayment.user_id == 1,
+                   TeamMemberPayment.work_date.between(date(2026, 1, 1), date(2026, 1, 31)))
+            .order_by(TeamMemberPayment.work_date))
+
+
+@hot_query('logistics_info.by_stop')
+def _logistics_by_stop():
+    return select(LogisticsInfo).where(LogisticsInfo.tour_stop_id == 1)
+
+
+@hot_query('documents.by_band')
+def _documents_by_band():
+    return select(Document).where(Document.band_id.in_([1, 2, 3]))
+
+
+# ======================================================================
+# Plan parsing
+# ======================================================================
+
+def sqlite_seq_scans(plan_rows: List[Any]) -> List[str]:
+    """
+    Tables read sequentially in a SQLite EXPLAIN QUERY PLAN output.
+
+    Args:
+        plan_rows: (id, parent, notused, detail) rows
+
+    Returns:
+        Table names with a full table scan
+    """
+    tables = []
+    for row in plan_rows:
+        match = _SQLITE_SCAN.match(row[-1])
+        if match and 'INDEX' not in match.group(2):
+            tables.append(match.group(1))
+    return tables
+
+
+def postgres_seq_scans(plan: Any) -> List[str]:
+    """
+    Tables read sequentially in a PostgreSQL EXPLAIN (FORMAT JSON) output.
+
+    Args:
+        plan: Decoded JSON plan (list with one {"Plan": ...} item) or its text
+
+    Returns:
+        Table names with a Seq Scan node
+    """
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    tables = []
+    nodes = [item['Plan'] for item in plan]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            tables.append(node['Relation Name'])
+        nodes.extend(node.get('Plans', []))
+    return tables
+
+
+# ======================================================================
+# Service
+# ======================================================================
+
+class IndexAuditService:
+    """EXPLAIN-based report of the hot queries (`flask db-index-report`)."""
+
+    @staticmethod
+    def explain(stmt: Select) -> Dict[str, Any]:
+        """
+        Plan of a SELECT on the current database (the query itself is not run).
+
+        Args:
+            stmt: SQLAlchemy SELECT
+
+        Returns:
+            Dict with 'plan' (text lines) and 'seq_scans' (table names)
+        """
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect == 'postgresql':
+            prefix = 'EXPLAIN (FORMAT JSON) '
+        else:
+            raise ValueError(f'EXPLAIN non supporté pour {dialect}')
+
+        # Prefixing at cursor level keeps SQLAlchemy's parameter handling
+        # (enums, dates) identical to the real query
+        def add_prefix(conn, cursor, statement, parameters, context, executemany):
+            return prefix + statement, parameters
+
+        with db.engine.connect() as conn:
+            event.listen(conn, 'before_cursor_execute', add_prefix, retval=True)
+            rows = [tuple(row) for row in conn.execute(stmt)]
+
+        if dialect == 'sqlite':
+            return {
+                'plan': [row[-1] for row in rows],
+                'seq_scans': sqlite_seq_scans(rows),
+            }
+        plan = rows[0][0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        return {
+            'plan': json.dumps(plan[0]['Plan'], indent=2).splitlines(),
+            'seq_scans': postgres_seq_scans(plan),
+        }
+
+    @staticmethod
+    def table_sizes(tables) -> Dict[str, int]:
+        """Row count of each table."""
+        metadata = db.metadata.tables
+        return {
+            name: db.session.execute(select(func.count()).select_from(metadata[name])).scalar() or 0
+            for name in tables if name in metadata
+        }
+
+    @staticmethod
+    def run_report(min_rows: Optional[int] = None, only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Explain every catalog query and flag sequential scans on large tables.
+
+        Args:
+            min_rows: Tables with at least this many rows count as large
+                (default INDEX_AUDIT_MIN_ROWS)
+            only: Restrict to these catalog names
+
+        Returns:
+            One dict per query: name, plan, seq_scans, flagged (large tables scanned)
+        """
+        if min_rows is None:
+            min_rows = current_app.config.get('INDEX_AUDIT_MIN_ROWS', 1000)
+
+        results = []
+        for name, builder in HOT_QUERIES.items():
+            if only and name not in only:
+                continue
+            explained = IndexAuditService.explain(builder())
+            results.append({'name': name, **explained})
+
+        sizes = IndexAuditService.table_sizes({t for r in results for t in r['seq_scans']})
+        for result in results:
+            result['flagged'] = [
+                {'table': table, 'rows': sizes.get(table, 0)}
+                for table in result['seq_scans'] if sizes.get(table, 0) >= min_rows
+            ]
+        return results
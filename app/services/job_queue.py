@@ -0,0 +1,353 @@
+"""
+Persistent job queue for GigRoute.
+Background work (J-7/J-1 reminders, invoice emails, tour stop fan-out
+emails) is stored in the `jobs` table and processed by `flask worker`.
+
+- Claiming: `SELECT ... FOR UPDATE SKIP LOCKED` on PostgreSQL, so several
+  workers never pick the same job. Other databases (SQLite) use a
+  conditional `UPDATE ... WHERE status = 'pending'`: only the worker whose
+  update matched the row owns it.
+- Idempotency: a job may carry an idempotency key (unique); enqueueing
+  the same key again is a no-op, so re-running `flask send-reminders`
+  after a crash resumes instead of sending duplicates.
+- Retries: a failing handler is retried with exponential backoff
+  (JOB_RETRY_BASE_DELAY * 2^(attempt-1), capped at JOB_RETRY_MAX_DELAY)
+  until max_attempts, then the job is left in 'failed' for inspection.
+- Crash recovery: jobs still 'running' after JOB_LOCK_TIMEOUT (worker
+  killed mid-job) are put back in the queue.
+
+Handlers are registered with @JobQueue.task('name') in
+app/services/job_tasks.py and receive the JSON payload.
+When no worker is deployed (JOBS_INLINE) or the jobs table has not been
+migrated yet, enqueue() runs the handler inline (previous behaviour):
+no retry, a failure is only logged.
+"""
+import logging
+import os
+import socket
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app, has_request_context
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.job import Job, JobStatus
+from app.utils.schema import session_has_table
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """Raised by a handler to fail the current attempt (the job is retried)."""
+
+
+class JobQueue:
+    """Enqueue, claim and run persistent background jobs."""
+
+    _handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Registry
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def task(cls, name: str):
+        """Register a handler for a task name (decorator)."""
+        def decorator(func):
+            cls._handlers[name] = func
+            return func
+        return decorator
+
+    @classmethod
+    def get_handler(cls, name: str) -> Optional[Callable[[Dict[str, Any]], Any]]:
+        # Importing the module registers the built-in tasks
+        import app.services.job_tasks  # noqa: F401
+        return cls._handlers.get(name)
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def enqueue(task: str, payload: Optional[Dict[str, Any]] = None, key: Optional[str] = None,
+                run_at: Optional[datetime] = None, max_attempts: Optional[int] = None,
+                commit: bool = True) -> Optional[Job]:
+        """
+        Add a job to the queue.
+
+        Args:
+            task: Registered task name
+            payload: JSON-serializable arguments for the handler
+            key: Idempotency key (same key = same job, enqueued once)
+            run_at: Earliest execution time (default: now)
+            max_attempts: Attempts before the job is marked failed
+            commit: Commit now (False when enqueueing a batch)
+
+        Returns:
+            The new Job, the existing Job for `key`, or None if the
+            handler was run inline (JOBS_INLINE or jobs table missing)
+        """
+        payload = payload or {}
+        if current_app.config.get('JOBS_INLINE', False):
+            JobQueue.run_inline(task, payload)
+            return None
+        if not session_has_table(db.session, Job.__tablename__):
+            logger.warning(f"[JOBS] Table jobs absente - tâche {task} exécutée immédiatement")
+            JobQueue.run_inline(task, payload)
+            return None
+
+        if key:
+            existing = Job.query.filter_by(idempotency_key=key).first()
+            if existing:
+                return existing
+
+        job = Job(
+            task=task,
+            payload=payload,
+            idempotency_key=key,
+            status=JobStatus.PENDING,
+            attempts=0,
+            max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+            run_at=run_at or datetime.utcnow(),
+        )
+        try:
+            # Savepoint: a concurrent insert of the same key only loses this row
+            with db.session.begin_nested():
+                db.session.add(job)
+        except IntegrityError:
+            if not key:
+                raise
+            return Job.query.filter_by(idempotency_key=key).first()
+
+        if commit:
+            db.session.commit()
+        return job
+
+    # ------------------------------------------------------------------
+    # Claim
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def claim(worker_id: str, limit: int = 10) -> List[Job]:
+        """
+        Lock up to `limit` due jobs for this worker (status -> running).
+
+        Each claim counts as an attempt, so a job that keeps killing its
+        worker still ends up failed after max_attempts.
+        """
+        now = datetime.utcnow()
+        due = Job.query.filter(
+            Job.status == JobStatus.PENDING,
+            Job.run_at <= now,
+        ).order_by(Job.run_at, Job.id).limit(limit)
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            jobs = due.with_for_update(skip_locked=True).all()
+            for job in jobs:
+                job.status = JobStatus.RUNNING
+                job.locked_by = worker_id
+                job.locked_at = now
+                job.attempts += 1
+            db.session.commit()
+            return jobs
+
+        # Fallback: conditional update, the row goes to whichever worker matches first
+        candidate_ids = [job_id for (job_id,) in due.with_entities(Job.id)]
+        if not candidate_ids:
+            db.session.commit()
+            return []
+        Job.query.filter(
+            Job.id.in_(candidate_ids),
+            Job.status == JobStatus.PENDING,
+        ).update({
+            Job.status: JobStatus.RUNNING,
+            Job.locked_by: worker_id,
+            Job.locked_at: now,
+            Job.attempts: Job.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        return Job.query.filter(
+            Job.id.in_(candidate_ids),
+            Job.status == JobStatus.RUNNING,
+            Job.locked_by == worker_id,
+        ).order_by(Job.run_at, Job.id).all()
+
+    @staticmethod
+    def requeue_stale(lock_timeout: Optional[int] = None) -> int:
+        """Put back 'running' jobs whose worker died (locked for more than lock_timeout seconds)."""
+        lock_timeout = lock_timeout or current_app.config.get('JOB_LOCK_TIMEOUT', 900)
+        now = datetime.utcnow()
+        stale = Job.query.filter(
+            Job.status == JobStatus.RUNNING,
+            Job.locked_at < now - timedelta(seconds=lock_timeout),
+        )
+        # Out of attempts: the job itself is probably what kills the worker
+        stale.filter(Job.attempts >= Job.max_attempts).update({
+            Job.status: JobStatus.FAILED,
+            Job.finished_at: now,
+            Job.last_error: 'Worker lock expired',
+        }, synchronize_session=False)
+        count = stale.update({
+            Job.status: JobStatus.PENDING,
+            Job.locked_by: None,
+            Job.locked_at: None,
+        }, synchronize_session=False)
+        db.session.commit()
+        if count:
+            logger.warning(f"[JOBS] {count} job(s) bloqué(s) remis en file")
+        return count
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Exponential backoff before the next attempt."""
+        base = current_app.config.get('JOB_RETRY_BASE_DELAY', 60)
+        cap = current_app.config.get('JOB_RETRY_MAX_DELAY', 3600)
+        return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+    @staticmethod
+    def request_context():
+        """
+        Anonymous request context on APP_URL for handlers.
+
+        `flask worker` only has an app context, but email and PDF templates
+        need a request (context processors, url_for(_external=True)).
+        Handlers must not rely on the session: the org comes from the payload.
+        """
+        return current_app.test_request_context(base_url=current_app.config.get('APP_URL'))
+
+    @staticmethod
+    def run_inline(task: str, payload: Dict[str, Any]) -> bool:
+        """
+        Run a handler in the calling process, without a jobs row.
+
+        Used when no worker processes the queue. The error is logged and
+        not raised: the caller's action (saving a stop, validating an
+        invoice) has already succeeded.
+
+        Returns:
+            True if the handler succeeded
+        """
+        handler = JobQueue.get_handler(task)
+        try:
+            if handler is None:
+                raise JobError(f'Tâche inconnue: {task}')
+            # CLI commands (flask send-reminders) have no request
+            with nullcontext() if has_request_context() else JobQueue.request_context():
+                handler(dict(payload))
+        except Exception as e:
+            if not db.session.is_active:
+                db.session.rollback()
+            logger.error(f"[JOBS] {task} exécutée immédiatement en échec: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def run_job(job: Job) -> bool:
+        """
+        Run a claimed job and record the outcome.
+
+        Returns:
+            True if the handler succeeded
+        """
+        handler = JobQueue.get_handler(job.task)
+        try:
+            if handler is None:
+                raise JobError(f'Tâche inconnue: {job.task}')
+            with JobQueue.request_context():
+                handler(dict(job.payload or {}))
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(Job, job.id)
+            job.locked_by = None
+            job.locked_at = None
+            job.last_error = f'{type(e).__name__}: {e}'[:2000]
+            if job.attempts >= job.max_attempts:
+                job.status = JobStatus.FAILED
+                job.finished_at = datetime.utcnow()
+                logger.error(f"[JOBS] {job.task} #{job.id} abandonné après {job.attempts} tentative(s): {e}")
+            else:
+                job.status = JobStatus.PENDING
+                job.run_at = datetime.utcnow() + JobQueue.retry_delay(job.attempts)
+                logger.warning(f"[JOBS] {job.task} #{job.id} en échec (tentative {job.attempts}), "
+                               f"nouvel essai à {job.run_at:%H:%M:%S}: {e}")
+            db.session.commit()
+            return False
+
+        job.status = JobStatus.DONE
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = None
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def work(worker_id: Optional[str] = None, batch_size: int = 10, max_jobs: Optional[int] = None,
+             poll_interval: float = 5.0, once: bool = False,
+             should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, int]:
+        """
+        Worker loop: claim and run jobs until stopped.
+
+        Args:
+            worker_id: Lock owner name (default: host:pid)
+            batch_size: Jobs claimed per round trip
+            max_jobs: Stop after this many jobs (None = unlimited)
+            poll_interval: Seconds to sleep when the queue is empty
+            once: Drain the due jobs and return instead of polling
+            should_stop: Checked between jobs (signal handling)
+
+        Returns:
+            dict: {'done': int, 'failed': int, 'requeued': int}
+        """
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        should_stop = should_stop or (lambda: False)
+        stats = {'done': 0, 'failed': 0, 'requeued': JobQueue.requeue_stale()}
+        processed = 0
+
+        while not should_stop():
+            limit = batch_size if max_jobs is None else min(batch_size, max_jobs - processed)
+            jobs = JobQueue.claim(worker_id, limit) if limit > 0 else []
+            if not jobs:
+                if once or (max_jobs is not None and processed >= max_jobs):
+                    break
+                time.sleep(poll_interval)
+                stats['requeued'] += JobQueue.requeue_stale()
+                continue
+
+            for index, job in enumerate(jobs):
+                if should_stop():
+                    # Claimed but not started: hand the rest back
+                    Job.query.filter(Job.id.in_([j.id for j in jobs[index:]])).update({
+                        Job.status: JobStatus.PENDING,
+                        Job.locked_by: None,
+                        Job.locked_at: None,
+                        Job.attempts: Job.attempts - 1,
+                    }, synchronize_session=False)
+                    db.session.commit()
+                    break
+                if JobQueue.run_job(job):
+                    stats['done'] += 1
+                else:
+                    stats['failed'] += 1
+                processed += 1
+
+        return stats
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def counts() -> Dict[str, int]:
+        """Number of jobs per status."""
+        rows = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+        counts = {status: 0 for status in (JobStatus.PENDING, JobStatus.RUNNING, JobStatus.DONE, JobStatus.FAILED)}
+        counts.update({status: count for status, count in rows})
+        return counts
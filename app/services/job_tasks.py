@@ -0,0 +1,144 @@
+"""
+Background tasks run by `flask worker` (see app/services/job_queue.py).
+Each handler receives the job payload, loads what it needs by ID and
+raises JobError when delivery failed so the job is retried.
+Handlers must be safe to run twice: a worker killed after sending but
+before recording the job as done replays it.
+They run in an anonymous request context (JobQueue.request_context):
+anything taken from the session at enqueue time, such as the org whose
+SMTP config sends an email, must be put in the payload.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from app.extensions import db
+from app.services.job_queue import JobError, JobQueue
+
+logger = logging.getLogger(__name__)
+
+TASK_TOUR_REMINDER = 'tour_reminder'
+TASK_INVOICE_EMAIL = 'invoice_email'
+TASK_TOUR_STOP_NOTIFICATION = 'tour_stop_notification'
+TASK_CALENDAR_SYNC = 'calendar_sync'
+TASK_PDF_RENDER = 'pdf_render'
+
+
+def reminder_job_key(tour_stop_id: int, user_id: int, reminder_type: str) -> str:
+    """Idempotency key of a reminder: one per (stop, user, reminder type)."""
+    return f'reminder:{tour_stop_id}:{user_id}:{reminder_type}'
+
+
+def stop_org_id(tour_stop) -> Optional[int]:
+    """Organization of a stop's band: its SMTP config sends the stop's emails."""
+    band = tour_stop.associated_band
+    return band.org_id if band else None
+
+
+# ======================================================================
+# Handlers
+# ======================================================================
+
+@JobQueue.task(TASK_TOUR_REMINDER)
+def run_tour_reminder(payload: Dict[str, Any]) -> None:
+    """Send one J-7/J-1 reminder and record it in tour_stop_reminders."""
+    from app.models.reminder import TourStopReminder
+    from app.models.tour_stop import TourStop
+    from app.models.user import User
+    from app.utils.email import send_tour_reminder_email
+
+    stop_id, user_id, reminder_type = payload['tour_stop_id'], payload['user_id'], payload['reminder_type']
+    if TourStopReminder.already_sent(stop_id, user_id, reminder_type):
+        return
+
+    tour_stop = db.session.get(TourStop, stop_id)
+    user = db.session.get(User, user_id)
+    if not tour_stop or not user:
+        return  # Deleted since enqueued
+
+    if not send_tour_reminder_email(user, tour_stop, reminder_type, org_id=payload.get('org_id')):
+        raise JobError(f'Rappel {reminder_type} non envoyé à {user.email}')
+    TourStopReminder.mark_sent(stop_id, user_id, reminder_type)
+    db.session.commit()
+
+
+@JobQueue.task(TASK_INVOICE_EMAIL)
+def run_invoice_email(payload: Dict[str, Any]) -> None:
+    """Send an invoice with its PDF, then mark it as sent."""
+    from app.models.invoices import Invoice, InvoiceStatus
+    from app.utils.email import send_invoice_email
+
+    invoice = db.session.get(Invoice, payload['invoice_id'])
+    if not invoice:
+        return
+
+    if not send_invoice_email(invoice):
+        raise JobError(f'Facture {invoice.number} non envoyée')
+    if invoice.status == InvoiceStatus.VALIDATED:
+        invoice.mark_as_sent()
+        db.session.commit()
+
+
+@JobQueue.task(TASK_TOUR_STOP_NOTIFICATION)
+def run_tour_stop_notification(payload: Dict[str, Any]) -> None:
+    """Send a tour stop notification to one band member."""
+    from app.models.tour_stop import TourStop
+    from app.utils.email import send_tour_stop_notification_email
+
+    tour_stop = db.session.get(TourStop, payload['tour_stop_id'])
+    if not tour_stop:
+        return
+
+    if not send_tour_stop_notification_email(tour_stop, payload['recipient'], payload['notification_type'],
+                                             org_id=payload.get('org_id')):
+        raise JobError(f"Notification {payload['notification_type']} non envoyée à {payload['recipient']}")
+
+
+@JobQueue.task(TASK_CALENDAR_SYNC)
+def run_calendar_sync(payload: Dict[str, Any]) -> None:
+    """Push a user's tour stops to Google Calendar / Outlook (incremental)."""
+    from app.services.calendar_sync import CalendarSyncService
+
+    stats = CalendarSyncService.sync(payload['user_id'], payload['provider'])
+    if stats['errors']:
+        # Successful items are recorded: the retry only resends the failed ones
+        raise JobError(f"Synchro {payload['provider']}: {stats['errors']} évènement(s) en échec")
+
+
+@JobQueue.task(TASK_PDF_RENDER)
+def run_pdf_render(payload: Dict[str, Any]) -> None:
+    """Render a large PDF document into the render cache (see PdfRenderCache.submit)."""
+    from app.services.pdf_render_cache import PdfRenderCache
+
+    PdfRenderCache.run_render_job(payload)
+
+
+# ======================================================================
+# Enqueue helpers
+# ======================================================================
+
+def enqueue_invoice_email(invoice) -> Optional[Any]:
+    """Queue the invoice email (the invoice is marked as sent once delivered)."""
+    return JobQueue.enqueue(TASK_INVOICE_EMAIL, {'invoice_id': invoice.id})
+
+
+def enqueue_tour_stop_notification(tour_stop, notification_type: str = 'created') -> int:
+    """
+    Queue one notification email per band member.
+
+    One job per recipient: a retry only re-sends the failed address.
+
+    Returns:
+        Number of jobs queued
+    """
+    from app.utils.email import get_tour_stop_notification_recipients
+
+    recipients = get_tour_stop_notification_recipients(tour_stop)
+    for recipient in recipients:
+        JobQueue.enqueue(TASK_TOUR_STOP_NOTIFICATION, {
+            'tour_stop_id': tour_stop.id,
+            'recipient': recipient,
+            'notification_type': notification_type,
+            'org_id': stop_org_id(tour_stop),
+        }, commit=False)
+    db.session.commit()
+    return len(recipients)
@@ -0,0 +1,204 @@
+"""
+Content-addressed image store for GigRoute (profile pictures).
+
+An uploaded image is identified by the SHA-256 of its bytes. It is decoded
+once with Pillow and every size of AVATAR_SIZES is pre-generated in WebP
+and JPEG into media_variants; the rows that use it (users) only keep the
+hash. Identical uploads share their variants, and variants no longer
+referenced by any user are deleted.
+
+The bytes of a variant never change for a given hash, so responses carry
+a strong ETag built from (hash, size, format): a revalidation is answered
+with a 304 from the users row alone, without reading the image.
+"""
+import hashlib
+import io
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, exists, update
+
+from app.extensions import db
+from app.models.media import MediaVariant
+from app.models.user import User
+
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+    WEBP_AVAILABLE = features.check('webp')
+except ImportError:
+    Image = ImageOps = None
+    PIL_AVAILABLE = False
+    WEBP_AVAILABLE = False
+
+# Pre-generated bounding boxes (px): list avatars, hi-dpi list avatars, profile pages
+AVATAR_SIZES = (48, 96, 200)
+
+IMAGE_FORMATS = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+class MediaStore:
+    """Store, resize and serve images by content hash."""
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """SHA-256 of the uploaded bytes: the image identity."""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def formats() -> Tuple[str, ...]:
+        """Formats generated for each size (JPEG only if Pillow lacks WebP)."""
+        return ('webp', 'jpeg') if WEBP_AVAILABLE else ('jpeg',)
+
+    @staticmethod
+    def resize(data: bytes, sizes: Tuple[int, ...] = AVATAR_SIZES) -> Dict[Tuple[int, str], bytes]:
+        """
+        Decode an image once and encode every size in every format.
+
+        Transparency is flattened on white (JPEG has no alpha) and the EXIF
+        orientation is applied. Images are never upscaled.
+
+        Args:
+            data: Uploaded image bytes (JPEG, PNG, GIF)
+            sizes: Bounding boxes in pixels
+
+        Returns:
+            Dict (size, format) -> encoded bytes
+
+        Raises:
+            RuntimeError: Pillow is not installed
+            PIL.UnidentifiedImageError: not an image
+        """
+        if not PIL_AVAILABLE:
+            raise RuntimeError('Pillow non installé: traitement des images indisponible')
+
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+
+        # Convert RGBA to RGB if necessary (for JPEG)
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[3])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        variants = {}
+        for size in sorted(sizes, reverse=True):
+            # Each size is reduced from the previous (larger) one
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt in MediaStore.formats():
+                output = io.BytesIO()
+                if fmt == 'webp':
+                    img.save(output, format='WEBP', quality=WEBP_QUALITY, method=4)
+                else:
+                    img.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+                variants[(size, fmt)] = output.getvalue()
+        return variants
+
+    @staticmethod
+    def store_image(data: bytes) -> str:
+        """
+        Add an image and its variants to the session (once per content hash).
+
+        Args:
+            data: Uploaded image bytes
+
+        Returns:
+            Content hash to keep on the referencing row (caller commits)
+        """
+        content_hash = MediaStore.content_hash(data)
+        exists = db.session.query(MediaVariant.id).filter_by(content_hash=content_hash).first()
+        if exists is None:
+            for (size, fmt), encoded in MediaStore.resize(data).items():
+                db.session.add(MediaVariant(
+                    content_hash=content_hash, size=size, format=fmt,
+                    mime_type=IMAGE_FORMATS[fmt], byte_size=len(encoded), data=encoded,
+                ))
+        return content_hash
+
+    @staticmethod
+    def release(content_hash: Optional[str]) -> int:
+        """
+        Delete the variants of an image no user references any more.
+
+        Call after the referencing row has been changed (caller commits).
+        The reference check and the delete are one statement, so an image
+        another user started using in the meantime is kept.
+
+        Returns:
+            Number of variants deleted
+        """
+        if not content_hash:
+            return 0
+        db.session.flush()
+        result = db.session.execute(
+            delete(MediaVariant)
+            .where(MediaVariant.content_hash == content_hash)
+            .where(~exists().where(User.profile_picture_hash == content_hash))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def forget(user_id: int, content_hash: str) -> None:
+        """
+        Clear a user's picture whose variants are gone (caller commits).
+
+        A concurrent release() can delete variants an upload reused just
+        before it committed; the user then falls back to having no picture.
+        Only cleared if the user still points to that hash.
+        """
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id, User.profile_picture_hash == content_hash)
+            .values(profile_picture_hash=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def variant_size(requested: Optional[int]) -> int:
+        """Smallest pre-generated size covering the requested one (largest by default)."""
+        for size in AVATAR_SIZES:
+            if requested and size >= requested:
+                return size
+        return AVATAR_SIZES[-1]
+
+    @staticmethod
+    def negotiate_format(accept_mimetypes, requested: Optional[str] = None) -> str:
+        """
+        Format to serve: ?format= if valid, else WebP when the client accepts it.
+
+        Args:
+            accept_mimetypes: request.accept_mimetypes
+            requested: Explicit format (webp | jpeg)
+        """
+        if requested in MediaStore.formats():
+            return requested
+        # Explicitly listed only: */* clients (curl, old browsers) get JPEG
+        if 'webp' in MediaStore.formats() and 'image/webp' in accept_mimetypes.values():
+            return 'webp'
+        return 'jpeg'
+
+    @staticmethod
+    def etag(content_hash: str, size: int, fmt: str) -> str:
+        """Strong ETag of a variant (its bytes are fixed by the hash, size and format)."""
+        return f'{content_hash}-{size}.{fmt}'
+
+    @staticmethod
+    def load(content_hash: str, size: int, fmt: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Bytes and MIME type of a variant.
+
+        Returns:
+            (data, mime_type), or None if the variant does not exist
+        """
+        row = db.session.query(MediaVariant.data, MediaVariant.mime_type).filter_by(
+            content_hash=content_hash, size=size, format=fmt
+        ).first()
+        return (row.data, row.mime_type) if row else None
@@ -0,0 +1,324 @@
+"""
+Notification dispatcher for GigRoute.
+Single in-process fan-out queue for emails and push notifications,
+replacing the thread-per-call pattern (one Thread per email / check-in).
+
+- Bounded queue + fixed worker pool: a burst of notifications cannot
+  spawn an unbounded number of threads or SMTP connections.
+- Workers coalesce what is queued: emails sharing an SMTP config go out
+  over one connection (org smtplib connections are kept open per worker
+  while in use), pushes with the same payload become one FCM multicast.
+- Backpressure: when the queue is full, submit() waits up to
+  NOTIFICATION_ENQUEUE_TIMEOUT then runs the job in the caller (the
+  request slows down instead of the notification being dropped).
+  Counters are exposed by stats().
+- Graceful drain: shutdown() lets workers finish the queued jobs; it is
+  called from gunicorn's worker_exit hook and at interpreter exit.
+
+Workers are started lazily on the first submit, in the process that
+submits (gunicorn preload_app forks after create_app).
+With NOTIFICATION_DISPATCH_SYNC (tests), jobs run inline in the caller.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a worker to exit (queued after the pending jobs)
+_STOP = object()
+
+
+class EmailJob:
+    """A rendered email (org SMTP config, or None for the global Flask-Mailman backend)."""
+
+    kind = 'email'
+
+    def __init__(self, email_id: str, recipient: str, subject: str, sender: str,
+                 text_body: str, html_body: str, smtp_config: Optional[Dict[str, Any]] = None):
+        self.email_id = email_id
+        self.recipient = recipient
+        self.subject = subject
+        self.sender = sender
+        self.text_body = text_body
+        self.html_body = html_body
+        self.smtp_config = smtp_config
+
+    @property
+    def group_key(self) -> tuple:
+        """Emails with the same key can share an SMTP connection."""
+        from app.utils.email import smtp_config_key
+        return ('email', smtp_config_key(self.smtp_config))
+
+
+class PushJob:
+    """A push notification for one or more users."""
+
+    kind = 'push'
+
+    def __init__(self, user_ids: List[int], title: str, body: Optional[str] = None,
+                 data: Optional[Dict[str, Any]] = None):
+        self.user_ids = list(user_ids)
+        self.title = title
+        self.body = body or ''
+        self.data = {k: str(v) for k, v in (data or {}).items()}
+
+    @property
+    def group_key(self) -> tuple:
+        """Pushes with the same payload can be merged into one multicast."""
+        return ('push', self.title, self.body, tuple(sorted(self.data.items())))
+
+
+class NotificationDispatcher:
+    """Bounded queue + worker pool delivering EmailJob / PushJob."""
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._workers: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+        self._accepting = True
+        self._atexit_registered = False
+        self._reset_stats()
+
+    def init_app(self, app) -> None:
+        """Bind the dispatcher to the application (config + app context for workers)."""
+        self._app = app
+        app.extensions['notification_dispatcher'] = self
+
+    # ------------------------------------------------------------------
+    # Config
+    # ------------------------------------------------------------------
+
+    def _config(self, key: str, default):
+        return self._app.config.get(key, default) if self._app is not None else default
+
+    @property
+    def sync(self) -> bool:
+        return bool(self._config('NOTIFICATION_DISPATCH_SYNC', False))
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit(self, job) -> bool:
+        """
+        Queue a job for delivery.
+
+        Returns:
+            True if queued, False if it was run inline (sync mode, queue
+            full or dispatcher stopped)
+        """
+        if self.sync or self._app is None:
+            self._run_inline(job)
+            return False
+
+        self._ensure_started()
+        if self._accepting:
+            try:
+                self._queue.put(job, timeout=self._config('NOTIFICATION_ENQUEUE_TIMEOUT', 0.5))
+            except queue.Full:
+                with self._lock:
+                    self._stats['rejected'] += 1
+                logger.warning(
+                    f"[DISPATCH] File pleine ({self._queue.maxsize}) - {job.kind} envoyé dans le thread appelant"
+                )
+            else:
+                with self._lock:
+                    self._stats['enqueued'] += 1
+                    self._stats['high_water'] = max(self._stats['high_water'], self._queue.qsize())
+                return True
+
+        self._run_inline(job)
+        return False
+
+    def submit_email(self, *args, **kwargs) -> bool:
+        return self.submit(EmailJob(*args, **kwargs))
+
+    def submit_push(self, user_ids: List[int], title: str, body: Optional[str] = None,
+                    data: Optional[Dict[str, Any]] = None) -> bool:
+        if not user_ids:
+            return False
+        return self.submit(PushJob(user_ids, title, body, data))
+
+    def _run_inline(self, job) -> None:
+        with self._lock:
+            self._stats['inline'] += 1
+        if has_app_context() or self._app is None:
+            self._deliver([job])
+        else:
+            with self._app.app_context():
+                self._deliver([job])
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        # Already running, or shut down in this process (late jobs then run inline)
+        if self._pid == pid and (self._workers or not self._accepting):
+            return
+        with self._lock:
+            if self._pid == pid and (self._workers or not self._accepting):
+                return
+            # New process (fork after preload): threads and queue of the parent are not ours
+            self._queue = queue.Queue(maxsize=self._config('NOTIFICATION_QUEUE_SIZE', 1000))
+            self._pid = pid
+            self._accepting = True
+            self._workers = []
+            for index in range(self._config('NOTIFICATION_WORKERS', 2)):
+                worker = threading.Thread(target=self._worker, name=f'notify-{index}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+        logger.info(f"[DISPATCH] {len(self._workers)} workers démarrés (pid {pid})")
+
+    def _worker(self) -> None:
+        from app.utils.email import SMTPConnectionCache
+
+        connections = SMTPConnectionCache(idle_timeout=self._config('NOTIFICATION_SMTP_IDLE_TIMEOUT', 30))
+        batch_size = self._config('NOTIFICATION_BATCH_SIZE', 50)
+        work_queue = self._queue
+        try:
+            while True:
+                try:
+                    job = work_queue.get(timeout=connections.idle_timeout)
+                except queue.Empty:
+                    connections.close_idle()
+                    continue
+
+                stop = job is _STOP
+                batch = [] if stop else [job]
+                # Coalesce whatever is already waiting
+                while not stop and len(batch) < batch_size:
+                    try:
+                        job = work_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stop = True
+                    else:
+                        batch.append(job)
+
+                if batch:
+                    try:
+                        with self._app.app_context():
+                            self._deliver(batch, connections)
+                    except Exception as e:
+                        logger.error(f"[DISPATCH] Lot de {len(batch)} notifications en échec: {e}")
+                    connections.close_idle()
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    work_queue.task_done()
+                if stop:
+                    break
+        finally:
+            connections.close_all()
+
+    def shutdown(self, timeout: float = 25.0) -> bool:
+        """
+        Stop accepting jobs and let the workers drain the queue.
+
+        Returns:
+            True if every worker finished within the timeout
+        """
+        with self._lock:
+            if self._pid != os.getpid() or not self._workers:
+                return True
+            self._accepting = False
+            workers, self._workers = self._workers, []
+
+        deadline = time.monotonic() + timeout
+        pending = self._queue.qsize()
+        for _ in workers:
+            try:
+                self._queue.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+        drained = not any(worker.is_alive() for worker in workers)
+        if drained:
+            logger.info(f"[DISPATCH] Arrêt propre ({pending} notifications vidées)")
+        else:
+            logger.warning(f"[DISPATCH] Arrêt après {timeout}s, {self._queue.qsize()} notifications perdues")
+        return drained
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+
+    def _deliver(self, batch: List, connections=None) -> None:
+        """Deliver a batch (app context required): one pass per SMTP config / push payload."""
+        groups: Dict[tuple, List] = {}
+        for job in batch:
+            groups.setdefault(job.group_key, []).append(job)
+
+        for key, jobs in groups.items():
+            if key[0] == 'email':
+                sent = self._deliver_emails(jobs, connections)
+                self._count('emails_sent', sent)
+                self._count('emails_failed', len(jobs) - sent)
+            else:
+                self._deliver_push(jobs)
+                self._count('push_batches', 1)
+
+    @staticmethod
+    def _deliver_emails(jobs: List[EmailJob], connections=None) -> int:
+        from app.utils.email import deliver_emails
+        return deliver_emails(jobs, connections)
+
+    @staticmethod
+    def _deliver_push(jobs: List[PushJob]) -> None:
+        from app.services.fcm_service import send_push_to_users
+
+        first = jobs[0]
+        user_ids = list(dict.fromkeys(user_id for job in jobs for user_id in job.user_ids))
+        try:
+            result = send_push_to_users(user_ids, first.title, first.body, first.data)
+            if result.get('success_count', 0) > 0:
+                logger.debug('Push sent to %d devices: %s', result['success_count'], first.title)
+        except Exception as e:
+            logger.warning('Push failed for %d users: %s', len(user_ids), e)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _reset_stats(self) -> None:
+        self._stats = {
+            'enqueued': 0,
+            'inline': 0,
+            'rejected': 0,
+            'high_water': 0,
+            'emails_sent': 0,
+            'emails_failed': 0,
+            'push_batches': 0,
+        }
+
+    def _count(self, key: str, amount: int) -> None:
+        if amount:
+            with self._lock:
+                self._stats[key] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters since start + current queue depth (backpressure monitoring)."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['queue_size'] = self._queue.maxsize if self._queue is not None else 0
+        stats['workers'] = sum(1 for worker in self._workers if worker.is_alive())
+        return stats
+
+
+dispatcher = NotificationDispatcher()
@@ -4,22 +4,23 @@ Handles business logic for payments, per diems, and payroll.
 """
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from typing import List, Dict, Optional, Any
-import csv
-import io
+from typing import List, Dict, Iterator, Optional, Any
 
 from flask import current_app
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy.orm import joinedload
 
 from app.extensions import db
 from app.models.payments import (
     TeamMemberPayment, UserPaymentConfig, PaymentType,
-    PaymentStatus, StaffCategory, PaymentFrequency
+    PaymentStatus, StaffCategory, PaymentFrequency, get_category_for_role
 )
 from app.models.tour import Tour
-from app.models.tour_stop import TourStop
+from app.models.tour_stop import TourStop, EventType
 from app.models.user import User
+from app.services.document_sequences import DocumentSequenceService, PREFIX_PAYMENT
 from app.services.validation_service import ValidationService
+from app.utils.exports import csv_string, preload, stream_batches
 
 
 class PaymentService:
@@ -35,23 +36,24 @@ class PaymentService:
         Returns:
             Unique payment reference string
         """
-        year = datetime.now().year
+        return PaymentService.allocate_references(1)[0]
 
-        # Get the last reference number for this year
-        last_payment = TeamMemberPayment.query.filter(
-            TeamMemberPayment.reference.like(f'PAY-{year}-%')
-        ).order_by(TeamMemberPayment.reference.desc()).first()
+    @staticmethod
+    def allocate_references(count: int, reserve: bool = True) -> List[str]:
+        """
+        Allocate a contiguous block of payment references.
 
-        if last_payment and last_payment.reference:
-            try:
-                last_num = int(last_payment.reference.split('-')[-1])
-                next_num = last_num + 1
-            except (ValueError, IndexError):
-                next_num = 1
-        else:
-            next_num = 1
+        The numbers come from the PAY document sequence, in the current
+        transaction: they are only consumed if the caller commits.
 
-        return f"PAY-{year}-{next_num:05d}"
+        Args:
+            count: Number of references needed
+            reserve: False to only preview the next references
+
+        Returns:
+            References PAY-YYYY-NNNNN, in order
+        """
+        return DocumentSequenceService.next_numbers(PREFIX_PAYMENT, count, reserve=reserve)
 
     @staticmethod
     def create_payment(
@@ -129,97 +131,149 @@ class PaymentService:
         per_diem_amount: Decimal,
         created_by_id: int,
         include_travel_days: bool = True,
-        include_day_offs: bool = False
-    ) -> List[TeamMemberPayment]:
+        include_day_offs: bool = False,
+        notes: Optional[str] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
         """
         Generate per diem payments for all eligible tour members.
 
+        One per diem per member and per day, from the first to the last stop
+        of the tour. Days without any stop count as days off. Runs in a fixed
+        number of queries whatever the tour length or crew size: existing per
+        diems are preloaded, references are allocated as one block and the
+        rows are inserted in a single statement and transaction.
+
         Args:
             tour_id: Tour ID to generate per diems for
             per_diem_amount: Amount per day per person
             created_by_id: User creating the payments
             include_travel_days: Include travel days
             include_day_offs: Include day offs
+            notes: Optional notes copied on each payment
+            dry_run: Only compute what would be created (nothing is written)
 
         Returns:
-            List of created payments
+            Summary dictionary: members, stops, days, created, skipped, total_amount,
+            first/last reference and a per-day breakdown
         """
         Tour.query.get_or_404(tour_id)
-        created_payments = []
+        summary = {
+            'tour_id': tour_id,
+            'dry_run': dry_run,
+            'members': 0,
+            'stops': 0,
+            'days': 0,
+            'created': 0,
+            'skipped': 0,
+            'total_amount': Decimal('0'),
+            'first_reference': None,
+            'last_reference': None,
+            'by_day': [],
+        }
 
         # Get all users with payment configs that have per_diem > 0
         configs = UserPaymentConfig.query.filter(
             UserPaymentConfig.per_diem > 0
-        ).all()
-
-        eligible_user_ids = [c.user_id for c in configs]
-
-        if not eligible_user_ids:
-            return []
+        ).order_by(UserPaymentConfig.user_id).all()
+        summary['members'] = len(configs)
 
         # Get tour stops to calculate dates
-        stops = TourStop.query.filter_by(tour_id=tour_id).order_by(TourStop.date).all()
-
-        if not stops:
-            return []
-
-        # Calculate all days in tour
-        start_date = stops[0].date
-        end_date = stops[-1].date
+        stops = TourStop.query.options(joinedload(TourStop.venue)).filter_by(
+            tour_id=tour_id
+        ).order_by(TourStop.date, TourStop.id).all()
+        summary['stops'] = len(stops)
+
+        if not configs or not stops:
+            return summary
+
+        stops_by_date: Dict[date, List[TourStop]] = {}
+        for stop in stops:
+            stops_by_date.setdefault(stop.date, []).append(stop)
+
+        # Existing per diems of this tour, loaded once
+        existing = {
+            (user_id, work_date)
+            for user_id, work_date in db.session.query(
+                TeamMemberPayment.user_id, TeamMemberPayment.work_date
+            ).filter(
+                TeamMemberPayment.tour_id == tour_id,
+                TeamMemberPayment.payment_type == PaymentType.PER_DIEM,
+                TeamMemberPayment.user_id.in_([c.user_id for c in configs])
+            )
+        }
 
-        current_date = start_date
-        while current_date <= end_date:
-            # Check if this date has a stop
-            day_stops = [s for s in stops if s.date == current_date]
+        rows = []
+        now = datetime.utcnow()
+        current_date = stops[0].date
+        while current_date <= stops[-1].date:
+            day_stops = stops_by_date.get(current_date, [])
 
             # Determine day type
-            is_travel_day = any(s.stop_type.value == 'travel' for s in day_stops)
-            is_day_off = any(s.stop_type.value == 'day_off' for s in day_stops)
+            is_travel_day = any(s.event_type == EventType.TRAVEL for s in day_stops)
+            is_day_off = not day_stops or any(s.event_type == EventType.DAY_OFF for s in day_stops)
 
             # Skip based on settings
-            if is_day_off and not include_day_offs:
+            if (is_day_off and not include_day_offs) or (is_travel_day and not include_travel_days):
                 current_date += timedelta(days=1)
                 continue
 
-            if is_travel_day and not include_travel_days:
-                current_date += timedelta(days=1)
-                continue
+            # Get stop for description
+            stop = day_stops[0] if day_stops else None
+            description = f"Per diem - {current_date.strftime('%d/%m/%Y')}"
+            if stop and stop.venue:
+                description += f" - {stop.venue.city}"
 
-            # Create per diem for each eligible user
-            for user_id in eligible_user_ids:
-                # Check if per diem already exists for this user/date/tour
-                existing = TeamMemberPayment.query.filter_by(
-                    user_id=user_id,
-                    tour_id=tour_id,
-                    work_date=current_date,
-                    payment_type=PaymentType.PER_DIEM
-                ).first()
-
-                if existing:
+            day_count = 0
+            for config in configs:
+                if (config.user_id, current_date) in existing:
+                    summary['skipped'] += 1
                     continue  # Don't duplicate
 
-                # Get stop for description
-                stop = day_stops[0] if day_stops else None
-                description = f"Per diem - {current_date.strftime('%d/%m/%Y')}"
-                if stop and stop.venue:
-                    description += f" - {stop.venue.city}"
-
-                payment = PaymentService.create_payment(
-                    user_id=user_id,
-                    payment_type=PaymentType.PER_DIEM,
-                    amount=per_diem_amount,
-                    created_by_id=created_by_id,
-                    tour_id=tour_id,
-                    tour_stop_id=stop.id if stop else None,
-                    work_date=current_date,
-                    description=description
-                )
+                rows.append({
+                    'user_id': config.user_id,
+                    'tour_id': tour_id,
+                    'tour_stop_id': stop.id if stop else None,
+                    'staff_category': config.staff_category or get_category_for_role(config.staff_role),
+                    'staff_role': config.staff_role,
+                    'payment_frequency': config.payment_frequency,
+                    'payment_type': PaymentType.PER_DIEM,
+                    'description': description,
+                    'notes': notes or None,
+                    'amount': per_diem_amount,
+                    'currency': 'EUR',
+                    'quantity': Decimal('1'),
+                    'work_date': current_date,
+                    'status': PaymentStatus.DRAFT,
+                    'created_by_id': created_by_id,
+                    'created_at': now,
+                })
+                day_count += 1
+
+            summary['days'] += 1
+            summary['by_day'].append({
+                'date': current_date,
+                'city': stop.venue.city if stop and stop.venue else None,
+                'count': day_count,
+            })
+            current_date += timedelta(days=1)
 
-                created_payments.append(payment)
+        summary['created'] = len(rows)
+        summary['total_amount'] = per_diem_amount * len(rows)
+        if not rows:
+            return summary
 
-            current_date += timedelta(days=1)
+        references = PaymentService.allocate_references(len(rows), reserve=not dry_run)
+        summary['first_reference'], summary['last_reference'] = references[0], references[-1]
+        if dry_run:
+            return summary
+
+        for row, reference in zip(rows, references):
+            row['reference'] = reference
+        db.session.execute(insert(TeamMemberPayment), rows)
+        db.session.commit()
 
-        return created_payments
+        return summary
 
     @staticmethod
     def submit_for_approval(payment_id: int) -> TeamMemberPayment:
@@ -451,13 +505,16 @@ class PaymentService:
         return count
 
     @staticmethod
-    def export_payments_csv(
+    def payment_export_rows(
         tour_id: Optional[int] = None,
         status: Optional[PaymentStatus] = None,
         include_bank_details: bool = True
-    ) -> str:
+    ) -> Iterator[list]:
         """
-        Export payments to CSV format for accounting.
+        Rows of the payments export for accounting (header first).
+
+        Payments are read in batches through a server-side cursor; bank
+        details of each batch are loaded in one query.
 
         Args:
             tour_id: Optional filter by tour
@@ -465,7 +522,7 @@ class PaymentService:
             include_bank_details: Include IBAN/BIC in export
 
         Returns:
-            CSV string
+            Row iterator for app.utils.exports
         """
         query = TeamMemberPayment.query
 
@@ -474,12 +531,11 @@ class PaymentService:
         if status:
             query = query.filter_by(status=status)
 
-        payments = query.order_by(TeamMemberPayment.work_date).all()
-
-        output = io.StringIO()
-        writer = csv.writer(output, delimiter=';')
+        query = query.options(
+            joinedload(TeamMemberPayment.user),
+            joinedload(TeamMemberPayment.tour)
+        ).order_by(TeamMemberPayment.work_date, TeamMemberPayment.id)
 
-        # Header
         headers = [
             'Reference',
             'Beneficiaire',
@@ -491,37 +547,62 @@ class PaymentService:
             'Statut',
             'Tournée'
         ]
-
         if include_bank_details:
             headers.extend(['IBAN', 'BIC', 'Banque'])
 
-        writer.writerow(headers)
+        def rows():
+            yield headers
+            for batch in stream_batches(query):
+                configs_by_user = preload(
+                    UserPaymentConfig.user_id, (p.user_id for p in batch)
+                ) if include_bank_details else {}
+
+                for payment in batch:
+                    row = [
+                        payment.reference,
+                        payment.user.full_name if payment.user else 'N/A',
+                        payment.payment_type.value if payment.payment_type else '',
+                        payment.description or '',
+                        payment.work_date.strftime('%d/%m/%Y') if payment.work_date else '',
+                        payment.amount,
+                        payment.currency,
+                        payment.status.value if payment.status else '',
+                        payment.tour.name if payment.tour else ''
+                    ]
+
+                    if include_bank_details:
+                        config = configs_by_user.get(payment.user_id)
+                        row.extend([
+                            config.iban if config and config.iban else '',
+                            config.bic if config and config.bic else '',
+                            config.bank_name if config and config.bank_name else ''
+                        ])
+
+                    yield row
+
+        return rows()
 
-        # Data rows
-        for payment in payments:
-            row = [
-                payment.reference,
-                payment.user.full_name if payment.user else 'N/A',
-                payment.payment_type.value if payment.payment_type else '',
-                payment.description or '',
-                payment.work_date.strftime('%d/%m/%Y') if payment.work_date else '',
-                str(payment.amount),
-                payment.currency,
-                payment.status.value if payment.status else '',
-                payment.tour.name if payment.tour else ''
-            ]
-
-            if include_bank_details:
-                config = UserPaymentConfig.query.get(payment.user_id) if payment.user_id else None
-                row.extend([
-                    config.iban if config and config.iban else '',
-                    config.bic if config and config.bic else '',
-                    config.bank_name if config and config.bank_name else ''
-                ])
-
-            writer.writerow(row)
-
-        return output.getvalue()
+    @staticmethod
+    def export_payments_csv(
+        tour_id: Optional[int] = None,
+        status: Optional[PaymentStatus] = None,
+        include_bank_details: bool = True
+    ) -> str:
+        """
+        Export payments to CSV format for accounting (see payment_export_rows).
+
+        Args:
+            tour_id: Optional filter by tour
+            status: Optional filter by status
+            include_bank_details: Include IBAN/BIC in export
+
+        Returns:
+            CSV string
+        """
+        return csv_string(
+            PaymentService.payment_export_rows(tour_id, status, include_bank_details),
+            delimiter=';'
+        )
 
     @staticmethod
     def calculate_user_totals(user_id: int, tour_id: Optional[int] = None) -> Dict[str, Decimal]:
@@ -0,0 +1,522 @@
+"""
+Content-addressed cache of rendered PDF documents.
+
+A document is keyed by a hash of the data it is rendered from (the
+settlement dict, or the column values of every row the ReportLab /
+xhtml2pdf layout reads) plus its template version. The same data always
+maps to the same file and any edit changes the key, so entries are never
+invalidated, only evicted.
+
+- Storage: PDF_CACHE_DIR on local disk, <key>.pdf plus a <key>.json
+  sidecar (kind, object, filename, access scope, status). Hits bump the
+  file mtime; writes evict the least recently used files above
+  PDF_CACHE_MAX_BYTES.
+- Background rendering: documents of PDF_ASYNC_MIN_ROWS rows or more
+  (tour schedule, bordereau, budget) and tour books are rendered by the
+  job queue (task pdf_render, `flask worker`); the request gets a page
+  polling /reports/pdf/<key>/status until the file is ready.
+- Tour books (app/services/tour_book.py) are ZIP or merged PDF archives
+  of per-stop documents, stored like any other document.
+
+Bump TEMPLATE_VERSIONS[kind] when the layout of a document changes.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import Column, LargeBinary, inspect as sa_inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSIONS = {
+    'tour': 1,
+    'daysheet': 1,
+    'settlement': 1,
+    'invoice': 1,
+    'bordereau': 1,
+    'budget': 1,
+    'itinerary': 1,
+    'tour_book': 1,
+    'tour_book_pdf': 1,
+}
+
+STATUS_PENDING = 'pending'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+STATUS_SUPERSEDED = 'superseded'
+
+_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+@dataclass
+class PdfDocument:
+    """A renderable document and the data snapshot that identifies it."""
+    kind: str
+    object_id: int
+    data: Any  # hashed into the key
+    render: Callable[[], bytes]
+    filename: str
+    band_id: Optional[int] = None  # access scope of the background download
+    org_ids: Optional[Tuple[int, ...]] = None  # if set, the current org must be one of these (invoices)
+    manager_only: bool = False
+    rows: int = 0  # size hint: rendered in the background from PDF_ASYNC_MIN_ROWS
+    background: bool = False  # always rendered in the background (when not cached)
+    mimetype: str = 'application/pdf'
+
+    @cached_property
+    def key(self) -> str:
+        return PdfRenderCache.cache_key(self.kind, self.data)
+
+
+def row_snapshot(obj) -> Optional[Dict[str, Any]]:
+    """Column values of a row (binary columns skipped): any edit changes the snapshot."""
+    if obj is None:
+        return None
+    return {
+        prop.key: getattr(obj, prop.key)
+        for prop in sa_inspect(obj).mapper.column_attrs
+        if isinstance(prop.columns[0], Column) and not isinstance(prop.columns[0].type, LargeBinary)
+    }
+
+
+def safe_filename(name: str) -> str:
+    return name.replace(' ', '_').replace('/', '-')
+
+
+class PdfRenderCache:
+    """Render, store and serve PDF documents by content hash."""
+
+    # ------------------------------------------------------------------
+    # Keys and storage
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def cache_key(kind: str, data: Any) -> str:
+        """SHA-256 of the document kind, its template version and its data."""
+        payload = json.dumps({'kind': kind, 'version': TEMPLATE_VERSIONS[kind], 'data': data},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_key(key: str) -> bool:
+        return bool(_KEY_RE.match(key or ''))
+
+    @staticmethod
+    def cache_dir() -> str:
+        path = current_app.config.get('PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(),
+                                                                       'gigroute-pdf-cache')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _path(key: str, ext: str = 'pdf') -> str:
+        return os.path.join(PdfRenderCache.cache_dir(), f'{key}.{ext}')
+
+    @staticmethod
+    def _write(path: str, content: bytes) -> None:
+        """Atomic write: readers never see a partial file."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def get(key: str) -> Optional[bytes]:
+        """Cached PDF for a key (marked as recently used), or None."""
+        path = PdfRenderCache._path(key)
+        try:
+            with open(path, 'rb') as pdf_file:
+                content = pdf_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    @staticmethod
+    def put(key: str, pdf: bytes) -> None:
+        """Store a PDF, then evict the least recently used files above the size limit."""
+        PdfRenderCache._write(PdfRenderCache._path(key), pdf)
+        PdfRenderCache.evict()
+
+    @staticmethod
+    def read_meta(key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(PdfRenderCache._path(key, 'json'), encoding='utf-8') as meta_file:
+                return json.load(meta_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def write_meta(key: str, meta: Dict[str, Any]) -> None:
+        PdfRenderCache._write(PdfRenderCache._path(key, 'json'), json.dumps(meta).encode('utf-8'))
+
+    @staticmethod
+    def evict(max_bytes: Optional[int] = None) -> int:
+        """
+        Delete the least recently used PDFs until the cache fits in max_bytes.
+
+        Args:
+            max_bytes: Size limit (default PDF_CACHE_MAX_BYTES)
+
+        Returns:
+            Number of files removed
+        """
+        if max_bytes is None:
+            max_bytes = current_app.config.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+        entries = []
+        with os.scandir(PdfRenderCache.cache_dir()) as scan:
+            for entry in scan:
+                if entry.name.endswith('.pdf'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _mtime, size, _path in entries)
+        removed = 0
+        for _mtime, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            for stale in (path, path[:-len('pdf')] + 'json'):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"[PDF] {removed} document(s) retiré(s) du cache")
+        return removed
+
+    # ------------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def document(kind: str, object_id: int) -> Optional[PdfDocument]:
+        """
+        Describe a document: its data snapshot, renderer and download name.
+
+        Args:
+            kind: tour, daysheet, settlement, invoice, bordereau, budget,
+                tour_book (ZIP) or tour_book_pdf
+            object_id: Tour, TourStop or Invoice ID
+
+        Returns:
+            PdfDocument, or None if the object does not exist
+        """
+        builder = _DOCUMENT_BUILDERS.get(kind)
+        if builder is None:
+            raise ValueError(f'Unknown PDF document kind: {kind}')
+        return builder(object_id)
+
+    @staticmethod
+    def render(document: PdfDocument) -> bytes:
+        """PDF of a document, from the cache or rendered now and stored."""
+        pdf = PdfRenderCache.get(document.key)
+        if pdf is None:
+            pdf = document.render()
+            PdfRenderCache.put(document.key, pdf)
+            PdfRenderCache._mark_ready(document)
+        return pdf
+
+    @staticmethod
+    def needs_background(document: PdfDocument) -> bool:
+        """True if the document is large and not cached yet."""
+        min_rows = current_app.config.get('PDF_ASYNC_MIN_ROWS', 150)
+        large = document.background or document.rows >= min_rows
+        return large and not os.path.exists(PdfRenderCache._path(document.key))
+
+    @staticmethod
+    def submit(document: PdfDocument) -> str:
+        """
+        Queue the background rendering of a document (once per key).
+
+        Returns:
+            Status of the key (ready when the jobs table is missing: rendered inline)
+        """
+        from app.services.job_tasks import TASK_PDF_RENDER
+        from app.services.job_queue import JobQueue
+
+        key = document.key
+        meta = PdfRenderCache.read_meta(key)
+        lock_timeout = current_app.config.get('JOB_LOCK_TIMEOUT', 900)
+        if meta and meta['status'] == STATUS_PENDING and time.time() - meta['queued_at'] < lock_timeout:
+            return STATUS_PENDING
+
+        PdfRenderCache.write_meta(key, PdfRenderCache._meta(document, STATUS_PENDING))
+        JobQueue.enqueue(TASK_PDF_RENDER, {'kind': document.kind, 'object_id': document.object_id, 'key': key})
+        return PdfRenderCache.status(key)[1]['status']
+
+    @staticmethod
+    def run_render_job(payload: Dict[str, Any]) -> None:
+        """
+        Job handler: render the document from the current data and store it.
+
+        HTML layouts go through render_template, which needs a request:
+        `flask worker` only has an app context, so rendering runs in an
+        anonymous one. A failed rendering is recorded in the metadata (the
+        waiting page stops polling) before the job is retried.
+        """
+        from app.services.job_queue import JobQueue
+
+        requested_key = payload['key']
+        failed_key = requested_key
+        try:
+            with JobQueue.request_context():
+                document = PdfRenderCache.document(payload['kind'], payload['object_id'])
+                if document is None:
+                    meta = PdfRenderCache.read_meta(requested_key) or {}
+                    PdfRenderCache.write_meta(requested_key, {**meta, 'status': STATUS_FAILED})
+                    return  # Deleted since enqueued
+
+                failed_key = document.key
+                if document.key != requested_key:
+                    # Edited since enqueued: the request follows the newer document
+                    PdfRenderCache.write_meta(document.key, PdfRenderCache._meta(document, STATUS_PENDING))
+                    meta = PdfRenderCache.read_meta(requested_key) or {}
+                    PdfRenderCache.write_meta(requested_key, {**meta, 'status': STATUS_SUPERSEDED,
+                                                              'key': document.key})
+                PdfRenderCache.render(document)
+                PdfRenderCache._mark_ready(document)
+        except Exception as e:
+            logger.error(f"[PDF] Échec du rendu {payload['kind']} #{payload['object_id']}: {e}")
+            meta = PdfRenderCache.read_meta(failed_key) or {}
+            PdfRenderCache.write_meta(failed_key, {**meta, 'status': STATUS_FAILED})
+            raise
+
+    @staticmethod
+    def set_progress(key: str, done: int, total: int) -> None:
+        """Record the progress of a background rendering (shown by the waiting page)."""
+        meta = PdfRenderCache.read_meta(key)
+        if meta is not None:
+            PdfRenderCache.write_meta(key, {**meta, 'progress': [done, total]})
+
+    @staticmethod
+    def status(key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Current key and metadata of a requested document (follows a superseded key).
+
+        Returns:
+            (key, meta) - meta is None for an unknown key
+        """
+        meta = PdfRenderCache.read_meta(key)
+        if meta and meta['status'] == STATUS_SUPERSEDED:
+            key = meta['key']
+            meta = PdfRenderCache.read_meta(key)
+        if meta and meta['status'] == STATUS_READY and not os.path.exists(PdfRenderCache._path(key)):
+            meta = {**meta, 'status': STATUS_FAILED}  # Evicted before download
+        return key, meta
+
+    @staticmethod
+    def _mark_ready(document: PdfDocument) -> None:
+        """Ready metadata of a stored document (keeps the recorded progress)."""
+        meta = PdfRenderCache._meta(document, STATUS_READY)
+        progress = (PdfRenderCache.read_meta(document.key) or {}).get('progress')
+        if progress:
+            meta['progress'] = progress
+        PdfRenderCache.write_meta(document.key, meta)
+
+    @staticmethod
+    def _meta(document: PdfDocument, status: str) -> Dict[str, Any]:
+        return {
+            'kind': document.kind,
+            'object_id': document.object_id,
+            'filename': document.filename,
+            'band_id': document.band_id,
+            'org_ids': list(document.org_ids) if document.org_ids is not None else None,
+            'manager_only': document.manager_only,
+            'mimetype': document.mimetype,
+            'status': status,
+            'queued_at': time.time(),
+        }
+
+
+# ======================================================================
+# Document builders: snapshot of what each layout reads
+# ======================================================================
+
+def _tour_document(tour_id: int) -> Optional[PdfDocument]:
+    from app.models.tour import Tour
+    from app.models.tour_stop import TourStop
+    from app.utils.pdf_generator import generate_tour_pdf
+
+    tour = Tour.query.options(
+        joinedload(Tour.band), selectinload(Tour.stops).joinedload(TourStop.venue),
+    ).filter_by(id=tour_id).first()
+    if tour is None:
+        return None
+    data = {
+        'tour': row_snapshot(tour),
+        'band': row_snapshot(tour.band),
+        'stops': [{'stop': row_snapshot(stop), 'venue': row_snapshot(stop.venue)} for stop in tour.stops],
+    }
+    return PdfDocument('tour', tour.id, data, lambda: generate_tour_pdf(tour),
+                       filename=f"{tour.name.replace(' ', '_')}_schedule.pdf",
+                       band_id=tour.band_id, rows=len(tour.stops))
+
+
+def daysheet_data(stop) -> Dict[str, Any]:
+    """Snapshot of a day sheet: the stop, its tour, venue and contacts."""
+    venue = stop.venue
+    return {
+        'stop': row_snapshot(stop),
+        'tour': row_snapshot(stop.tour),
+        'band': row_snapshot(stop.tour.band) if stop.tour else None,
+        'venue': row_snapshot(venue),
+        'venue_contacts': [row_snapshot(contact) for contact in venue.contacts] if venue else [],
+        'local_contacts': [row_snapshot(contact) for contact in stop.local_contacts],
+    }
+
+
+def itinerary_data(stop) -> Dict[str, Any]:
+    """Snapshot of a travel itinerary: the stop, its logistics, lineup and local contacts."""
+    return {
+        'stop': row_snapshot(stop),
+        'tour': row_snapshot(stop.tour),
+        'band': row_snapshot(stop.tour.band) if stop.tour else None,
+        'venue': row_snapshot(stop.venue),
+        'logistics': [row_snapshot(item) for item in stop.logistics],
+        'lineup_slots': [row_snapshot(slot) for slot in stop.lineup_slots],
+        'local_contacts': [row_snapshot(contact) for contact in stop.local_contacts],
+    }
+
+
+def _daysheet_document(stop_id: int) -> Optional[PdfDocument]:
+    from app.models.tour import Tour
+    from app.models.tour_stop import TourStop
+    from app.models.venue import Venue
+    from app.utils.pdf_generator import generate_daysheet_pdf
+
+    stop = TourStop.query.options(
+        joinedload(TourStop.tour).joinedload(Tour.band),
+        joinedload(TourStop.venue).selectinload(Venue.contacts),
+        selectinload(TourStop.local_contacts),
+    ).filter_by(id=stop_id).first()
+    if stop is None:
+        return None
+    venue = stop.venue
+    data = daysheet_data(stop)
+    date_str = stop.date.strftime('%Y%m%d') if stop.date else 'TBA'
+    venue_name = venue.name.replace(' ', '_') if venue else 'TBA'
+    return PdfDocument('daysheet', stop.id, data, lambda: generate_daysheet_pdf(stop),
+                       filename=f"daysheet_{date_str}_{venue_name}.pdf",
+                       band_id=stop.tour.band_id if stop.tour else stop.band_id)
+
+
+def _settlement_document(stop_id: int) -> Optional[PdfDocument]:
+    from app.models.tour_stop import TourStop
+    from app.utils.pdf_generator import generate_settlement_pdf
+    from app.utils.reports import calculate_settlement
+
+    stop = db.session.get(TourStop, stop_id)
+    if stop is None:
+        return None
+    settlement = calculate_settlement(stop)
+    venue_name = safe_filename(settlement['venue_name'])
+    date_str = settlement['date'].strftime('%Y%m%d') if settlement['date'] else 'NA'
+    return PdfDocument('settlement', stop.id, settlement, lambda: generate_settlement_pdf(settlement),
+                       filename=f"settlement_{venue_name}_{date_str}.pdf",
+                       band_id=stop.tour.band_id if stop.tour else stop.band_id, manager_only=True)
+
+
+def _invoice_document(invoice_id: int) -> Optional[PdfDocument]:
+    from app.models.invoices import Invoice
+    from app.models.organization import OrganizationMembership
+    from app.utils.pdf_generator import generate_invoice_pdf
+
+    invoice = Invoice.query.options(selectinload(Invoice.lines)).filter_by(id=invoice_id).first()
+    if invoice is None:
+        return None
+    data = {'invoice': row_snapshot(invoice), 'lines': [row_snapshot(line) for line in invoice.lines]}
+    # Same scope as the invoices blueprint: orgs the invoice creator belongs to
+    org_ids = tuple(sorted(
+        org_id for (org_id,) in db.session.query(OrganizationMembership.org_id).filter_by(
+            user_id=invoice.created_by_id)
+    )) if invoice.created_by_id else ()
+    return PdfDocument('invoice', invoice.id, data, lambda: generate_invoice_pdf(invoice),
+                       filename=f"{invoice.number.replace('/', '-')}.pdf", org_ids=org_ids,
+                       manager_only=True)
+
+
+def _payments_data(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Snapshot of a payment report context (tour, payments and their payees)."""
+    from app.models.payments import UserPaymentConfig
+
+    tour, payments = context['tour'], context['payments']
+    user_ids = {payment.user_id for payment in payments if payment.user_id}
+    configs = UserPaymentConfig.query.filter(UserPaymentConfig.user_id.in_(user_ids)).all() if user_ids else []
+    return {
+        'tour': row_snapshot(tour),
+        'band': row_snapshot(tour.band),
+        'stops': len(tour.stops),
+        'payments': [row_snapshot(payment) for payment in payments],
+        'payees': sorted((payment.user_id, payment.user.full_name if payment.user else None)
+                         for payment in payments),
+        'configs': sorted((row_snapshot(config) for config in configs), key=lambda row: row['user_id']),
+    }
+
+
+def _payments_document(kind: str, tour_id: int, template: str, context_builder, prefix: str):
+    from app.models.tour import Tour
+    from app.services.report_service import ReportService
+
+    if db.session.get(Tour, tour_id) is None:
+        return None
+    context = context_builder(tour_id)
+    tour = context['tour']
+    date_str = tour.start_date.strftime('%Y%m%d') if tour.start_date else 'NA'
+    return PdfDocument(kind, tour.id, _payments_data(context),
+                       lambda: ReportService.render_html_pdf(template, context),
+                       filename=f"{prefix}_{safe_filename(tour.name)}_{date_str}.pdf",
+                       band_id=tour.band_id, manager_only=True, rows=len(context['payments']))
+
+
+def _bordereau_document(tour_id: int) -> Optional[PdfDocument]:
+    from app.services.report_service import ReportService
+    return _payments_document('bordereau', tour_id, 'reports/bordereau_paiement.html',
+                              ReportService.bordereau_context, 'bordereau_paiement')
+
+
+def _budget_document(tour_id: int) -> Optional[PdfDocument]:
+    from app.services.report_service import ReportService
+    return _payments_document('budget', tour_id, 'reports/budget_tournee.html',
+                              ReportService.budget_context, 'budget_tournee')
+
+
+def _tour_book_document(tour_id: int) -> Optional[PdfDocument]:
+    from app.services.tour_book import TourBookService
+    return TourBookService.document(tour_id, 'zip')
+
+
+def _tour_book_pdf_document(tour_id: int) -> Optional[PdfDocument]:
+    from app.services.tour_book import TourBookService
+    return TourBookService.document(tour_id, 'pdf')
+
+
+_DOCUMENT_BUILDERS = {
+    'tour': _tour_document,
+    'daysheet': _daysheet_document,
+    'settlement': _settlement_document,
+    'invoice': _invoice_document,
+    'bordereau': _bordereau_document,
+    'budget': _budget_document,
+    'tour_book': _tour_book_document,
+    'tour_book_pdf': _tour_book_pdf_document,
+}
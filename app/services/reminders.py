@@ -77,3 +77,74 @@ def get_users_for_reminder(tour_stop):
         u for u in recipients
         if u.is_active and getattr(u, 'notify_tour_reminder', True)
     ]
+
+
+def enqueue_due_reminders(dry_run=False):
+    """
+    Queue today's J-7 and J-1 reminders (one job per stop, user and type).
+
+    Already-sent reminders are skipped, and the idempotency key makes a
+    second run (or a run after a crash) enqueue only what is missing.
+    The emails are sent by `flask worker`.
+
+    Args:
+        dry_run: Only list what would be queued
+
+    Returns:
+        dict: {'j7': int, 'j1': int, 'skipped': int, 'planned': [(reminder_type, user, stop)]}
+    """
+    from app.extensions import db
+    from app.models.job import Job
+    from app.models.reminder import TourStopReminder
+    from app.services.job_queue import JobQueue
+    from app.services.job_tasks import TASK_TOUR_REMINDER, reminder_job_key, stop_org_id
+    from app.utils.schema import session_has_table
+
+    stats = {'j7': 0, 'j1': 0, 'skipped': 0, 'planned': []}
+    batches = [
+        ('j7', get_stops_needing_j7_reminders()),
+        ('j1', get_stops_needing_j1_reminders()),
+    ]
+    stop_ids = [stop.id for _, stops in batches for stop in stops]
+    if not stop_ids:
+        return stats
+
+    sent = {
+        (r.tour_stop_id, r.user_id, r.reminder_type)
+        for r in TourStopReminder.query.filter(TourStopReminder.tour_stop_id.in_(stop_ids))
+    }
+
+    candidates = []
+    for reminder_type, stops in batches:
+        for tour_stop in stops:
+            for user in get_users_for_reminder(tour_stop):
+                if (tour_stop.id, user.id, reminder_type) in sent:
+                    stats['skipped'] += 1
+                else:
+                    candidates.append((reminder_type, user, tour_stop))
+
+    # Reminders already queued by a previous run (one query for all keys)
+    keys = [reminder_job_key(stop.id, user.id, rtype) for rtype, user, stop in candidates]
+    queued = set()
+    if keys and session_has_table(db.session, Job.__tablename__):
+        queued = {
+            key for (key,) in db.session.query(Job.idempotency_key).filter(Job.idempotency_key.in_(keys))
+        }
+
+    for (reminder_type, user, tour_stop), key in zip(candidates, keys):
+        if key in queued:
+            stats['skipped'] += 1
+            continue
+        stats[reminder_type] += 1
+        stats['planned'].append((reminder_type, user, tour_stop))
+        if not dry_run:
+            JobQueue.enqueue(TASK_TOUR_REMINDER, {
+                'tour_stop_id': tour_stop.id,
+                'user_id': user.id,
+                'reminder_type': reminder_type,
+                'org_id': stop_org_id(tour_stop),
+            }, key=key, commit=False)
+
+    if not dry_run:
+        db.session.commit()
+    return stats
@@ -0,0 +1,344 @@
+"""
+Report query layer for GigRoute.
+SQL-side aggregation (SQLAlchemy Core) for the financial dashboard.
+
+Mirrors app.utils.reports.calculate_dashboard_kpis: same figures, same
+dict shape, but computed with SUM / GROUP BY / CASE in the database
+instead of iterating ORM objects. Works on PostgreSQL and SQLite.
+
+Aggregations run over a "stop figures" selectable exposing one row per
+tour stop. It is either computed live from the base tables
+(ReportQueries.stop_figures) or read from the materialized
+stop_financial_snapshot table.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import and_, case, func, literal, or_, select
+
+from app.extensions import db
+from app.models.logistics import LogisticsInfo, LogisticsType
+from app.models.ticket_tier import TicketTier
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop
+from app.models.venue import Venue
+from app.utils.reports import (
+    ACCOMMODATION_TYPES,
+    EQUIPMENT_TYPES,
+    TRANSPORT_TYPES,
+    format_currency,
+)
+
+# Default ticketing fee applied when a stop has none (R2, see calculate_stop_financials)
+DEFAULT_TICKETING_FEE_PCT = 5
+
+
+def _logistics_types(names: List[str]) -> List[LogisticsType]:
+    """Map category type names to LogisticsType members (unknown names skipped)."""
+    return [LogisticsType[name] for name in names if name in LogisticsType.__members__]
+
+
+class ReportQueries:
+    """SQL aggregate queries backing the financial reports."""
+
+    # ------------------------------------------------------------------
+    # Per-stop figures
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def stop_figures():
+        """
+        Per-stop financial figures computed from the base tables.
+
+        Column names match StopFinancialSnapshot so both sources can be
+        aggregated by the same queries.
+
+        Returns:
+            Subquery with one row per tour stop
+        """
+        tiers = select(
+            TicketTier.tour_stop_id.label('tour_stop_id'),
+            func.count(TicketTier.id).label('tier_count'),
+            func.sum(TicketTier.sold).label('tier_sold'),
+            func.sum(TicketTier.price * TicketTier.sold).label('tier_gross'),
+        ).group_by(TicketTier.tour_stop_id).subquery('tiers')
+
+        cost = func.coalesce(LogisticsInfo.cost, 0)
+        logistics = select(
+            LogisticsInfo.tour_stop_id.label('tour_stop_id'),
+            func.sum(case(
+                (LogisticsInfo.logistics_type.in_(_logistics_types(TRANSPORT_TYPES)), cost), else_=0
+            )).label('transport'),
+            func.sum(case(
+                (LogisticsInfo.logistics_type.in_(_logistics_types(ACCOMMODATION_TYPES)), cost), else_=0
+            )).label('accommodation'),
+            func.sum(case(
+                (LogisticsInfo.logistics_type.in_(_logistics_types(EQUIPMENT_TYPES)), cost), else_=0
+            )).label('equipment'),
+            func.sum(cost).label('total'),
+            func.sum(case(
+                (or_(LogisticsInfo.is_paid.is_(None), LogisticsInfo.is_paid.is_(False)), cost), else_=0
+            )).label('unpaid'),
+        ).group_by(LogisticsInfo.tour_stop_id).subquery('logistics')
+
+        has_tiers = func.coalesce(tiers.c.tier_count, 0) > 0
+        sold_tickets = case(
+            (has_tiers, func.coalesce(tiers.c.tier_sold, 0)),
+            else_=func.coalesce(TourStop.sold_tickets, 0),
+        )
+        ticket_revenue = case(
+            (has_tiers, func.coalesce(tiers.c.tier_gross, 0)),
+            else_=func.coalesce(TourStop.ticket_price, 0) * func.coalesce(TourStop.sold_tickets, 0),
+        )
+        fee_pct = case(
+            (func.coalesce(TourStop.ticketing_fee_percentage, 0) == 0, DEFAULT_TICKETING_FEE_PCT),
+            else_=TourStop.ticketing_fee_percentage,
+        )
+        net_ticket_revenue = ticket_revenue - ticket_revenue * fee_pct / 100
+        door_deal_revenue = case(
+            (func.coalesce(TourStop.door_deal_percentage, 0) > 0,
+             net_ticket_revenue * TourStop.door_deal_percentage / 100),
+            else_=0,
+        )
+        guarantee = func.coalesce(TourStop.guarantee, 0)
+        transport = func.coalesce(logistics.c.transport, 0)
+        accommodation = func.coalesce(logistics.c.accommodation, 0)
+        equipment = func.coalesce(logistics.c.equipment, 0)
+        logistics_total = func.coalesce(logistics.c.total, 0)
+
+        return select(
+            TourStop.id.label('tour_stop_id'),
+            TourStop.tour_id.label('tour_id'),
+            TourStop.date.label('stop_date'),
+            func.coalesce(Venue.name, 'N/A').label('venue_name'),
+            func.coalesce(Venue.city, 'N/A').label('venue_city'),
+            func.coalesce(TourStop.currency, 'EUR').label('currency'),
+            guarantee.label('guarantee'),
+            func.coalesce(Venue.capacity, 0).label('capacity'),
+            sold_tickets.label('sold_tickets'),
+            ticket_revenue.label('ticket_revenue'),
+            net_ticket_revenue.label('net_ticket_revenue'),
+            door_deal_revenue.label('door_deal_revenue'),
+            (guarantee + door_deal_revenue).label('total_estimated_revenue'),
+            transport.label('logistics_transport'),
+            accommodation.label('logistics_accommodation'),
+            equipment.label('logistics_equipment'),
+            (logistics_total - transport - accommodation - equipment).label('logistics_services'),
+            logistics_total.label('logistics_total'),
+            func.coalesce(logistics.c.unpaid, 0).label('logistics_unpaid'),
+        ).select_from(TourStop).outerjoin(
+            Venue, TourStop.venue_id == Venue.id
+        ).outerjoin(
+            tiers, tiers.c.tour_stop_id == TourStop.id
+        ).outerjoin(
+            logistics, logistics.c.tour_stop_id == TourStop.id
+        ).subquery('stop_figures')
+
+    @staticmethod
+    def month_key(date_column):
+        """'YYYY-MM' expression for a date column on the current dialect."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return func.to_char(date_column, 'YYYY-MM')
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(date_column, '%Y-%m')
+        return func.strftime('%Y-%m', date_column)
+
+    # ------------------------------------------------------------------
+    # Dashboard
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def dashboard_kpis(band_ids: List[int], figures=None) -> Dict[str, Any]:
+        """
+        Calculate advanced KPIs for the financial dashboard in SQL.
+
+        Args:
+            band_ids: Bands whose tours are included
+            figures: Per-stop figures selectable (defaults to live stop_figures())
+
+        Returns:
+            Same dict as app.utils.reports.calculate_dashboard_kpis
+            (top_stops rows carry the fields the dashboard displays)
+        """
+        f = figures if figures is not None else ReportQueries.stop_figures()
+        c = f.c
+        scope = and_(c.tour_id == Tour.id, Tour.band_id.in_(band_ids))
+
+        totals = db.session.execute(
+            select(
+                func.count(c.tour_stop_id),
+                func.sum(c.guarantee),
+                func.sum(c.door_deal_revenue),
+                func.sum(c.ticket_revenue),
+                func.sum(c.sold_tickets),
+                func.sum(c.capacity),
+                func.sum(case((c.capacity == 0, 1), else_=0)),
+                func.sum(c.logistics_transport),
+                func.sum(c.logistics_accommodation),
+                func.sum(c.logistics_equipment),
+                func.sum(c.logistics_services),
+                func.sum(c.logistics_total),
+                func.sum(c.logistics_unpaid),
+            ).select_from(f).join(Tour, scope)
+        ).one()
+
+        (num_shows, total_guarantees, total_door_deals, total_ticket_revenue,
+         total_tickets, total_capacity, stops_without_capacity,
+         log_transport, log_accommodation, log_equipment, log_services,
+         log_total, log_unpaid) = [v or 0 for v in totals]
+
+        total_guarantees = float(total_guarantees)
+        total_door_deals = float(total_door_deals)
+        total_ticket_revenue = float(total_ticket_revenue)
+        total_tickets = int(total_tickets)
+        total_capacity = int(total_capacity)
+        stops_without_capacity = int(stops_without_capacity)
+        stops_with_capacity = int(num_shows) - stops_without_capacity
+        total_revenue = total_guarantees + total_door_deals
+
+        # Bug #4: Fill rate intelligent - None si capacity inconnue
+        if total_capacity > 0:
+            avg_fill_rate = (total_tickets / total_capacity * 100)
+        elif total_tickets > 0:
+            # Billets vendus mais aucune capacité connue - impossible de calculer
+            avg_fill_rate = None
+        else:
+            avg_fill_rate = 0
+
+        avg_ticket_price = (total_ticket_revenue / total_tickets) if total_tickets > 0 else 0.0
+
+        # Revenue breakdown percentages
+        guarantee_pct = (total_guarantees / total_revenue * 100) if total_revenue > 0 else 0
+        door_deal_pct = (total_door_deals / total_revenue * 100) if total_revenue > 0 else 0
+
+        logistics_costs = {
+            'transport': float(log_transport),
+            'accommodation': float(log_accommodation),
+            'equipment': float(log_equipment),
+            'services': float(log_services),
+            'total': float(log_total),
+        }
+
+        return {
+            # Main KPIs
+            'total_revenue': total_revenue,
+            'total_tickets': total_tickets,
+            'total_capacity': total_capacity,
+            'avg_fill_rate': round(avg_fill_rate, 1) if avg_fill_rate is not None else None,  # Bug #4
+            'avg_ticket_price': float(avg_ticket_price),
+            'num_shows': int(num_shows),
+
+            # Bug #5: GBOR (ticket revenue) distinct from artist revenue
+            'total_ticket_revenue': total_ticket_revenue,
+            'formatted_ticket_revenue': format_currency(total_ticket_revenue, 'EUR'),
+
+            # Bug #3: Venues without capacity
+            'stops_without_capacity': stops_without_capacity,
+            'stops_with_capacity': stops_with_capacity,
+
+            # Revenue breakdown
+            'total_guarantees': total_guarantees,
+            'total_door_deals': total_door_deals,
+            'guarantee_percentage': round(float(guarantee_pct), 1),
+            'door_deal_percentage': round(float(door_deal_pct), 1),
+
+            # Chart data
+            'monthly_revenue': ReportQueries.monthly_revenue(band_ids, f),
+            'revenue_by_tour': ReportQueries.revenue_by_tour(band_ids, f),
+            'top_stops': ReportQueries.top_stops(band_ids, f),
+
+            # Formatted values for display
+            'formatted_revenue': format_currency(total_revenue, 'EUR'),
+            'formatted_guarantees': format_currency(total_guarantees, 'EUR'),
+            'formatted_door_deals': format_currency(total_door_deals, 'EUR'),
+
+            # Logistics costs (informatif)
+            'logistics_costs': logistics_costs,
+            'logistics_by_paid_by': ReportQueries.logistics_by_paid_by(band_ids),
+            'logistics_unpaid': float(log_unpaid),
+            'formatted_logistics_total': format_currency(logistics_costs['total'], 'EUR'),
+            'formatted_logistics_transport': format_currency(logistics_costs['transport'], 'EUR'),
+            'formatted_logistics_accommodation': format_currency(logistics_costs['accommodation'], 'EUR'),
+            'formatted_logistics_equipment': format_currency(logistics_costs['equipment'], 'EUR'),
+            'formatted_logistics_services': format_currency(logistics_costs['services'], 'EUR'),
+        }
+
+    @staticmethod
+    def monthly_revenue(band_ids: List[int], figures=None) -> List[Dict[str, Any]]:
+        """Estimated revenue per month ('YYYY-MM'), sorted chronologically."""
+        f = figures if figures is not None else ReportQueries.stop_figures()
+        month = func.coalesce(ReportQueries.month_key(f.c.stop_date), literal('unknown'))
+        rows = db.session.execute(
+            select(month.label('month'), func.sum(f.c.total_estimated_revenue))
+            .select_from(f)
+            .join(Tour, and_(f.c.tour_id == Tour.id, Tour.band_id.in_(band_ids)))
+            .group_by(month)
+            .order_by(month)
+        ).all()
+        return [{'month': m, 'revenue': float(r or 0)} for m, r in rows]
+
+    @staticmethod
+    def revenue_by_tour(band_ids: List[int], figures=None) -> Dict[str, float]:
+        """Estimated revenue per tour name (tours without stops included at 0)."""
+        f = figures if figures is not None else ReportQueries.stop_figures()
+        rows = db.session.execute(
+            select(Tour.name, func.sum(f.c.total_estimated_revenue))
+            .select_from(Tour)
+            .outerjoin(f, f.c.tour_id == Tour.id)
+            .where(Tour.band_id.in_(band_ids))
+            .group_by(Tour.id, Tour.name, Tour.start_date)
+            .order_by(Tour.start_date.desc(), Tour.id)
+        ).all()
+        return {name: float(total or 0) for name, total in rows}
+
+    @staticmethod
+    def top_stops(band_ids: List[int], figures=None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best performing stops by estimated revenue."""
+        f = figures if figures is not None else ReportQueries.stop_figures()
+        c = f.c
+        rows = db.session.execute(
+            select(
+                c.tour_stop_id, c.tour_id, c.stop_date, c.venue_name, c.venue_city, c.currency,
+                c.guarantee, c.capacity, c.sold_tickets, c.ticket_revenue,
+                c.door_deal_revenue, c.total_estimated_revenue,
+            )
+            .select_from(f)
+            .join(Tour, and_(c.tour_id == Tour.id, Tour.band_id.in_(band_ids)))
+            .order_by(c.total_estimated_revenue.desc(), Tour.start_date.desc(), c.stop_date, c.tour_stop_id)
+            .limit(limit)
+        ).all()
+
+        top = []
+        for row in rows:
+            capacity = int(row.capacity or 0)
+            sold = int(row.sold_tickets or 0)
+            top.append({
+                'stop_id': row.tour_stop_id,
+                'tour_id': row.tour_id,
+                'date': row.stop_date,
+                'venue_name': row.venue_name,
+                'venue_city': row.venue_city,
+                'currency': row.currency or 'EUR',
+                'guarantee': float(row.guarantee or 0),
+                'capacity': capacity,
+                'sold_tickets': sold,
+                'fill_rate': round(sold / capacity * 100, 1) if capacity > 0 else 0,
+                'ticket_revenue': float(row.ticket_revenue or 0),
+                'door_deal_revenue': float(row.door_deal_revenue or 0),
+                'total_estimated_revenue': float(row.total_estimated_revenue or 0),
+            })
+        return top
+
+    @staticmethod
+    def logistics_by_paid_by(band_ids: List[int]) -> Dict[str, float]:
+        """Logistics costs grouped by who paid ('non_specifie' when unknown)."""
+        paid_by = func.coalesce(func.nullif(LogisticsInfo.paid_by, ''), 'non_specifie')
+        rows = db.session.execute(
+            select(paid_by, func.sum(LogisticsInfo.cost))
+            .select_from(LogisticsInfo)
+            .join(TourStop, LogisticsInfo.tour_stop_id == TourStop.id)
+            .join(Tour, and_(TourStop.tour_id == Tour.id, Tour.band_id.in_(band_ids)))
+            .where(LogisticsInfo.cost.isnot(None), LogisticsInfo.cost != 0)
+            .group_by(paid_by)
+        ).all()
+        return {key: float(amount or 0) for key, amount in rows}
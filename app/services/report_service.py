@@ -4,9 +4,7 @@ Generates accounting-ready documents for external payment processing.
 """
 from datetime import datetime, date
 from decimal import Decimal
-from typing import List, Dict, Any, Optional
-import csv
-import io
+from typing import List, Dict, Any, Iterator, Optional
 
 from flask import render_template, current_app
 from sqlalchemy.orm import joinedload
@@ -21,11 +19,31 @@ from app.models.payments import (
 from app.models.tour import Tour
 from app.models.user import User
 from app.services.payment_service import PaymentService
+from app.utils.exports import csv_string, preload, stream_batches
 
 
 class ReportService:
     """Service for generating financial reports and documents."""
 
+    @staticmethod
+    def render_html_pdf(template: str, context: Dict[str, Any]) -> bytes:
+        """
+        Render a report template and convert it to PDF with xhtml2pdf.
+
+        Args:
+            template: Jinja template path
+            context: Template variables (generated_at is added)
+
+        Returns:
+            PDF bytes
+        """
+        html_content = render_template(template, generated_at=datetime.now(), **context)
+
+        # Convert to PDF using xhtml2pdf (cloud-compatible)
+        result = BytesIO()
+        pisa.pisaDocument(BytesIO(html_content.encode('utf-8')), result)
+        return result.getvalue()
+
     @staticmethod
     def generate_bordereau_paiement(tour_id: int) -> bytes:
         """
@@ -38,6 +56,21 @@ class ReportService:
         Returns:
             PDF bytes
         """
+        return ReportService.render_html_pdf('reports/bordereau_paiement.html',
+                                             ReportService.bordereau_context(tour_id))
+
+    @staticmethod
+    def bordereau_context(tour_id: int) -> Dict[str, Any]:
+        """
+        Template data of the payment slip: approved / scheduled payments grouped by payee.
+
+        Args:
+            tour_id: Tour ID
+
+        Returns:
+            dict: tour, payments, payments_by_user (user, config, payments, total),
+            total_amount, total_beneficiaries
+        """
         tour = Tour.query.get_or_404(tour_id)
 
         # Get approved payments for this tour with eager loading (H3 fix: avoid N+1 queries)
@@ -78,21 +111,13 @@ class ReportService:
         total_amount = sum(p['total'] for p in payments_by_user.values())
         total_beneficiaries = len(payments_by_user)
 
-        # Render HTML template
-        html_content = render_template(
-            'reports/bordereau_paiement.html',
-            tour=tour,
-            payments_by_user=payments_by_user,
-            total_amount=total_amount,
-            total_beneficiaries=total_beneficiaries,
-            generated_at=datetime.now(),
-            payments=payments
-        )
-
-        # Convert to PDF using xhtml2pdf (cloud-compatible)
-        result = BytesIO()
-        pisa.pisaDocument(BytesIO(html_content.encode('utf-8')), result)
-        return result.getvalue()
+        return {
+            'tour': tour,
+            'payments_by_user': payments_by_user,
+            'total_amount': total_amount,
+            'total_beneficiaries': total_beneficiaries,
+            'payments': payments,
+        }
 
     @staticmethod
     def generate_fiche_membre(user_id: int, start_date: date = None, end_date: date = None) -> bytes:
@@ -159,6 +184,20 @@ class ReportService:
         Returns:
             PDF bytes
         """
+        return ReportService.render_html_pdf('reports/budget_tournee.html',
+                                             ReportService.budget_context(tour_id))
+
+    @staticmethod
+    def budget_context(tour_id: int) -> Dict[str, Any]:
+        """
+        Template data of the tour budget: payments, summary and totals by category / type.
+
+        Args:
+            tour_id: Tour ID
+
+        Returns:
+            dict: tour, payments, summary, by_category, by_type, total_amount
+        """
         tour = Tour.query.get_or_404(tour_id)
 
         # Get all payments for this tour
@@ -189,22 +228,14 @@ class ReportService:
                     'total': sum(p.amount for p in type_payments)
                 })
 
-        # Render HTML template
-        html_content = render_template(
-            'reports/budget_tournee.html',
-            tour=tour,
-            payments=payments,
-            summary=summary,
-            by_category=by_category,
-            by_type=by_type,
-            total_amount=summary['total_amount'],
-            generated_at=datetime.now()
-        )
-
-        # Convert to PDF using xhtml2pdf (cloud-compatible)
-        result = BytesIO()
-        pisa.pisaDocument(BytesIO(html_content.encode('utf-8')), result)
-        return result.getvalue()
+        return {
+            'tour': tour,
+            'payments': payments,
+            'summary': summary,
+            'by_category': by_category,
+            'by_type': by_type,
+            'total_amount': summary['total_amount'],
+        }
 
     @staticmethod
     def generate_attestation_paiement(payment_id: int) -> bytes:
@@ -236,21 +267,23 @@ class ReportService:
         return result.getvalue()
 
     @staticmethod
-    def export_masse_salariale_csv(tour_id: int) -> str:
+    def masse_salariale_rows(tour_id: int) -> Iterator[list]:
         """
-        Export payroll data for accounting.
+        Rows of the payroll export for accounting (header first).
         Includes all payment details with bank information.
 
+        Payments are read in batches through a server-side cursor and the
+        UserPaymentConfigs of each batch are loaded in one query.
+
         Args:
             tour_id: Tour ID
 
         Returns:
-            CSV string
+            Row iterator for app.utils.exports
         """
         tour = Tour.query.get_or_404(tour_id)
 
-        # Get all approved/paid payments with eager loading (H3 fix: avoid N+1 queries)
-        payments = TeamMemberPayment.query.filter_by(tour_id=tour_id).filter(
+        query = TeamMemberPayment.query.filter_by(tour_id=tour_id).filter(
             TeamMemberPayment.status.in_([
                 PaymentStatus.APPROVED,
                 PaymentStatus.SCHEDULED,
@@ -258,76 +291,82 @@ class ReportService:
             ])
         ).options(
             joinedload(TeamMemberPayment.user)
-        ).order_by(TeamMemberPayment.user_id).all()
-
-        # Pre-load all UserPaymentConfigs in one query (H3 fix: avoid N+1)
-        user_ids = list(set(p.user_id for p in payments if p.user_id))
-        configs_list = UserPaymentConfig.query.filter(
-            UserPaymentConfig.user_id.in_(user_ids)
-        ).all() if user_ids else []
-        configs_by_user = {c.user_id: c for c in configs_list}
+        ).order_by(TeamMemberPayment.user_id, TeamMemberPayment.id)
+
+        def rows():
+            # Header matching French accounting software format
+            yield [
+                'Reference',
+                'Nom',
+                'Prenom',
+                'Email',
+                'Type paiement',
+                'Description',
+                'Date travail',
+                'Montant brut',
+                'Devise',
+                'IBAN',
+                'BIC',
+                'Banque',
+                'Statut intermittent',
+                'SIRET',
+                'Numéro congés spectacles',
+                'Tournée',
+                'Statut'
+            ]
+
+            for batch in stream_batches(query):
+                configs_by_user = preload(UserPaymentConfig.user_id, (p.user_id for p in batch))
+                for payment in batch:
+                    user = payment.user
+                    config = configs_by_user.get(payment.user_id)
+
+                    yield [
+                        payment.reference,
+                        user.last_name if user else '',
+                        user.first_name if user else '',
+                        user.email if user else '',
+                        payment.payment_type.value if payment.payment_type else '',
+                        payment.description or '',
+                        payment.work_date.strftime('%d/%m/%Y') if payment.work_date else '',
+                        payment.amount,
+                        payment.currency,
+                        config.iban if config and config.iban else '',
+                        config.bic if config and config.bic else '',
+                        config.bank_name if config and config.bank_name else '',
+                        'Oui' if config and config.is_intermittent else 'Non',
+                        config.siret if config and config.siret else '',
+                        config.conges_spectacle_id if config and config.conges_spectacle_id else '',
+                        tour.name,
+                        payment.status.value if payment.status else ''
+                    ]
+
+        return rows()
 
-        output = io.StringIO()
-        writer = csv.writer(output, delimiter=';')
-
-        # Header matching French accounting software format
-        writer.writerow([
-            'Reference',
-            'Nom',
-            'Prenom',
-            'Email',
-            'Type paiement',
-            'Description',
-            'Date travail',
-            'Montant brut',
-            'Devise',
-            'IBAN',
-            'BIC',
-            'Banque',
-            'Statut intermittent',
-            'SIRET',
-            'Numéro congés spectacles',
-            'Tournée',
-            'Statut'
-        ])
+    @staticmethod
+    def export_masse_salariale_csv(tour_id: int) -> str:
+        """
+        Export payroll data for accounting (see masse_salariale_rows).
 
-        for payment in payments:
-            user = payment.user
-            config = configs_by_user.get(payment.user_id) if payment.user_id else None
-
-            writer.writerow([
-                payment.reference,
-                user.last_name if user else '',
-                user.first_name if user else '',
-                user.email if user else '',
-                payment.payment_type.value if payment.payment_type else '',
-                payment.description or '',
-                payment.work_date.strftime('%d/%m/%Y') if payment.work_date else '',
-                str(payment.amount),
-                payment.currency,
-                config.iban if config and config.iban else '',
-                config.bic if config and config.bic else '',
-                config.bank_name if config and config.bank_name else '',
-                'Oui' if config and config.is_intermittent else 'Non',
-                config.siret if config and config.siret else '',
-                config.conges_spectacle_id if config and config.conges_spectacle_id else '',
-                tour.name,
-                payment.status.value if payment.status else ''
-            ])
+        Args:
+            tour_id: Tour ID
 
-        return output.getvalue()
+        Returns:
+            CSV string
+        """
+        return csv_string(ReportService.masse_salariale_rows(tour_id), delimiter=';')
 
     @staticmethod
-    def export_paiements_a_effectuer_csv(band_ids: Optional[List[int]] = None) -> str:
+    def paiements_a_effectuer_rows(band_ids: Optional[List[int]] = None) -> Iterator[list]:
         """
-        Export list of payments to be processed.
+        Rows of the list of payments to be processed (header first).
         Only includes approved payments not yet paid.
 
         Args:
             band_ids: Optional list of band IDs to filter by
 
         Returns:
-            CSV string
+            Row iterator for app.utils.exports
         """
         query = TeamMemberPayment.query.filter_by(status=PaymentStatus.APPROVED)
 
@@ -335,58 +374,65 @@ class ReportService:
             # Filter by tours belonging to these bands
             query = query.join(Tour).filter(Tour.band_id.in_(band_ids))
 
-        # Add eager loading (H3 fix: avoid N+1 queries)
-        payments = query.options(
+        query = query.options(
             joinedload(TeamMemberPayment.user),
             joinedload(TeamMemberPayment.tour)
         ).order_by(
             TeamMemberPayment.user_id,
-            TeamMemberPayment.work_date
-        ).all()
-
-        # Pre-load all UserPaymentConfigs in one query (H3 fix: avoid N+1)
-        user_ids = list(set(p.user_id for p in payments if p.user_id))
-        configs_list = UserPaymentConfig.query.filter(
-            UserPaymentConfig.user_id.in_(user_ids)
-        ).all() if user_ids else []
-        configs_by_user = {c.user_id: c for c in configs_list}
+            TeamMemberPayment.work_date,
+            TeamMemberPayment.id
+        )
+        execution_date = datetime.now().strftime('%d/%m/%Y')  # Suggested execution date
+
+        def rows():
+            # Header for bank import format
+            yield [
+                'Reference virement',
+                'Beneficiaire',
+                'IBAN',
+                'BIC',
+                'Montant',
+                'Devise',
+                'Motif',
+                'Date execution'
+            ]
+
+            for batch in stream_batches(query):
+                configs_by_user = preload(UserPaymentConfig.user_id, (p.user_id for p in batch))
+                for payment in batch:
+                    user = payment.user
+                    config = configs_by_user.get(payment.user_id)
+
+                    # Create payment reference for bank
+                    motif = f"{payment.reference} - {payment.payment_type.value if payment.payment_type else 'Paiement'}"
+                    if payment.tour:
+                        motif += f" - {payment.tour.name}"
+
+                    yield [
+                        payment.reference,
+                        user.full_name if user else '',
+                        config.iban if config and config.iban else '',
+                        config.bic if config and config.bic else '',
+                        payment.amount,
+                        payment.currency,
+                        motif,
+                        execution_date
+                    ]
+
+        return rows()
 
-        output = io.StringIO()
-        writer = csv.writer(output, delimiter=';')
-
-        # Header for bank import format
-        writer.writerow([
-            'Reference virement',
-            'Beneficiaire',
-            'IBAN',
-            'BIC',
-            'Montant',
-            'Devise',
-            'Motif',
-            'Date execution'
-        ])
+    @staticmethod
+    def export_paiements_a_effectuer_csv(band_ids: Optional[List[int]] = None) -> str:
+        """
+        Export list of payments to be processed (see paiements_a_effectuer_rows).
 
-        for payment in payments:
-            user = payment.user
-            config = configs_by_user.get(payment.user_id) if payment.user_id else None
-
-            # Create payment reference for bank
-            motif = f"{payment.reference} - {payment.payment_type.value if payment.payment_type else 'Paiement'}"
-            if payment.tour:
-                motif += f" - {payment.tour.name}"
-
-            writer.writerow([
-                payment.reference,
-                user.full_name if user else '',
-                config.iban if config and config.iban else '',
-                config.bic if config and config.bic else '',
-                str(payment.amount),
-                payment.currency,
-                motif,
-                datetime.now().strftime('%d/%m/%Y')  # Suggested execution date
-            ])
+        Args:
+            band_ids: Optional list of band IDs to filter by
 
-        return output.getvalue()
+        Returns:
+            CSV string
+        """
+        return csv_string(ReportService.paiements_a_effectuer_rows(band_ids), delimiter=';')
 
     @staticmethod
     def get_dashboard_stats() -> Dict[str, Any]:
@@ -0,0 +1,156 @@
+"""
+Route optimization service for GigRoute.
+Suggests a stop ordering for a tour that minimizes total kilometers
+(and drive time), keeping confirmed dates in place.
+
+The set of dates is fixed: the optimizer decides which stop plays on
+which date. Confirmed / performed / settled stops keep their date; draft
+and pending stops (open dates) may move, optionally limited to
+`window_days` around their current date. Canceled and rescheduled stops
+are ignored; stops without coordinates are reported as unlocated.
+
+Results are cached per tour version (fingerprint of the tour, its stops
+and their coordinates), so any edit invalidates them.
+"""
+import bisect
+import hashlib
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import joinedload
+
+from app.extensions import cache
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop, TourStopStatus
+from app.utils.geo import estimate_travel_time
+from app.utils.routing import NUMPY_AVAILABLE, haversine_matrix, optimize_route, route_length
+
+# Cache lifetime of an optimization result (the key changes on any edit anyway)
+CACHE_TIMEOUT = 3600
+
+# Stops whose date cannot move
+LOCKED_STATUSES = {TourStopStatus.CONFIRMED, TourStopStatus.PERFORMED, TourStopStatus.SETTLED}
+
+# Stops not taking part in the run
+EXCLUDED_STATUSES = {TourStopStatus.CANCELED, TourStopStatus.RESCHEDULED}
+
+
+class RouteOptimizationService:
+    """Service for tour route suggestions."""
+
+    @staticmethod
+    def load_stops(tour: Tour) -> List[TourStop]:
+        """Tour stops taking part in the run, by date."""
+        return TourStop.query.options(joinedload(TourStop.venue)).filter(
+            TourStop.tour_id == tour.id,
+            TourStop.status.notin_(EXCLUDED_STATUSES),
+        ).order_by(TourStop.date, TourStop.id).all()
+
+    @staticmethod
+    def tour_version(tour: Tour, stops: List[TourStop]) -> str:
+        """Fingerprint of everything the optimization depends on."""
+        digest = hashlib.sha1()
+        digest.update(f'{tour.id}|{tour.updated_at}'.encode())
+        for stop in stops:
+            digest.update(
+                f'|{stop.id},{stop.date},{stop.status.name},{stop.updated_at},{stop.get_coordinates}'.encode()
+            )
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def optimize_tour(tour: Tour, window_days: Optional[int] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Suggest a shorter ordering of the tour's stops.
+
+        Args:
+            tour: Tour to optimize
+            window_days: Max date shift (days) for open dates (None = anywhere in the run)
+            use_cache: Serve / store the result in the cache
+
+        Returns:
+            Dict with current and suggested routes (km, drive minutes, legs)
+        """
+        stops = RouteOptimizationService.load_stops(tour)
+        version = RouteOptimizationService.tour_version(tour, stops)
+        cache_key = f'route-optimization:{tour.id}:{version}:{window_days}'
+
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return {**cached, 'cached': True}
+
+        result = RouteOptimizationService._compute(tour, stops, window_days)
+        result['version'] = version
+        if use_cache:
+            cache.set(cache_key, result, timeout=CACHE_TIMEOUT)
+        return {**result, 'cached': False}
+
+    @staticmethod
+    def _windows(located: List[TourStop], window_days: Optional[int]) -> List[tuple]:
+        """Allowed positions (lo, hi) of each stop within the sorted dates."""
+        dates = [stop.date for stop in located]
+        windows = []
+        for stop in located:
+            if stop.status in LOCKED_STATUSES:
+                earliest = latest = stop.date
+            elif window_days is None:
+                earliest, latest = dates[0], dates[-1]
+            else:
+                earliest = stop.date - timedelta(days=window_days)
+                latest = stop.date + timedelta(days=window_days)
+            windows.append((bisect.bisect_left(dates, earliest), bisect.bisect_right(dates, latest) - 1))
+        return windows
+
+    @staticmethod
+    def _compute(tour: Tour, stops: List[TourStop], window_days: Optional[int]) -> Dict[str, Any]:
+        located = [stop for stop in stops if stop.has_coordinates]
+        unlocated = [stop.id for stop in stops if not stop.has_coordinates]
+
+        matrix = haversine_matrix([stop.get_coordinates for stop in located])
+        windows = RouteOptimizationService._windows(located, window_days)
+        current = list(range(len(located)))
+        suggested = optimize_route(matrix, windows, initial=current)
+
+        current_summary = RouteOptimizationService._summary(located, current, matrix)
+        suggested_summary = RouteOptimizationService._summary(located, suggested, matrix)
+
+        return {
+            'tour_id': tour.id,
+            'engine': 'numpy' if NUMPY_AVAILABLE else 'python',
+            'window_days': window_days,
+            'current': current_summary,
+            'suggested': suggested_summary,
+            'savings_km': round(current_summary['total_km'] - suggested_summary['total_km'], 1),
+            'savings_drive_minutes': (current_summary['total_drive_minutes']
+                                      - suggested_summary['total_drive_minutes']),
+            'locked': [stop.id for stop in located if stop.status in LOCKED_STATUSES],
+            'unlocated': unlocated,
+        }
+
+    @staticmethod
+    def _summary(located: List[TourStop], route: List[int], matrix: List[List[float]]) -> Dict[str, Any]:
+        """Legs, total km and drive time of a route (position k = k-th date)."""
+        legs = []
+        total_minutes = 0
+        for position, index in enumerate(route):
+            stop = located[index]
+            play_date = located[position].date
+            leg_km = matrix[route[position - 1]][index] if position > 0 else 0.0
+            leg_minutes = estimate_travel_time(leg_km, 'car') if position > 0 else 0
+            total_minutes += leg_minutes
+            legs.append({
+                'position': position,
+                'date': play_date.isoformat(),
+                'stop_id': stop.id,
+                'original_date': stop.date.isoformat(),
+                'moved': stop.date != play_date,
+                'venue_name': stop.map_location_name,
+                'city': stop.map_location_city,
+                'leg_km': round(leg_km, 1),
+                'leg_drive_minutes': leg_minutes,
+            })
+        return {
+            'total_km': round(route_length(route, matrix), 1) if route else 0.0,
+            'total_drive_minutes': total_minutes,
+            'stops': legs,
+        }
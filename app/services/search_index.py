@@ -0,0 +1,381 @@
+"""
+Search index service for GigRoute.
+Maintains the search_documents table and answers global search queries.
+
+Indexed entities: tours, venues, bands and guestlist entries. Their
+search_documents rows are refreshed through SQLAlchemy session events
+(collected after flush, written before commit), so the index stays in
+sync with every code path that goes through the ORM.
+
+Matching is accent- and case-insensitive ("cafe" finds "Café de la Danse").
+On PostgreSQL, queries use pg_trgm (GIN index on normalized_text). On
+other databases (SQLite in dev/tests), candidates are scored in-process
+with the same trigram logic. Results are ranked per entity type, so many
+guest matches never crowd out the tours, venues and bands.
+
+Tour and guest documents carry the band of their tour: moving a tour to
+another band or a stop to another tour re-indexes the guests under it.
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, func, inspect, literal, or_
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.band import Band
+from app.models.guestlist import GuestlistEntry
+from app.models.search_document import SearchDocument
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop
+from app.models.venue import Venue
+from app.utils.schema import session_has_table
+
+# session.info keys for entities touched since the last refresh
+_PENDING_UPSERT_KEY = 'search_index_pending_upsert'
+_PENDING_DELETE_KEY = 'search_index_pending_delete'
+
+# Entity type names stored in search_documents.entity_type
+ENTITY_TYPES = {
+    Tour: 'tour',
+    Venue: 'venue',
+    Band: 'band',
+    GuestlistEntry: 'guest',
+}
+
+# Minimum word similarity for fuzzy (typo-tolerant) matches.
+# Matches pg_trgm's default word_similarity_threshold.
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+_listeners_registered = False
+
+
+# ======================================================================
+# Text helpers
+# ======================================================================
+
+def normalize_search_text(*parts: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse whitespace ("Café  Olé" -> "cafe ole")."""
+    text = ' '.join(p for p in parts if p)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^\w]+', ' ', text.casefold())
+    return ' '.join(text.split())
+
+
+def trigrams(word: str) -> Set[str]:
+    """pg_trgm-style trigrams of a single word (padded "  w" ... "d ")."""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def word_similarity(query: str, text: str) -> float:
+    """
+    Approximate pg_trgm word_similarity(query, text).
+
+    Share of the query's trigrams found in the best matching word of text
+    (1.0 when every query word appears in the text).
+    """
+    query_words = query.split()
+    text_words = text.split()
+    if not query_words or not text_words:
+        return 0.0
+
+    scores = []
+    for q_word in query_words:
+        q_trgms = trigrams(q_word)
+        best = max(len(q_trgms & trigrams(t_word)) for t_word in text_words)
+        scores.append(best / len(q_trgms))
+    return sum(scores) / len(scores)
+
+
+# ======================================================================
+# Service
+# ======================================================================
+
+class SearchIndexService:
+    """Service for maintaining and querying the global search index."""
+
+    @staticmethod
+    def document_fields(obj) -> Optional[Dict[str, Any]]:
+        """
+        Build search_documents column values for an indexed entity.
+
+        Returns:
+            Dict of column values, or None if the entity type is not indexed
+        """
+        if isinstance(obj, Tour):
+            band = obj.band
+            return {
+                'org_id': band.org_id if band else None,
+                'band_id': obj.band_id,
+                'title': obj.name,
+                'subtitle': obj.status.value if obj.status else None,
+                'normalized_text': normalize_search_text(obj.name),
+            }
+        if isinstance(obj, Venue):
+            return {
+                'org_id': obj.org_id,
+                'band_id': None,
+                'title': obj.name,
+                'subtitle': obj.city,
+                'normalized_text': normalize_search_text(obj.name, obj.city),
+            }
+        if isinstance(obj, Band):
+            return {
+                'org_id': obj.org_id,
+                'band_id': obj.id,
+                'title': obj.name,
+                'subtitle': None,
+                'normalized_text': normalize_search_text(obj.name),
+            }
+        if isinstance(obj, GuestlistEntry):
+            stop = obj.tour_stop
+            tour = stop.tour if stop else None
+            return {
+                'org_id': tour.band.org_id if tour and tour.band else None,
+                'band_id': tour.band_id if tour else None,
+                'title': obj.guest_name,
+                'subtitle': obj.status.value if obj.status else None,
+                'normalized_text': normalize_search_text(obj.guest_name),
+            }
+        return None
+
+    @staticmethod
+    def index_entities(entities: Set[Tuple[type, int]], session: Optional[Session] = None) -> int:
+        """
+        Insert or update the search documents of the given entities.
+
+        Args:
+            entities: (model class, id) pairs
+            session: Session to use (defaults to db.session)
+
+        Returns:
+            Number of documents written
+        """
+        session = session or db.session
+        written = 0
+
+        by_model: Dict[type, Set[int]] = {}
+        for model, entity_id in entities:
+            by_model.setdefault(model, set()).add(entity_id)
+
+        for model, ids in by_model.items():
+            entity_type = ENTITY_TYPES[model]
+            objects = session.query(model).filter(model.id.in_(ids)).all()
+            existing = {
+                doc.entity_id: doc
+                for doc in session.query(SearchDocument).filter(
+                    SearchDocument.entity_type == entity_type,
+                    SearchDocument.entity_id.in_(ids),
+                )
+            }
+            for obj in objects:
+                fields = SearchIndexService.document_fields(obj)
+                doc = existing.pop(obj.id, None)
+                if doc is None:
+                    doc = SearchDocument(entity_type=entity_type, entity_id=obj.id)
+                    session.add(doc)
+                for key, value in fields.items():
+                    setattr(doc, key, value)
+                written += 1
+            # Entities gone in the meantime
+            for orphan in existing.values():
+                session.delete(orphan)
+
+        return written
+
+    @staticmethod
+    def remove_entities(entities: Set[Tuple[str, int]], session: Optional[Session] = None) -> None:
+        """Delete the search documents of (entity_type, id) pairs."""
+        session = session or db.session
+        by_type: Dict[str, Set[int]] = {}
+        for entity_type, entity_id in entities:
+            by_type.setdefault(entity_type, set()).add(entity_id)
+        for entity_type, ids in by_type.items():
+            session.query(SearchDocument).filter(
+                SearchDocument.entity_type == entity_type,
+                SearchDocument.entity_id.in_(ids),
+            ).delete(synchronize_session=False)
+
+    @staticmethod
+    def rebuild_all(batch_size: int = 500) -> int:
+        """
+        Rebuild the whole search index (backfill after migration).
+
+        Returns:
+            Number of documents written
+        """
+        db.session.query(SearchDocument).delete(synchronize_session=False)
+        written = 0
+        for model in ENTITY_TYPES:
+            ids = [row[0] for row in db.session.query(model.id).order_by(model.id)]
+            for start in range(0, len(ids), batch_size):
+                batch = {(model, entity_id) for entity_id in ids[start:start + batch_size]}
+                written += SearchIndexService.index_entities(batch)
+                db.session.flush()
+        db.session.commit()
+        return written
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _scope_filter(band_ids: List[int], org_id: Optional[int]):
+        """Venues are visible per organization, everything else per band."""
+        if org_id is not None:
+            venue_scope = and_(SearchDocument.entity_type == 'venue', SearchDocument.org_id == org_id)
+        else:
+            venue_scope = SearchDocument.entity_type == 'venue'
+        band_scope = and_(
+            SearchDocument.entity_type != 'venue',
+            SearchDocument.band_id.in_(band_ids),
+        )
+        return or_(venue_scope, band_scope)
+
+    @staticmethod
+    def search(query: str, band_ids: List[int], org_id: Optional[int] = None,
+               per_type: int = 10) -> List[Tuple[SearchDocument, float]]:
+        """
+        Ranked, accent-insensitive search over the index.
+
+        Args:
+            query: Raw user query
+            band_ids: Bands whose tours, guests and band records are visible
+            org_id: Organization whose venues are visible (None = all venues)
+            per_type: Maximum number of results of each entity type
+
+        Returns:
+            List of (SearchDocument, score) sorted by relevance, the best
+            `per_type` of each type
+        """
+        normalized = normalize_search_text(query)
+        if not normalized:
+            return []
+
+        scope = SearchIndexService._scope_filter(band_ids, org_id)
+        if db.session.get_bind().dialect.name == 'postgresql':
+            return SearchIndexService._search_pg_trgm(normalized, scope, per_type)
+        return SearchIndexService._search_in_process(normalized, scope, per_type)
+
+    @staticmethod
+    def _search_pg_trgm(normalized: str, scope, per_type: int) -> List[Tuple[SearchDocument, float]]:
+        """Single ranked query using pg_trgm (GIN index on normalized_text), ranked per type."""
+        text_col = SearchDocument.normalized_text
+        substring = text_col.contains(normalized, autoescape=True)
+        # "<%" is pg_trgm's word similarity operator (index-assisted)
+        fuzzy = literal(normalized).op('<%')(text_col)
+        score = case((substring, 1.0), else_=0.0) + func.word_similarity(normalized, text_col)
+        rank = func.row_number().over(
+            partition_by=SearchDocument.entity_type,
+            order_by=(score.desc(), func.length(text_col), SearchDocument.id),
+        )
+
+        ranked = db.session.query(
+            SearchDocument.id.label('id'), score.label('score'), rank.label('rank')
+        ).filter(
+            scope,
+            or_(substring, fuzzy),
+        ).subquery()
+        rows = db.session.query(SearchDocument, ranked.c.score).join(
+            ranked, SearchDocument.id == ranked.c.id
+        ).filter(
+            ranked.c.rank <= per_type
+        ).order_by(
+            ranked.c.score.desc(), func.length(text_col), SearchDocument.id
+        ).all()
+        return [(doc, float(s)) for doc, s in rows]
+
+    @staticmethod
+    def _search_in_process(normalized: str, scope, per_type: int) -> List[Tuple[SearchDocument, float]]:
+        """Fallback without pg_trgm: score scoped candidates in Python."""
+        scored = []
+        for doc in db.session.query(SearchDocument).filter(scope):
+            text = doc.normalized_text
+            substring = 1.0 if normalized in text else 0.0
+            similarity = word_similarity(normalized, text)
+            if substring or similarity >= WORD_SIMILARITY_THRESHOLD:
+                scored.append((doc, substring + similarity))
+
+        scored.sort(key=lambda item: (-item[1], len(item[0].normalized_text), item[0].id))
+        kept: Dict[str, int] = {}
+        results = []
+        for doc, score in scored:
+            if kept.get(doc.entity_type, 0) < per_type:
+                kept[doc.entity_type] = kept.get(doc.entity_type, 0) + 1
+                results.append((doc, score))
+        return results
+
+
+# ======================================================================
+# Session event hooks
+# ======================================================================
+
+def _moved(obj, attr: str) -> bool:
+    """True if the flush changed a (foreign key) attribute of an existing row."""
+    return inspect(obj).attrs[attr].history.has_changes()
+
+
+def _collect_changes(session, flush_context):
+    """after_flush: remember which indexed entities were written or deleted."""
+    upserts: Set[Tuple[type, int]] = session.info.setdefault(_PENDING_UPSERT_KEY, set())
+    deletes: Set[Tuple[str, int]] = session.info.setdefault(_PENDING_DELETE_KEY, set())
+
+    for obj in list(session.new) + list(session.dirty):
+        model = type(obj)
+        if model in ENTITY_TYPES and obj.id is not None:
+            upserts.add((model, obj.id))
+
+    # Guests are scoped by their tour's band: follow tours and stops that moved
+    moved_tours = {obj.id for obj in session.dirty if isinstance(obj, Tour) and _moved(obj, 'band_id')}
+    moved_stops = {obj.id for obj in session.dirty if isinstance(obj, TourStop) and _moved(obj, 'tour_id')}
+    if moved_tours or moved_stops:
+        guests = session.query(GuestlistEntry.id).join(
+            TourStop, GuestlistEntry.tour_stop_id == TourStop.id
+        ).filter(or_(TourStop.tour_id.in_(moved_tours), TourStop.id.in_(moved_stops)))
+        upserts.update((GuestlistEntry, guest_id) for (guest_id,) in guests)
+
+    for obj in session.deleted:
+        model = type(obj)
+        if model in ENTITY_TYPES and obj.id is not None:
+            deletes.add((ENTITY_TYPES[model], obj.id))
+            upserts.discard((model, obj.id))
+
+
+def _refresh_pending(session):
+    """before_commit: write index changes for this transaction."""
+    session.flush()
+    upserts = session.info.pop(_PENDING_UPSERT_KEY, set())
+    deletes = session.info.pop(_PENDING_DELETE_KEY, set())
+    if not upserts and not deletes:
+        return
+    if not session_has_table(session, SearchDocument.__tablename__):
+        return
+
+    if deletes:
+        SearchIndexService.remove_entities(deletes, session=session)
+    if upserts:
+        SearchIndexService.index_entities(upserts, session=session)
+    session.flush()
+    # The flush above re-collects nothing new: clear leftovers
+    session.info.pop(_PENDING_UPSERT_KEY, None)
+    session.info.pop(_PENDING_DELETE_KEY, None)
+
+
+def _discard_pending(session, previous_transaction=None):
+    """after_rollback: forget uncommitted changes."""
+    session.info.pop(_PENDING_UPSERT_KEY, None)
+    session.info.pop(_PENDING_DELETE_KEY, None)
+
+
+def register_search_listeners():
+    """Attach the search index maintenance hooks to all ORM sessions (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'after_flush', _collect_changes)
+    event.listen(Session, 'before_commit', _refresh_pending)
+    event.listen(Session, 'after_rollback', _discard_pending)
+    _listeners_registered = True
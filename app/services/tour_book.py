@@ -0,0 +1,268 @@
+"""
+Tour book: every per-stop document of a tour in one download.
+
+For each stop: the day sheet, the settlement and the travel itinerary.
+
+- Loading: the tour, its stops and everything the three layouts read
+  (venues and their contacts, logistics, local contacts, lineups, ticket
+  tiers, promoter expenses) in a fixed number of queries, whatever the
+  number of stops.
+- Rendering: documents are snapshotted into plain data (the same data the
+  render cache hashes), so they can be rendered across TOUR_BOOK_WORKERS
+  processes - ReportLab layout is CPU-bound and holds the GIL. Documents
+  already in the render cache are reused; new ones are stored there too,
+  so per-stop downloads then hit the cache.
+- Output: a ZIP (one folder per stop) written entry by entry as documents
+  come back from the pool, or a single PDF with one bookmark per stop and
+  document (needs pypdf, falls back to ZIP).
+
+A tour book is rendered by the job queue like any large PDF; the waiting
+page shows the progress recorded after each document.
+"""
+import io
+import logging
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.services.pdf_render_cache import (
+    PdfDocument, PdfRenderCache, daysheet_data, itinerary_data, row_snapshot, safe_filename
+)
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PdfReader = PdfWriter = None
+    PYPDF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Per-stop documents: kind -> (file name in the archive, bookmark title)
+STOP_DOCUMENTS = {
+    'daysheet': ('day_sheet.pdf', 'Day sheet'),
+    'settlement': ('settlement.pdf', 'Settlement'),
+    'itinerary': ('itineraire.pdf', 'Itinéraire'),
+}
+
+
+@dataclass
+class StopDocument:
+    """One per-stop document of a tour book and its data snapshot."""
+    kind: str
+    data: Any
+    folder: str  # stop folder in the ZIP
+    title: str  # stop bookmark in the merged PDF
+    key: str
+
+
+# ======================================================================
+# Rendering (runs in the worker processes: plain data in, bytes out)
+# ======================================================================
+
+def _view(row: Optional[Dict[str, Any]], **relations) -> Optional[SimpleNamespace]:
+    """Attribute access over a snapshot row, as the layouts read model instances."""
+    if row is None:
+        return None
+    return SimpleNamespace(**row, **relations)
+
+
+def _stop_view(data: Dict[str, Any]) -> SimpleNamespace:
+    venue = _view(data['venue'], contacts=[_view(row) for row in data.get('venue_contacts', [])])
+    return _view(
+        data['stop'],
+        tour=_view(data['tour'], band=_view(data['band'])),
+        venue=venue,
+        logistics=[_view(row) for row in data.get('logistics', [])],
+        lineup_slots=[_view(row) for row in data.get('lineup_slots', [])],
+        local_contacts=[_view(row) for row in data['local_contacts']],
+    )
+
+
+def render_stop_document(job: Tuple[str, Any]) -> bytes:
+    """
+    Render one per-stop document from its snapshot.
+
+    Args:
+        job: (kind, data) - data as returned by daysheet_data(),
+            calculate_settlement() or itinerary_data()
+
+    Returns:
+        PDF file as bytes
+    """
+    from app.utils.pdf_generator import generate_daysheet_pdf, generate_itinerary_pdf, generate_settlement_pdf
+
+    kind, data = job
+    if kind == 'settlement':
+        return generate_settlement_pdf(data)
+    if kind == 'daysheet':
+        return generate_daysheet_pdf(_stop_view(data))
+    return generate_itinerary_pdf(_stop_view(data))
+
+
+class TourBookService:
+    """Build tour books from preloaded stops and a process pool."""
+
+    @staticmethod
+    def load_tour(tour_id: int):
+        """
+        Tour with everything its per-stop documents read, in a fixed number of queries.
+
+        Returns:
+            Tour instance, or None
+        """
+        from app.models.tour import Tour
+        from app.models.tour_stop import TourStop
+        from app.models.venue import Venue
+
+        return Tour.query.options(
+            joinedload(Tour.band),
+            selectinload(Tour.stops).options(
+                joinedload(TourStop.venue).selectinload(Venue.contacts),
+                selectinload(TourStop.logistics),
+                selectinload(TourStop.local_contacts),
+                selectinload(TourStop.lineup_slots),
+                selectinload(TourStop.ticket_tiers),
+                selectinload(TourStop.promotor_expenses),
+            ),
+        ).filter_by(id=tour_id).first()
+
+    @staticmethod
+    def stop_documents(tour) -> List[StopDocument]:
+        """Day sheet, settlement and itinerary of each stop, in date order."""
+        from app.utils.reports import calculate_settlement
+
+        documents = []
+        for stop in tour.stops:
+            date_str = stop.date.strftime('%Y-%m-%d') if stop.date else 'TBA'
+            venue_name = stop.venue.name if stop.venue else 'TBA'
+            folder = safe_filename(f'{date_str}_{venue_name}')
+            title = f"{stop.date.strftime('%d/%m/%Y') if stop.date else 'TBA'} - {venue_name}"
+            if stop.venue and stop.venue.city:
+                title += f' ({stop.venue.city})'
+            for kind, data in (('daysheet', daysheet_data(stop)),
+                               ('settlement', calculate_settlement(stop)),
+                               ('itinerary', itinerary_data(stop))):
+                documents.append(StopDocument(kind, data, folder, title, PdfRenderCache.cache_key(kind, data)))
+        return documents
+
+    @staticmethod
+    def document(tour_id: int, fmt: str = 'zip') -> Optional[PdfDocument]:
+        """
+        Describe the tour book of a tour for the render cache.
+
+        Args:
+            tour_id: Tour ID
+            fmt: 'zip' or 'pdf' (merged PDF with bookmarks)
+
+        Returns:
+            PdfDocument keyed by the keys of all its documents, or None
+        """
+        tour = TourBookService.load_tour(tour_id)
+        if tour is None:
+            return None
+        documents = TourBookService.stop_documents(tour)
+        kind = 'tour_book_pdf' if fmt == 'pdf' else 'tour_book'
+        data = {'tour': row_snapshot(tour), 'documents': [document.key for document in documents]}
+        book = PdfDocument(
+            kind, tour.id, data,
+            lambda: TourBookService.build(
+                documents, fmt, lambda done, total: PdfRenderCache.set_progress(book.key, done, total)
+            ),
+            filename=f"{safe_filename(tour.name)}_tour_book.{'pdf' if fmt == 'pdf' else 'zip'}",
+            band_id=tour.band_id, manager_only=True, rows=len(documents), background=True,
+            mimetype='application/pdf' if fmt == 'pdf' else 'application/zip',
+        )
+        return book
+
+    @staticmethod
+    def rendered(documents: List[StopDocument],
+                 workers: Optional[int] = None) -> Iterator[Tuple[StopDocument, bytes]]:
+        """
+        PDFs of the documents, in order: from the render cache, or rendered in parallel.
+
+        Args:
+            documents: Per-stop documents (see stop_documents)
+            workers: Rendering processes (default TOUR_BOOK_WORKERS; 1 renders here)
+
+        Yields:
+            (document, PDF bytes) as soon as each one is available
+        """
+        if workers is None:
+            workers = current_app.config.get('TOUR_BOOK_WORKERS', 1)
+        cached = {document.key: PdfRenderCache.get(document.key) for document in documents}
+        jobs = [(document.kind, document.data) for document in documents if cached[document.key] is None]
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(jobs) > 1 else None
+        try:
+            results = executor.map(render_stop_document, jobs) if executor else map(render_stop_document, jobs)
+            for document in documents:
+                pdf = cached[document.key]
+                if pdf is None:
+                    pdf = next(results)
+                    PdfRenderCache.put(document.key, pdf)
+                yield document, pdf
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def build(documents: List[StopDocument], fmt: str = 'zip',
+              on_progress: Optional[Callable[[int, int], None]] = None) -> bytes:
+        """
+        Assemble a tour book.
+
+        Args:
+            documents: Per-stop documents (see stop_documents)
+            fmt: 'zip' or 'pdf'
+            on_progress: Called with (done, total) after each document
+
+        Returns:
+            ZIP archive or merged PDF as bytes
+
+        Raises:
+            RuntimeError: merged PDF requested but pypdf is not installed
+        """
+        if fmt == 'pdf' and not PYPDF_AVAILABLE:
+            raise RuntimeError('pypdf non installé: tour book PDF indisponible')
+
+        output = io.BytesIO()
+        archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) if fmt == 'zip' else None
+        writer = PdfWriter() if fmt == 'pdf' else None
+        stop_bookmarks = {}
+
+        total = len(documents)
+        for done, (document, pdf) in enumerate(TourBookService.rendered(documents), 1):
+            filename, title = STOP_DOCUMENTS[document.kind]
+            if archive:
+                archive.writestr(f'{document.folder}/{filename}', pdf)
+            else:
+                first_page = len(writer.pages)
+                writer.append(PdfReader(io.BytesIO(pdf)), import_outline=False)
+                parent = stop_bookmarks.get(document.folder)
+                if parent is None:
+                    parent = stop_bookmarks[document.folder] = writer.add_outline_item(document.title, first_page)
+                writer.add_outline_item(title, first_page, parent=parent)
+            if on_progress:
+                on_progress(done, total)
+
+        if archive:
+            archive.close()
+        else:
+            writer.write(output)
+        logger.info(f"[PDF] Tour book généré: {total} document(s)")
+        return output.getvalue()
+
+    @staticmethod
+    def book_format(fmt: Optional[str]) -> str:
+        """Requested format (?format=zip|pdf), ZIP when pypdf is missing."""
+        fmt = (fmt or 'zip').lower()
+        if fmt == 'pdf' and not PYPDF_AVAILABLE:
+            current_app.logger.warning('Tour book PDF demandé mais pypdf non installé: export ZIP')
+            return 'zip'
+        return 'pdf' if fmt == 'pdf' else 'zip'
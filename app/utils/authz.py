@@ -0,0 +1,211 @@
+"""
+Per-request authorization context for GigRoute.
+Permission checks (decorators, model can_* methods, list filters) used to
+walk user.band_memberships, user.managed_bands and band.tours one
+relationship at a time, several times per request. The AuthzContext loads
+what they need once, lazily:
+
+- band ids the user is a member of / manages: one UNION query
+- tour ids of those bands: one query, only if a check needs it
+- role in the current organization: one query, only if a check needs it
+
+It lives on `g` for the duration of the request (reset before each one)
+and is dropped whenever a flush touches memberships, bands, tours or org
+memberships, so a check made after such a change sees it.
+"""
+from typing import FrozenSet, Optional
+
+from flask import g, has_request_context
+from sqlalchemy import event, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+
+_G_KEY = 'authz_context'
+
+# Flushing one of these invalidates the request's context
+_TRACKED_MODELS = {'BandMembership', 'Band', 'Tour', 'OrganizationMembership'}
+
+_listeners_registered = False
+
+
+class AuthzContext:
+    """What a user may see, computed once per request."""
+
+    def __init__(self, user, org_id: Optional[int] = None):
+        self.user_id = user.id
+        self.access_level = user.access_level
+        self.is_superadmin = bool(getattr(user, 'is_superadmin', False))
+        self.org_id = org_id
+        self._user = user
+        self._member_band_ids = None
+        self._managed_band_ids = None
+        self._tour_ids = None
+        self._org_role = None
+        self._org_role_loaded = False
+
+    # ------------------------------------------------------------------
+    # Lazy sets
+    # ------------------------------------------------------------------
+
+    def _load_bands(self) -> None:
+        from app.models.band import Band, BandMembership
+
+        stmt = union_all(
+            select(BandMembership.band_id, literal(False).label('managed'))
+            .where(BandMembership.user_id == self.user_id),
+            select(Band.id, literal(True).label('managed'))
+            .where(Band.manager_id == self.user_id),
+        )
+        member, managed = set(), set()
+        for band_id, is_managed in db.session.execute(stmt):
+            (managed if is_managed else member).add(band_id)
+        self._member_band_ids = frozenset(member)
+        self._managed_band_ids = frozenset(managed)
+
+    @property
+    def member_band_ids(self) -> FrozenSet[int]:
+        """Bands the user has a membership in."""
+        if self._member_band_ids is None:
+            self._load_bands()
+        return self._member_band_ids
+
+    @property
+    def managed_band_ids(self) -> FrozenSet[int]:
+        """Bands the user is the manager of."""
+        if self._managed_band_ids is None:
+            self._load_bands()
+        return self._managed_band_ids
+
+    @property
+    def band_ids(self) -> FrozenSet[int]:
+        """Bands the user is a member or the manager of."""
+        return self.member_band_ids | self.managed_band_ids
+
+    @property
+    def tour_ids(self) -> FrozenSet[int]:
+        """Tours of the user's bands."""
+        if self._tour_ids is None:
+            from app.models.tour import Tour
+
+            band_ids = self.band_ids
+            if band_ids:
+                rows = db.session.execute(select(Tour.id).where(Tour.band_id.in_(band_ids))).scalars()
+                self._tour_ids = frozenset(rows)
+            else:
+                self._tour_ids = frozenset()
+        return self._tour_ids
+
+    @property
+    def org_role(self):
+        """OrgRole in the current organization (None if not a member or no org context)."""
+        if not self._org_role_loaded:
+            self._org_role_loaded = True
+            if self.org_id is not None:
+                from app.models.organization import OrganizationMembership
+
+                self._org_role = db.session.execute(
+                    select(OrganizationMembership.role).where(
+                        OrganizationMembership.user_id == self.user_id,
+                        OrganizationMembership.org_id == self.org_id,
+                    )
+                ).scalar()
+        return self._org_role
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+
+    def has_level(self, required_level) -> bool:
+        """Access level at least `required_level` (ADMIN > MANAGER > STAFF > VIEWER > EXTERNAL)."""
+        return self._user.has_access(required_level)
+
+    def is_member(self, band_id: int) -> bool:
+        return band_id in self.member_band_ids
+
+    def manages_band(self, band_id: int) -> bool:
+        return band_id in self.managed_band_ids
+
+    def can_access_band(self, band_id: int) -> bool:
+        return band_id in self.band_ids
+
+    def can_access_tour(self, tour_id: int) -> bool:
+        return tour_id in self.tour_ids
+
+
+def get_authz(user=None) -> Optional[AuthzContext]:
+    """
+    Authorization context of `user` (default: the logged-in or API user).
+
+    Inside a request the context is built once and shared by every check;
+    outside one (CLI, jobs) a fresh context is returned.
+
+    Returns:
+        AuthzContext, or None for an anonymous user
+    """
+    if user is None:
+        user = _request_user()
+    if user is None or not getattr(user, 'is_authenticated', False) or user.id is None:
+        return None
+
+    if not has_request_context():
+        return AuthzContext(user)
+
+    ctx = g.get(_G_KEY)
+    if ctx is None or ctx.user_id != user.id:
+        from app.utils.org_context import get_current_org_id
+        ctx = AuthzContext(user, org_id=get_current_org_id())
+        # Only the request's own user is cached; checks on other users stay uncached
+        if user is _request_user():
+            setattr(g, _G_KEY, ctx)
+    return ctx
+
+
+def authz_for(user) -> Optional[AuthzContext]:
+    """Cached context for `user` if it is the request's user, else None (callers fall back to the ORM)."""
+    if not has_request_context() or user is None or getattr(user, 'id', None) is None:
+        return None
+    if user is not _request_user():
+        return None
+    return get_authz(user)
+
+
+def reset_authz() -> None:
+    """Drop the request's context (before_request hook, membership changes)."""
+    if has_request_context():
+        g.pop(_G_KEY, None)
+
+
+def _request_user():
+    from flask import request
+    from flask_login import current_user
+
+    if not has_request_context():
+        return None
+    api_user = getattr(request, 'api_user', None)
+    if api_user is not None:
+        return api_user
+    user = current_user._get_current_object()
+    return user if getattr(user, 'is_authenticated', False) else None
+
+
+# ============================================================
+# SESSION LISTENERS
+# ============================================================
+
+def _after_flush(session, flush_context):
+    if not has_request_context() or g.get(_G_KEY) is None:
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if type(obj).__name__ in _TRACKED_MODELS:
+            reset_authz()
+            return
+
+
+def register_authz_listeners():
+    """Register the invalidation listener (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    _listeners_registered = True
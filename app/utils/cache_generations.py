@@ -0,0 +1,163 @@
+"""
+Generation-counter cache invalidation for GigRoute.
+Cached values derived from a user's or an organization's data are stored
+under keys embedding that scope's generation number:
+
+    user_ctx:u42.1712..:o7.1712..
+
+Any committed change to the scope bumps its generation, so every worker
+(with the shared cache backend) stops reading the old entries at once;
+they simply age out. Bulk UPDATE/DELETE statements on tracked models do
+not say which rows they touch: they bump the global generation.
+
+Generations are seeded from the clock, so a counter evicted from the
+cache never comes back with a number that was already used.
+"""
+import time
+from typing import Any, Callable, Optional, Set
+
+from flask import has_app_context
+from sqlalchemy import event, inspect as sa_inspect, select
+from sqlalchemy.orm import Session
+
+from app.extensions import cache
+
+# session.info key for scopes touched since the last commit
+_PENDING_SCOPES_KEY = 'cache_generation_pending_scopes'
+_GLOBAL = ('global', 0)
+
+# Models whose bulk UPDATE / DELETE bumps the global generation
+_TRACKED_MODELS = {'Notification', 'User', 'Subscription', 'OrganizationMembership', 'Organization'}
+
+_listeners_registered = False
+
+
+def _generation_key(scope: str, scope_id) -> str:
+    return f'gen:{scope}:{scope_id}'
+
+
+def cache_generation(scope: str, scope_id) -> int:
+    """Current generation of a scope ('user', 'org' or 'global')."""
+    key = _generation_key(scope, scope_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), timeout=0)
+        generation = cache.get(key) or 0
+    return generation
+
+
+def bump_cache_generation(scope: str, scope_id) -> None:
+    """Invalidate every cached value scoped to (scope, scope_id)."""
+    key = _generation_key(scope, scope_id)
+    if cache.get(key) is None:
+        cache.add(key, int(time.time() * 1000), timeout=0)
+    cache.cache.inc(key)
+
+
+def scoped_cache_key(name: str, user_id: Optional[int] = None, org_id: Optional[int] = None) -> str:
+    """Cache key for `name` that changes whenever the user, the org or the global scope changes."""
+    parts = [name, f'g{cache_generation(*_GLOBAL)}']
+    if user_id is not None:
+        parts.append(f'u{user_id}.{cache_generation("user", user_id)}')
+    if org_id is not None:
+        parts.append(f'o{org_id}.{cache_generation("org", org_id)}')
+    return ':'.join(parts)
+
+
+def cached_value(name: str, compute: Callable[[], Any], user_id: Optional[int] = None,
+                 org_id: Optional[int] = None, timeout: Optional[int] = None) -> Any:
+    """
+    Get-or-compute a value under a generation-scoped key.
+
+    Args:
+        name: Value name (key prefix)
+        compute: Called on a miss; its result must be picklable
+        user_id: Invalidate when this user's data changes
+        org_id: Invalidate when this organization's data changes
+        timeout: TTL in seconds (safety net; CACHE_DEFAULT_TIMEOUT if None)
+    """
+    if not has_app_context():
+        return compute()
+    key = scoped_cache_key(name, user_id=user_id, org_id=org_id)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=timeout)
+    return value
+
+
+# ======================================================================
+# Session event hooks
+# ======================================================================
+
+def _collect_changes(session, flush_context):
+    """after_flush: remember which users / orgs had cached data change."""
+    from app.models.notification import Notification
+    from app.models.organization import Organization, OrganizationMembership
+    from app.models.subscription import Subscription
+    from app.models.user import User
+
+    scopes: Set[tuple] = session.info.setdefault(_PENDING_SCOPES_KEY, set())
+    registration_users = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Notification):
+            scopes.add(('user', obj.user_id))
+        elif isinstance(obj, User):
+            scopes.add(('user', obj.id))
+            # Activation / invitation changes move the org's pending registrations count
+            attrs = sa_inspect(obj).attrs
+            if obj not in session.dirty or attrs.is_active.history.has_changes() \
+                    or attrs.invitation_token.history.has_changes():
+                registration_users.add(obj.id)
+        elif isinstance(obj, Subscription):
+            scopes.add(('user', obj.user_id))
+            scopes.add(('org', obj.org_id))
+        elif isinstance(obj, OrganizationMembership):
+            scopes.add(('user', obj.user_id))
+            scopes.add(('org', obj.org_id))
+        elif isinstance(obj, Organization):
+            scopes.add(('org', obj.id))
+
+    registration_users.discard(None)
+    if registration_users:
+        rows = session.connection().execute(
+            select(OrganizationMembership.org_id).where(OrganizationMembership.user_id.in_(registration_users))
+        )
+        scopes.update(('org', org_id) for (org_id,) in rows)
+
+
+def _collect_bulk_changes(orm_execute_state):
+    """do_orm_execute: bulk UPDATE / DELETE on a tracked model invalidates everything."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_.__name__ in _TRACKED_MODELS:
+        orm_execute_state.session.info.setdefault(_PENDING_SCOPES_KEY, set()).add(_GLOBAL)
+
+
+def _bump_pending(session):
+    """after_commit: publish the new generations (other workers see them immediately)."""
+    scopes: Set[tuple] = session.info.pop(_PENDING_SCOPES_KEY, set())
+    if not scopes or not has_app_context():
+        return
+    for scope, scope_id in scopes:
+        if scope_id is not None:
+            bump_cache_generation(scope, scope_id)
+
+
+def _discard_pending(session, previous_transaction=None):
+    """after_rollback: forget uncommitted changes."""
+    session.info.pop(_PENDING_SCOPES_KEY, None)
+
+
+def register_cache_generation_listeners():
+    """Attach the invalidation hooks to all ORM sessions (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'after_flush', _collect_changes)
+    event.listen(Session, 'do_orm_execute', _collect_bulk_changes)
+    event.listen(Session, 'after_commit', _bump_pending)
+    event.listen(Session, 'after_rollback', _discard_pending)
+    _listeners_registered = True
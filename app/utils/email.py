@@ -5,16 +5,17 @@ Handles all email notifications with per-organization SMTP support.
 Architecture:
 - If the current org has custom SMTP config → send via smtplib directly (thread-safe)
 - Otherwise → fall back to Flask-Mailman global config
-- Supports async sending via threading and retry with exponential backoff.
+- Supports async sending through the notification dispatcher (bounded
+  queue + worker pool, app/services/notification_dispatcher.py) and
+  retry with exponential backoff.
 """
 import time
 import uuid
 import logging
 import smtplib
-import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from flask import render_template, current_app, url_for
+from flask import render_template, current_app, has_request_context, url_for
 from flask_mailman import EmailMessage, EmailMultiAlternatives
 from app.extensions import mail
 
@@ -25,16 +26,18 @@ MAX_RETRIES = 3
 RETRY_BASE_DELAY = 2  # seconds (2, 4, 8 with exponential backoff)
 
 
-def _get_org_smtp_config():
-    """Get SMTP config for the current organization.
+def _get_org_smtp_config(org_id=None):
+    """Get SMTP config for an organization (default: the current one).
 
     Returns a dict with SMTP settings if the org has custom config,
-    or None to use the global Flask-Mailman backend.
+    or None to use the global Flask-Mailman backend. Outside a request
+    (`flask worker`) there is no session: the org must be passed.
     """
     from app.utils.org_context import get_current_org_id
     from app.models.system_settings import SystemSettings
 
-    org_id = get_current_org_id()
+    if org_id is None and has_request_context():
+        org_id = get_current_org_id()
     if not org_id:
         return None
 
@@ -46,10 +49,87 @@ def _get_org_smtp_config():
     return None
 
 
-def _send_via_smtplib(sender, recipient, subject, text_body, html_body, smtp_config):
+def smtp_config_key(smtp_config):
+    """Identity of an SMTP account: emails with the same key can share a connection."""
+    if not smtp_config:
+        return 'mailman'
+    return (
+        smtp_config['MAIL_SERVER'],
+        int(smtp_config.get('MAIL_PORT') or 587),
+        smtp_config['MAIL_USERNAME'],
+        str(smtp_config.get('MAIL_USE_TLS', 'true')).lower() == 'true',
+    )
+
+
+def _open_smtp(smtp_config):
+    """Open and authenticate an smtplib connection for an org SMTP config."""
+    server, port, username, use_tls = smtp_config_key(smtp_config)
+    smtp = smtplib.SMTP(server, port, timeout=30)
+    try:
+        smtp.ehlo()
+        if use_tls:
+            smtp.starttls()
+            smtp.ehlo()
+        smtp.login(username, smtp_config['MAIL_PASSWORD'])
+    except Exception:
+        smtp.close()
+        raise
+    return smtp
+
+
+class SMTPConnectionCache:
+    """Open smtplib connections per org SMTP config, reused across emails.
+
+    Not thread-safe: each dispatcher worker owns one. Connections unused
+    for `idle_timeout` seconds are closed (servers drop idle sessions).
+    """
+
+    def __init__(self, idle_timeout=30):
+        self.idle_timeout = idle_timeout
+        self._connections = {}  # key -> (smtp, last_used)
+
+    def get(self, smtp_config):
+        key = smtp_config_key(smtp_config)
+        entry = self._connections.get(key)
+        smtp = entry[0] if entry else _open_smtp(smtp_config)
+        self._connections[key] = (smtp, time.monotonic())
+        return smtp
+
+    def discard(self, smtp_config):
+        """Drop a connection after an error (the next get() reconnects)."""
+        entry = self._connections.pop(smtp_config_key(smtp_config), None)
+        if entry:
+            self._close(entry[0])
+
+    def close_idle(self):
+        now = time.monotonic()
+        for key, (smtp, last_used) in list(self._connections.items()):
+            if now - last_used >= self.idle_timeout:
+                del self._connections[key]
+                self._close(smtp)
+
+    def close_all(self):
+        for smtp, _last_used in self._connections.values():
+            self._close(smtp)
+        self._connections.clear()
+
+    def __len__(self):
+        return len(self._connections)
+
+    @staticmethod
+    def _close(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+def _send_via_smtplib(sender, recipient, subject, text_body, html_body, smtp_config,
+                      connections=None):
     """Send email directly via smtplib using org-specific SMTP config.
 
-    Thread-safe: each call creates its own SMTP connection.
+    Thread-safe: without `connections`, each call creates its own SMTP
+    connection; with an SMTPConnectionCache, the connection is reused.
     """
     msg = MIMEMultipart('alternative')
     msg['Subject'] = subject
@@ -59,22 +139,22 @@ def _send_via_smtplib(sender, recipient, subject, text_body, html_body, smtp_con
     msg.attach(MIMEText(text_body, 'plain', 'utf-8'))
     msg.attach(MIMEText(html_body, 'html', 'utf-8'))
 
-    server = smtp_config['MAIL_SERVER']
-    port = int(smtp_config.get('MAIL_PORT') or 587)
-    use_tls = str(smtp_config.get('MAIL_USE_TLS', 'true')).lower() == 'true'
-    username = smtp_config['MAIL_USERNAME']
-    password = smtp_config['MAIL_PASSWORD']
+    if connections is None:
+        smtp = _open_smtp(smtp_config)
+        try:
+            smtp.sendmail(sender, [recipient], msg.as_string())
+        finally:
+            SMTPConnectionCache._close(smtp)
+        return
 
-    with smtplib.SMTP(server, port, timeout=30) as smtp:
-        smtp.ehlo()
-        if use_tls:
-            smtp.starttls()
-            smtp.ehlo()
-        smtp.login(username, password)
-        smtp.sendmail(sender, [recipient], msg.as_string())
+    try:
+        connections.get(smtp_config).sendmail(sender, [recipient], msg.as_string())
+    except Exception:
+        connections.discard(smtp_config)
+        raise
 
 
-def send_email(subject, recipient, template, **kwargs):
+def send_email(subject, recipient, template, org_id=None, **kwargs):
     """
     Send an email with per-org SMTP support and retry logic.
 
@@ -82,6 +162,8 @@ def send_email(subject, recipient, template, **kwargs):
         subject: Email subject (will be prefixed with [GigRoute])
         recipient: Email address of the recipient
         template: Template name (without .html extension) in templates/email/
+        org_id: Organization whose SMTP config is used (default: current
+            session org; background jobs pass it from their payload)
         **kwargs: Context variables for the template
 
     Returns:
@@ -104,7 +186,7 @@ def send_email(subject, recipient, template, **kwargs):
         full_subject = f"[GigRoute] {subject}"
 
         # Check for org-specific SMTP config
-        org_smtp = _get_org_smtp_config()
+        org_smtp = _get_org_smtp_config(org_id)
 
         if org_smtp:
             sender = org_smtp.get('MAIL_DEFAULT_SENDER') or org_smtp['MAIL_USERNAME']
@@ -115,13 +197,7 @@ def send_email(subject, recipient, template, **kwargs):
         else:
             # Fallback to Flask-Mailman global backend
             sender = current_app.config.get('MAIL_DEFAULT_SENDER', 'noreply@gigroute.app')
-            msg = EmailMultiAlternatives(
-                subject=full_subject,
-                body=text_body,
-                from_email=sender,
-                to=[recipient],
-            )
-            msg.attach_alternative(html_body, 'text/html')
+            msg = _build_mailman_message(sender, recipient, full_subject, text_body, html_body)
             return _send_with_retry(msg, email_id, recipient)
 
     except Exception as e:
@@ -130,12 +206,13 @@ def send_email(subject, recipient, template, **kwargs):
 
 
 def _send_with_retry_smtplib(sender, recipient, subject, text_body, html_body,
-                              smtp_config, email_id):
+                              smtp_config, email_id, connections=None):
     """Send via smtplib with exponential backoff retry."""
     last_error = None
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            _send_via_smtplib(sender, recipient, subject, text_body, html_body, smtp_config)
+            _send_via_smtplib(sender, recipient, subject, text_body, html_body, smtp_config,
+                              connections=connections)
             logger.info(f"[EMAIL:{email_id}] Succès (smtplib) - Email envoyé à {recipient}"
                         + (f" (tentative {attempt})" if attempt > 1 else ""))
             return True
@@ -167,6 +244,7 @@ def _send_with_retry(msg, email_id, recipient):
             return True
         except Exception as e:
             last_error = e
+            _reset_connection(msg)
             if attempt < MAX_RETRIES:
                 delay = RETRY_BASE_DELAY * (2 ** (attempt - 1))
                 logger.warning(
@@ -182,15 +260,83 @@ def _send_with_retry(msg, email_id, recipient):
     return False
 
 
+def _reset_connection(msg):
+    """Close a (possibly shared) connection after an error: the retry reconnects."""
+    connection = getattr(msg, 'connection', None)
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def _build_mailman_message(sender, recipient, subject, text_body, html_body):
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=text_body,
+        from_email=sender,
+        to=[recipient],
+    )
+    msg.attach_alternative(html_body, 'text/html')
+    return msg
+
+
+def deliver_emails(jobs, connections=None):
+    """
+    Send rendered emails (EmailJob) sharing one SMTP config, with retry.
+
+    Called by the notification dispatcher (app context required). Org
+    SMTP emails reuse the connections of `connections` (SMTPConnectionCache);
+    global-backend emails share one Flask-Mailman connection.
+
+    Returns:
+        int: Number of emails sent
+    """
+    if not jobs:
+        return 0
+
+    smtp_config = jobs[0].smtp_config
+    sent = 0
+    if smtp_config:
+        for job in jobs:
+            if _send_with_retry_smtplib(job.sender, job.recipient, job.subject, job.text_body,
+                                        job.html_body, smtp_config, job.email_id,
+                                        connections=connections):
+                sent += 1
+        return sent
+
+    connection = mail.get_connection()
+    try:
+        # If the connection cannot be opened here, each send() retries on its own
+        connection.open()
+    except Exception as e:
+        logger.warning(f"[EMAIL] Connexion SMTP partagée impossible: {e}")
+    try:
+        for job in jobs:
+            msg = _build_mailman_message(job.sender, job.recipient, job.subject,
+                                         job.text_body, job.html_body)
+            msg.connection = connection
+            if _send_with_retry(msg, job.email_id, job.recipient):
+                sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent
+
+
 def send_async_email(subject, recipient, template, **kwargs):
     """
-    Send email asynchronously in a background thread.
+    Send email asynchronously through the notification dispatcher.
 
     The template is rendered in the current request context before
-    dispatching to the thread, so Jinja context is preserved.
-    Org SMTP config is captured before thread dispatch.
+    queuing, so Jinja context is preserved.
+    Org SMTP config is captured before queuing.
     """
     from app.models.user import User
+    from app.services.notification_dispatcher import EmailJob, dispatcher
+
     user = User.query.filter_by(email=recipient).first()
     if user and not user.receive_emails:
         logger.info(f"[EMAIL] Ignoré (async) - {recipient} a désactivé la réception des emails")
@@ -209,40 +355,20 @@ def send_async_email(subject, recipient, template, **kwargs):
 
     full_subject = f"[GigRoute] {subject}"
 
-    # Capture org SMTP config in request context (before thread dispatch)
+    # Capture org SMTP config in request context (before queuing)
     org_smtp = _get_org_smtp_config()
-
     if org_smtp:
         sender = org_smtp.get('MAIL_DEFAULT_SENDER') or org_smtp['MAIL_USERNAME']
-
-        def _send_in_thread():
-            _send_with_retry_smtplib(
-                sender, recipient, full_subject, text_body, html_body,
-                org_smtp, email_id
-            )
     else:
         sender = current_app.config.get('MAIL_DEFAULT_SENDER', 'noreply@gigroute.app')
-        msg = EmailMultiAlternatives(
-            subject=full_subject,
-            body=text_body,
-            from_email=sender,
-            to=[recipient],
-        )
-        msg.attach_alternative(html_body, 'text/html')
-
-        app = current_app._get_current_object()
-
-        def _send_in_thread():
-            with app.app_context():
-                _send_with_retry(msg, email_id, recipient)
 
-    thread = threading.Thread(target=_send_in_thread, daemon=True)
-    thread.start()
+    dispatcher.submit(EmailJob(email_id, recipient, full_subject, sender,
+                               text_body, html_body, smtp_config=org_smtp))
     logger.info(f"[EMAIL:{email_id}] Dispatch async pour {recipient} - {subject}")
     return True
 
 
-def send_guestlist_notification(entry, notification_type, extra_context=None):
+def send_guestlist_notification(entry, notification_type, extra_context=None, deferred=False):
     """
     Send guestlist notification email.
 
@@ -250,6 +376,7 @@ def send_guestlist_notification(entry, notification_type, extra_context=None):
         entry: GuestlistEntry object
         notification_type: 'approved', 'denied', 'request', or 'checked_in'
         extra_context: Additional context variables for the template
+        deferred: Render now, send through the notification dispatcher
 
     Returns:
         bool: True if email sent successfully
@@ -305,10 +432,11 @@ def send_guestlist_notification(entry, notification_type, extra_context=None):
             else:
                 recipients = [recipient]
 
+    send = send_async_email if deferred else send_email
     success = True
     for recipient in recipients:
         if recipient:
-            if not send_email(subject, recipient, template, **context):
+            if not send(subject, recipient, template, **context):
                 success = False
 
     return success
@@ -544,17 +672,8 @@ def send_mission_response_notification(invitation):
     return success
 
 
-def send_tour_stop_notification(tour_stop, notification_type='created'):
-    """
-    Send tour stop notification to band members.
-
-    Args:
-        tour_stop: TourStop object
-        notification_type: 'created', 'updated', or 'cancelled'
-
-    Returns:
-        bool: True if all emails sent successfully
-    """
+def _tour_stop_notification_context(tour_stop, notification_type):
+    """Build (subject, template context) for a tour stop notification."""
     # Support standalone events (tour_stop without tour)
     tour = tour_stop.tour
     band = tour_stop.associated_band  # Uses tour.band or tour_stop.band
@@ -576,12 +695,23 @@ def send_tour_stop_notification(tour_stop, notification_type='created'):
         'cancelled': f'Date annulee: {location_name}',
     }
 
-    subject = subjects.get(notification_type, 'Mise a jour tournee')
+    return subjects.get(notification_type, 'Mise a jour tournee'), context
+
 
-    # Get all band members - handle case where band is None
+def get_tour_stop_notification_recipients(tour_stop):
+    """
+    Get emails of band members accepting tour stop notifications.
+
+    Args:
+        tour_stop: TourStop object
+
+    Returns:
+        list: Email addresses (empty if the stop has no band)
+    """
+    band = tour_stop.associated_band
     if not band:
         logger.warning(f"Tour stop {tour_stop.id} has no associated band - skipping notification")
-        return True  # Not a failure, just nothing to do
+        return []
 
     all_recipients = _get_band_member_emails(band)
 
@@ -591,8 +721,42 @@ def send_tour_stop_notification(tour_stop, notification_type='created'):
     if not recipients and all_recipients:
         logger.info("Tour stop notification skipped - all band members disabled notify_new_tour")
 
+    return recipients
+
+
+def send_tour_stop_notification_email(tour_stop, recipient, notification_type='created', org_id=None):
+    """
+    Send one tour stop notification (used by the job queue, one job per recipient).
+
+    Args:
+        tour_stop: TourStop object
+        recipient: Email address
+        notification_type: 'created', 'updated', 'rescheduled' or 'cancelled'
+        org_id: Organization whose SMTP config is used
+
+    Returns:
+        bool: True if email sent successfully
+    """
+    subject, context = _tour_stop_notification_context(tour_stop, notification_type)
+    return send_email(subject, recipient, 'tour_stop_notification', org_id=org_id,
+                      notification_type=notification_type, **context)
+
+
+def send_tour_stop_notification(tour_stop, notification_type='created'):
+    """
+    Send tour stop notification to band members.
+
+    Args:
+        tour_stop: TourStop object
+        notification_type: 'created', 'updated', or 'cancelled'
+
+    Returns:
+        bool: True if all emails sent successfully
+    """
+    subject, context = _tour_stop_notification_context(tour_stop, notification_type)
+
     success = True
-    for recipient in recipients:
+    for recipient in get_tour_stop_notification_recipients(tour_stop):
         if not send_email(subject, recipient, 'tour_stop_notification',
                          notification_type=notification_type, **context):
             success = False
@@ -626,10 +790,11 @@ def send_invoice_email(invoice):
 
     try:
         # Generate PDF attachment
-        from app.utils.pdf_generator import generate_invoice_pdf, PDF_AVAILABLE
+        from app.services.pdf_render_cache import PdfRenderCache
+        from app.utils.pdf_generator import PDF_AVAILABLE
         pdf_bytes = None
         if PDF_AVAILABLE:
-            pdf_bytes = generate_invoice_pdf(invoice)
+            pdf_bytes = PdfRenderCache.render(PdfRenderCache.document('invoice', invoice.id))
 
         # Type labels for subject
         type_labels = {
@@ -704,7 +869,7 @@ def send_document_shared_email(document, shared_by, shared_to):
     )
 
 
-def send_tour_reminder_email(user, tour_stop, reminder_type):
+def send_tour_reminder_email(user, tour_stop, reminder_type, org_id=None):
     """
     Send tour reminder email (J-7 or J-1).
 
@@ -712,6 +877,7 @@ def send_tour_reminder_email(user, tour_stop, reminder_type):
         user: User object to send reminder to
         tour_stop: TourStop object
         reminder_type: 'j7' or 'j1'
+        org_id: Organization whose SMTP config is used
 
     Returns:
         bool: True if email sent successfully
@@ -733,6 +899,7 @@ def send_tour_reminder_email(user, tour_stop, reminder_type):
         subject=subject,
         recipient=user.email,
         template='tour_reminder',
+        org_id=org_id,
         user=user,
         tour_stop=tour_stop,
         tour=tour,
@@ -0,0 +1,225 @@
+"""
+Streaming CSV / XLSX exports.
+
+Exports are produced row by row instead of being built in memory:
+- rows are read through a server-side cursor (yield_per), one batch of
+  EXPORT_BATCH_SIZE ORM objects at a time; per-row lookups are preloaded
+  once per batch with preload()
+- CSV is sent as a generator Response, a few hundred rows per chunk
+- XLSX (optional, needs XlsxWriter) is written in constant_memory mode to
+  a temporary file, then streamed from disk
+- the first chunk is produced before the response is returned, so a
+  failing query still reaches the view's error handling (flash + redirect);
+  an error after that is logged with the export name and aborts the download
+
+An exporter is a generator of rows whose first row is the header; the same
+rows feed both writers. Keep rows plain (str, int, Decimal): Decimals are
+written as numbers in XLSX and as str(amount) in CSV.
+"""
+import csv
+import io
+import os
+import tempfile
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy import select
+from sqlalchemy.orm import Query
+
+from app.extensions import db
+
+try:
+    import xlsxwriter
+    XLSX_AVAILABLE = True
+except ImportError:
+    xlsxwriter = None
+    XLSX_AVAILABLE = False
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# CSV rows per chunk sent to the client / bytes per XLSX chunk
+CSV_ROWS_PER_CHUNK = 200
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+# ======================================================================
+# Reading
+# ======================================================================
+
+def stream_batches(query, batch_size: Optional[int] = None) -> Iterator[List[Any]]:
+    """
+    Iterate the results of a query in batches through a server-side cursor.
+
+    Args:
+        query: Model.query / session.query(...) or a select(Model) statement.
+            Many-to-one joinedload() is fine; collections must be loaded
+            per batch (yield_per does not support collection eager loads).
+        batch_size: Rows per batch (default EXPORT_BATCH_SIZE)
+
+    Yields:
+        Lists of at most batch_size results
+    """
+    batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', 500)
+    if isinstance(query, Query):
+        results = iter(query.yield_per(batch_size))
+    else:
+        results = iter(db.session.execute(query.execution_options(yield_per=batch_size)).scalars())
+
+    while True:
+        batch = list(islice(results, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def preload(column, keys: Iterable) -> Dict[Any, Any]:
+    """
+    Load the rows matching a batch of keys in one query.
+
+    Args:
+        column: Mapped column to match (e.g. UserPaymentConfig.user_id)
+        keys: Values of that column (None ignored)
+
+    Returns:
+        Dict key -> instance
+    """
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return {}
+    model = column.class_
+    return {
+        getattr(obj, column.key): obj
+        for obj in db.session.execute(select(model).where(column.in_(keys))).scalars()
+    }
+
+
+# ======================================================================
+# Writing
+# ======================================================================
+
+def csv_chunks(rows: Iterable[Sequence], delimiter: str = ',') -> Iterator[str]:
+    """
+    Serialize rows as CSV, CSV_ROWS_PER_CHUNK rows per yielded string.
+
+    Args:
+        rows: Header then data rows
+        delimiter: Field delimiter (';' for the accounting exports)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CSV_ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def csv_string(rows: Iterable[Sequence], delimiter: str = ',') -> str:
+    """Whole CSV as a string (small exports and callers that need the content)."""
+    return ''.join(csv_chunks(rows, delimiter))
+
+
+def _xlsx_value(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def xlsx_chunks(rows: Iterable[Sequence], sheet_name: str = 'Export') -> Iterator[bytes]:
+    """
+    Write rows to an XLSX workbook in constant-memory mode and stream it.
+
+    The workbook is only complete once closed (it is a zip archive), so it
+    is written to a temporary file first; only one row is held in memory.
+
+    Raises:
+        RuntimeError: XlsxWriter is not installed
+    """
+    if not XLSX_AVAILABLE:
+        raise RuntimeError('XlsxWriter non installé: export XLSX indisponible')
+
+    fd, path = tempfile.mkstemp(prefix='gigroute-export-', suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        sheet = workbook.add_worksheet(sheet_name[:31])
+        for row_index, row in enumerate(rows):
+            sheet.write_row(row_index, 0, [_xlsx_value(value) for value in row])
+        workbook.close()
+
+        with open(path, 'rb') as workbook_file:
+            while True:
+                chunk = workbook_file.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+# ======================================================================
+# Responses
+# ======================================================================
+
+def _logged_chunks(first, chunks: Iterator, filename: str) -> Iterator:
+    """Yield the pre-computed first chunk, then the rest; log a mid-stream error."""
+    yield first
+    try:
+        yield from chunks
+    except Exception as e:
+        # Headers are sent: re-raising drops the connection, so the client
+        # sees a failed download rather than a truncated file
+        current_app.logger.error(f'Export {filename} interrompu en cours d\'envoi: {e}')
+        raise
+
+
+def export_format(default: str = 'csv') -> str:
+    """
+    Format requested with ?format=csv|xlsx.
+
+    Falls back to CSV when XLSX is requested but XlsxWriter is missing.
+    """
+    fmt = (request.args.get('format') or default).lower()
+    if fmt == 'xlsx' and not XLSX_AVAILABLE:
+        current_app.logger.warning('Export XLSX demandé mais XlsxWriter non installé: export CSV')
+        return 'csv'
+    return 'xlsx' if fmt == 'xlsx' else 'csv'
+
+
+def export_response(rows: Iterable[Sequence], filename: str, fmt: str = 'csv',
+                    delimiter: str = ',', sheet_name: str = 'Export') -> Response:
+    """
+    Streamed download of an export.
+
+    Args:
+        rows: Header then data rows (generator: consumed while sending)
+        filename: File name without extension
+        fmt: 'csv' or 'xlsx' (see export_format)
+        delimiter: CSV delimiter
+        sheet_name: XLSX worksheet name
+
+    Returns:
+        Response whose body is generated while it is sent
+
+    Raises:
+        Exception: Whatever producing the first chunk raised (first batch
+            of rows for CSV, the whole workbook for XLSX)
+    """
+    if fmt == 'xlsx':
+        chunks, mimetype = xlsx_chunks(rows, sheet_name), XLSX_MIMETYPE
+    else:
+        chunks, mimetype = csv_chunks(rows, delimiter), 'text/csv'
+
+    filename = f'{filename}.{fmt}'.replace(' ', '_').replace('/', '-')
+
+    # Run the first batch now, while the view can still redirect
+    first = next(chunks, None)
+    body = _logged_chunks(first, chunks, filename) if first is not None else iter(())
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -1,17 +1,129 @@
 """
 Geocoding service using Nominatim (OpenStreetMap).
 Gratuit et sans clé API - parfait pour applications internes.
+
+Bulk geocoding (cache, dedup, concurrent workers) lives in
+app/services/geocoding_service.py; this module holds the HTTP primitives
+and the shared rate limiter.
 """
+import hashlib
+import threading
 import time
 import logging
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
 import requests
 
 logger = logging.getLogger(__name__)
 
-# Nominatim rate limiting: max 1 request per second
-_last_request_time = 0
+NOMINATIM_BASE_URL = 'https://nominatim.openstreetmap.org'
+
+NOMINATIM_HEADERS = {
+    'User-Agent': 'GigRoute/1.0 (Tour Management Application)',
+    'Accept-Language': 'fr,en'
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Each acquire() reserves a token and sleeps until it is due, so
+    concurrent workers sharing one bucket never exceed `rate` requests
+    per second in total (bursts up to `capacity`).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Optional[Callable[[], float]] = None,
+                 sleep: Optional[Callable[[float], None]] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = self._now()
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return (self._clock or time.monotonic)()
+
+    def acquire(self) -> float:
+        """
+        Take one token, waiting if the bucket is empty.
+
+        Returns:
+            Seconds waited
+        """
+        with self._lock:
+            now = self._now()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative: each waiter reserves its own slot
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            (self._sleep or time.sleep)(wait)
+        return wait
+
+
+# Nominatim rate limiting: max 1 request per second (shared by all callers)
+_rate_limiter = TokenBucket(rate=1.0)
+
+
+def build_query(
+    address: Optional[str],
+    city: Optional[str],
+    country: Optional[str],
+    state: Optional[str] = None
+) -> str:
+    """Build the free-form Nominatim query ("address, city, state, country")."""
+    return ', '.join(p for p in [address, city, state, country] if p)
+
+
+def normalize_address(query: str) -> str:
+    """Canonical form of a query for cache lookups (case and spacing folded)."""
+    parts = [' '.join(part.casefold().split()) for part in query.split(',')]
+    return ', '.join(p for p in parts if p)
+
+
+def address_cache_key(query: str) -> str:
+    """Fixed-length cache key (SHA-256) of a normalized query."""
+    return hashlib.sha256(normalize_address(query).encode('utf-8')).hexdigest()
+
+
+def nominatim_search(
+    query: str,
+    base_url: Optional[str] = None,
+    http: Optional[requests.Session] = None,
+    timeout: float = 10
+) -> Optional[Tuple[float, float]]:
+    """
+    Single Nominatim search request (no rate limiting, no error handling).
+
+    Returns:
+        (latitude, longitude), or None if the address is unknown
+
+    Raises:
+        requests.RequestException: Transport / HTTP error (worth retrying later)
+        KeyError, ValueError: Unexpected response payload
+    """
+    url = f"{(base_url or NOMINATIM_BASE_URL).rstrip('/')}/search"
+    params = {
+        'q': query,
+        'format': 'json',
+        'limit': 1,
+        'addressdetails': 0
+    }
+    response = (http or requests).get(url, params=params, headers=NOMINATIM_HEADERS, timeout=timeout)
+    response.raise_for_status()
+
+    results = response.json()
+    if not results:
+        return None
+    return float(results[0]['lat']), float(results[0]['lon'])
 
 
 def geocode_address(
@@ -36,44 +148,19 @@ def geocode_address(
         Respecte le rate limit de Nominatim (1 req/sec).
         User-Agent requis par Nominatim Terms of Service.
     """
-    global _last_request_time
-
-    # Build query parts
-    query_parts = [p for p in [address, city, state, country] if p]
-    query = ', '.join(query_parts)
+    query = build_query(address, city, country, state)
 
     if not query:
         logger.warning("Geocoding: empty query")
         return None, None
 
     # Rate limiting (1 request per second)
-    now = time.time()
-    elapsed = now - _last_request_time
-    if elapsed < 1.0:
-        time.sleep(1.0 - elapsed)
-
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': query,
-        'format': 'json',
-        'limit': 1,
-        'addressdetails': 0
-    }
-    headers = {
-        'User-Agent': 'GigRoute/1.0 (Tour Management Application)',
-        'Accept-Language': 'fr,en'
-    }
+    _rate_limiter.acquire()
 
     try:
-        _last_request_time = time.time()
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        results = response.json()
-        if results:
-            result = results[0]
-            lat = float(result['lat'])
-            lon = float(result['lon'])
+        coords = nominatim_search(query)
+        if coords:
+            lat, lon = coords
             logger.info(f"Geocoded '{query}' -> ({lat}, {lon})")
             return lat, lon
         else:
@@ -102,29 +189,19 @@ def reverse_geocode(
     Returns:
         Dict avec address, city, country ou None si échec
     """
-    global _last_request_time
-
     # Rate limiting
-    now = time.time()
-    elapsed = now - _last_request_time
-    if elapsed < 1.0:
-        time.sleep(1.0 - elapsed)
+    _rate_limiter.acquire()
 
-    url = "https://nominatim.openstreetmap.org/reverse"
+    url = f"{NOMINATIM_BASE_URL}/reverse"
     params = {
         'lat': latitude,
         'lon': longitude,
         'format': 'json',
         'addressdetails': 1
     }
-    headers = {
-        'User-Agent': 'GigRoute/1.0 (Tour Management Application)',
-        'Accept-Language': 'fr,en'
-    }
 
     try:
-        _last_request_time = time.time()
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = requests.get(url, params=params, headers=NOMINATIM_HEADERS, timeout=10)
         response.raise_for_status()
 
         result = response.json()
@@ -150,7 +227,10 @@ def reverse_geocode(
 
 def batch_geocode_venues(venues: list, commit_callback=None) -> dict:
     """
-    Géocode plusieurs venues en batch (avec rate limiting).
+    Géocode plusieurs venues en série (avec rate limiting).
+
+    Pour les imports volumineux, préférer GeocodingService.geocode_venues
+    (cache persistant, déduplication, workers concurrents).
 
     Args:
         venues: Liste d'objets Venue à géocoder
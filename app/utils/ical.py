@@ -1,14 +1,25 @@
 """
 iCal utilities for GigRoute.
 Generates proper iCal/ICS files compatible with Google Calendar, Apple Calendar, Outlook, etc.
+
+Serialized VEVENTs are cached per stop / crew slot under a key built from
+the updated_at of every row they are rendered from, so regenerating a tour
+calendar only re-serializes the events that changed.
 """
+import hashlib
 from datetime import datetime, timedelta, date, time
 from icalendar import Calendar, Event, Alarm
 import pytz
+from flask import current_app, has_app_context
+from sqlalchemy.orm import selectinload
+
+from app.extensions import cache
 
 # Default timezone for events
 DEFAULT_TIMEZONE = pytz.timezone('Europe/Paris')
 
+_CALENDAR_END = b'END:VCALENDAR\r\n'
+
 
 def create_calendar(name, description=None):
     """
@@ -334,12 +345,80 @@ def _format_time(t):
     return ''
 
 
+def event_blob(version, build):
+    """
+    Serialized VEVENT, cached under a key derived from its row versions.
+
+    Args:
+        version: Tuple identifying the event and the state it is rendered
+            from (ids, updated_at of the stop / venue / tour / band...)
+        build: Called on a miss, returns the icalendar.Event
+
+    Returns:
+        bytes: The VEVENT block (BEGIN:VEVENT ... END:VEVENT)
+    """
+    if not has_app_context():
+        return build().to_ical()
+
+    key = 'ical:event:' + hashlib.sha1(repr(version).encode()).hexdigest()
+    blob = cache.get(key)
+    if blob is None:
+        blob = build().to_ical()
+        cache.set(key, blob, timeout=current_app.config.get('ICAL_EVENT_CACHE_TIMEOUT', 86400))
+    return blob
+
+
+def serialize_calendar(cal, blobs):
+    """
+    Serialize a calendar whose events are already serialized.
+
+    Args:
+        cal: icalendar.Calendar (headers only, see create_calendar)
+        blobs: VEVENT blocks from event_blob()
+
+    Returns:
+        bytes: iCal file content
+    """
+    header = cal.to_ical()
+    return header[:-len(_CALENDAR_END)] + b''.join(blobs) + _CALENDAR_END
+
+
+def _row_version(obj):
+    """(id, updated_at) of an optional related row, for event_blob keys."""
+    return (obj.id, obj.updated_at) if obj is not None else None
+
+
+def stop_event_version(kind, stop, tour=None, *extra):
+    """
+    Cache version of an event rendered from a stop, its venue, tour and band.
+
+    Args:
+        kind: Renderer name (one per event format)
+        stop: TourStop model instance
+        tour: Optional Tour model instance
+        *extra: Renderer options (alarms...)
+    """
+    band = tour.band if tour else stop.band
+    return (kind, stop.id, stop.updated_at, _row_version(stop.venue),
+            _row_version(tour), _row_version(band)) + extra
+
+
+def _tour_stops(tour):
+    """Stops of a tour in date order, venues loaded in the same round trip."""
+    from app.models.tour_stop import TourStop
+
+    if tour.id is None:
+        return list(tour.stops)
+    return (TourStop.query.options(selectinload(TourStop.venue))
+            .filter_by(tour_id=tour.id).order_by(TourStop.date).all())
+
+
 def generate_tour_ical(tour, include_alarms=True):
     """
     Generate complete iCal calendar for a tour.
 
     Args:
-        tour: Tour model instance with stops loaded
+        tour: Tour model instance
         include_alarms: Whether to add reminders
 
     Returns:
@@ -351,11 +430,12 @@ def generate_tour_ical(tour, include_alarms=True):
 
     cal = create_calendar(tour.name, description)
 
-    for stop in tour.stops:
-        event = create_event(stop, tour, include_alarm=include_alarms)
-        cal.add_component(event)
-
-    return cal.to_ical()
+    blobs = [
+        event_blob(stop_event_version('tour', stop, tour, include_alarms),
+                   lambda stop=stop: create_event(stop, tour, include_alarm=include_alarms))
+        for stop in _tour_stops(tour)
+    ]
+    return serialize_calendar(cal, blobs)
 
 
 def generate_stop_ical(tour_stop, tour=None, include_alarm=True):
@@ -396,25 +476,26 @@ def generate_crew_schedule_ical(tour_stop, user=None):
     from app.models.crew_schedule import CrewScheduleSlot, CrewAssignment
 
     # Get slots (filtered if user provided)
+    slots = tour_stop.crew_slots.options(selectinload(CrewScheduleSlot.assignments))
     if user:
-        slots = CrewScheduleSlot.query.filter_by(tour_stop_id=tour_stop.id).join(
-            CrewAssignment
-        ).filter(CrewAssignment.user_id == user.id).all()
+        slots = slots.join(CrewAssignment).filter(CrewAssignment.user_id == user.id)
         cal_name = f"Mon planning - {tour_stop.venue.name if tour_stop.venue else tour_stop.date}"
     else:
-        slots = list(tour_stop.crew_slots)
         cal_name = f"Planning équipe - {tour_stop.venue.name if tour_stop.venue else tour_stop.date}"
 
     cal = create_calendar(cal_name)
 
-    for slot in slots:
-        event = _create_crew_slot_event(slot, tour_stop)
-        cal.add_component(event)
+    venue_version = _row_version(tour_stop.venue)
+    blobs = []
+    for slot in slots.all():
+        version = ('crew', slot.id, slot.updated_at, tour_stop.updated_at, venue_version,
+                   tuple(_row_version(a) for a in slot.assignments))
+        blobs.append(event_blob(version, lambda slot=slot: create_crew_slot_event(slot, tour_stop)))
 
-    return cal.to_ical()
+    return serialize_calendar(cal, blobs)
 
 
-def _create_crew_slot_event(slot, tour_stop):
+def create_crew_slot_event(slot, tour_stop):
     """Create an iCal event for a crew schedule slot."""
     event = Event()
 
@@ -467,3 +548,83 @@ def _create_crew_slot_event(slot, tour_stop):
     event.add_component(alarm)
 
     return event
+
+
+def _slot_times(day, start_time, end_time):
+    """Localized start/end of a time slot (end past midnight rolls over)."""
+    start_dt = DEFAULT_TIMEZONE.localize(datetime.combine(day, start_time))
+    end_dt = DEFAULT_TIMEZONE.localize(datetime.combine(day, end_time))
+    if end_dt < start_dt:
+        end_dt += timedelta(days=1)
+    return start_dt, end_dt
+
+
+def create_planning_slot_event(slot):
+    """Create an iCal event for a planning slot (one person's task on a stop)."""
+    tour_stop = slot.tour_stop
+    event = Event()
+
+    event.add('uid', f'planningslot-{slot.id}@gigroute.app')
+    event.add('dtstamp', datetime.now(DEFAULT_TIMEZONE))
+    event.add('last-modified', slot.updated_at or datetime.now(DEFAULT_TIMEZONE))
+    event.add('summary', f"{slot.role_name} - {slot.task_description}")
+
+    start_dt, end_dt = _slot_times(tour_stop.date, slot.start_time, slot.end_time)
+    event.add('dtstart', start_dt)
+    event.add('dtend', end_dt)
+
+    location = build_location(tour_stop)
+    if location:
+        event.add('location', location)
+
+    event.add('description', '\n'.join([
+        f"Rôle: {slot.role_name}",
+        f"Catégorie: {slot.category}",
+        f"Tâche: {slot.task_description}",
+    ]))
+    event.add('categories', ['PLANNING'])
+    return event
+
+
+def create_logistics_event(item):
+    """
+    Create an iCal event for a logistics item (flight, train, hotel...).
+
+    Items without start_datetime become all-day events on the stop date.
+    """
+    event = Event()
+
+    event.add('uid', f'logistics-{item.id}@gigroute.app')
+    event.add('dtstamp', datetime.now(DEFAULT_TIMEZONE))
+    event.add('last-modified', item.updated_at or datetime.now(DEFAULT_TIMEZONE))
+
+    summary = item.display_name
+    if item.confirmation_number:
+        summary += f' ({item.confirmation_number})'
+    event.add('summary', summary)
+
+    if item.start_datetime:
+        start_dt = DEFAULT_TIMEZONE.localize(item.start_datetime)
+        end_dt = DEFAULT_TIMEZONE.localize(item.end_datetime) if item.end_datetime else start_dt + timedelta(hours=1)
+        event.add('dtstart', start_dt)
+        event.add('dtend', max(end_dt, start_dt))
+    else:
+        event.add('dtstart', item.tour_stop.date)
+        event.add('dtend', item.tour_stop.date + timedelta(days=1))
+
+    location = item.pickup_location or ', '.join(p for p in (item.address, item.city, item.country) if p)
+    if location:
+        event.add('location', location)
+
+    lines = []
+    if item.pickup_location:
+        lines.append(f"Départ: {item.pickup_location}")
+    if item.dropoff_location:
+        lines.append(f"Arrivée: {item.dropoff_location}")
+    if item.confirmation_number:
+        lines.append(f"Réf: {item.confirmation_number}")
+    if item.notes:
+        lines.append(f"Notes: {item.notes}")
+    event.add('description', '\n'.join(lines))
+    event.add('categories', ['LOGISTICS'])
+    return event
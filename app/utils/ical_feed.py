@@ -0,0 +1,137 @@
+"""
+Conditional GET for the iCal exports and subscription feeds.
+
+Calendar apps poll subscription URLs all day long. Each calendar gets an
+ETag computed from one aggregate query over the rows it is rendered from
+(max(updated_at), row counts and id sums: deletions do not move
+max(updated_at)), so a poll whose If-None-Match still matches is answered
+304 without loading or serializing a single event.
+"""
+import hashlib
+from typing import Optional
+
+from flask import Response, request
+from sqlalchemy import distinct, func, select, true
+
+from app.extensions import db
+from app.models.band import Band
+from app.models.crew_schedule import CrewAssignment, CrewScheduleSlot
+from app.models.tour import Tour
+from app.models.tour_stop import TourStop
+from app.models.venue import Venue
+
+# Part of every ETag: bump when the rendered iCal changes shape
+FEED_FORMAT_VERSION = 1
+
+
+def tour_feed_state(tour_id: int):
+    """
+    Version of everything a tour calendar is rendered from, in one query.
+
+    Args:
+        tour_id: Tour ID
+
+    Returns:
+        Row (id, band_id, tour / band updated_at, stop aggregates) or None
+        if the tour does not exist. id and band_id are enough for
+        _generate_calendar_token, so token feeds need no other query.
+    """
+    stops = (
+        select(
+            func.count(TourStop.id).label('stop_count'),
+            func.coalesce(func.sum(TourStop.id), 0).label('stop_id_sum'),
+            func.max(TourStop.updated_at).label('stops_updated_at'),
+            func.max(Venue.updated_at).label('venues_updated_at'),
+        )
+        .select_from(TourStop)
+        .outerjoin(Venue, Venue.id == TourStop.venue_id)
+        .where(TourStop.tour_id == tour_id)
+        .subquery()
+    )
+    return db.session.execute(
+        select(
+            Tour.id, Tour.band_id, Tour.updated_at,
+            Band.updated_at.label('band_updated_at'),
+            stops.c.stop_count, stops.c.stop_id_sum, stops.c.stops_updated_at, stops.c.venues_updated_at,
+        )
+        .select_from(Tour)
+        .outerjoin(Band, Band.id == Tour.band_id)
+        .join(stops, true())
+        .where(Tour.id == tour_id)
+    ).first()
+
+
+def crew_feed_state(stop_id: int):
+    """
+    Version of a stop's crew schedule (slots, assignments, stop, venue) in one query.
+
+    Args:
+        stop_id: TourStop ID
+
+    Returns:
+        Row of aggregates, or None if the stop does not exist
+    """
+    return db.session.execute(
+        select(
+            TourStop.id, TourStop.updated_at,
+            Venue.updated_at.label('venue_updated_at'),
+            func.count(distinct(CrewScheduleSlot.id)).label('slot_count'),
+            func.coalesce(func.sum(distinct(CrewScheduleSlot.id)), 0).label('slot_id_sum'),
+            func.max(CrewScheduleSlot.updated_at).label('slots_updated_at'),
+            func.count(CrewAssignment.id).label('assignment_count'),
+            func.coalesce(func.sum(CrewAssignment.id), 0).label('assignment_id_sum'),
+            func.max(CrewAssignment.updated_at).label('assignments_updated_at'),
+        )
+        .select_from(TourStop)
+        .outerjoin(Venue, Venue.id == TourStop.venue_id)
+        .outerjoin(CrewScheduleSlot, CrewScheduleSlot.tour_stop_id == TourStop.id)
+        .outerjoin(CrewAssignment, CrewAssignment.slot_id == CrewScheduleSlot.id)
+        .where(TourStop.id == stop_id)
+        .group_by(TourStop.id, TourStop.updated_at, Venue.updated_at)
+    ).first()
+
+
+def feed_etag(variant: str, state, *extra) -> str:
+    """
+    ETag of a calendar.
+
+    Args:
+        variant: Calendar kind ('tour-feed', 'logistics', 'crew'...)
+        state: Row from tour_feed_state / crew_feed_state
+        *extra: Anything else the output depends on (user filter, options)
+
+    Returns:
+        Opaque ETag value (without quotes)
+    """
+    raw = repr((FEED_FORMAT_VERSION, variant, tuple(state), extra))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def not_modified(etag: str, cache_control: str = 'private, no-cache') -> Optional[Response]:
+    """304 response if the client already has this version, else None."""
+    if not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def ical_response(content: bytes, etag: str, filename: Optional[str] = None,
+                  cache_control: str = 'private, no-cache') -> Response:
+    """
+    text/calendar response carrying its ETag.
+
+    Args:
+        content: iCal file content
+        etag: Value from feed_etag
+        filename: Sent as an attachment when set
+        cache_control: Cache-Control header (clients revalidate with If-None-Match)
+    """
+    response = Response(content, mimetype='text/calendar')
+    response.headers['Content-Type'] = 'text/calendar; charset=utf-8'
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
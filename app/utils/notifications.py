@@ -13,25 +13,21 @@ logger = logging.getLogger(__name__)
 
 
 def _send_push_async(user_id, title, body, data=None):
-    """Send push notification (best-effort, never blocks)."""
-    try:
-        from app.services.fcm_service import send_push_to_user
-        result = send_push_to_user(user_id, title, body or '', data)
-        if result.get('success_count', 0) > 0:
-            logger.debug('Push sent to user %s: %s', user_id, title)
-    except Exception as e:
-        logger.warning('Push notification failed for user %s: %s', user_id, e)
+    """Queue a push notification on the dispatcher (best-effort, never blocks)."""
+    _send_push_batch([user_id], title, body, data)
 
 
 def _send_push_batch(user_ids, title, body, data=None):
-    """Send push notification to multiple users (best-effort)."""
+    """Queue a push notification to multiple users (best-effort).
+
+    Pushes with the same payload queued meanwhile are merged by the
+    dispatcher into one FCM multicast.
+    """
     try:
-        from app.services.fcm_service import send_push_to_users
-        result = send_push_to_users(user_ids, title, body or '', data)
-        if result.get('success_count', 0) > 0:
-            logger.debug('Push sent to %d users: %s', result['success_count'], title)
+        from app.services.notification_dispatcher import dispatcher
+        dispatcher.submit_push(user_ids, title, body or '', data)
     except Exception as e:
-        logger.warning('Push batch failed for %d users: %s', len(user_ids), e)
+        logger.warning('Push notification failed for %d users: %s', len(user_ids), e)
 
 
 def create_notification(user_id, title, message=None, type=NotificationType.INFO,
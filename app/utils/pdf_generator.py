@@ -6,7 +6,9 @@ No system dependencies required (pure Python).
 """
 from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any
+from xml.sax.saxutils import escape
 
 from app import DAYS_FR, MONTHS_FR
 
@@ -51,6 +53,24 @@ WHITE = white
 BLACK = black
 
 
+@lru_cache(maxsize=1)
+def get_stylesheet():
+    """ReportLab sample stylesheet, built once per process (styles are only read)."""
+    return getSampleStyleSheet()
+
+
+_PARAGRAPH_STYLES = {}
+
+
+def _paragraph_style(name: str, parent: str, **kwargs) -> 'ParagraphStyle':
+    """ParagraphStyle derived from a sample style, built once per process per definition."""
+    key = (name, parent, repr(sorted(kwargs.items())))
+    style = _PARAGRAPH_STYLES.get(key)
+    if style is None:
+        style = _PARAGRAPH_STYLES[key] = ParagraphStyle(name, parent=get_stylesheet()[parent], **kwargs)
+    return style
+
+
 def format_currency(amount: float, currency: str = 'EUR') -> str:
     """Format amount with currency symbol."""
     symbols = {
@@ -116,24 +136,23 @@ def generate_settlement_pdf(settlement: Dict[str, Any]) -> bytes:
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1.5*cm,
                             bottomMargin=1.5*cm, leftMargin=1.5*cm, rightMargin=1.5*cm)
 
-    styles = getSampleStyleSheet()
     elements = []
     s = settlement
     currency = s.get('currency', 'EUR')
 
     # Custom styles
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=16, textColor=WHITE,
+    title_style = _paragraph_style('Title', 'Heading1', fontSize=16, textColor=WHITE,
                                  spaceAfter=6)
-    subtitle_style = ParagraphStyle('Subtitle', parent=styles['Normal'], fontSize=10, textColor=WHITE)
-    section_header_style = ParagraphStyle('SectionHeader', parent=styles['Heading2'], fontSize=11,
+    subtitle_style = _paragraph_style('Subtitle', 'Normal', fontSize=10, textColor=WHITE)
+    section_header_style = _paragraph_style('SectionHeader', 'Heading2', fontSize=11,
                                           textColor=BLACK, spaceBefore=12, spaceAfter=6,
                                           backColor=LIGHT_GRAY)
-    normal_style = ParagraphStyle('NormalCustom', parent=styles['Normal'], fontSize=9)
-    label_style = ParagraphStyle('Label', parent=styles['Normal'], fontSize=9, textColor=GRAY)
-    value_style = ParagraphStyle('Value', parent=styles['Normal'], fontSize=9, alignment=TA_RIGHT)
-    bold_value = ParagraphStyle('BoldValue', parent=styles['Normal'], fontSize=10, alignment=TA_RIGHT,
+    normal_style = _paragraph_style('NormalCustom', 'Normal', fontSize=9)
+    label_style = _paragraph_style('Label', 'Normal', fontSize=9, textColor=GRAY)
+    value_style = _paragraph_style('Value', 'Normal', fontSize=9, alignment=TA_RIGHT)
+    bold_value = _paragraph_style('BoldValue', 'Normal', fontSize=10, alignment=TA_RIGHT,
                                 fontName='Helvetica-Bold')
-    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=7,
+    footer_style = _paragraph_style('Footer', 'Normal', fontSize=7,
                                   textColor=GRAY, alignment=TA_CENTER)
 
     # Format date
@@ -398,29 +417,28 @@ def generate_invoice_pdf(invoice) -> bytes:
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1.5*cm,
                             bottomMargin=1.5*cm, leftMargin=1.5*cm, rightMargin=1.5*cm)
 
-    styles = getSampleStyleSheet()
     elements = []
     currency = invoice.currency or 'EUR'
 
     # Custom styles
-    title_style = ParagraphStyle('InvTitle', parent=styles['Heading1'], fontSize=18,
+    title_style = _paragraph_style('InvTitle', 'Heading1', fontSize=18,
                                  textColor=WHITE, alignment=TA_CENTER, spaceAfter=4)
-    subtitle_style = ParagraphStyle('InvSub', parent=styles['Normal'], fontSize=10,
+    subtitle_style = _paragraph_style('InvSub', 'Normal', fontSize=10,
                                     textColor=WHITE, alignment=TA_CENTER)
-    section_header_style = ParagraphStyle('InvSection', parent=styles['Heading2'], fontSize=11,
+    section_header_style = _paragraph_style('InvSection', 'Heading2', fontSize=11,
                                           textColor=BLACK, spaceBefore=12, spaceAfter=6,
                                           backColor=LIGHT_GRAY)
-    label_style = ParagraphStyle('InvLabel', parent=styles['Normal'], fontSize=9, textColor=GRAY)
-    value_style = ParagraphStyle('InvValue', parent=styles['Normal'], fontSize=9, alignment=TA_RIGHT)
-    bold_value = ParagraphStyle('InvBoldValue', parent=styles['Normal'], fontSize=10,
+    label_style = _paragraph_style('InvLabel', 'Normal', fontSize=9, textColor=GRAY)
+    value_style = _paragraph_style('InvValue', 'Normal', fontSize=9, alignment=TA_RIGHT)
+    bold_value = _paragraph_style('InvBoldValue', 'Normal', fontSize=10,
                                 alignment=TA_RIGHT, fontName='Helvetica-Bold')
-    cell_style = ParagraphStyle('InvCell', parent=styles['Normal'], fontSize=9)
-    cell_bold = ParagraphStyle('InvCellBold', parent=styles['Normal'], fontSize=9,
+    cell_style = _paragraph_style('InvCell', 'Normal', fontSize=9)
+    cell_bold = _paragraph_style('InvCellBold', 'Normal', fontSize=9,
                                fontName='Helvetica-Bold')
-    small_style = ParagraphStyle('InvSmall', parent=styles['Normal'], fontSize=8, textColor=GRAY)
-    footer_style = ParagraphStyle('InvFooter', parent=styles['Normal'], fontSize=7,
+    small_style = _paragraph_style('InvSmall', 'Normal', fontSize=8, textColor=GRAY)
+    footer_style = _paragraph_style('InvFooter', 'Normal', fontSize=7,
                                   textColor=GRAY, alignment=TA_CENTER)
-    addr_style = ParagraphStyle('InvAddr', parent=styles['Normal'], fontSize=9,
+    addr_style = _paragraph_style('InvAddr', 'Normal', fontSize=9,
                                 alignment=TA_LEFT, leading=13)
 
     # Type labels
@@ -506,8 +524,8 @@ def generate_invoice_pdf(invoice) -> bytes:
     # Invoice lines table
     elements.append(Paragraph("LIGNES DE FACTURE", section_header_style))
 
-    right_cell = ParagraphStyle('RCell', parent=styles['Normal'], fontSize=9, alignment=TA_RIGHT)
-    right_bold = ParagraphStyle('RBold', parent=styles['Normal'], fontSize=9,
+    right_cell = _paragraph_style('RCell', 'Normal', fontSize=9, alignment=TA_RIGHT)
+    right_bold = _paragraph_style('RBold', 'Normal', fontSize=9,
                                 alignment=TA_RIGHT, fontName='Helvetica-Bold')
 
     lines_header = [
@@ -659,20 +677,19 @@ def generate_tour_pdf(tour) -> bytes:
     doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), topMargin=1.5*cm,
                             bottomMargin=1.5*cm, leftMargin=1.5*cm, rightMargin=1.5*cm)
 
-    styles = getSampleStyleSheet()
     elements = []
 
     # Custom styles
-    title_style = ParagraphStyle('TourTitle', parent=styles['Heading1'], fontSize=20,
+    title_style = _paragraph_style('TourTitle', 'Heading1', fontSize=20,
                                  textColor=GOLD, alignment=TA_CENTER, spaceAfter=4)
-    subtitle_style = ParagraphStyle('TourSubtitle', parent=styles['Normal'], fontSize=12,
+    subtitle_style = _paragraph_style('TourSubtitle', 'Normal', fontSize=12,
                                     textColor=WHITE, alignment=TA_CENTER)
-    date_style = ParagraphStyle('TourDates', parent=styles['Normal'], fontSize=10,
+    date_style = _paragraph_style('TourDates', 'Normal', fontSize=10,
                                 textColor=HexColor('#aaaaaa'), alignment=TA_CENTER)
-    cell_style = ParagraphStyle('Cell', parent=styles['Normal'], fontSize=9)
-    cell_bold = ParagraphStyle('CellBold', parent=styles['Normal'], fontSize=9, fontName='Helvetica-Bold')
-    cell_small = ParagraphStyle('CellSmall', parent=styles['Normal'], fontSize=8, textColor=GRAY)
-    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=7,
+    cell_style = _paragraph_style('Cell', 'Normal', fontSize=9)
+    cell_bold = _paragraph_style('CellBold', 'Normal', fontSize=9, fontName='Helvetica-Bold')
+    cell_small = _paragraph_style('CellSmall', 'Normal', fontSize=8, textColor=GRAY)
+    footer_style = _paragraph_style('Footer', 'Normal', fontSize=7,
                                   textColor=GRAY, alignment=TA_CENTER)
 
     # Tour dates
@@ -760,7 +777,7 @@ def generate_tour_pdf(tour) -> bytes:
     elements.append(Spacer(1, 12))
 
     # Total stops
-    total_style = ParagraphStyle('Total', parent=styles['Normal'], fontSize=10,
+    total_style = _paragraph_style('Total', 'Normal', fontSize=10,
                                  textColor=GRAY, alignment=TA_RIGHT)
     elements.append(Paragraph(f"Total: {len(stops)} date(s)", total_style))
     elements.append(Spacer(1, 16))
@@ -790,28 +807,25 @@ def generate_daysheet_pdf(stop) -> bytes:
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1.5*cm,
                             bottomMargin=1.5*cm, leftMargin=1.5*cm, rightMargin=1.5*cm)
 
-    styles = getSampleStyleSheet()
     elements = []
 
     # Custom styles
-    title_style = ParagraphStyle('DayTitle', parent=styles['Heading1'], fontSize=20,
+    title_style = _paragraph_style('DayTitle', 'Heading1', fontSize=20,
                                  textColor=GOLD, alignment=TA_CENTER, spaceAfter=4)
-    subtitle_style = ParagraphStyle('DaySub', parent=styles['Normal'], fontSize=12,
+    subtitle_style = _paragraph_style('DaySub', 'Normal', fontSize=12,
                                     textColor=WHITE, alignment=TA_CENTER)
-    info_style = ParagraphStyle('DayInfo', parent=styles['Normal'], fontSize=10,
+    info_style = _paragraph_style('DayInfo', 'Normal', fontSize=10,
                                 textColor=HexColor('#aaaaaa'), alignment=TA_CENTER)
-    section_header_style = ParagraphStyle(
-        'SecHeader', parent=styles['Heading2'], fontSize=11,
+    section_header_style = _paragraph_style('SecHeader', 'Heading2', fontSize=11,
         textColor=DARK_BG, backColor=GOLD, spaceBefore=10, spaceAfter=4)
-    cell_style = ParagraphStyle('Cell', parent=styles['Normal'], fontSize=9)
-    cell_bold = ParagraphStyle('CellBold', parent=styles['Normal'], fontSize=9, fontName='Helvetica-Bold')
-    time_style = ParagraphStyle('TimeStyle', parent=styles['Normal'], fontSize=10,
+    cell_style = _paragraph_style('Cell', 'Normal', fontSize=9)
+    cell_bold = _paragraph_style('CellBold', 'Normal', fontSize=9, fontName='Helvetica-Bold')
+    time_style = _paragraph_style('TimeStyle', 'Normal', fontSize=10,
                                 textColor=BLUE, fontName='Helvetica-Bold')
-    highlight_time_style = ParagraphStyle(
-        'HighlightTime', parent=styles['Normal'], fontSize=12,
+    highlight_time_style = _paragraph_style('HighlightTime', 'Normal', fontSize=12,
         textColor=GREEN, fontName='Helvetica-Bold')
-    cell_small = ParagraphStyle('CellSmall', parent=styles['Normal'], fontSize=8, textColor=GRAY)
-    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=7,
+    cell_small = _paragraph_style('CellSmall', 'Normal', fontSize=8, textColor=GRAY)
+    footer_style = _paragraph_style('Footer', 'Normal', fontSize=7,
                                   textColor=GRAY, alignment=TA_CENTER)
 
     # Get basic info
@@ -956,3 +970,197 @@ def generate_daysheet_pdf(stop) -> bytes:
 
     doc.build(elements)
     return buffer.getvalue()
+
+
+def generate_itinerary_pdf(stop) -> bytes:
+    """
+    Generate a PDF travel itinerary for a single tour stop.
+
+    Transport, hotels and call times in one timeline, then hotels, the
+    lineup running order and the primary local contact.
+
+    Args:
+        stop: TourStop model instance (or any object with the same attributes)
+
+    Returns:
+        PDF file as bytes
+    """
+    if not PDF_AVAILABLE:
+        raise ImportError("reportlab is required for PDF generation. Install with: pip install reportlab")
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1.5*cm,
+                            bottomMargin=1.5*cm, leftMargin=1.5*cm, rightMargin=1.5*cm)
+
+    elements = []
+
+    # Custom styles (shared with the day sheet)
+    title_style = _paragraph_style('DayTitle', 'Heading1', fontSize=20,
+                                 textColor=GOLD, alignment=TA_CENTER, spaceAfter=4)
+    subtitle_style = _paragraph_style('DaySub', 'Normal', fontSize=12,
+                                    textColor=WHITE, alignment=TA_CENTER)
+    info_style = _paragraph_style('DayInfo', 'Normal', fontSize=10,
+                                textColor=HexColor('#aaaaaa'), alignment=TA_CENTER)
+    section_header_style = _paragraph_style('SecHeader', 'Heading2', fontSize=11,
+        textColor=DARK_BG, backColor=GOLD, spaceBefore=10, spaceAfter=4)
+    cell_style = _paragraph_style('Cell', 'Normal', fontSize=9)
+    cell_bold = _paragraph_style('CellBold', 'Normal', fontSize=9, fontName='Helvetica-Bold')
+    time_style = _paragraph_style('TimeStyle', 'Normal', fontSize=10,
+                                textColor=BLUE, fontName='Helvetica-Bold')
+    highlight_time_style = _paragraph_style('HighlightTime', 'Normal', fontSize=12,
+        textColor=GREEN, fontName='Helvetica-Bold')
+    cell_small = _paragraph_style('CellSmall', 'Normal', fontSize=8, textColor=GRAY)
+    footer_style = _paragraph_style('Footer', 'Normal', fontSize=7,
+                                  textColor=GRAY, alignment=TA_CENTER)
+
+    tour = stop.tour
+    band_name = tour.band.name if tour.band else 'TBA'
+    date_str = stop.date.strftime('%d/%m/%Y') if stop.date else 'TBA'
+    venue = stop.venue
+    venue_name = venue.name if venue else 'TBA'
+    venue_city = venue.city if venue else ''
+
+    logistics_labels = {
+        'flight': 'Vol', 'train': 'Train', 'bus': 'Bus', 'ferry': 'Ferry',
+        'rental_car': 'Location voiture', 'taxi': 'Taxi', 'ground_transport': 'Navette',
+        'hotel': 'Hôtel', 'apartment': 'Appartement', 'rental': 'Location',
+        'equipment': 'Équipement', 'backline': 'Backline', 'catering': 'Catering',
+        'meal': 'Repas', 'parking': 'Parking', 'visa': 'Visa', 'other': 'Autre',
+    }
+
+    # Header
+    header_data = [
+        [Paragraph("<i>Itinéraire</i>", info_style)],
+        [Paragraph(f"<b>{escape(band_name)}</b>", title_style)],
+        [Paragraph(escape(tour.name), subtitle_style)],
+        [Paragraph(f"{_format_date_fr(stop.date) or 'TBA'} - {escape(venue_name)}, {escape(venue_city or '')}",
+                   info_style)],
+    ]
+    header_table = Table(header_data, colWidths=[doc.width])
+    header_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), DARK_BG),
+        ('TOPPADDING', (0, 0), (0, 0), 12),
+        ('BOTTOMPADDING', (-1, -1), (-1, -1), 12),
+    ]))
+    elements.append(header_table)
+    elements.append(Spacer(1, 10))
+
+    # Timeline: logistics with a start time, then the day's call times
+    timeline = []
+    for item in stop.logistics:
+        if not item.start_datetime:
+            continue
+        kind = item.logistics_type.value if item.logistics_type else 'other'
+        details = [escape(item.provider)] if item.provider else []
+        if item.confirmation_number:
+            details.append(f"Ref: {escape(item.confirmation_number)}")
+        if item.pickup_location:
+            details.append(f"Depart: {escape(item.pickup_location)}")
+        if item.dropoff_location:
+            details.append(f"Arrivee: {escape(item.dropoff_location)}")
+        if item.end_datetime:
+            hours, mins = divmod((item.end_datetime - item.start_datetime).seconds // 60, 60)
+            details.append(f"Duree: {hours}h{mins:02d}" if hours else f"Duree: {mins} min")
+        timeline.append((item.start_datetime, logistics_labels.get(kind, 'Logistique'), details, False))
+
+    call_times = [
+        ('load_in_time', 'Load-In'), ('crew_call_time', 'Appel Equipe'),
+        ('artist_call_time', 'Appel Artistes'), ('catering_time', 'Repas'),
+        ('soundcheck_time', 'Soundcheck'), ('press_time', 'Presse'),
+        ('meet_greet_time', 'Meet & Greet'), ('doors_time', 'Ouverture Portes'),
+        ('set_time', 'SET TIME'), ('curfew_time', 'Curfew'),
+    ]
+    if stop.date:
+        for attr, label in call_times:
+            call_time = getattr(stop, attr, None)
+            if call_time:
+                timeline.append((datetime.combine(stop.date, call_time), escape(label),
+                                 [escape(venue_name)], attr == 'set_time'))
+    timeline.sort(key=lambda event: event[0])
+
+    elements.append(Paragraph("TIMELINE", section_header_style))
+    if timeline:
+        timeline_data = []
+        for when, label, details, is_set in timeline:
+            when_str = when.strftime('%H:%M') if when.date() == stop.date else when.strftime('%d/%m %H:%M')
+            timeline_data.append([
+                Paragraph(when_str, highlight_time_style if is_set else time_style),
+                Paragraph(f"<b>{label}</b><br/>{' - '.join(details)}" if details else f"<b>{label}</b>",
+                          cell_style),
+            ])
+        timeline_table = Table(timeline_data, colWidths=[doc.width * 0.2, doc.width * 0.8])
+        timeline_table.setStyle(TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 0.5, LIGHT_GRAY),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        elements.append(timeline_table)
+    else:
+        elements.append(Paragraph("Aucun horaire defini", cell_small))
+    elements.append(Spacer(1, 8))
+
+    # Hotels
+    hotels = [item for item in stop.logistics if item.logistics_type and item.logistics_type.value == 'hotel']
+    if hotels:
+        elements.append(Paragraph("HÉBERGEMENT", section_header_style))
+        for hotel in hotels:
+            lines = [f"<b>{escape(hotel.provider or 'Hôtel')}</b>"]
+            address = ', '.join(escape(part) for part in (hotel.address, hotel.city) if part)
+            if address:
+                lines.append(address)
+            if hotel.check_in_time or hotel.check_out_time:
+                check_in = hotel.check_in_time.strftime('%H:%M') if hotel.check_in_time else '-'
+                check_out = hotel.check_out_time.strftime('%H:%M') if hotel.check_out_time else '-'
+                lines.append(f"Check-in: {check_in} / Check-out: {check_out}")
+            if hotel.confirmation_number:
+                lines.append(f"Ref: {escape(hotel.confirmation_number)}")
+            elements.append(Paragraph('<br/>'.join(lines), cell_style))
+            elements.append(Spacer(1, 4))
+        elements.append(Spacer(1, 4))
+
+    # Lineup running order
+    if stop.lineup_slots:
+        elements.append(Paragraph("LINEUP", section_header_style))
+        lineup_data = []
+        for slot in stop.lineup_slots:
+            start = slot.start_time.strftime('%H:%M') if slot.start_time else '-'
+            end = f" - {slot.end_time.strftime('%H:%M')}" if slot.end_time else ''
+            lineup_data.append([
+                Paragraph(f"{start}{end}", time_style),
+                Paragraph(f"<b>{escape(slot.performer_name)}</b>", cell_bold),
+            ])
+        lineup_table = Table(lineup_data, colWidths=[doc.width * 0.3, doc.width * 0.7])
+        lineup_table.setStyle(TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 0.5, LIGHT_GRAY),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ]))
+        elements.append(lineup_table)
+        elements.append(Spacer(1, 8))
+
+    # Primary local contact
+    contacts = list(stop.local_contacts)
+    primary_contact = next((contact for contact in contacts if contact.is_primary), contacts[0] if contacts else None)
+    elements.append(Paragraph("CONTACT SUR PLACE", section_header_style))
+    if primary_contact:
+        role_text = f" ({escape(primary_contact.role)})" if primary_contact.role else ''
+        elements.append(Paragraph(
+            f"<b>{escape(primary_contact.name)}{role_text}</b><br/>{escape(primary_contact.phone or '')}",
+            cell_style
+        ))
+    else:
+        elements.append(Paragraph("Aucun contact", cell_small))
+
+    elements.append(Spacer(1, 20))
+
+    # Footer
+    generation_date = datetime.now().strftime('%d/%m/%Y %H:%M')
+    elements.append(Paragraph(
+        f"Itinéraire genere le {generation_date} - GigRoute - "
+        f"Reference: ITINERARY-{stop.id}-{date_str.replace('/', '')}",
+        footer_style
+    ))
+
+    doc.build(elements)
+    return buffer.getvalue()
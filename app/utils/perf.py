@@ -0,0 +1,236 @@
+"""
+Request performance instrumentation for GigRoute.
+Every request records, through SQLAlchemy cursor events:
+
+- number of SQL statements and total DB time
+- slowest statement (duration + truncated SQL)
+- rows returned / affected (when the driver reports them)
+
+The figures go to the request log line (JSON fields in production), to a
+`Server-Timing` header (visible in the browser devtools; development and
+tests only unless PERF_SERVER_TIMING is set) and to an in-process
+aggregate per endpoint (p50 / p95, /admin/perf).
+
+Views can declare a query budget with @query_budget(n). Going over it is
+logged; with PERF_ENFORCE_BUDGETS (tests) it is also recorded as a
+violation that the test suite turns into a failure.
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+from typing import Dict, List, Optional
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_G_KEY = 'perf_stats'
+_STATEMENT_PREVIEW = 200  # characters of SQL kept for the slowest statement
+
+_listeners_registered = False
+
+
+class RequestStats:
+    """SQL figures of one request."""
+
+    __slots__ = ('started', 'query_count', 'db_time', 'rows', 'slowest_time', 'slowest_statement')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float, rowcount: int) -> None:
+        self.query_count += 1
+        self.db_time += duration
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict:
+        """Fields for the structured request log."""
+        return {
+            'duration_ms': round(self.elapsed * 1000, 1),
+            'db_queries': self.query_count,
+            'db_time_ms': round(self.db_time * 1000, 1),
+            'db_rows': self.rows,
+            'db_slowest_ms': round(self.slowest_time * 1000, 1),
+            'db_slowest': (self.slowest_statement or '')[:_STATEMENT_PREVIEW] or None,
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value."""
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries", '
+            f'app;dur={self.elapsed * 1000:.1f}'
+        )
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class PerfRegistry:
+    """Recent samples per endpoint (bounded, per process)."""
+
+    def __init__(self, sample_size: int = 500):
+        self.sample_size = sample_size
+        self._samples = defaultdict(lambda: deque(maxlen=self.sample_size))
+        self._lock = threading.Lock()
+        self.violations = []
+
+    def add(self, endpoint: str, duration_ms: float, queries: int, db_ms: float) -> None:
+        with self._lock:
+            self._samples[endpoint].append((duration_ms, queries, db_ms))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self.violations = []
+
+    def summary(self) -> List[Dict]:
+        """p50 / p95 of duration, query count and DB time per endpoint, slowest p95 first."""
+        with self._lock:
+            snapshot = {endpoint: list(samples) for endpoint, samples in self._samples.items()}
+        rows = []
+        for endpoint, samples in snapshot.items():
+            durations = sorted(s[0] for s in samples)
+            queries = sorted(s[1] for s in samples)
+            db_times = sorted(s[2] for s in samples)
+            rows.append({
+                'endpoint': endpoint,
+                'count': len(samples),
+                'p50_ms': round(_percentile(durations, 50), 1),
+                'p95_ms': round(_percentile(durations, 95), 1),
+                'p50_queries': _percentile(queries, 50),
+                'p95_queries': _percentile(queries, 95),
+                'max_queries': queries[-1],
+                'p95_db_ms': round(_percentile(db_times, 95), 1),
+            })
+        rows.sort(key=lambda r: r['p95_ms'], reverse=True)
+        return rows
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the maximum number of SQL statements a view may run.
+
+    Usage:
+        @api_bp.route('/search')
+        @jwt_required
+        @query_budget(10)
+        def api_search():
+            ...
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return f(*args, **kwargs)
+        decorated_function.query_budget = max_queries
+        return decorated_function
+    return decorator
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the current request (None outside a request or when disabled)."""
+    if not has_request_context():
+        return None
+    return g.get(_G_KEY)
+
+
+def get_registry(app=None) -> PerfRegistry:
+    app = app or current_app
+    return app.extensions['perf']
+
+
+# ============================================================
+# SQLALCHEMY CURSOR EVENTS
+# ============================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('perf_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('perf_query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = current_request_stats()
+    if stats is not None:
+        stats.record(statement, duration, getattr(cursor, 'rowcount', -1))
+
+
+def register_perf_listeners():
+    """Time every statement of every engine (idempotent)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _listeners_registered = True
+
+
+# ============================================================
+# REQUEST HOOKS
+# ============================================================
+
+def init_perf(app):
+    """Register the per-request instrumentation (PERF_INSTRUMENTATION)."""
+    app.extensions['perf'] = PerfRegistry(app.config.get('PERF_SAMPLE_SIZE', 500))
+    if not app.config.get('PERF_INSTRUMENTATION', True):
+        return
+    register_perf_listeners()
+
+    @app.before_request
+    def start_request_stats():
+        setattr(g, _G_KEY, RequestStats())
+
+    @app.after_request
+    def finish_request_stats(response):
+        stats = current_request_stats()
+        if stats is None or request.path.startswith('/static'):
+            return response
+
+        endpoint = request.endpoint or 'unknown'
+        if app.config.get('PERF_SERVER_TIMING', False):
+            response.headers['Server-Timing'] = stats.server_timing()
+        get_registry(app).add(endpoint, stats.elapsed * 1000, stats.query_count, stats.db_time * 1000)
+        _check_budget(app, endpoint, stats)
+        return response
+
+
+def _check_budget(app, endpoint: str, stats: RequestStats) -> None:
+    view = app.view_functions.get(endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is None or stats.query_count <= budget:
+        return
+    logger.warning(
+        f"[PERF] Budget de requêtes dépassé sur {endpoint}: {stats.query_count} > {budget} "
+        f"(requête la plus lente: {stats.slowest_time * 1000:.1f}ms)"
+    )
+    if app.config.get('PERF_ENFORCE_BUDGETS'):
+        get_registry(app).violations.append({
+            'endpoint': endpoint,
+            'path': request.path,
+            'queries': stats.query_count,
+            'budget': budget,
+        })
@@ -3,7 +3,7 @@ Financial reports utility module for GigRoute.
 Handles calculations for tour financial analytics.
 """
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from datetime import date
 
 
@@ -571,17 +571,19 @@ def calculate_logistics_costs(tour_stop) -> Dict[str, Any]:
         if item.cost:
             # Get type name (handle enum or string)
             type_name = item.logistics_type.value if hasattr(item.logistics_type, 'value') else str(item.logistics_type)
+            # Category lists use enum member names ('FLIGHT'), values are lowercase
+            category_key = item.logistics_type.name if hasattr(item.logistics_type, 'name') else type_name.upper()
             cost_val = Decimal(str(item.cost))
 
             # Agrégation par type précis
             costs_by_type[type_name] = costs_by_type.get(type_name, Decimal('0')) + cost_val
 
             # Agrégation par catégorie
-            if type_name in TRANSPORT_TYPES:
+            if category_key in TRANSPORT_TYPES:
                 costs['transport'] += cost_val
-            elif type_name in ACCOMMODATION_TYPES:
+            elif category_key in ACCOMMODATION_TYPES:
                 costs['accommodation'] += cost_val
-            elif type_name in EQUIPMENT_TYPES:
+            elif category_key in EQUIPMENT_TYPES:
                 costs['equipment'] += cost_val
             else:
                 costs['services'] += cost_val
@@ -651,30 +653,22 @@ def calculate_tour_logistics_costs(tour) -> Dict[str, Any]:
     }
 
 
-def generate_csv_report(tour_data: Dict[str, Any]) -> str:
+def tour_report_rows(tour_data: Dict[str, Any]) -> Iterator[list]:
     """
-    Generate CSV content for a tour financial report.
+    Rows of the tour financial report export (header, one row per stop, totals).
 
-    Returns CSV string ready for download.
+    Feeds app.utils.exports (CSV or XLSX).
     """
-    import csv
-    from io import StringIO
-
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
+    yield [
         'Date', 'Venue', 'Ville', 'Statut',
         'Cachet (Guarantee)', 'Location Salle', 'Prix Billet', 'Billets Vendus',
         'Capacité', 'Taux Remplissage (%)',
         'Revenus Billetterie', 'Part Porte', 'Revenu Total Estimé',
         'Devise'
-    ])
+    ]
 
-    # Data rows
     for stop in tour_data['stops_data']:
-        writer.writerow([
+        yield [
             stop['date'].strftime('%d/%m/%Y') if isinstance(stop['date'], date) else stop['date'],
             stop['venue_name'],
             stop['venue_city'],
@@ -689,21 +683,29 @@ def generate_csv_report(tour_data: Dict[str, Any]) -> str:
             stop['door_deal_revenue'],
             stop['total_estimated_revenue'],
             stop['currency']
-        ])
+        ]
 
     # Summary row
-    writer.writerow([])
-    writer.writerow(['TOTAL', '', '', '',
-                     tour_data['total_guarantee'],
-                     tour_data.get('total_venue_rental_cost', 0),
-                     '',
-                     tour_data['total_sold_tickets'],
-                     tour_data['total_capacity'],
-                     tour_data['avg_fill_rate'],
-                     tour_data['total_ticket_revenue'],
-                     tour_data['total_door_deal_revenue'],
-                     tour_data['total_estimated_revenue'],
-                     tour_data['currency']])
-
-    output.seek(0)
-    return output.getvalue()
+    yield []
+    yield ['TOTAL', '', '', '',
+           tour_data['total_guarantee'],
+           tour_data.get('total_venue_rental_cost', 0),
+           '',
+           tour_data['total_sold_tickets'],
+           tour_data['total_capacity'],
+           tour_data['avg_fill_rate'],
+           tour_data['total_ticket_revenue'],
+           tour_data['total_door_deal_revenue'],
+           tour_data['total_estimated_revenue'],
+           tour_data['currency']]
+
+
+def generate_csv_report(tour_data: Dict[str, Any]) -> str:
+    """
+    Generate CSV content for a tour financial report.
+
+    Returns CSV string ready for download.
+    """
+    from app.utils.exports import csv_string
+
+    return csv_string(tour_report_rows(tour_data))
@@ -0,0 +1,213 @@
+"""
+Routing engine for GigRoute.
+Distance matrix and heuristic stop ordering (nearest-neighbour + 2-opt).
+
+Points are indexed 0..n-1; a route is a list of point indices where
+position k is the k-th date of the run. Each point may carry a position
+window (lo, hi): it can only be played on dates lo..hi (inclusive).
+Confirmed dates get a one-position window, open dates a wider one.
+
+The distance matrix is vectorized with NumPy when available, with a
+pure-Python fallback (same results).
+"""
+import heapq
+import math
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Earth's radius in kilometers (same as app.utils.geo.haversine_distance)
+EARTH_RADIUS_KM = 6371.0
+
+Window = Tuple[int, int]
+
+
+# ======================================================================
+# Distance matrix
+# ======================================================================
+
+def haversine_matrix(coords: Sequence[Tuple[float, float]]) -> List[List[float]]:
+    """
+    Great-circle distances (km) between every pair of (lat, lon) points.
+
+    Returns:
+        n x n nested list, matrix[i][j] = distance from point i to point j
+    """
+    if not coords:
+        return []
+    if NUMPY_AVAILABLE:
+        return _haversine_matrix_numpy(coords)
+    return _haversine_matrix_python(coords)
+
+
+def _haversine_matrix_numpy(coords: Sequence[Tuple[float, float]]) -> List[List[float]]:
+    """Broadcasted haversine over all pairs in one pass."""
+    points = np.radians(np.asarray(coords, dtype=float))
+    lat = points[:, 0]
+    lon = points[:, 1]
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    # Nested lists: element access in the optimizer loops is faster than on ndarrays
+    return distances.tolist()
+
+
+def _haversine_matrix_python(coords: Sequence[Tuple[float, float]]) -> List[List[float]]:
+    """Fallback without NumPy (symmetric, computed once per pair)."""
+    radians = [(math.radians(lat), math.radians(lon)) for lat, lon in coords]
+    cos_lat = [math.cos(lat) for lat, _ in radians]
+    n = len(radians)
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        lat1, lon1 = radians[i]
+        for j in range(i + 1, n):
+            lat2, lon2 = radians[j]
+            a = (math.sin((lat2 - lat1) / 2) ** 2
+                 + cos_lat[i] * cos_lat[j] * math.sin((lon2 - lon1) / 2) ** 2)
+            distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, max(0.0, a))))
+            matrix[i][j] = matrix[j][i] = distance
+    return matrix
+
+
+def route_length(route: Sequence[int], matrix: List[List[float]]) -> float:
+    """Total distance (km) of an open route."""
+    return sum(matrix[route[k]][route[k + 1]] for k in range(len(route) - 1))
+
+
+# ======================================================================
+# Optimizer
+# ======================================================================
+
+def _remaining_feasible(points: Sequence[int], first_position: int, windows: Sequence[Window]) -> bool:
+    """
+    Can `points` fill positions first_position.. (one each) within their windows?
+
+    Earliest-deadline-first assignment, optimal for interval windows.
+    """
+    by_start = sorted(points, key=lambda p: windows[p][0])
+    heap: List[int] = []
+    cursor = 0
+    for position in range(first_position, first_position + len(by_start)):
+        while cursor < len(by_start) and windows[by_start[cursor]][0] <= position:
+            heapq.heappush(heap, windows[by_start[cursor]][1])
+            cursor += 1
+        if not heap or heapq.heappop(heap) < position:
+            return False
+    return True
+
+
+def nearest_neighbour(matrix: List[List[float]], windows: Sequence[Window],
+                      start: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Greedy route: always go to the closest point allowed at the next position.
+
+    A candidate is only taken if the remaining points can still fill the
+    remaining positions, so the greedy never paints itself into a corner.
+
+    Returns:
+        Route, or None if the windows admit no route
+    """
+    n = len(matrix)
+    remaining = set(range(n))
+    route: List[int] = []
+    for position in range(n):
+        candidates = [p for p in remaining if windows[p][0] <= position <= windows[p][1]]
+        if position == 0 and start is not None:
+            candidates = [start] if start in candidates else []
+        elif route:
+            previous = route[-1]
+            candidates.sort(key=lambda p: (matrix[previous][p], p))
+        else:
+            candidates.sort()
+
+        for candidate in candidates:
+            if _remaining_feasible(remaining - {candidate}, position + 1, windows):
+                route.append(candidate)
+                remaining.discard(candidate)
+                break
+        else:
+            return None
+    return route
+
+
+def two_opt(route: List[int], matrix: List[List[float]], windows: Sequence[Window],
+            max_passes: int = 50) -> List[int]:
+    """
+    Improve an open route by reversing segments while it gets shorter.
+
+    A reversal is only kept if every moved point stays within its window.
+    """
+    route = list(route)
+    n = len(route)
+    epsilon = 1e-9
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 1):
+            before = route[i - 1] if i > 0 else None
+            for j in range(i + 1, n):
+                after = route[j + 1] if j + 1 < n else None
+                first, last = route[i], route[j]
+
+                removed = (matrix[before][first] if before is not None else 0.0) + \
+                          (matrix[last][after] if after is not None else 0.0)
+                added = (matrix[before][last] if before is not None else 0.0) + \
+                        (matrix[first][after] if after is not None else 0.0)
+                if added - removed >= -epsilon:
+                    continue
+
+                # Reversed segment: route[j - (p - i)] lands on position p
+                if all(windows[route[i + j - p]][0] <= p <= windows[route[i + j - p]][1]
+                       for p in range(i, j + 1)):
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    improved = True
+        if not improved:
+            break
+    return route
+
+
+def optimize_route(matrix: List[List[float]], windows: Optional[Sequence[Window]] = None,
+                   initial: Optional[Sequence[int]] = None, max_passes: int = 50) -> List[int]:
+    """
+    Shortest open route found by nearest-neighbour + 2-opt.
+
+    Args:
+        matrix: Distance matrix (see haversine_matrix)
+        windows: (lo, hi) allowed positions per point (default: anywhere)
+        initial: Current route; also improved with 2-opt so the result is
+            never longer than it (must respect the windows)
+        max_passes: 2-opt passes cap
+
+    Returns:
+        Route (list of point indices by position)
+    """
+    n = len(matrix)
+    if n <= 2:
+        return list(initial) if initial is not None else list(range(n))
+    windows = list(windows) if windows is not None else [(0, n - 1)] * n
+
+    seeds: List[List[int]] = []
+    if initial is not None:
+        seeds.append(list(initial))
+    # One greedy run per possible first point (bounded by the n <= ~100 use case)
+    for start in range(n):
+        if windows[start][0] == 0:
+            route = nearest_neighbour(matrix, windows, start=start)
+            if route is not None:
+                seeds.append(route)
+    if not seeds:
+        return list(range(n))
+
+    best = None
+    best_length = math.inf
+    for seed in seeds:
+        route = two_opt(seed, matrix, windows, max_passes=max_passes)
+        length = route_length(route, matrix)
+        if length < best_length - 1e-9:
+            best, best_length = route, length
+    return best
@@ -0,0 +1,32 @@
+"""
+Schema helpers for GigRoute.
+Lets optional subsystems (snapshots, search index...) degrade gracefully
+when their tables have not been migrated yet.
+"""
+import logging
+
+from sqlalchemy import inspect as sa_inspect
+
+logger = logging.getLogger(__name__)
+
+# (engine URL, table name) pairs known to exist
+_known_tables = set()
+
+
+def session_has_table(session, table_name):
+    """Check (once per engine) that a table exists.
+
+    Inspects through the session's own connection: a separate connection
+    would roll back the transaction on single-connection pools (SQLite).
+    """
+    key = (str(session.get_bind().url), table_name)
+    if key in _known_tables:
+        return True
+    try:
+        exists = sa_inspect(session.connection()).has_table(table_name)
+    except Exception as e:
+        logger.debug('Table check failed for %s: %s', table_name, e)
+        return False
+    if exists:
+        _known_tables.add(key)
+    return exists
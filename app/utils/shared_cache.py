@@ -0,0 +1,233 @@
+"""
+Shared cache backend for GigRoute (no Redis required).
+Stores Flask-Caching entries in a local SQLite file so that every gunicorn
+worker on the machine sees the same cache and the same invalidations,
+unlike SimpleCache which is private to each process.
+
+- WAL journal: readers never block the writer, one writer at a time.
+- TTL per entry (0 = never expires), expired rows are dropped on read.
+- LRU eviction: each read stamps `accessed`; when the table grows past
+  CACHE_THRESHOLD entries, the least recently used ones are deleted.
+- inc()/add() run in an IMMEDIATE transaction, so counters (cache
+  generations) stay atomic across processes.
+
+Errors never propagate: a locked or corrupt cache file behaves like a miss.
+
+Usage (config):
+    CACHE_TYPE = 'app.utils.shared_cache.SQLiteCache'
+    CACHE_SQLITE_PATH = '/tmp/gigroute-cache.sqlite'
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from flask_caching.backends.base import BaseCache
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entries ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL NOT NULL,'   # 0 = never
+    ' accessed REAL NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed ON cache_entries (accessed)',
+)
+
+# Reads do not restamp `accessed` more often than this (seconds): keeps hot keys cheap
+_TOUCH_INTERVAL = 1.0
+
+
+class SQLiteCache(BaseCache):
+    """Cross-process cache stored in a SQLite file (TTL + LRU eviction)."""
+
+    def __init__(self, path: str, threshold: int = 5000, default_timeout: int = 300,
+                 prune_interval: int = 100):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self.prune_interval = max(1, prune_interval)
+        self._local = threading.local()
+        self._writes = 0
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        path = config.get('CACHE_SQLITE_PATH') or os.path.join(tempfile.gettempdir(), 'gigroute-cache.sqlite')
+        kwargs.update(
+            threshold=config.get('CACHE_THRESHOLD', 5000),
+            default_timeout=config.get('CACHE_DEFAULT_TIMEOUT', 300),
+        )
+        return cls(path, *args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Connection (one per thread and per process: never shared across fork)
+    # ------------------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _expires(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return 0 if timeout == 0 else time.time() + timeout
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    # ------------------------------------------------------------------
+    # Cache API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Any:
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                'SELECT value, expires, accessed FROM cache_entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires, accessed = row
+            now = time.time()
+            if expires and expires <= now:
+                conn.execute('DELETE FROM cache_entries WHERE key = ? AND expires = ?', (key, expires))
+                return None
+            if now - accessed > _TOUCH_INTERVAL:
+                conn.execute('UPDATE cache_entries SET accessed = ? WHERE key = ?', (now, key))
+            return pickle.loads(value)
+        except (sqlite3.Error, pickle.PickleError, EOFError) as e:
+            logger.warning(f"[CACHE] Lecture {key} impossible: {e}")
+            return None
+
+    def has(self, key: str) -> bool:
+        try:
+            row = self._conn().execute(
+                'SELECT 1 FROM cache_entries WHERE key = ? AND (expires = 0 OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            return row is not None
+        except sqlite3.Error as e:
+            logger.warning(f"[CACHE] Lecture {key} impossible: {e}")
+            return False
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        try:
+            self._conn().execute(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                (key, self._dumps(value), self._expires(timeout), time.time()),
+            )
+        except (sqlite3.Error, pickle.PickleError) as e:
+            logger.warning(f"[CACHE] Écriture {key} impossible: {e}")
+            return False
+        self._after_write()
+        return True
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        """Store only if the key is missing (or expired)."""
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM cache_entries WHERE key = ? AND expires != 0 AND expires <= ?', (key, now))
+                added = conn.execute(
+                    'INSERT OR IGNORE INTO cache_entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                    (key, self._dumps(value), self._expires(timeout), now),
+                ).rowcount == 1
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except (sqlite3.Error, pickle.PickleError) as e:
+            logger.warning(f"[CACHE] Écriture {key} impossible: {e}")
+            return False
+        if added:
+            self._after_write()
+        return added
+
+    def delete(self, key: str) -> bool:
+        try:
+            return self._conn().execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount > 0
+        except sqlite3.Error as e:
+            logger.warning(f"[CACHE] Suppression {key} impossible: {e}")
+            return False
+
+    def clear(self) -> bool:
+        try:
+            self._conn().execute('DELETE FROM cache_entries')
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"[CACHE] Vidage impossible: {e}")
+            return False
+
+    def inc(self, key: str, delta: int = 1) -> Optional[int]:
+        """Atomically add `delta` (missing or expired key counts as 0, never expires)."""
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+                current, expires = 0, 0
+                if row is not None and not (row[1] and row[1] <= now):
+                    current, expires = pickle.loads(row[0]), row[1]
+                value = int(current) + delta
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                    (key, self._dumps(value), expires, now),
+                )
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except (sqlite3.Error, pickle.PickleError, TypeError, ValueError) as e:
+            logger.warning(f"[CACHE] Incrément {key} impossible: {e}")
+            return None
+        return value
+
+    def dec(self, key: str, delta: int = 1) -> Optional[int]:
+        return self.inc(key, -delta)
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _after_write(self) -> None:
+        self._writes += 1
+        if self._writes % self.prune_interval == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired entries, then the least recently used ones above the threshold."""
+        try:
+            conn = self._conn()
+            removed = conn.execute(
+                'DELETE FROM cache_entries WHERE expires != 0 AND expires <= ?', (time.time(),)
+            ).rowcount
+            if self.threshold:
+                (count,) = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()
+                if count > self.threshold:
+                    removed += conn.execute(
+                        'DELETE FROM cache_entries WHERE key IN ('
+                        ' SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)',
+                        (count - self.threshold,),
+                    ).rowcount
+            return removed
+        except sqlite3.Error as e:
+            logger.warning(f"[CACHE] Purge impossible: {e}")
+            return 0
@@ -0,0 +1 @@
+"""GigRoute benchmark suite (see benchmarks/conftest.py)."""
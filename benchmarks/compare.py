@@ -0,0 +1,57 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+    python -m benchmarks.compare old.json new.json --threshold 10   # exit 1 if a median regressed > 10%
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(old, new, threshold=None):
+    """
+    Print median / query changes per benchmark.
+
+    Returns:
+        Names of benchmarks whose median regressed by more than `threshold` percent
+    """
+    before = {row['name']: row for row in old['benchmarks']}
+    regressions = []
+    print(f"{old.get('commit')} ({old.get('dialect')}, {old.get('scale')}) -> "
+          f"{new.get('commit')} ({new.get('dialect')}, {new.get('scale')})")
+    print(f"{'benchmark':<40} {'old ms':>10} {'new ms':>10} {'change':>9} {'queries':>13}")
+    for row in new['benchmarks']:
+        prev = before.get(row['name'])
+        if prev is None:
+            print(f"{row['name']:<40} {'-':>10} {row['median_ms']:>10.2f} {'new':>9} {row['queries']:>13}")
+            continue
+        change = (row['median_ms'] - prev['median_ms']) / prev['median_ms'] * 100 if prev['median_ms'] else 0.0
+        queries = f"{prev['queries']} -> {row['queries']}"
+        print(f"{row['name']:<40} {prev['median_ms']:>10.2f} {row['median_ms']:>10.2f} {change:>+8.1f}% {queries:>13}")
+        if threshold is not None and change > threshold:
+            regressions.append(row['name'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, help='Fail when a median regresses by more than this percentage')
+    args = parser.parse_args()
+
+    regressions = compare(load(args.old), load(args.new), args.threshold)
+    if regressions:
+        print(f"\nRegressions above {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
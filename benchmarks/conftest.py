@@ -0,0 +1,190 @@
+# =============================================================================
+# GigRoute - Benchmark Suite Fixtures
+# =============================================================================
+# Timings of the hot paths against a synthetic organization (benchmarks/dataset.py).
+#
+#   pytest benchmarks --no-cov -p no:cacheprovider              # small scale, SQLite file
+#   BENCH_SCALE=large pytest benchmarks --no-cov
+#   BENCH_DATABASE_URL=postgresql://localhost/gigroute_bench pytest benchmarks --no-cov
+#
+# Each run writes benchmarks/results/<timestamp>-<dialect>-<scale>.json;
+# compare two runs with `python -m benchmarks.compare old.json new.json`.
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+
+RESULTS_DIR = os.environ.get('BENCH_RESULTS_DIR') or os.path.join(os.path.dirname(__file__), 'results')
+SCALE = os.environ.get('BENCH_SCALE', 'small')
+SEED = int(os.environ.get('BENCH_SEED', 42))
+ROUNDS = int(os.environ.get('BENCH_ROUNDS', 5))
+
+_results = []
+_run_info = {}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__), text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# =============================================================================
+# Dataset Fixtures
+# =============================================================================
+
+@pytest.fixture(scope='session')
+def bench_app():
+    """Benchmark app with the synthetic organization loaded (built once per run)."""
+    from benchmarks.dataset import generate
+    from app.services.calendar_index import CalendarIndexService
+    from app.services.financial_snapshots import FinancialSnapshotService
+    from app.services.search_index import SearchIndexService
+
+    application = create_app('benchmark')
+    with application.app_context():
+        db.drop_all()
+        db.create_all()
+
+        started = time.perf_counter()
+        summary = generate(SCALE, SEED)
+        generated = time.perf_counter() - started
+        # Bulk INSERTs bypass the session listeners: backfill the derived tables
+        SearchIndexService.rebuild_all()
+        FinancialSnapshotService.rebuild_all()
+        CalendarIndexService.rebuild_all()
+        db.session.commit()
+
+        _run_info.update(
+            scale=SCALE,
+            seed=SEED,
+            dialect=db.engine.dialect.name,
+            counts=summary['counts'],
+            generate_seconds=round(generated, 2),
+        )
+        application.config['BENCH_DATASET'] = summary
+        yield application
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def dataset(bench_app):
+    """Summary returned by benchmarks.dataset.generate (ids, counts)."""
+    return bench_app.config['BENCH_DATASET']
+
+
+@pytest.fixture(scope='session')
+def manager_client(bench_app):
+    """Test client logged in as the org manager."""
+    from benchmarks.dataset import MANAGER_EMAIL, MANAGER_PASSWORD
+
+    client = bench_app.test_client()
+    client.post('/auth/login', data={'email': MANAGER_EMAIL, 'password': MANAGER_PASSWORD})
+    return client
+
+
+@pytest.fixture(scope='session')
+def api_headers(bench_app, dataset):
+    """Bearer token headers for the org manager."""
+    from app.blueprints.api.decorators import create_access_token
+
+    return {'Authorization': f"Bearer {create_access_token(dataset['manager_id'], expires_minutes=600)}"}
+
+
+# =============================================================================
+# Timing Fixture
+# =============================================================================
+
+@pytest.fixture
+def bench(request, bench_app):
+    """Time a callable over several rounds (pytest-benchmark style).
+
+    The session is cleared before every round so the ORM identity map does not
+    turn later rounds into cache hits. Returns the last round's result.
+
+    Usage:
+        def test_dashboard(bench, manager_client):
+            response = bench(lambda: manager_client.get('/reports/dashboard'))
+            assert response.status_code == 200
+    """
+    def run(fn, rounds=ROUNDS, warmup=1, name=None):
+        for _ in range(warmup):
+            db.session.remove()
+            fn()
+
+        timings, queries = [], []
+        result = None
+        for _ in range(rounds):
+            db.session.remove()
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', record)
+            started = time.perf_counter()
+            try:
+                result = fn()
+            finally:
+                elapsed = time.perf_counter() - started
+                event.remove(db.engine, 'before_cursor_execute', record)
+            timings.append(elapsed * 1000)
+            queries.append(len(statements))
+
+        _results.append({
+            'name': name or request.node.name,
+            'rounds': rounds,
+            'min_ms': round(min(timings), 2),
+            'median_ms': round(statistics.median(timings), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'stdev_ms': round(statistics.stdev(timings), 2) if len(timings) > 1 else 0.0,
+            'queries': max(queries),
+        })
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Write the run's timings as JSON (benchmarks/results/)."""
+    if not _results:
+        return
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    started = datetime.now(timezone.utc)
+    payload = {
+        'created_at': started.isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        **_run_info,
+        'benchmarks': _results,
+    }
+    name = f"{started.strftime('%Y%m%d-%H%M%S')}-{_run_info.get('dialect', 'db')}-{_run_info.get('scale', SCALE)}.json"
+    path = os.path.join(RESULTS_DIR, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+    reporter = session.config.pluginmanager.get_plugin('terminalreporter')
+    if reporter:
+        reporter.write_sep('-', f'benchmark results: {path}')
+        for row in _results:
+            reporter.write_line(
+                f"{row['name']:<40} median {row['median_ms']:>9.2f} ms   "
+                f"min {row['min_ms']:>9.2f} ms   {row['queries']:>5} queries"
+            )
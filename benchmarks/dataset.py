@@ -0,0 +1,241 @@
+"""
+Deterministic synthetic dataset for the benchmark suite.
+Builds one large organization (bands, tours, stops, guestlists, payments,
+logistics, documents) with bulk INSERTs, so generating the `large` scale
+takes seconds rather than the hours the ORM would need.
+
+The same (scale, seed) always produces the same rows, so timings from two
+runs (or two databases) are comparable.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://localhost/gigroute_bench python -m benchmarks.dataset --scale medium
+"""
+import argparse
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict
+
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models.band import Band, BandMembership
+from app.models.document import Document, DocumentType
+from app.models.guestlist import EntryType, GuestlistEntry, GuestlistStatus
+from app.models.logistics import LogisticsInfo, LogisticsStatus, LogisticsType
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.payments import PaymentStatus, PaymentType, StaffCategory, StaffRole, TeamMemberPayment
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import EventType, TourStop, TourStopStatus
+from app.models.user import AccessLevel, User
+from app.models.venue import Venue
+
+# Row counts per scale (stops/guests/payments are totals for the org)
+SCALES = {
+    'small': {'bands': 5, 'tours': 20, 'stops': 400, 'venues': 50, 'members': 30,
+              'guests': 4000, 'payments': 1000, 'logistics': 400, 'documents': 200},
+    'medium': {'bands': 20, 'tours': 150, 'stops': 5000, 'venues': 300, 'members': 150,
+               'guests': 50000, 'payments': 12000, 'logistics': 5000, 'documents': 1500},
+    'large': {'bands': 50, 'tours': 500, 'stops': 20000, 'venues': 1000, 'members': 400,
+              'guests': 200000, 'payments': 50000, 'logistics': 20000, 'documents': 5000},
+}
+
+MANAGER_EMAIL = 'bench.manager@example.com'
+MANAGER_PASSWORD = 'Bench123!'
+
+_CITIES = [
+    ('Paris', 'France'), ('Lyon', 'France'), ('Marseille', 'France'), ('Lille', 'France'),
+    ('Nantes', 'France'), ('Bordeaux', 'France'), ('Toulouse', 'France'), ('Bruxelles', 'Belgique'),
+    ('Genève', 'Suisse'), ('Montréal', 'Canada'), ('Berlin', 'Allemagne'), ('London', 'Royaume-Uni'),
+]
+_FIRST_NAMES = ['Camille', 'Louis', 'Léa', 'Hugo', 'Chloé', 'Jules', 'Inès', 'Arthur', 'Manon', 'Noé',
+                'Zoé', 'Gabriel', 'Éloïse', 'Raphaël', 'Lucie', 'Adam']
+_LAST_NAMES = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand',
+               'Leroy', 'Moreau', 'Simon', 'Laurent', 'Lefèvre', 'Michel', 'Garcia', 'Faure']
+
+BATCH_SIZE = 5000
+
+
+def _bulk(model, rows) -> None:
+    """INSERT rows in batches (executemany)."""
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _ids(model, **filters):
+    return list(db.session.execute(select(model.id).filter_by(**filters).order_by(model.id)).scalars())
+
+
+def generate(scale: str = 'small', seed: int = 42) -> Dict:
+    """
+    Create the benchmark organization in the current database.
+
+    Args:
+        scale: Key of SCALES
+        seed: Random seed (same seed = same data)
+
+    Returns:
+        Summary: org_id, manager_id, row counts and a few ids used by the benchmarks
+    """
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    today = date(2026, 1, 1)
+    now = datetime(2026, 1, 1, 12, 0)
+
+    # Users share one precomputed hash: hashing 400 passwords would dominate the run
+    manager = User(email=MANAGER_EMAIL, first_name='Bench', last_name='Manager',
+                   access_level=AccessLevel.MANAGER, is_active=True, email_verified=True)
+    manager.set_password(MANAGER_PASSWORD)
+    db.session.add(manager)
+    db.session.flush()
+
+    org = Organization(name=f'Bench Org ({scale})', slug=f'bench-{scale}-{seed}', created_by_id=manager.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager.id, org_id=org.id, role=OrgRole.OWNER))
+
+    _bulk(User, [{
+        'email': f'member{i}@bench.example.com',
+        'password_hash': manager.password_hash,
+        'first_name': rng.choice(_FIRST_NAMES),
+        'last_name': rng.choice(_LAST_NAMES),
+        'access_level': AccessLevel.STAFF,
+        'is_active': True,
+        'email_verified': True,
+    } for i in range(sizes['members'])])
+    member_ids = list(db.session.execute(
+        select(User.id).where(User.email.like('member%@bench.example.com')).order_by(User.id)
+    ).scalars())
+    _bulk(OrganizationMembership, [
+        {'user_id': uid, 'org_id': org.id, 'role': OrgRole.MEMBER, 'joined_at': now} for uid in member_ids
+    ])
+
+    _bulk(Band, [{
+        'name': f'Bench Band {i:03d}', 'genre': rng.choice(['Rock', 'Jazz', 'Électro', 'Folk']),
+        'org_id': org.id, 'manager_id': manager.id, 'created_at': now,
+    } for i in range(sizes['bands'])])
+    band_ids = _ids(Band, org_id=org.id)
+    _bulk(BandMembership, [
+        {'user_id': uid, 'band_id': band_ids[i % len(band_ids)], 'is_active': True, 'joined_at': now}
+        for i, uid in enumerate(member_ids)
+    ])
+
+    _bulk(Venue, [{
+        'org_id': org.id, 'name': f'Salle {i:04d}', 'city': city, 'country': country,
+        'capacity': rng.choice([300, 800, 1500, 3000, 8000]),
+    } for i in range(sizes['venues']) for city, country in [rng.choice(_CITIES)]])
+    venue_ids = _ids(Venue, org_id=org.id)
+
+    stops_per_tour = max(1, sizes['stops'] // sizes['tours'])
+    tour_rows = []
+    for i in range(sizes['tours']):
+        start = today + timedelta(days=rng.randint(-365, 365))
+        tour_rows.append({
+            'name': f'Tournée {i:04d}', 'band_id': band_ids[i % len(band_ids)],
+            'start_date': start, 'end_date': start + timedelta(days=stops_per_tour + 5),
+            'status': rng.choice([TourStatus.PLANNING, TourStatus.CONFIRMED, TourStatus.ACTIVE,
+                                  TourStatus.COMPLETED]),
+            'created_at': now,
+        })
+    _bulk(Tour, tour_rows)
+    tour_ids = list(db.session.execute(
+        select(Tour.id).where(Tour.band_id.in_(band_ids)).order_by(Tour.id)
+    ).scalars())
+
+    stop_rows = []
+    for tour_id, tour in zip(tour_ids, tour_rows):
+        for d in range(stops_per_tour):
+            stop_rows.append({
+                'tour_id': tour_id, 'venue_id': rng.choice(venue_ids),
+                'date': tour['start_date'] + timedelta(days=d),
+                'event_type': EventType.SHOW,
+                'status': rng.choice([TourStopStatus.CONFIRMED, TourStopStatus.PERFORMED,
+                                      TourStopStatus.SETTLED]),
+                'doors_time': time(19, 0), 'set_time': time(21, 0),
+                'guarantee': Decimal(rng.randrange(500, 20000, 50)),
+                'ticket_price': Decimal(rng.randrange(15, 60)),
+                'sold_tickets': rng.randint(0, 3000),
+                'door_deal_percentage': Decimal(rng.choice([0, 70, 80, 85])),
+                'created_at': now,
+            })
+    _bulk(TourStop, stop_rows)
+    stop_ids = list(db.session.execute(
+        select(TourStop.id).where(TourStop.tour_id.in_(tour_ids)).order_by(TourStop.id)
+    ).scalars())
+
+    _bulk(GuestlistEntry, [{
+        'tour_stop_id': stop_ids[i % len(stop_ids)],
+        'guest_name': f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}',
+        'guest_email': f'guest{i}@example.com',
+        'entry_type': rng.choice(list(EntryType)),
+        'status': rng.choice([GuestlistStatus.PENDING, GuestlistStatus.APPROVED, GuestlistStatus.CHECKED_IN]),
+        'plus_ones': rng.randint(0, 2),
+        'requested_by_id': manager.id,
+        'created_at': now,
+    } for i in range(sizes['guests'])])
+
+    _bulk(TeamMemberPayment, [{
+        'reference': f'PAY-2026-{i + 1:05d}',
+        'user_id': rng.choice(member_ids),
+        'tour_id': tour_ids[i % len(tour_ids)],
+        'staff_category': StaffCategory.TECHNICAL,
+        'staff_role': StaffRole.FOH_ENGINEER,
+        'payment_type': rng.choice([PaymentType.CACHET, PaymentType.PER_DIEM]),
+        'amount': Decimal(rng.randrange(35, 600)),
+        'currency': 'EUR',
+        'work_date': today + timedelta(days=rng.randint(-365, 365)),
+        'status': rng.choice([PaymentStatus.DRAFT, PaymentStatus.APPROVED, PaymentStatus.PAID]),
+        'created_by_id': manager.id,
+        'created_at': now,
+    } for i in range(sizes['payments'])])
+
+    _bulk(LogisticsInfo, [{
+        'tour_stop_id': stop_ids[i % len(stop_ids)],
+        'logistics_type': rng.choice([LogisticsType.HOTEL, LogisticsType.TRAIN, LogisticsType.FLIGHT]),
+        'provider': rng.choice(['Ibis', 'SNCF', 'Air France', 'Novotel']),
+        'status': LogisticsStatus.CONFIRMED,
+        'created_at': now,
+    } for i in range(sizes['logistics'])])
+
+    _bulk(Document, [{
+        'name': f'Document {i:05d}', 'document_type': rng.choice([DocumentType.CONTRACT, DocumentType.OTHER]),
+        'original_filename': f'doc{i}.pdf', 'stored_filename': f'bench-{seed}-{i}.pdf',
+        'file_path': f'bench/{i}.pdf', 'file_size': 1024,
+        'band_id': band_ids[i % len(band_ids)], 'tour_id': tour_ids[i % len(tour_ids)],
+        'uploaded_by_id': manager.id, 'created_at': now,
+    } for i in range(sizes['documents'])])
+
+    db.session.commit()
+
+    busiest_stop = db.session.execute(
+        select(GuestlistEntry.tour_stop_id).group_by(GuestlistEntry.tour_stop_id)
+        .order_by(db.func.count().desc(), GuestlistEntry.tour_stop_id).limit(1)
+    ).scalar()
+    return {
+        'scale': scale,
+        'seed': seed,
+        'org_id': org.id,
+        'manager_id': manager.id,
+        'tour_id': tour_ids[0],
+        'stop_id': busiest_stop,
+        'counts': dict(sizes, stops=len(stop_ids), tours=len(tour_ids)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the benchmark dataset (BENCH_DATABASE_URL).')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app('benchmark')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        summary = generate(args.scale, args.seed)
+    print(summary)
+
+
+if __name__ == '__main__':
+    main()
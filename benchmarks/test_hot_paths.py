@@ -0,0 +1,88 @@
+# =============================================================================
+# GigRoute - Hot Path Benchmarks
+# =============================================================================
+# Each test times one page / service against the synthetic organization and
+# checks the result is still correct (a fast 500 is not a win).
+
+from app.extensions import db
+from app.models.band import Band
+from app.models.tour import Tour
+
+
+def _org_tours(dataset):
+    return Tour.query.join(Band).filter(Band.org_id == dataset['org_id']).all()
+
+
+class TestReports:
+    """Financial dashboard and settlements."""
+
+    def test_reports_dashboard(self, bench, manager_client):
+        response = bench(lambda: manager_client.get('/reports/dashboard'))
+        assert response.status_code == 200
+
+    def test_calculate_dashboard_kpis(self, bench, dataset):
+        from app.utils.reports import calculate_dashboard_kpis
+
+        kpis = bench(lambda: calculate_dashboard_kpis(_org_tours(dataset)))
+        assert kpis['num_shows'] > 0
+
+    def test_snapshot_dashboard_kpis(self, bench, dataset):
+        from app.services.financial_snapshots import FinancialSnapshotService
+
+        band_ids = [b.id for b in Band.query.filter_by(org_id=dataset['org_id'])]
+        kpis = bench(lambda: FinancialSnapshotService.dashboard_kpis(band_ids))
+        assert kpis['num_shows'] > 0
+
+    def test_settlements_list(self, bench, manager_client):
+        response = bench(lambda: manager_client.get('/reports/settlements'))
+        assert response.status_code == 200
+
+
+class TestApi:
+    """REST endpoints used by the mobile app."""
+
+    def test_api_calendar(self, bench, manager_client, api_headers):
+        response = bench(lambda: manager_client.get('/api/v1/calendar', headers=api_headers))
+        assert response.status_code == 200
+
+    def test_api_search(self, bench, manager_client, api_headers):
+        response = bench(lambda: manager_client.get('/api/v1/search?q=Salle', headers=api_headers))
+        assert response.status_code == 200
+
+
+class TestGuestlist:
+    """Guestlist management for the busiest stop."""
+
+    def test_guestlist_manage(self, bench, manager_client, dataset):
+        response = bench(lambda: manager_client.get(f"/guestlist/stop/{dataset['stop_id']}"))
+        assert response.status_code == 200
+
+
+class TestExports:
+    """PDF and iCal generation for a full tour."""
+
+    def test_tour_pdf(self, bench, bench_app, dataset):
+        from app.utils.pdf_generator import generate_tour_pdf
+
+        def render():
+            with bench_app.test_request_context():
+                return generate_tour_pdf(db.session.get(Tour, dataset['tour_id']))
+
+        assert bench(render).startswith(b'%PDF')
+
+    def test_tour_ical(self, bench, dataset):
+        from app.utils.ical import generate_tour_ical
+
+        feed = bench(lambda: generate_tour_ical(db.session.get(Tour, dataset['tour_id'])))
+        assert b'BEGIN:VCALENDAR' in (feed if isinstance(feed, bytes) else feed.encode())
+
+    def test_user_calendar_feed(self, bench, bench_app, dataset):
+        from app.services.calendar_index import CalendarIndexService
+
+        client = bench_app.test_client()
+        manager_id = dataset['manager_id']
+        url = f'/calendar/feed/{manager_id}.ics?token={CalendarIndexService.feed_token(manager_id)}'
+
+        response = bench(lambda: client.get(url))
+        assert response.status_code == 200
+        assert b'BEGIN:VEVENT' in response.data
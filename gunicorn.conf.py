@@ -29,6 +29,12 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 max_requests = 1000
 max_requests_jitter = 50
 
+
+def worker_exit(server, worker):
+    """Drain queued emails / push notifications before the worker exits."""
+    from app.services.notification_dispatcher import dispatcher
+    dispatcher.shutdown(timeout=graceful_timeout - 5)
+
 # Security: limit request sizes
 limit_request_line = 8190
 limit_request_fields = 100
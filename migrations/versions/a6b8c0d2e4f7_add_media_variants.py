@@ -0,0 +1,146 @@
+"""add media_variants (content-addressed profile pictures)
+
+Revision ID: a6b8c0d2e4f7
+Revises: f5a7b9c1d3e6
+Create Date: 2026-04-02 10:15:32.418730
+
+Profile pictures move from users.profile_picture_data/mime to the
+media_variants table (one row per hash, size and format); users keep
+only profile_picture_hash. Existing pictures are converted here.
+"""
+import hashlib
+import io
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6b8c0d2e4f7'
+down_revision = 'f5a7b9c1d3e6'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table_name):
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return table_name in inspector.get_table_names()
+
+
+def _column_exists(table_name, column_name):
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+media_variants = sa.table(
+    'media_variants',
+    sa.column('content_hash', sa.String),
+    sa.column('size', sa.Integer),
+    sa.column('format', sa.String),
+    sa.column('mime_type', sa.String),
+    sa.column('byte_size', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+# Frozen copy of MediaStore.resize at this revision (migrations must not import app code)
+AVATAR_SIZES = (48, 96, 200)
+IMAGE_FORMATS = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def _variants(data):
+    """All sizes/formats of a stored picture (the stored JPEG as-is without Pillow)."""
+    try:
+        from PIL import Image, ImageOps, features
+
+        # Stored pictures are already JPEG (no alpha to flatten)
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert('RGB')
+        formats = ('webp', 'jpeg') if features.check('webp') else ('jpeg',)
+        variants = []
+        for size in sorted(AVATAR_SIZES, reverse=True):
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                output = io.BytesIO()
+                if fmt == 'webp':
+                    img.save(output, format='WEBP', quality=80, method=4)
+                else:
+                    img.save(output, format='JPEG', quality=85, optimize=True)
+                variants.append((size, fmt, IMAGE_FORMATS[fmt], output.getvalue()))
+        return variants
+    except Exception:
+        # Pillow missing or unreadable image: the stored picture is already a <=200px JPEG
+        return [(size, 'jpeg', IMAGE_FORMATS['jpeg'], data) for size in AVATAR_SIZES]
+
+
+def upgrade():
+    if not _table_exists('media_variants'):
+        op.create_table('media_variants',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('format', sa.String(length=10), nullable=False),
+            sa.Column('mime_type', sa.String(length=50), nullable=False),
+            sa.Column('byte_size', sa.Integer(), nullable=False),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('content_hash', 'size', 'format', name='uq_media_variants_hash_size_format')
+        )
+        op.create_index('ix_media_variants_content_hash', 'media_variants', ['content_hash'])
+
+    if not _column_exists('users', 'profile_picture_hash'):
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('profile_picture_hash', sa.String(length=64), nullable=True))
+
+    if not _column_exists('users', 'profile_picture_data'):
+        return
+
+    # Move existing pictures into the media store (identical pictures stored once)
+    conn = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('profile_picture_hash', sa.String))
+    rows = conn.execute(sa.text(
+        'SELECT id, profile_picture_data FROM users WHERE profile_picture_data IS NOT NULL'
+    )).fetchall()
+    stored = set()
+    for user_id, data in rows:
+        data = bytes(data)
+        content_hash = hashlib.sha256(data).hexdigest()
+        if content_hash not in stored:
+            conn.execute(media_variants.insert(), [
+                {'content_hash': content_hash, 'size': size, 'format': fmt, 'mime_type': mime_type,
+                 'byte_size': len(payload), 'data': payload, 'created_at': datetime.utcnow()}
+                for size, fmt, mime_type, payload in _variants(data)
+            ])
+            stored.add(content_hash)
+        conn.execute(users.update().where(users.c.id == user_id).values(profile_picture_hash=content_hash))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('profile_picture_mime')
+        batch_op.drop_column('profile_picture_data')
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('profile_picture_data', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('profile_picture_mime', sa.String(length=50), nullable=True))
+
+    # Restore the 200px JPEG of each picture
+    op.execute(
+        "UPDATE users SET profile_picture_data = ("
+        "  SELECT data FROM media_variants"
+        "  WHERE media_variants.content_hash = users.profile_picture_hash"
+        "  AND media_variants.size = 200 AND media_variants.format = 'jpeg'"
+        "), profile_picture_mime = 'image/jpeg' "
+        "WHERE profile_picture_hash IS NOT NULL"
+    )
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('profile_picture_hash')
+
+    op.drop_index('ix_media_variants_content_hash', table_name='media_variants')
+    op.drop_table('media_variants')
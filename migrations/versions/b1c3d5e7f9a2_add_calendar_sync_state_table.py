@@ -0,0 +1,36 @@
+"""add calendar_sync_state table (incremental Google / Outlook sync)
+
+Revision ID: b1c3d5e7f9a2
+Revises: a8b0c2d4e6f9
+Create Date: 2026-03-21 10:12:37.804551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1c3d5e7f9a2'
+down_revision = 'a8b0c2d4e6f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'calendar_sync_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('tour_stop_id', sa.Integer(), nullable=False),
+        sa.Column('remote_event_id', sa.String(length=1024), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('synced_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'provider', 'tour_stop_id', name='uq_calendar_sync_state_stop'),
+    )
+
+
+def downgrade():
+    op.drop_table('calendar_sync_state')
@@ -0,0 +1,35 @@
+"""add document_sequences table (gap-free payment / invoice numbering)
+
+Revision ID: c2d4e6f8a0b3
+Revises: b1c3d5e7f9a2
+Create Date: 2026-03-23 09:41:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d4e6f8a0b3'
+down_revision = 'b1c3d5e7f9a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Counters are seeded lazily from the existing references on first use
+    op.create_table(
+        'document_sequences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('prefix', sa.String(length=10), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('org_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_value', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('prefix', 'year', 'org_id', name='uq_document_sequences_scope'),
+    )
+
+
+def downgrade():
+    op.drop_table('document_sequences')
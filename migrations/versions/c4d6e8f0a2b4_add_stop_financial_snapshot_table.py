@@ -0,0 +1,83 @@
+"""add stop_financial_snapshot table
+
+Revision ID: c4d6e8f0a2b4
+Revises: 54cf47fde258
+Create Date: 2026-03-16 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d6e8f0a2b4'
+down_revision = '54cf47fde258'
+branch_labels = None
+depends_on = None
+
+
+def _money(name):
+    return sa.Column(name, sa.Numeric(precision=14, scale=4), nullable=False, server_default='0')
+
+
+def upgrade():
+    op.create_table(
+        'stop_financial_snapshot',
+        sa.Column('tour_stop_id', sa.Integer(), nullable=False),
+        sa.Column('tour_id', sa.Integer(), nullable=True),
+        sa.Column('band_id', sa.Integer(), nullable=True),
+        sa.Column('stop_date', sa.Date(), nullable=True),
+        sa.Column('month_key', sa.String(length=7), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('has_venue', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('venue_name', sa.String(length=100), nullable=True),
+        sa.Column('venue_city', sa.String(length=100), nullable=True),
+        sa.Column('venue_country', sa.String(length=100), nullable=True),
+        sa.Column('currency', sa.String(length=3), nullable=True),
+        _money('guarantee'),
+        _money('venue_rental_cost'),
+        sa.Column('door_deal_percentage', sa.Numeric(precision=5, scale=2), nullable=False, server_default='0'),
+        sa.Column('ticketing_fee_percentage', sa.Numeric(precision=5, scale=2), nullable=False, server_default='0'),
+        sa.Column('capacity', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sold_tickets', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('fill_rate', sa.Float(), nullable=False, server_default='0'),
+        _money('ticket_price'),
+        sa.Column('has_tiers', sa.Boolean(), nullable=False, server_default=sa.false()),
+        _money('ticket_revenue'),
+        _money('ticketing_fees'),
+        _money('net_ticket_revenue'),
+        _money('door_deal_revenue'),
+        _money('total_estimated_revenue'),
+        _money('promoter_expenses_total'),
+        _money('artist_payment'),
+        sa.Column('payment_type', sa.String(length=20), nullable=True),
+        _money('logistics_transport'),
+        _money('logistics_accommodation'),
+        _money('logistics_equipment'),
+        _money('logistics_services'),
+        _money('logistics_total'),
+        _money('logistics_unpaid'),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['tour_stop_id'], ['tour_stops.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tour_id'], ['tours.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['band_id'], ['bands.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tour_stop_id'),
+    )
+    with op.batch_alter_table('stop_financial_snapshot', schema=None) as batch_op:
+        batch_op.create_index('ix_stop_financial_snapshot_tour_id', ['tour_id'])
+        batch_op.create_index('ix_stop_financial_snapshot_band_id', ['band_id'])
+        batch_op.create_index('ix_stop_financial_snapshot_stop_date', ['stop_date'])
+        batch_op.create_index('ix_stop_financial_snapshot_month_key', ['month_key'])
+
+    # Snapshot rows are backfilled by 'flask rebuild-financial-snapshots'
+    # (or lazily on first dashboard read).
+
+
+def downgrade():
+    with op.batch_alter_table('stop_financial_snapshot', schema=None) as batch_op:
+        batch_op.drop_index('ix_stop_financial_snapshot_month_key')
+        batch_op.drop_index('ix_stop_financial_snapshot_stop_date')
+        batch_op.drop_index('ix_stop_financial_snapshot_band_id')
+        batch_op.drop_index('ix_stop_financial_snapshot_tour_id')
+
+    op.drop_table('stop_financial_snapshot')
@@ -0,0 +1,55 @@
+"""add composite indexes for the hot filters (stops, guestlist, notifications, payments)
+
+Revision ID: d3e5f7a9b1c4
+Revises: c2d4e6f8a0b3
+Create Date: 2026-03-25 14:06:51.772410
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3e5f7a9b1c4'
+down_revision = 'c2d4e6f8a0b3'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_tour_stops_tour_date', 'tour_stops', ['tour_id', 'date']),
+    ('ix_tour_stops_band_date', 'tour_stops', ['band_id', 'date']),
+    ('ix_tour_stops_venue_id', 'tour_stops', ['venue_id']),
+    ('ix_tours_band_start_date', 'tours', ['band_id', 'start_date']),
+    ('ix_guestlist_entries_stop_status', 'guestlist_entries', ['tour_stop_id', 'status']),
+    ('ix_notifications_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_team_member_payments_tour_status', 'team_member_payments', ['tour_id', 'status']),
+    ('ix_team_member_payments_user_work_date', 'team_member_payments', ['user_id', 'work_date']),
+]
+
+
+def _postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if _postgres():
+        # CONCURRENTLY: no write lock on tour_stops / guestlist_entries while
+        # the indexes build (must run outside the migration transaction)
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        return
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    if _postgres():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+        return
+
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
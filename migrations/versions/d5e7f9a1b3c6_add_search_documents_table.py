@@ -0,0 +1,63 @@
+"""add search_documents table (global search index)
+
+Revision ID: d5e7f9a1b3c6
+Revises: c4d6e8f0a2b4
+Create Date: 2026-03-17 09:41:12.550371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e7f9a1b3c6'
+down_revision = 'c4d6e8f0a2b4'
+branch_labels = None
+depends_on = None
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    op.create_table(
+        'search_documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('org_id', sa.Integer(), nullable=True),
+        sa.Column('band_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('subtitle', sa.String(length=255), nullable=True),
+        sa.Column('normalized_text', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['band_id'], ['bands.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+    )
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.create_index('ix_search_documents_org', ['org_id'])
+        batch_op.create_index('ix_search_documents_band', ['band_id'])
+
+    # Trigram GIN index (PostgreSQL only — SQLite falls back to in-process scoring)
+    if _is_postgresql():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            'CREATE INDEX ix_search_documents_trgm ON search_documents '
+            'USING gin (normalized_text gin_trgm_ops)'
+        )
+
+    # Documents are backfilled by 'flask rebuild-search-index'.
+
+
+def downgrade():
+    if _is_postgresql():
+        op.execute('DROP INDEX IF EXISTS ix_search_documents_trgm')
+
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_documents_band')
+        batch_op.drop_index('ix_search_documents_org')
+
+    op.drop_table('search_documents')
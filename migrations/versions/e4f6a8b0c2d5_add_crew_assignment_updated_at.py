@@ -0,0 +1,28 @@
+"""add crew_assignments.updated_at (iCal feed ETags)
+
+Revision ID: e4f6a8b0c2d5
+Revises: d3e5f7a9b1c4
+Create Date: 2026-03-27 11:18:40.513927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4f6a8b0c2d5'
+down_revision = 'd3e5f7a9b1c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('crew_assignments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE crew_assignments SET updated_at = COALESCE(confirmed_at, assigned_at)')
+
+
+def downgrade():
+    with op.batch_alter_table('crew_assignments', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
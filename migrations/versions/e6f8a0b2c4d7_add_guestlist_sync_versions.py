@@ -0,0 +1,53 @@
+"""add guestlist sync versions and tombstones (offline check-in)
+
+Revision ID: e6f8a0b2c4d7
+Revises: d5e7f9a1b3c6
+Create Date: 2026-03-18 10:12:37.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f8a0b2c4d7'
+down_revision = 'd5e7f9a1b3c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tour_stops', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('guestlist_version', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('guestlist_entries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checkin_client_id', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('sync_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index('ix_guestlist_entries_stop_sync_version', ['tour_stop_id', 'sync_version'])
+
+    op.create_table(
+        'guestlist_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tour_stop_id', sa.Integer(), nullable=False),
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('sync_version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['tour_stop_id'], ['tour_stops.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('guestlist_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_guestlist_tombstones_stop_sync_version', ['tour_stop_id', 'sync_version'])
+
+
+def downgrade():
+    with op.batch_alter_table('guestlist_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_guestlist_tombstones_stop_sync_version')
+    op.drop_table('guestlist_tombstones')
+
+    with op.batch_alter_table('guestlist_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_guestlist_entries_stop_sync_version')
+        batch_op.drop_column('sync_version')
+        batch_op.drop_column('checkin_client_id')
+
+    with op.batch_alter_table('tour_stops', schema=None) as batch_op:
+        batch_op.drop_column('guestlist_version')
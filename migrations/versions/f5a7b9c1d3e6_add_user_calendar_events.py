@@ -0,0 +1,44 @@
+"""add user_calendar_events (per-user calendar feed index)
+
+Revision ID: f5a7b9c1d3e6
+Revises: e4f6a8b0c2d5
+Create Date: 2026-03-30 09:42:17.204518
+
+The table is filled by session listeners from now on; existing data is
+backfilled with `flask rebuild-calendar-index`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a7b9c1d3e6'
+down_revision = 'e4f6a8b0c2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_calendar_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('source_type', sa.String(length=20), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('tour_stop_id', sa.Integer(), nullable=True),
+        sa.Column('event_date', sa.Date(), nullable=False),
+        sa.Column('ical', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'source_type', 'source_id', name='uq_user_calendar_events_source')
+    )
+    op.create_index('ix_user_calendar_events_user_date', 'user_calendar_events', ['user_id', 'event_date'])
+    op.create_index('ix_user_calendar_events_source', 'user_calendar_events', ['source_type', 'source_id'])
+    op.create_index('ix_user_calendar_events_stop', 'user_calendar_events', ['tour_stop_id'])
+
+
+def downgrade():
+    op.drop_index('ix_user_calendar_events_stop', table_name='user_calendar_events')
+    op.drop_index('ix_user_calendar_events_source', table_name='user_calendar_events')
+    op.drop_index('ix_user_calendar_events_user_date', table_name='user_calendar_events')
+    op.drop_table('user_calendar_events')
@@ -0,0 +1,40 @@
+"""add geocode_cache table (bulk venue geocoding)
+
+Revision ID: f7a9b1c3d5e8
+Revises: e6f8a0b2c4d7
+Create Date: 2026-03-19 14:03:51.318402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a9b1c3d5e8'
+down_revision = 'e6f8a0b2c4d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'geocode_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('address_key', sa.String(length=64), nullable=False),
+        sa.Column('normalized_query', sa.Text(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('address_key'),
+    )
+    with op.batch_alter_table('geocode_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_geocode_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('geocode_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_geocode_cache_expires_at'))
+
+    op.drop_table('geocode_cache')
@@ -35,6 +35,49 @@ def app():
         db.engine.dispose()
 
 
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Fail a test whose requests ran more queries than their view's @query_budget."""
+    result = yield
+    app = item.funcargs.get('app')
+    perf = app.extensions.get('perf') if app is not None else None
+    if perf and perf.violations:
+        details = ', '.join(f"{v['endpoint']} ({v['queries']} > {v['budget']})" for v in perf.violations)
+        perf.violations.clear()
+        pytest.fail(f'Query budget exceeded: {details}')
+    return result
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Context manager failing if the block runs more than `n` SQL statements.
+
+    Usage:
+        with assert_max_queries(5):
+            client.get('/tours/')
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def counter(n):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(statements) <= n, (
+            f'{len(statements)} queries (budget {n}):\n' + '\n'.join(statements)
+        )
+
+    return counter
+
+
 @pytest.fixture(scope='function')
 def client(app):
     """Test client for HTTP requests."""
@@ -47,6 +90,21 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture
+def no_request_context(app):
+    """Pop the request context pytest-flask pushes: run with an app context
+    only, like `flask worker` and CLI commands."""
+    from flask import has_request_context
+    from flask.globals import request_ctx
+
+    ctx = request_ctx._get_current_object() if has_request_context() else None
+    if ctx is not None:
+        ctx.pop()
+    yield
+    if ctx is not None:
+        ctx.push()
+
+
 # =============================================================================
 # Database Session Fixture
 # =============================================================================
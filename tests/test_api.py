@@ -275,6 +275,83 @@ class TestPagination:
         assert 'last' in links
 
 
+class TestCursorPagination:
+    """Test keyset (cursor) pagination mode."""
+
+    @pytest.fixture
+    def many_notifications(self, app, sample_user):
+        """25 notifications, several sharing the same created_at."""
+        with app.app_context():
+            base = datetime(2026, 3, 1, 12, 0, 0)
+            for i in range(25):
+                db.session.add(Notification(
+                    user_id=sample_user,
+                    title=f'Notif {i}',
+                    message='Paginated.',
+                    type=NotificationType.INFO,
+                    created_at=base + timedelta(minutes=i // 3),
+                ))
+            db.session.commit()
+
+    def test_cursor_walks_all_pages(self, client, sample_user, many_notifications):
+        token = get_auth_token(client)
+        seen = []
+        cursor = ''
+        for _ in range(10):
+            resp = client.get(
+                f'/api/v1/notifications?cursor={cursor}&per_page=10',
+                headers=auth_header(token),
+            )
+            assert resp.status_code == 200
+            body = resp.get_json()
+            seen.extend(n['id'] for n in body['data'])
+            cursor = body['links']['next_cursor']
+            if not cursor:
+                break
+        assert len(seen) == 25
+        assert len(set(seen)) == 25
+
+    def test_cursor_order_is_newest_first(self, client, sample_user, many_notifications):
+        token = get_auth_token(client)
+        resp = client.get('/api/v1/notifications?cursor=&per_page=25', headers=auth_header(token))
+        rows = [(n['created_at'], n['id']) for n in resp.get_json()['data']]
+        assert rows == sorted(rows, reverse=True)
+
+    def test_cursor_include_total_false(self, client, sample_user, many_notifications):
+        token = get_auth_token(client)
+        resp = client.get(
+            '/api/v1/notifications?cursor=&per_page=5&include_total=false',
+            headers=auth_header(token),
+        )
+        body = resp.get_json()
+        assert body['meta']['total'] is None
+        assert len(body['data']) == 5
+        assert body['links']['next_cursor']
+        assert 'cursor=' in body['links']['next']
+
+    def test_cursor_include_total_default(self, client, sample_user, many_notifications):
+        token = get_auth_token(client)
+        resp = client.get('/api/v1/notifications?cursor=&per_page=5', headers=auth_header(token))
+        assert resp.get_json()['meta']['total'] == 25
+
+    def test_invalid_cursor(self, client, sample_user):
+        token = get_auth_token(client)
+        resp = client.get('/api/v1/notifications?cursor=not-a-cursor', headers=auth_header(token))
+        assert resp.status_code == 400
+        assert resp.get_json()['error']['code'] == 'invalid_cursor'
+
+    def test_offset_mode_without_total(self, client, sample_user, many_notifications):
+        token = get_auth_token(client)
+        resp = client.get(
+            '/api/v1/notifications?page=1&per_page=10&include_total=false',
+            headers=auth_header(token),
+        )
+        body = resp.get_json()
+        assert body['meta']['total'] is None
+        assert 'next' in body['links']
+        assert 'last' not in body['links']
+
+
 # ── Error Handling Tests ────────────────────────────────────
 
 class TestErrorHandling:
@@ -1571,3 +1648,173 @@ class TestBOLA:
         resp = client.get('/api/v1/tours', headers=auth_header(token))
         assert resp.status_code == 200
         assert resp.get_json()['meta']['total'] >= 1
+
+
+# ── Stop / tour counts ──────────────────────────────────────
+
+class TestListCounts:
+    """Counts in tour / band listings come from the query, never from loading the stops."""
+
+    @pytest.fixture
+    def counted_tours(self, app, sample_user):
+        """Band with 5 tours of 4 stops each (1 past, 3 upcoming)."""
+        from app.models.organization import Organization
+        org = Organization(name='Count Org', slug='count-org', created_by_id=sample_user)
+        db.session.add(org)
+        db.session.flush()
+        band = Band(name='Count Band', manager_id=sample_user, org_id=org.id)
+        db.session.add(band)
+        db.session.flush()
+        today = date.today()
+        for i in range(5):
+            tour = Tour(name=f'Count Tour {i}', start_date=today, end_date=today + timedelta(days=30),
+                        status=TourStatus.ACTIVE, band_id=band.id)
+            db.session.add(tour)
+            for offset in (-3, 1, 2, 3):
+                db.session.add(TourStop(tour=tour, date=today + timedelta(days=offset),
+                                        status=TourStopStatus.CONFIRMED, event_type=EventType.SHOW))
+        db.session.commit()
+        return band.id
+
+    @staticmethod
+    def _statements(app):
+        from sqlalchemy import event
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        return statements
+
+    def test_list_tours_counts_in_query(self, app, client, sample_user, counted_tours):
+        token = get_auth_token(client)
+        statements = self._statements(app)
+
+        resp = client.get('/api/v1/tours?per_page=5', headers=auth_header(token))
+
+        tours = resp.get_json()['data']
+        assert len(tours) == 5
+        assert all((t['stops_count'], t['upcoming_stops_count'], t['past_stops_count']) == (4, 3, 1)
+                   for t in tours)
+        # Stop rows are never selected: only the correlated count subqueries touch tour_stops
+        assert not any(s.lstrip().startswith('SELECT tour_stops.id') for s in statements)
+
+    def test_get_tour_counts_one_grouped_query(self, app, client, sample_user, counted_tours):
+        token = get_auth_token(client)
+        tour_id = Tour.query.filter_by(band_id=counted_tours).first().id
+
+        resp = client.get(f'/api/v1/tours/{tour_id}', headers=auth_header(token))
+
+        data = resp.get_json()['data']
+        assert (data['stops_count'], data['upcoming_stops_count'], data['past_stops_count']) == (4, 3, 1)
+
+    def test_load_stop_counts_batch(self, app, counted_tours):
+        tours = Tour.query.filter_by(band_id=counted_tours).all()
+        statements = self._statements(app)
+
+        Tour.load_stop_counts(tours)
+        Tour.load_stop_counts(tours)
+
+        assert len(statements) == 1
+        assert [t.stops_count for t in tours] == [4] * 5
+        assert all('stops' not in t.__dict__ for t in tours)
+
+    def test_list_bands_tours_count(self, app, client, sample_user, counted_tours):
+        token = get_auth_token(client)
+
+        resp = client.get('/api/v1/bands?q=Count', headers=auth_header(token))
+
+        assert resp.get_json()['data'][0]['tours_count'] == 5
+
+
+class TestSparseFieldsets:
+    """?fields= / ?include= prune the serialized fields and the eager loads."""
+
+    @pytest.fixture
+    def fieldset_tour(self, app, sample_user):
+        """Tour with 3 stops at a venue, in a band managed by the user."""
+        from app.models.organization import Organization
+        org = Organization(name='Fields Org', slug='fields-org', created_by_id=sample_user)
+        db.session.add(org)
+        db.session.flush()
+        band = Band(name='Fields Band', manager_id=sample_user, org_id=org.id)
+        venue = Venue(name='Le Trianon', city='Paris', country='France', org_id=org.id)
+        db.session.add_all([band, venue])
+        db.session.flush()
+        tour = Tour(name='Fields Tour', start_date=date.today(), end_date=date.today() + timedelta(days=10),
+                    status=TourStatus.ACTIVE, band_id=band.id)
+        db.session.add(tour)
+        for offset in range(3):
+            db.session.add(TourStop(tour=tour, venue_id=venue.id, date=date.today() + timedelta(days=offset),
+                                    location_city='Paris', set_time=time(21, 0),
+                                    status=TourStopStatus.CONFIRMED, event_type=EventType.SHOW))
+        db.session.commit()
+        return tour.id
+
+    @staticmethod
+    def _statements(app):
+        from sqlalchemy import event
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        return statements
+
+    def test_fields_prune_output_and_joins(self, app, client, sample_user, fieldset_tour):
+        token = get_auth_token(client)
+        statements = self._statements(app)
+
+        resp = client.get(f'/api/v1/tours/{fieldset_tour}/stops?fields=id,date,city',
+                          headers=auth_header(token))
+
+        assert resp.status_code == 200
+        stops = resp.get_json()['data']
+        assert len(stops) == 3
+        assert all(set(stop) == {'id', 'date', 'city'} for stop in stops)
+        assert stops[0]['city'] == 'Paris'
+        assert not any('venues' in s or 'bands' in s for s in statements if 'FROM tour_stops' in s)
+
+    def test_include_selects_nested(self, app, client, sample_user, fieldset_tour):
+        token = get_auth_token(client)
+
+        resp = client.get(f'/api/v1/tours/{fieldset_tour}/stops?include=venue', headers=auth_header(token))
+
+        stop = resp.get_json()['data'][0]
+        assert stop['venue']['name'] == 'Le Trianon'
+        assert 'tour' not in stop and 'band' not in stop
+        assert stop['set_time'] == '21:00'
+
+    def test_default_full_schema(self, app, client, sample_user, fieldset_tour):
+        token = get_auth_token(client)
+
+        resp = client.get(f'/api/v1/tours/{fieldset_tour}/stops', headers=auth_header(token))
+
+        stop = resp.get_json()['data'][0]
+        assert {'venue', 'tour', 'band', 'doors_time', 'guarantee'} <= set(stop)
+
+    def test_tour_fields_skip_counts(self, app, client, sample_user, fieldset_tour):
+        token = get_auth_token(client)
+        statements = self._statements(app)
+
+        resp = client.get('/api/v1/tours?fields=id,name', headers=auth_header(token))
+
+        assert resp.get_json()['data'] == [{'id': fieldset_tour, 'name': 'Fields Tour'}]
+        assert not any('tour_stops' in s for s in statements)
+
+    def test_unknown_field_rejected(self, app, client, sample_user, fieldset_tour):
+        token = get_auth_token(client)
+
+        resp = client.get('/api/v1/tours?fields=id,password&include=stops', headers=auth_header(token))
+
+        assert resp.status_code == 400
+        error = resp.get_json()['error']
+        assert error['code'] == 'invalid_fields'
+        assert 'password' in error['message'] and 'stops' in error['message']
+
+    def test_compiled_schema_reused(self, app, client, sample_user, fieldset_tour):
+        from app.blueprints.api.helpers import _compiled_schema
+        token = get_auth_token(client)
+        _compiled_schema.cache_clear()
+
+        for _ in range(3):
+            client.get('/api/v1/bands?fields=id,name', headers=auth_header(token))
+
+        info = _compiled_schema.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
@@ -0,0 +1,139 @@
+# =============================================================================
+# Tour Manager - Per-request Authorization Context Tests
+# =============================================================================
+# Tests for app/utils/authz.py: the sets are loaded in a bounded number of
+# queries, shared for the whole request and dropped on membership changes.
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.band import Band, BandMembership
+from app.models.organization import Organization
+from app.models.tour import Tour, TourStatus
+from app.models.user import AccessLevel, User
+from app.utils.authz import AuthzContext, get_authz
+from tests.conftest import login
+
+
+@pytest.fixture
+def bands(app, manager_user, musician_user):
+    """Two bands managed by manager_user; musician_user is a member of the first only."""
+    org = Organization(name='Authz Org', slug='authz-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    own = Band(name='Own Band', manager=manager_user, org_id=org.id)
+    other = Band(name='Other Band', manager=manager_user, org_id=org.id)
+    db.session.add_all([own, other])
+    db.session.flush()
+    db.session.add(BandMembership(user_id=musician_user.id, band_id=own.id))
+    for band in (own, other):
+        db.session.add(Tour(name=f'{band.name} Tour', start_date=date.today(),
+                            end_date=date.today() + timedelta(days=10),
+                            status=TourStatus.PLANNING, band=band))
+    db.session.commit()
+    return own, other
+
+
+@pytest.fixture
+def viewer(app, bands):
+    """A VIEWER member of the first band (no level-based bypass)."""
+    user = User(email='viewer@test.com', first_name='Vi', last_name='Ewer',
+                access_level=AccessLevel.VIEWER, is_active=True, email_verified=True)
+    user.set_password('Viewer123!')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(BandMembership(user_id=user.id, band_id=bands[0].id))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements executed once recording is started (statements.clear())."""
+    recorded = []
+
+    def record(conn, cursor, statement, *args):
+        recorded.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+class TestAuthzContext:
+    """Tests for the AuthzContext sets."""
+
+    def test_sets(self, app, bands, manager_user, musician_user):
+        own, other = bands
+
+        manager = AuthzContext(manager_user)
+        musician = AuthzContext(musician_user)
+
+        assert manager.managed_band_ids == frozenset({own.id, other.id})
+        assert manager.member_band_ids == frozenset()
+        assert musician.band_ids == frozenset({own.id})
+        assert musician.tour_ids == frozenset(t.id for t in own.tours)
+        assert isinstance(musician.tour_ids, frozenset)
+
+    def test_bands_loaded_in_one_query(self, app, bands, manager_user, statements):
+        ctx = AuthzContext(manager_user)
+        statements.clear()
+
+        ctx.band_ids, ctx.member_band_ids, ctx.managed_band_ids
+        assert len(statements) == 1
+
+        ctx.tour_ids, ctx.tour_ids
+        assert len(statements) == 2
+
+
+class TestRequestCache:
+    """Tests for the context stored on g."""
+
+    def test_shared_within_request(self, app, bands, viewer):
+        with app.test_request_context():
+            from flask_login import login_user
+            login_user(viewer)
+
+            assert get_authz() is get_authz()
+            assert get_authz().can_access_band(bands[0].id)
+
+    def test_membership_flush_invalidates(self, app, bands, viewer):
+        own, other = bands
+        with app.test_request_context():
+            from flask_login import login_user
+            login_user(viewer)
+            assert not get_authz().can_access_band(other.id)
+
+            db.session.add(BandMembership(user_id=viewer.id, band_id=other.id))
+            db.session.flush()
+
+            assert get_authz().can_access_band(other.id)
+
+    def test_model_checks_use_context(self, app, bands, viewer, statements):
+        own, other = bands
+        own_tour, other_tour = own.tours[0], other.tours[0]
+        with app.test_request_context():
+            from flask_login import login_user
+            login_user(viewer)
+            get_authz().tour_ids
+            statements.clear()
+
+            assert own.has_access(viewer) and own.is_member(viewer)
+            assert own_tour.can_view(viewer)
+            assert not other_tour.can_view(viewer)
+            assert not own_tour.can_edit(viewer)
+            assert statements == []
+
+
+class TestDocumentRoutes:
+    """Band document pages are filtered through the context."""
+
+    def test_band_documents_require_membership(self, app, client, bands, musician_user):
+        own, other = bands
+        login(client, 'musician@test.com', 'Musician123!')
+
+        assert client.get(f'/documents/band/{own.id}').status_code == 200
+        assert client.get(f'/documents/band/{other.id}').status_code == 403
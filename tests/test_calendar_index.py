@@ -0,0 +1,174 @@
+# =============================================================================
+# Tour Manager - Personal Calendar Feed Tests
+# =============================================================================
+# Tests for the per-user calendar index (app/services/calendar_index.py) and
+# the /calendar/feed/<user_id>.ics subscription feed.
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.band import Band, BandMembership
+from app.models.crew_schedule import CrewAssignment, CrewScheduleSlot
+from app.models.logistics import LogisticsAssignment, LogisticsInfo, LogisticsType
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.planning_slot import PlanningSlot
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import EventType, TourStop, TourStopStatus
+from app.models.user_calendar_event import UserCalendarEvent
+from app.models.venue import Venue
+from app.services.calendar_index import CalendarIndexService
+from tests.conftest import login
+
+
+@pytest.fixture
+def index_tour(app, manager_user, musician_user):
+    """A tour of 2 stops; the musician is a band member."""
+    org = Organization(name='Index Org', slug='index-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+    band = Band(name='Les Balises', manager=manager_user, org_id=org.id)
+    db.session.add(band)
+    db.session.flush()
+    db.session.add(BandMembership(user_id=musician_user.id, band_id=band.id))
+    venue = Venue(name='La Cigale', city='Paris', country='France', org_id=org.id)
+    start = date.today() + timedelta(days=10)
+    tour = Tour(name='Tournée Automne', start_date=start, end_date=start + timedelta(days=3),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add_all([venue, tour])
+    for d in range(2):
+        db.session.add(TourStop(tour=tour, venue=venue, date=start + timedelta(days=d),
+                                set_time=time(21, 0), status=TourStopStatus.CONFIRMED,
+                                event_type=EventType.SHOW))
+    db.session.commit()
+    return tour
+
+
+def _events(user):
+    return {(e.source_type, e.source_id) for e in UserCalendarEvent.query.filter_by(user_id=user.id)}
+
+
+def _feed_url(user):
+    return f'/calendar/feed/{user.id}.ics?token={CalendarIndexService.feed_token(user.id)}'
+
+
+def _query_count(response):
+    db_metric = response.headers['Server-Timing'].split(',')[0]
+    return int(db_metric.split('desc="')[1].split(' ')[0])
+
+
+class TestIndexMaintenance:
+    """Rows follow assignments and edits through the session listeners."""
+
+    def test_band_stops_indexed(self, app, index_tour, manager_user, musician_user):
+        stops = {('stop', s.id) for s in index_tour.stops}
+
+        assert _events(musician_user) == stops
+        assert _events(manager_user) == stops
+
+    def test_assignments_add_and_remove_events(self, app, index_tour, manager_user, musician_user):
+        stop = index_tour.stops[0]
+        crew = CrewScheduleSlot(tour_stop_id=stop.id, start_time=time(9, 0), end_time=time(12, 0),
+                                task_name='Load-in')
+        planning = PlanningSlot(tour_stop_id=stop.id, role_name='Guitare', category='musicien',
+                                start_time=time(17, 0), end_time=time(18, 0),
+                                task_description='Balances', user_id=musician_user.id)
+        hotel = LogisticsInfo(tour_stop_id=stop.id, logistics_type=LogisticsType.HOTEL, provider='Hôtel du Nord',
+                              start_datetime=datetime.combine(stop.date, time(15, 0)))
+        db.session.add_all([crew, planning, hotel])
+        db.session.flush()
+        assignment = CrewAssignment(slot_id=crew.id, user_id=musician_user.id)
+        db.session.add_all([assignment, LogisticsAssignment(logistics_info_id=hotel.id, user_id=musician_user.id)])
+        db.session.commit()
+
+        added = _events(musician_user)
+        db.session.delete(assignment)
+        db.session.commit()
+
+        assert {('crew_slot', crew.id), ('planning_slot', planning.id), ('logistics', hotel.id)} <= added
+        assert ('crew_slot', crew.id) not in _events(musician_user)
+        assert ('crew_slot', crew.id) not in _events(manager_user)
+
+    def test_stop_and_venue_edits_rerendered(self, app, index_tour, musician_user):
+        stop = index_tour.stops[1]
+        stop.set_time = time(20, 30)
+        stop.venue.name = 'La Cigale Rénovée'
+        db.session.commit()
+
+        row = UserCalendarEvent.query.filter_by(user_id=musician_user.id, source_type='stop',
+                                                source_id=stop.id).one()
+
+        assert 'La Cigale Rénovée' in row.ical.replace('\r\n ', '')
+
+    def test_stop_deleted(self, app, index_tour, musician_user):
+        stop_id = index_tour.stops[0].id
+        db.session.delete(index_tour.stops[0])
+        db.session.commit()
+
+        assert UserCalendarEvent.query.filter_by(tour_stop_id=stop_id).count() == 0
+
+    def test_membership_removed(self, app, index_tour, musician_user):
+        membership = BandMembership.query.filter_by(user_id=musician_user.id).one()
+        db.session.delete(membership)
+        db.session.commit()
+
+        assert _events(musician_user) == set()
+
+    def test_rebuild_cli(self, app, runner, index_tour, musician_user):
+        UserCalendarEvent.query.delete()
+        db.session.commit()
+
+        result = runner.invoke(args=['rebuild-calendar-index'])
+
+        assert result.exit_code == 0
+        assert '4 événement(s) indexé(s).' in result.output
+        assert len(_events(musician_user)) == 2
+
+
+class TestUserFeed:
+    """Token subscription feed /calendar/feed/<user_id>.ics."""
+
+    def test_feed_single_query_and_304(self, app, client, index_tour, musician_user):
+        client.get('/ping')  # first request of the worker also checks the mail settings
+        first = client.get(_feed_url(musician_user))
+        second = client.get(_feed_url(musician_user), headers={'If-None-Match': first.headers['ETag']})
+
+        assert first.status_code == 200
+        assert first.data.startswith(b'BEGIN:VCALENDAR')
+        assert first.data.count(b'BEGIN:VEVENT') == 2
+        assert _query_count(first) == 1
+        assert second.status_code == 304
+
+    def test_etag_follows_index(self, app, client, index_tour, musician_user):
+        etag = client.get(_feed_url(musician_user)).headers['ETag']
+        index_tour.stops[0].set_time = time(22, 0)
+        db.session.commit()
+
+        response = client.get(_feed_url(musician_user), headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_token_required(self, app, client, index_tour, musician_user, manager_user):
+        assert client.get(f'/calendar/feed/{musician_user.id}.ics').status_code == 401
+        wrong = f'/calendar/feed/{musician_user.id}.ics?token={CalendarIndexService.feed_token(manager_user.id)}'
+        assert client.get(wrong).status_code == 403
+
+    def test_inactive_user_gets_empty_feed(self, app, client, index_tour, musician_user):
+        musician_user.is_active = False
+        db.session.commit()
+
+        response = client.get(_feed_url(musician_user))
+
+        assert response.status_code == 200
+        assert b'BEGIN:VEVENT' not in response.data
+
+    def test_feed_url(self, app, client, index_tour, musician_user):
+        login(client, 'musician@test.com', 'Musician123!')
+
+        data = client.get('/calendar/feed-url').get_json()
+
+        assert data['success'] is True
+        assert data['feed_url'].endswith(_feed_url(musician_user))
@@ -0,0 +1,232 @@
+# =============================================================================
+# Tour Manager - Incremental Calendar Sync Tests
+# =============================================================================
+# Tests for app/services/calendar_sync.py against a local stub server that
+# speaks the Google Calendar batch (multipart/mixed) and Microsoft Graph
+# $batch protocols.
+
+import json
+import threading
+from datetime import date, datetime, timedelta
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from app.extensions import db
+from app.models.band import Band
+from app.models.calendar_sync_state import CalendarSyncState
+from app.models.job import Job
+from app.models.oauth_token import OAuthProvider, OAuthToken
+from app.models.organization import Organization
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus, EventType
+from app.models.venue import Venue
+from app.services.calendar_sync import CalendarSyncService, GoogleCalendarClient, OutlookCalendarClient
+from tests.conftest import login
+
+
+class StubCalendarAPI:
+    """In-memory calendar shared by the Google and Graph stub endpoints."""
+
+    def __init__(self):
+        self.events = {}
+        self.next_id = 1
+        self.http_calls = 0
+        self.operations = []
+
+    def handle(self, method, event_id, body):
+        self.operations.append(method)
+        if method == 'POST':
+            event_id = f'evt{self.next_id}'
+            self.next_id += 1
+            self.events[event_id] = body
+            return 201, {'id': event_id}
+        if event_id not in self.events:
+            return 404, {'error': 'not found'}
+        if method == 'PATCH':
+            self.events[event_id].update(body)
+            return 200, {'id': event_id}
+        del self.events[event_id]
+        return 204, None
+
+
+def _make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            api.http_calls += 1
+            content = self.rfile.read(int(self.headers['Content-Length']))
+            if self.path == '/$batch':
+                self._graph_batch(json.loads(content))
+            else:
+                self._google_batch(content)
+
+        def _graph_batch(self, payload):
+            responses = []
+            for item in payload['requests']:
+                event_id = item['url'].rsplit('/', 1)[-1] if item['method'] != 'POST' else None
+                status, body = api.handle(item['method'], event_id, item.get('body'))
+                responses.append({'id': item['id'], 'status': status, 'body': body})
+            self._send(200, 'application/json', json.dumps({'responses': responses}).encode())
+
+        def _google_batch(self, content):
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + content
+            )
+            parts = []
+            for part in message.get_payload():
+                request_text = part.get_payload()
+                head, _, body = request_text.partition('\r\n\r\n')
+                method, path, _ = head.split('\r\n')[0].split(' ')
+                event_id = path.rsplit('/', 1)[-1] if method != 'POST' else None
+                status, response = api.handle(method, event_id, json.loads(body) if body.strip() else None)
+                content_id = part['Content-ID'].strip('<>')
+                parts.append(
+                    '--resp\r\nContent-Type: application/http\r\n'
+                    f'Content-ID: <response-{content_id}>\r\n\r\n'
+                    f'HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n'
+                    f'{json.dumps(response) if response else ""}\r\n'
+                )
+            self._send(200, 'multipart/mixed; boundary=resp', (''.join(parts) + '--resp--\r\n').encode())
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+@pytest.fixture
+def stub_api():
+    """A stub calendar API on a local port."""
+    api = StubCalendarAPI()
+    server = HTTPServer(('127.0.0.1', 0), _make_handler(api))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api.url = f'http://127.0.0.1:{server.server_port}'
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def synced_user(app, manager_user, stub_api):
+    """manager_user with 3 upcoming stops, connected to both providers."""
+    app.config.update(GOOGLE_CALENDAR_API_URL=stub_api.url, MICROSOFT_GRAPH_API_URL=stub_api.url)
+    org = Organization(name='Sync Org', slug='sync-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    band = Band(name='Sync Band', manager=manager_user, org_id=org.id)
+    venue = Venue(name='Olympia', city='Paris', country='France', org_id=org.id)
+    db.session.add_all([band, venue])
+    db.session.flush()
+    tour = Tour(name='Sync Tour', start_date=date.today(), end_date=date.today() + timedelta(days=30),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+    for offset in (3, 4, 5):
+        db.session.add(TourStop(tour=tour, venue=venue, date=date.today() + timedelta(days=offset),
+                                status=TourStopStatus.CONFIRMED, event_type=EventType.SHOW))
+    for provider in (OAuthProvider.GOOGLE.value, OAuthProvider.MICROSOFT.value):
+        db.session.add(OAuthToken(user_id=manager_user.id, provider=provider, access_token='tok',
+                                  expires_at=datetime.utcnow() + timedelta(hours=1)))
+    db.session.commit()
+    return manager_user
+
+
+PROVIDERS = [OAuthProvider.GOOGLE.value, OAuthProvider.MICROSOFT.value]
+
+
+class TestIncrementalSync:
+    """Tests for CalendarSyncService.sync()."""
+
+    @pytest.mark.parametrize('provider', PROVIDERS)
+    def test_first_sync_inserts_in_one_batch(self, app, synced_user, stub_api, provider):
+        stats = CalendarSyncService.sync(synced_user.id, provider)
+
+        assert stats['inserted'] == 3
+        assert stub_api.http_calls == 1
+        assert len(stub_api.events) == 3
+        assert CalendarSyncState.query.filter_by(user_id=synced_user.id, provider=provider).count() == 3
+        assert OAuthToken.get_for_user(synced_user.id, provider).last_sync is not None
+
+    @pytest.mark.parametrize('provider', PROVIDERS)
+    def test_unchanged_stops_send_nothing(self, app, synced_user, stub_api, provider):
+        CalendarSyncService.sync(synced_user.id, provider)
+        calls = stub_api.http_calls
+
+        stats = CalendarSyncService.sync(synced_user.id, provider)
+
+        assert stats == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 3, 'errors': 0}
+        assert stub_api.http_calls == calls
+
+    @pytest.mark.parametrize('provider', PROVIDERS)
+    def test_changed_stop_is_patched(self, app, synced_user, stub_api, provider):
+        CalendarSyncService.sync(synced_user.id, provider)
+        stop = TourStop.query.order_by(TourStop.id).first()
+        stop.notes = 'Backline fourni'
+        db.session.commit()
+
+        stats = CalendarSyncService.sync(synced_user.id, provider)
+
+        assert stats['updated'] == 1
+        assert stats['unchanged'] == 2
+        assert stub_api.operations[-1] == 'PATCH'
+
+    @pytest.mark.parametrize('provider', PROVIDERS)
+    def test_deleted_stop_is_removed(self, app, synced_user, stub_api, provider):
+        CalendarSyncService.sync(synced_user.id, provider)
+        db.session.delete(TourStop.query.order_by(TourStop.id).first())
+        db.session.commit()
+
+        stats = CalendarSyncService.sync(synced_user.id, provider)
+
+        assert stats['deleted'] == 1
+        assert len(stub_api.events) == 2
+        assert CalendarSyncState.query.filter_by(user_id=synced_user.id, provider=provider).count() == 2
+
+    def test_event_deleted_remotely_is_recreated(self, app, synced_user, stub_api):
+        provider = OAuthProvider.GOOGLE.value
+        CalendarSyncService.sync(synced_user.id, provider)
+        stub_api.events.clear()
+        stop = TourStop.query.order_by(TourStop.id).first()
+        stop.notes = 'Changed'
+        db.session.commit()
+
+        stats = CalendarSyncService.sync(synced_user.id, provider)
+
+        assert stats['inserted'] == 1
+        assert stats['errors'] == 0
+        assert len(stub_api.events) == 1
+
+    def test_large_sync_is_split_in_batches(self, app, synced_user, stub_api):
+        tour = Tour.query.first()
+        venue = Venue.query.first()
+        for offset in range(6, 30):
+            db.session.add(TourStop(tour=tour, venue=venue, date=date.today() + timedelta(days=offset),
+                                    status=TourStopStatus.CONFIRMED, event_type=EventType.SHOW))
+        db.session.commit()
+
+        stats = CalendarSyncService.sync(synced_user.id, OAuthProvider.MICROSOFT.value)
+
+        assert stats['inserted'] == 27
+        assert stub_api.http_calls == -(-27 // OutlookCalendarClient.batch_size)
+        assert GoogleCalendarClient.batch_size == 50
+
+
+class TestSyncRoutes:
+    """Tests for the sync endpoints (queued, not run in the request)."""
+
+    def test_google_sync_enqueues_job_once(self, app, client, synced_user):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        first = client.post('/integrations/google/sync')
+        client.post('/integrations/google/sync')
+
+        assert first.get_json() == {'success': True, 'queued': True}
+        assert Job.query.filter_by(task='calendar_sync').count() == 1
@@ -0,0 +1,74 @@
+# =============================================================================
+# Tour Manager - Document Sequence Tests
+# =============================================================================
+# Tests for app/services/document_sequences.py (gap-free numbering of
+# payment references and invoice numbers).
+
+from datetime import datetime
+from decimal import Decimal
+
+from app.extensions import db
+from app.models.document_sequence import DocumentSequence
+from app.models.invoices import Invoice, InvoiceType
+from app.models.payments import PaymentStatus, PaymentType, StaffCategory, TeamMemberPayment
+from app.services.document_sequences import DocumentSequenceService, PREFIX_PAYMENT
+from app.services.payment_service import PaymentService
+
+YEAR = datetime.utcnow().year
+
+
+def _payment(user, reference):
+    payment = TeamMemberPayment(
+        reference=reference, user_id=user.id, staff_category=StaffCategory.ARTISTIC,
+        payment_type=PaymentType.CACHET, amount=Decimal('100.00'), status=PaymentStatus.DRAFT,
+    )
+    db.session.add(payment)
+    return payment
+
+
+class TestDocumentSequences:
+    """Tests for DocumentSequenceService."""
+
+    def test_first_numbers_of_a_series(self, app):
+        assert TeamMemberPayment.generate_reference() == f'PAY-{YEAR}-00001'
+        assert TeamMemberPayment.generate_reference() == f'PAY-{YEAR}-00002'
+
+    def test_block_reservation_is_contiguous(self, app):
+        first = PaymentService.allocate_references(3)
+        second = PaymentService.allocate_references(2)
+
+        assert first == [f'PAY-{YEAR}-0000{n}' for n in (1, 2, 3)]
+        assert second == [f'PAY-{YEAR}-0000{n}' for n in (4, 5)]
+
+    def test_counter_seeded_from_existing_references(self, app, manager_user):
+        _payment(manager_user, f'PAY-{YEAR}-00041')
+        db.session.commit()
+
+        assert PaymentService.generate_reference() == f'PAY-{YEAR}-00042'
+
+    def test_rollback_returns_numbers(self, app, manager_user):
+        _payment(manager_user, PaymentService.generate_reference())
+        db.session.commit()
+
+        PaymentService.allocate_references(5)
+        db.session.rollback()
+
+        assert PaymentService.generate_reference() == f'PAY-{YEAR}-00002'
+
+    def test_preview_does_not_consume(self, app):
+        assert PaymentService.allocate_references(2, reserve=False) == [f'PAY-{YEAR}-00001', f'PAY-{YEAR}-00002']
+        assert PaymentService.generate_reference() == f'PAY-{YEAR}-00001'
+
+    def test_series_are_independent(self, app):
+        assert Invoice.generate_number(InvoiceType.INVOICE) == f'FACT-{YEAR}-00001'
+        assert Invoice.generate_number(InvoiceType.CREDIT_NOTE) == f'AV-{YEAR}-00001'
+        assert Invoice.generate_number(InvoiceType.INVOICE) == f'FACT-{YEAR}-00002'
+        assert DocumentSequenceService.next_numbers(PREFIX_PAYMENT, year=YEAR - 1) == [f'PAY-{YEAR - 1}-00001']
+
+    def test_one_counter_row_per_scope(self, app):
+        PaymentService.allocate_references(10)
+        Invoice.generate_number()
+        db.session.commit()
+
+        rows = {(s.prefix, s.year): s.next_value for s in DocumentSequence.query.all()}
+        assert rows == {('PAY', YEAR): 11, ('FACT', YEAR): 2}
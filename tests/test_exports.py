@@ -0,0 +1,220 @@
+# =============================================================================
+# Tour Manager - Streaming Export Tests
+# =============================================================================
+# Tests for app/utils/exports.py and the CSV / XLSX exports built on it
+# (payments, payroll, guestlist).
+
+import csv
+import io
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+import app.services.report_service as report_service
+import app.utils.exports as exports
+from app.extensions import db
+from app.models.band import Band
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.payments import (
+    PaymentStatus, PaymentType, StaffCategory, TeamMemberPayment, UserPaymentConfig
+)
+from app.models.tour import Tour, TourStatus
+from app.models.user import User
+from app.services.payment_service import PaymentService
+from app.services.report_service import ReportService
+from tests.conftest import login
+
+
+@pytest.fixture
+def payroll(app, manager_user):
+    """12 approved payments for 3 payees with bank details, on one tour."""
+    org = Organization(name='Export Org', slug='export-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+    band = Band(name='Les Colonnes', manager=manager_user, org_id=org.id)
+    db.session.add(band)
+    db.session.flush()
+    tour = Tour(name='Tournée Export', start_date=date.today(), end_date=date.today() + timedelta(days=12),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+
+    payees = []
+    for i in range(3):
+        user = User(email=f'payee{i}@test.com', first_name=f'Payee{i}', last_name='Export', is_active=True)
+        user.set_password('Payee123!')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(OrganizationMembership(user_id=user.id, org_id=org.id, role=OrgRole.MEMBER))
+        db.session.add(UserPaymentConfig(user_id=user.id, iban=f'FR76300060000112345678901{i}',
+                                         bic='BNPAFRPP', bank_name='BNP Paribas'))
+        payees.append(user)
+    db.session.flush()
+
+    for i in range(12):
+        db.session.add(TeamMemberPayment(
+            reference=f'PAY-EXP-{i:05d}', user_id=payees[i % 3].id, tour_id=tour.id,
+            staff_category=StaffCategory.ARTISTIC, payment_type=PaymentType.CACHET,
+            amount=Decimal('250.50'), currency='EUR', work_date=date.today() + timedelta(days=i),
+            status=PaymentStatus.APPROVED,
+        ))
+    db.session.commit()
+    return tour
+
+
+def _parse(content, delimiter=';'):
+    return list(csv.reader(io.StringIO(content), delimiter=delimiter))
+
+
+class TestWriters:
+    """CSV chunking and the optional XLSX writer."""
+
+    def test_csv_chunks(self, monkeypatch):
+        monkeypatch.setattr(exports, 'CSV_ROWS_PER_CHUNK', 2)
+        rows = [['Nom', 'Montant'], ['Zoé; "la basse"', Decimal('10.50')], ['Léo', 3], [], ['TOTAL', '']]
+
+        chunks = list(exports.csv_chunks(rows, delimiter=';'))
+
+        assert len(chunks) == 3
+        assert _parse(''.join(chunks)) == [['Nom', 'Montant'], ['Zoé; "la basse"', '10.50'], ['Léo', '3'],
+                                           [], ['TOTAL', '']]
+
+    def test_xlsx_requires_xlsxwriter(self, monkeypatch):
+        monkeypatch.setattr(exports, 'XLSX_AVAILABLE', False)
+
+        with pytest.raises(RuntimeError):
+            list(exports.xlsx_chunks([['Nom']]))
+
+    def test_xlsx_workbook(self, app):
+        pytest.importorskip('xlsxwriter')
+
+        content = b''.join(exports.xlsx_chunks([['Nom', 'Montant'], ['Zoé', Decimal('10.50')]], 'Paie'))
+
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            assert 'xl/worksheets/sheet1.xml' in workbook.namelist()
+
+
+class TestBatchedReads:
+    """Server-side cursor batches and per-batch lookups."""
+
+    def test_stream_batches(self, app, payroll):
+        query = TeamMemberPayment.query.order_by(TeamMemberPayment.id)
+
+        sizes = [len(batch) for batch in exports.stream_batches(query, batch_size=5)]
+        statement_sizes = [len(batch) for batch in exports.stream_batches(select(TeamMemberPayment), batch_size=5)]
+
+        assert sizes == [5, 5, 2]
+        assert statement_sizes == [5, 5, 2]
+
+    def test_preload(self, app, payroll):
+        user_ids = [u.id for u in User.query.filter(User.email.like('payee%'))]
+
+        configs = exports.preload(UserPaymentConfig.user_id, user_ids + [None])
+
+        assert set(configs) == set(user_ids)
+        assert exports.preload(UserPaymentConfig.user_id, [None]) == {}
+
+    def test_payment_export_one_lookup_per_batch(self, app, payroll, assert_max_queries):
+        app.config['EXPORT_BATCH_SIZE'] = 5
+        tour_id = payroll.id
+
+        # payments, then per batch (3): bank details + the users' selectin-loaded professions
+        with assert_max_queries(7):
+            rows = list(PaymentService.payment_export_rows(tour_id=tour_id))
+
+        assert len(rows) == 13
+        assert rows[0][-3:] == ['IBAN', 'BIC', 'Banque']
+        assert all(row[-3].startswith('FR76') for row in rows[1:])
+
+    def test_service_csv_strings(self, app, payroll):
+        payroll_csv = _parse(ReportService.export_masse_salariale_csv(payroll.id))
+        payments_csv = _parse(PaymentService.export_payments_csv(tour_id=payroll.id))
+
+        assert len(payroll_csv) == 13
+        assert payroll_csv[1][7] == '250.50'
+        assert payroll_csv[1][15] == 'Tournée Export'
+        assert len(payments_csv) == 13
+
+
+class TestExportRoutes:
+    """Routes stream the export; ?format=xlsx falls back to CSV without XlsxWriter."""
+
+    def test_payments_export_streamed(self, app, client, payroll):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get('/payments/export/csv')
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.content_type == 'text/csv; charset=utf-8'
+        rows = _parse(response.get_data(as_text=True))
+        assert len(rows) == 13
+        assert rows[1][0] == 'PAY-EXP-00000'
+
+    def test_masse_salariale_export(self, app, client, payroll):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get(f'/reports/accounting/masse-salariale/{payroll.id}')
+
+        assert response.status_code == 200
+        assert 'masse_salariale_Tournée_Export_' in response.headers['Content-Disposition']
+        assert len(_parse(response.get_data(as_text=True))) == 13
+
+    def test_xlsx_fallback_to_csv(self, app, client, payroll, monkeypatch):
+        monkeypatch.setattr(exports, 'XLSX_AVAILABLE', False)
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get('/payments/export/csv?format=xlsx')
+
+        assert response.content_type == 'text/csv; charset=utf-8'
+        assert '.csv' in response.headers['Content-Disposition']
+
+    def test_xlsx_export(self, app, client, payroll):
+        pytest.importorskip('xlsxwriter')
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get('/payments/export/csv?format=xlsx')
+
+        assert response.content_type == exports.XLSX_MIMETYPE
+        assert response.data.startswith(b'PK')
+
+
+class TestExportErrors:
+    """A failing query redirects when it fails before streaming, and is logged after."""
+
+    @staticmethod
+    def failing_batches(after_batches):
+        def batches(query, batch_size=None):
+            for index, batch in enumerate(exports.stream_batches(query, batch_size)):
+                if index == after_batches:
+                    break
+                yield batch
+            raise OperationalError('SELECT team_member_payments', {}, Exception('connexion perdue'))
+        return batches
+
+    def test_query_error_redirects(self, app, client, payroll, monkeypatch):
+        monkeypatch.setattr(report_service, 'stream_batches', self.failing_batches(after_batches=0))
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get(f'/reports/accounting/masse-salariale/{payroll.id}')
+
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/reports/accounting')
+
+    def test_error_while_streaming_is_logged(self, app, client, payroll, monkeypatch, caplog):
+        app.config['EXPORT_BATCH_SIZE'] = 4
+        monkeypatch.setattr(exports, 'CSV_ROWS_PER_CHUNK', 2)
+        monkeypatch.setattr(report_service, 'stream_batches', self.failing_batches(after_batches=1))
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get(f'/reports/accounting/masse-salariale/{payroll.id}')
+
+        assert response.status_code == 200
+        with pytest.raises(OperationalError):
+            response.get_data()
+        assert any('Export masse_salariale_Tournée_Export_' in record.getMessage()
+                   and 'interrompu' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,276 @@
+# =============================================================================
+# Tour Manager - Financial Snapshot Tests
+# =============================================================================
+# Tests for app/services/financial_snapshots.py - materialized per-stop figures
+
+import pytest
+from decimal import Decimal
+from datetime import date, time, timedelta
+
+from app.extensions import db
+from app.models.organization import Organization
+from app.models.band import Band
+from app.models.venue import Venue
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus
+from app.models.ticket_tier import TicketTier
+from app.models.logistics import LogisticsInfo, LogisticsType, PromotorExpenses
+from app.models.financial_snapshot import StopFinancialSnapshot
+from app.services.financial_snapshots import FinancialSnapshotService
+from app.utils.reports import calculate_dashboard_kpis, calculate_settlement
+from tests.conftest import login
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+@pytest.fixture
+def org(app, manager_user):
+    """Create an organization owning the test data."""
+    organization = Organization(name='Snapshot Org', slug='snapshot-org', created_by_id=manager_user.id)
+    db.session.add(organization)
+    db.session.commit()
+    return organization
+
+
+@pytest.fixture
+def band(app, org, manager_user):
+    """Create a band attached to the organization."""
+    b = Band(name='Snapshot Band', genre='Rock', manager=manager_user, org_id=org.id)
+    db.session.add(b)
+    db.session.commit()
+    return b
+
+
+@pytest.fixture
+def venue(app, org):
+    """Create a venue attached to the organization."""
+    v = Venue(name='Snapshot Hall', city='Lyon', country='France', capacity=500, org_id=org.id)
+    db.session.add(v)
+    db.session.commit()
+    return v
+
+
+@pytest.fixture
+def tour(app, band, venue):
+    """Create a tour with a guarantee stop, a tiered stop and a door-deal stop."""
+    t = Tour(
+        name='Snapshot Tour',
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=60),
+        status=TourStatus.CONFIRMED,
+        band=band,
+    )
+    db.session.add(t)
+    db.session.flush()
+
+    guarantee_stop = TourStop(
+        tour=t, venue=venue, date=date.today() + timedelta(days=5),
+        doors_time=time(19, 0), status=TourStopStatus.CONFIRMED,
+        guarantee=5000.00, ticket_price=30.00, sold_tickets=300, currency='EUR',
+    )
+    tiered_stop = TourStop(
+        tour=t, venue=venue, date=date.today() + timedelta(days=40),
+        doors_time=time(19, 0), status=TourStopStatus.CONFIRMED,
+        guarantee=3000.00, currency='EUR',
+    )
+    door_deal_stop = TourStop(
+        tour=t, venue=venue, date=date.today() - timedelta(days=10),
+        doors_time=time(19, 0), status=TourStopStatus.CONFIRMED,
+        guarantee=1000.00, ticket_price=25.00, sold_tickets=450,
+        door_deal_percentage=70, currency='EUR',
+    )
+    db.session.add_all([guarantee_stop, tiered_stop, door_deal_stop])
+    db.session.flush()
+
+    db.session.add_all([
+        TicketTier(tour_stop=tiered_stop, name='Fosse', price=Decimal('35.00'),
+                   quantity_available=250, sold=200, sort_order=0),
+        TicketTier(tour_stop=tiered_stop, name='VIP', price=Decimal('80.00'),
+                   quantity_available=30, sold=25, sort_order=1),
+        LogisticsInfo(tour_stop=guarantee_stop, logistics_type=LogisticsType.HOTEL,
+                      cost=Decimal('420.00'), paid_by='band', is_paid=False),
+        PromotorExpenses(tour_stop=door_deal_stop, venue_fee=Decimal('1500.00'),
+                         marketing_cost=Decimal('500.00')),
+    ])
+    db.session.commit()
+    return t
+
+
+def _snapshot(stop_id):
+    db.session.expire_all()
+    return db.session.get(StopFinancialSnapshot, stop_id)
+
+
+# =============================================================================
+# Incremental maintenance
+# =============================================================================
+
+class TestSnapshotMaintenance:
+    """Snapshots follow their source rows through session events."""
+
+    def test_snapshot_created_on_commit(self, tour):
+        """Every stop gets a snapshot row when committed."""
+        stop_ids = {s.id for s in tour.stops}
+        snap_ids = {s.tour_stop_id for s in StopFinancialSnapshot.query.all()}
+        assert snap_ids == stop_ids
+
+    def test_snapshot_matches_settlement(self, tour):
+        """Stored figures match calculate_settlement for each stop."""
+        for stop in tour.stops:
+            expected = calculate_settlement(stop)
+            snap = _snapshot(stop.id)
+            assert float(snap.guarantee) == pytest.approx(expected['guarantee'])
+            assert float(snap.ticket_revenue) == pytest.approx(expected['gross_revenue'])
+            assert float(snap.artist_payment) == pytest.approx(expected['artist_payment'])
+            assert snap.payment_type == expected['payment_type']
+            assert snap.sold_tickets == expected['sold_tickets']
+
+    def test_tier_change_refreshes_snapshot(self, tour):
+        """Updating a ticket tier recomputes the stop revenue."""
+        stop = next(s for s in tour.stops if s.has_tiers)
+        tier = stop.ticket_tiers[0]
+        tier.sold = 250
+        db.session.commit()
+
+        snap = _snapshot(stop.id)
+        assert snap.sold_tickets == 275
+        assert float(snap.ticket_revenue) == pytest.approx(250 * 35 + 25 * 80)
+
+    def test_logistics_change_refreshes_snapshot(self, tour):
+        """Adding a logistics cost updates the logistics totals."""
+        stop = tour.stops[0]
+        db.session.add(LogisticsInfo(
+            tour_stop_id=stop.id, logistics_type=LogisticsType.FLIGHT,
+            cost=Decimal('180.00'), paid_by='promoter', is_paid=True,
+        ))
+        db.session.commit()
+
+        snap = _snapshot(stop.id)
+        expected = sum(float(item.cost or 0) for item in stop.logistics)
+        assert float(snap.logistics_total) == pytest.approx(expected)
+
+    def test_venue_change_refreshes_snapshot(self, tour, venue):
+        """Renaming a venue is reflected in its stops' snapshots."""
+        venue.name = 'Renamed Hall'
+        db.session.commit()
+
+        for stop in tour.stops:
+            assert _snapshot(stop.id).venue_name == 'Renamed Hall'
+
+    def test_stop_delete_removes_snapshot(self, tour):
+        """Deleting a stop (and its tiers) drops its snapshot row."""
+        stop = next(s for s in tour.stops if s.has_tiers)
+        stop_id = stop.id
+        db.session.delete(stop)
+        db.session.commit()
+
+        assert _snapshot(stop_id) is None
+
+    def test_rollback_discards_pending(self, tour):
+        """Rolled back changes do not leak into the next commit's refresh."""
+        stop = tour.stops[0]
+        stop.guarantee = 99999
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+
+        assert float(_snapshot(stop.id).guarantee) == pytest.approx(float(stop.guarantee))
+
+
+# =============================================================================
+# Aggregated reads
+# =============================================================================
+
+class TestSnapshotReads:
+    """SQL aggregates over snapshots match the Python report functions."""
+
+    def test_dashboard_kpis_parity(self, tour, band):
+        """dashboard_kpis returns the same figures as calculate_dashboard_kpis."""
+        expected = calculate_dashboard_kpis([tour])
+        result = FinancialSnapshotService.dashboard_kpis([band.id])
+
+        for key in ('total_revenue', 'total_tickets', 'total_capacity', 'avg_fill_rate',
+                    'avg_ticket_price', 'num_shows', 'total_ticket_revenue',
+                    'stops_without_capacity', 'total_guarantees', 'total_door_deals',
+                    'guarantee_percentage', 'door_deal_percentage', 'logistics_unpaid'):
+            assert result[key] == pytest.approx(expected[key]), key
+
+        assert result['monthly_revenue'] == pytest.approx(expected['monthly_revenue'])
+        assert result['revenue_by_tour'] == pytest.approx(expected['revenue_by_tour'])
+        assert result['logistics_costs'] == pytest.approx(expected['logistics_costs'])
+        assert result['logistics_by_paid_by'] == pytest.approx(expected['logistics_by_paid_by'])
+        assert [s['total_estimated_revenue'] for s in result['top_stops']] == pytest.approx(
+            [s['total_estimated_revenue'] for s in expected['top_stops']]
+        )
+
+    def test_dashboard_kpis_empty(self, app):
+        """No bands means empty KPIs."""
+        result = FinancialSnapshotService.dashboard_kpis([])
+        assert result['num_shows'] == 0
+        assert result['total_revenue'] == 0
+
+    def test_settlement_rows_filters(self, tour, band):
+        """Past/future filters are applied in SQL, newest first."""
+        today = date.today()
+        rows = FinancialSnapshotService.settlement_rows([band.id])
+        assert [r['date'] for r in rows] == sorted((s.date for s in tour.stops), reverse=True)
+        assert rows[0]['band_name'] == 'Snapshot Band'
+        assert rows[0]['tour_name'] == 'Snapshot Tour'
+
+        past = FinancialSnapshotService.settlement_rows([band.id], date_to=today)
+        assert all(r['date'] < today for r in past)
+        assert len(past) == 1
+
+        future = FinancialSnapshotService.settlement_rows([band.id], date_from=today)
+        assert len(future) == 2
+
+    def test_missing_snapshots_backfilled(self, tour, band):
+        """Rows written outside the ORM are backfilled on read."""
+        StopFinancialSnapshot.query.delete()
+        db.session.commit()
+
+        result = FinancialSnapshotService.summary_totals([band.id])
+        assert result['total_stops'] == 3
+        assert result['total_guarantee'] == pytest.approx(9000.0)
+
+    def test_rebuild_cli(self, tour, runner):
+        """flask rebuild-financial-snapshots recomputes all rows."""
+        StopFinancialSnapshot.query.delete()
+        db.session.commit()
+
+        result = runner.invoke(args=['rebuild-financial-snapshots'])
+        assert result.exit_code == 0
+        assert StopFinancialSnapshot.query.count() == 3
+
+
+# =============================================================================
+# Report routes
+# =============================================================================
+
+class TestSnapshotRoutes:
+    """Report pages render from snapshot aggregates."""
+
+    def test_financial_dashboard(self, client, tour):
+        """Dashboard shows snapshot KPIs."""
+        login(client, 'manager@test.com', 'Manager123!')
+        response = client.get('/reports/dashboard')
+        assert response.status_code == 200
+        assert b'Snapshot Hall' in response.data
+
+    def test_settlements_list_filter(self, client, tour):
+        """Settlements list honours the past/future filter."""
+        login(client, 'manager@test.com', 'Manager123!')
+        response = client.get('/reports/settlements?filter=past')
+        assert response.status_code == 200
+        assert b'Snapshot Tour' in response.data
+
+    def test_chart_data(self, client, tour):
+        """Chart API returns snapshot aggregates."""
+        login(client, 'manager@test.com', 'Manager123!')
+        response = client.get('/reports/dashboard/api/chart-data')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['revenue_by_tour']['Snapshot Tour'] > 0
+        assert len(data['top_stops']) == 3
@@ -0,0 +1,273 @@
+# =============================================================================
+# Tour Manager - Bulk Geocoding Pipeline Tests
+# =============================================================================
+# Tests for app/services/geocoding_service.py (geocode_cache, dedup, workers)
+# and the TokenBucket rate limiter, against a local stub Nominatim server.
+
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.extensions import db
+from app.models.organization import Organization
+from app.models.venue import Venue
+from app.models.geocode_cache import GeocodeCache
+from app.services.geocoding_service import GeocodingService
+from app.utils.geocoding import TokenBucket, address_cache_key, normalize_address
+
+
+# =============================================================================
+# Stub Nominatim server
+# =============================================================================
+
+KNOWN_ADDRESSES = {
+    '8 boulevard de rochechouart, paris, france': ('48.8826', '2.3447'),
+    '12 rue des taillandiers, paris, france': ('48.8554', '2.3760'),
+    'carrer de pamplona 88, barcelona, spain': ('41.3985', '2.1915'),
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers /search like Nominatim, from KNOWN_ADDRESSES."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query).get('q', [''])[0]
+        self.server.queries.append(query)
+
+        if 'explode' in query.lower():
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        coords = KNOWN_ADDRESSES.get(normalize_address(query))
+        body = [{'lat': coords[0], 'lon': coords[1]}] if coords else []
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_nominatim():
+    """Local HTTP server standing in for Nominatim."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.queries = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def geo_app(app, stub_nominatim):
+    """App pointed at the stub, with a high rate limit."""
+    app.config['GEOCODING_BASE_URL'] = f'http://127.0.0.1:{stub_nominatim.server_address[1]}'
+    app.config['GEOCODING_RATE_LIMIT'] = 1000.0
+    app.config['GEOCODING_WORKERS'] = 4
+    return app
+
+
+@pytest.fixture
+def org(app, manager_user):
+    organization = Organization(name='Geo Org', slug='geo-org', created_by_id=manager_user.id)
+    db.session.add(organization)
+    db.session.commit()
+    return organization
+
+
+def _venue(org, name, address, city, country):
+    venue = Venue(name=name, address=address, city=city, country=country, org_id=org.id)
+    db.session.add(venue)
+    return venue
+
+
+# =============================================================================
+# TokenBucket
+# =============================================================================
+
+class FakeClock:
+    """Deterministic clock: sleep() advances time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket:
+    """Token bucket rate limiter."""
+
+    def test_first_request_is_free(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+        assert bucket.acquire() == 0
+
+    def test_enforces_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, clock=clock, sleep=clock.sleep)
+        for _ in range(5):
+            bucket.acquire()
+        # 1 free token, then one every 0.5s
+        assert clock.now == pytest.approx(2.0)
+
+    def test_burst_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(1.0)
+
+    def test_refills_while_idle(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        clock.now += 5
+        assert bucket.acquire() == 0
+
+    def test_concurrent_waiters_reserve_distinct_slots(self):
+        """Waiters reserve successive slots instead of all waking at once."""
+        waits = []
+        bucket = TokenBucket(rate=10.0, clock=lambda: 0.0, sleep=lambda s: None)
+        threads = [threading.Thread(target=lambda: waits.append(bucket.acquire())) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(waits) == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4])
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+# =============================================================================
+# Pipeline
+# =============================================================================
+
+class TestGeocodeVenues:
+    """Bulk pipeline: dedup, cache, provider misses."""
+
+    def test_geocodes_and_dedupes(self, geo_app, stub_nominatim, org):
+        cigale = _venue(org, 'La Cigale', '8 Boulevard de Rochechouart', 'Paris', 'France')
+        same = _venue(org, 'La Cigale (bis)', '8  boulevard de ROCHECHOUART', 'paris', 'France')
+        apolo = _venue(org, 'Sala Apolo', 'Carrer de Pamplona 88', 'Barcelona', 'Spain')
+        db.session.commit()
+
+        stats = GeocodingService.geocode_venues([cigale, same, apolo])
+
+        assert stats['success'] == 3
+        assert stats['requests'] == 2
+        assert len(stub_nominatim.queries) == 2
+        assert cigale.latitude == pytest.approx(48.8826)
+        assert same.latitude == cigale.latitude
+        assert GeocodeCache.query.count() == 2
+
+    def test_second_run_served_from_cache(self, geo_app, stub_nominatim, org):
+        first = _venue(org, 'Badaboum', '12 Rue des Taillandiers', 'Paris', 'France')
+        db.session.commit()
+        GeocodingService.geocode_venues([first])
+
+        second = _venue(org, 'Badaboum 2', '12 rue des taillandiers', 'Paris', 'France')
+        db.session.commit()
+        stats = GeocodingService.geocode_venues([second])
+
+        assert stats == {'success': 1, 'failed': 0, 'skipped': 0, 'cache_hits': 1, 'requests': 0, 'errors': 0}
+        assert len(stub_nominatim.queries) == 1
+        assert second.longitude == pytest.approx(2.3760)
+
+    def test_negative_results_are_cached(self, geo_app, stub_nominatim, org):
+        nowhere = _venue(org, 'Nowhere', '1 Imaginary Road', 'Atlantis', 'Ocean')
+        db.session.commit()
+
+        assert GeocodingService.geocode_venues([nowhere])['failed'] == 1
+        stats = GeocodingService.geocode_venues([nowhere])
+
+        assert stats['cache_hits'] == 1 and stats['failed'] == 1
+        assert len(stub_nominatim.queries) == 1
+        row = GeocodeCache.query.one()
+        assert not row.found
+        assert row.expires_at < datetime.utcnow() + timedelta(days=15)
+
+    def test_expired_entries_are_refetched(self, geo_app, stub_nominatim, org):
+        venue = _venue(org, 'La Cigale', '8 Boulevard de Rochechouart', 'Paris', 'France')
+        db.session.add(GeocodeCache(
+            address_key=address_cache_key('8 Boulevard de Rochechouart, Paris, France'),
+            normalized_query='stale', latitude=None, longitude=None,
+            expires_at=datetime.utcnow() - timedelta(days=1),
+        ))
+        db.session.commit()
+
+        stats = GeocodingService.geocode_venues([venue])
+
+        assert stats['requests'] == 1 and stats['success'] == 1
+        row = GeocodeCache.query.one()
+        assert row.found and not row.is_expired
+
+    def test_provider_errors_are_not_cached(self, geo_app, stub_nominatim, org):
+        venue = _venue(org, 'Boom', '1 Explode Street', 'Paris', 'France')
+        db.session.commit()
+
+        stats = GeocodingService.geocode_venues([venue])
+
+        assert stats['errors'] == 1 and stats['failed'] == 1
+        assert GeocodeCache.query.count() == 0
+
+    def test_skips_geocoded_venues(self, geo_app, stub_nominatim, org):
+        venue = _venue(org, 'Done', '8 Boulevard de Rochechouart', 'Paris', 'France')
+        venue.latitude, venue.longitude = 1.0, 2.0
+        db.session.commit()
+
+        stats = GeocodingService.geocode_venues([venue])
+
+        assert stats['skipped'] == 1
+        assert stub_nominatim.queries == []
+
+    def test_chunked_commits(self, geo_app, stub_nominatim, org):
+        venues = [_venue(org, f'V{i}', f'{i} Unknown Lane', 'Paris', 'France') for i in range(5)]
+        db.session.commit()
+
+        stats = GeocodingService.geocode_venues(venues, chunk_size=2, workers=2)
+
+        assert stats['requests'] == 5
+        assert GeocodeCache.query.count() == 5
+
+    def test_purge_expired(self, geo_app, org):
+        db.session.add_all([
+            GeocodeCache(address_key='a' * 64, normalized_query='old', expires_at=datetime.utcnow() - timedelta(days=1)),
+            GeocodeCache(address_key='b' * 64, normalized_query='new', expires_at=datetime.utcnow() + timedelta(days=1)),
+        ])
+        db.session.commit()
+
+        assert GeocodingService.purge_expired() == 1
+        assert GeocodeCache.query.count() == 1
+
+
+class TestGeocodeCli:
+    """flask geocode-venues uses the pipeline."""
+
+    def test_cli(self, geo_app, stub_nominatim, org, runner):
+        _venue(org, 'La Cigale', '8 Boulevard de Rochechouart', 'Paris', 'France')
+        db.session.commit()
+
+        result = runner.invoke(args=['geocode-venues', '--workers', '2'])
+
+        assert result.exit_code == 0, result.output
+        assert '1 succès' in result.output
+        assert Venue.query.filter(Venue.latitude.isnot(None)).count() == 1
@@ -0,0 +1,309 @@
+# =============================================================================
+# Tour Manager - Offline Guestlist Sync Tests
+# =============================================================================
+# Tests for app/services/guestlist_sync.py, GET /api/v1/stops/<id>/guestlist/snapshot
+# and POST /api/v1/stops/<id>/guestlist/checkins
+
+import pytest
+from datetime import date, datetime, time, timedelta
+
+from app.extensions import db
+from app.models.organization import Organization
+from app.models.band import Band
+from app.models.venue import Venue
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus
+from app.models.guestlist import GuestlistEntry, GuestlistStatus, GuestlistTombstone, EntryType
+from app.services.guestlist_sync import GuestlistSyncService, MAX_BATCH_SIZE
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def _entry(stop, user, name, status=GuestlistStatus.APPROVED, plus_ones=0):
+    entry = GuestlistEntry(
+        tour_stop=stop, guest_name=name, guest_email=f'{name.lower()}@example.com',
+        entry_type=EntryType.GUEST, status=status, plus_ones=plus_ones,
+        requested_by_id=user.id,
+    )
+    db.session.add(entry)
+    return entry
+
+
+@pytest.fixture
+def door(app, manager_user):
+    """A stop with approved, pending and denied guests, plus another stop."""
+    org = Organization(name='Door Org', slug='door-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+
+    band = Band(name='Door Band', manager=manager_user, org_id=org.id)
+    venue = Venue(name='Le Trianon', city='Paris', country='France', capacity=1000, org_id=org.id)
+    db.session.add_all([band, venue])
+    db.session.flush()
+
+    tour = Tour(name='Door Tour', start_date=date.today(), end_date=date.today() + timedelta(days=10),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+    db.session.flush()
+
+    stop = TourStop(tour=tour, venue=venue, date=date.today(), doors_time=time(19, 0),
+                    status=TourStopStatus.CONFIRMED)
+    other_stop = TourStop(tour=tour, venue=venue, date=date.today() + timedelta(days=1),
+                          doors_time=time(19, 0), status=TourStopStatus.CONFIRMED)
+    db.session.add_all([stop, other_stop])
+    db.session.flush()
+
+    alice = _entry(stop, manager_user, 'Alice', plus_ones=2)
+    bob = _entry(stop, manager_user, 'Bob')
+    carol = _entry(stop, manager_user, 'Carol', status=GuestlistStatus.PENDING)
+    dave = _entry(stop, manager_user, 'Dave', status=GuestlistStatus.DENIED)
+    elsewhere = _entry(other_stop, manager_user, 'Eve')
+    db.session.commit()
+    return {'stop': stop, 'other_stop': other_stop, 'alice': alice, 'bob': bob,
+            'carol': carol, 'dave': dave, 'elsewhere': elsewhere}
+
+
+def _version(stop):
+    return GuestlistSyncService.current_version(stop.id)
+
+
+# =============================================================================
+# Versioning
+# =============================================================================
+
+class TestVersioning:
+    """Guestlist changes bump a monotonic per-stop version."""
+
+    def test_created_entries_share_flush_version(self, door):
+        version = _version(door['stop'])
+        assert version >= 1
+        assert {door[k].sync_version for k in ('alice', 'bob', 'carol', 'dave')} == {version}
+
+    def test_update_bumps_only_changed_entry(self, door):
+        before = _version(door['stop'])
+        other_before = _version(door['other_stop'])
+
+        door['bob'].notes = 'Tall guy'
+        db.session.commit()
+
+        assert _version(door['stop']) == before + 1
+        assert door['bob'].sync_version == before + 1
+        assert door['alice'].sync_version <= before
+        assert _version(door['other_stop']) == other_before
+
+    def test_delete_leaves_tombstone(self, door):
+        before = _version(door['stop'])
+        dave_id = door['dave'].id
+        db.session.delete(door['dave'])
+        db.session.commit()
+
+        tombstone = GuestlistTombstone.query.filter_by(entry_id=dave_id).one()
+        assert tombstone.sync_version == before + 1
+        assert tombstone.tour_stop_id == door['stop'].id
+
+    def test_stop_updated_at_untouched(self, door):
+        stop = door['stop']
+        updated_at = stop.updated_at
+        door['bob'].notes = 'VIP friend'
+        db.session.commit()
+
+        db.session.expire_all()
+        assert stop.updated_at == updated_at
+
+    def test_deleting_stop_cascades(self, door):
+        stop_id = door['stop'].id
+        db.session.delete(door['stop'])
+        db.session.commit()
+
+        assert GuestlistEntry.query.filter_by(tour_stop_id=stop_id).count() == 0
+        assert GuestlistTombstone.query.filter_by(tour_stop_id=stop_id).count() == 0
+
+
+# =============================================================================
+# Snapshots
+# =============================================================================
+
+class TestSnapshot:
+    """Delta snapshots only return what changed since a version."""
+
+    def test_full_snapshot(self, door):
+        snap = GuestlistSyncService.snapshot(door['stop'])
+        assert snap['full'] is True
+        assert {e.guest_name for e in snap['entries']} == {'Alice', 'Bob', 'Carol', 'Dave'}
+        assert snap['deleted'] == []
+
+    def test_delta_snapshot(self, door):
+        since = _version(door['stop'])
+        door['carol'].status = GuestlistStatus.APPROVED
+        carol_id = door['carol'].id
+        dave_id = door['dave'].id
+        db.session.delete(door['dave'])
+        db.session.commit()
+
+        snap = GuestlistSyncService.snapshot(door['stop'], since)
+        assert snap['full'] is False
+        assert [e.id for e in snap['entries']] == [carol_id]
+        assert snap['deleted'] == [dave_id]
+        assert snap['version'] == since + 2
+
+    def test_up_to_date_is_empty(self, door):
+        version = _version(door['stop'])
+        snap = GuestlistSyncService.snapshot(door['stop'], version)
+        assert snap['entries'] == [] and snap['deleted'] == []
+
+    def test_future_version_forces_full_resync(self, door):
+        snap = GuestlistSyncService.snapshot(door['stop'], _version(door['stop']) + 100)
+        assert snap['full'] is True
+        assert len(snap['entries']) == 4
+
+
+# =============================================================================
+# Batch check-ins
+# =============================================================================
+
+class TestBatchCheckins:
+    """Queued check-ins are applied idempotently with per-item results."""
+
+    def test_mixed_batch(self, door):
+        outcome = GuestlistSyncService.apply_checkins(door['stop'], [
+            {'entry_id': door['alice'].id, 'client_id': 'scan-1', 'plus_ones': 1},
+            {'entry_id': door['carol'].id, 'client_id': 'scan-2'},
+            {'entry_id': door['elsewhere'].id, 'client_id': 'scan-3'},
+            {'entry_id': 'x'},
+        ])
+        results = [r['result'] for r in outcome['results']]
+        assert results == ['checked_in', 'conflict', 'not_found', 'invalid']
+        assert outcome['results'][1]['reason'] == 'invalid_state'
+        assert outcome['summary'] == {'checked_in': 1, 'conflict': 1, 'not_found': 1, 'invalid': 1}
+
+        db.session.expire_all()
+        assert door['alice'].status == GuestlistStatus.CHECKED_IN
+        assert door['alice'].checked_in_plus_ones == 1
+        assert door['alice'].checkin_client_id == 'scan-1'
+        assert door['elsewhere'].status == GuestlistStatus.APPROVED
+
+    def test_replay_is_idempotent(self, door):
+        item = {'entry_id': door['bob'].id, 'client_id': 'scan-bob'}
+        GuestlistSyncService.apply_checkins(door['stop'], [item])
+        checked_in_at = door['bob'].checked_in_at
+        version = _version(door['stop'])
+
+        outcome = GuestlistSyncService.apply_checkins(door['stop'], [item])
+        assert outcome['results'][0]['result'] == 'duplicate'
+        assert door['bob'].checked_in_at == checked_in_at
+        assert outcome['version'] == version
+
+    def test_other_scanner_conflicts(self, door):
+        GuestlistSyncService.apply_checkins(door['stop'], [{'entry_id': door['bob'].id, 'client_id': 'gate-a'}])
+        outcome = GuestlistSyncService.apply_checkins(door['stop'], [{'entry_id': door['bob'].id, 'client_id': 'gate-b'}])
+
+        result = outcome['results'][0]
+        assert result['result'] == 'conflict'
+        assert result['reason'] == 'already_checked_in'
+        assert result['entry'].checkin_client_id == 'gate-a'
+
+    def test_concurrent_scanner_conflicts(self, door, monkeypatch):
+        lock_entries = GuestlistSyncService._lock_entries
+
+        def other_scanner_wins(stop, entry_ids):
+            # Gate B commits between this sync's read and its write
+            entries = lock_entries(stop, entry_ids)
+            table = GuestlistEntry.__table__
+            db.session.execute(table.update().where(table.c.id == door['bob'].id).values(
+                status=GuestlistStatus.CHECKED_IN, checkin_client_id='gate-b'))
+            return entries
+
+        monkeypatch.setattr(GuestlistSyncService, '_lock_entries', other_scanner_wins)
+        outcome = GuestlistSyncService.apply_checkins(door['stop'], [
+            {'entry_id': door['bob'].id, 'client_id': 'gate-a'},
+            {'entry_id': door['alice'].id, 'client_id': 'gate-a'},
+        ])
+
+        assert [r['result'] for r in outcome['results']] == ['conflict', 'checked_in']
+        assert outcome['results'][0]['reason'] == 'already_checked_in'
+        db.session.expire_all()
+        assert door['bob'].checkin_client_id == 'gate-b'
+        assert door['alice'].checkin_client_id == 'gate-a'
+
+    def test_scan_time_kept(self, door):
+        scanned = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=20)
+        GuestlistSyncService.apply_checkins(door['stop'], [
+            {'entry_id': door['bob'].id, 'client_id': 's', 'scanned_at': scanned.isoformat() + 'Z'},
+        ])
+        assert door['bob'].checked_in_at == scanned
+
+    def test_future_scan_time_clamped(self, door):
+        GuestlistSyncService.apply_checkins(door['stop'], [
+            {'entry_id': door['bob'].id, 'scanned_at': (datetime.utcnow() + timedelta(days=1)).isoformat()},
+        ])
+        assert door['bob'].checked_in_at <= datetime.utcnow()
+
+    def test_version_bumped_once_per_batch(self, door):
+        before = _version(door['stop'])
+        outcome = GuestlistSyncService.apply_checkins(door['stop'], [
+            {'entry_id': door['alice'].id}, {'entry_id': door['bob'].id},
+        ])
+        assert outcome['version'] == before + 1
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+class TestSyncApi:
+    """Snapshot and batch check-in endpoints."""
+
+    def _headers(self, client):
+        resp = client.post('/api/v1/auth/login', json={
+            'email': 'manager@test.com',
+            'password': 'Manager123!',
+        })
+        return {'Authorization': f"Bearer {resp.get_json()['data']['access_token']}"}
+
+    def test_snapshot_then_delta(self, client, door):
+        headers = self._headers(client)
+        stop_id = door['stop'].id
+
+        resp = client.get(f'/api/v1/stops/{stop_id}/guestlist/snapshot', headers=headers)
+        assert resp.status_code == 200
+        data = resp.get_json()['data']
+        assert data['full'] is True
+        assert len(data['entries']) == 4
+        version = data['version']
+
+        resp = client.post(f'/api/v1/stops/{stop_id}/guestlist/checkins', headers=headers, json={
+            'checkins': [{'entry_id': door['bob'].id, 'client_id': 'api-1'}],
+        })
+        assert resp.status_code == 200
+        body = resp.get_json()['data']
+        assert body['results'][0]['result'] == 'checked_in'
+        assert body['results'][0]['entry']['status'] == 'checked_in'
+        assert body['version'] == version + 1
+
+        resp = client.get(f'/api/v1/stops/{stop_id}/guestlist/snapshot?since={version}', headers=headers)
+        data = resp.get_json()['data']
+        assert data['full'] is False
+        assert [e['guest_name'] for e in data['entries']] == ['Bob']
+        assert data['entries'][0]['sync_version'] == version + 1
+
+    def test_invalid_since(self, client, door):
+        resp = client.get(f"/api/v1/stops/{door['stop'].id}/guestlist/snapshot?since=abc",
+                          headers=self._headers(client))
+        assert resp.status_code == 422
+
+    def test_empty_batch_rejected(self, client, door):
+        resp = client.post(f"/api/v1/stops/{door['stop'].id}/guestlist/checkins",
+                           headers=self._headers(client), json={'checkins': []})
+        assert resp.status_code == 422
+
+    def test_batch_too_large(self, client, door):
+        items = [{'entry_id': door['bob'].id}] * (MAX_BATCH_SIZE + 1)
+        resp = client.post(f"/api/v1/stops/{door['stop'].id}/guestlist/checkins",
+                           headers=self._headers(client), json={'checkins': items})
+        assert resp.status_code == 422
+
+    def test_unknown_stop(self, client, door):
+        resp = client.get('/api/v1/stops/99999/guestlist/snapshot', headers=self._headers(client))
+        assert resp.status_code == 404
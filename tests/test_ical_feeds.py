@@ -0,0 +1,182 @@
+# =============================================================================
+# Tour Manager - iCal Feed Tests
+# =============================================================================
+# Tests for the conditional-GET calendar exports (app/utils/ical_feed.py) and
+# the per-event VEVENT cache (app/utils/ical.py).
+
+from datetime import date, time, timedelta
+
+import pytest
+
+from app.extensions import cache, db
+from app.models.band import Band, BandMembership
+from app.models.crew_schedule import CrewAssignment, CrewScheduleSlot
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import EventType, TourStop, TourStopStatus
+from app.models.venue import Venue
+from app.blueprints.tours.routes import _generate_calendar_token
+from tests.conftest import login
+
+
+@pytest.fixture
+def feed_tour(app, manager_user, musician_user):
+    """A tour with 3 stops in two venues, one crew slot on the first stop."""
+    cache.clear()
+    org = Organization(name='Feed Org', slug='feed-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+    band = Band(name='Les Ondes', manager=manager_user, org_id=org.id)
+    db.session.add(band)
+    db.session.flush()
+    db.session.add(BandMembership(user_id=musician_user.id, band_id=band.id))
+    zenith = Venue(name='Zénith', city='Nantes', country='France', org_id=org.id)
+    olympia = Venue(name='Olympia', city='Paris', country='France', org_id=org.id)
+    start = date.today() + timedelta(days=20)
+    tour = Tour(name='Tournée Printemps', start_date=start, end_date=start + timedelta(days=5),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add_all([zenith, olympia, tour])
+    for d, venue in enumerate([zenith, olympia, zenith]):
+        db.session.add(TourStop(tour=tour, venue=venue, date=start + timedelta(days=d),
+                                set_time=time(21, 0), status=TourStopStatus.CONFIRMED,
+                                event_type=EventType.SHOW))
+    db.session.flush()
+    slot = CrewScheduleSlot(tour_stop_id=tour.stops[0].id, start_time=time(9, 0), end_time=time(12, 0),
+                            task_name='Load-in')
+    db.session.add(slot)
+    db.session.flush()
+    db.session.add(CrewAssignment(slot_id=slot.id, user_id=musician_user.id))
+    db.session.commit()
+    return tour
+
+
+def _feed_url(tour):
+    return f'/tours/{tour.id}/calendar.ics?token={_generate_calendar_token(tour)}'
+
+
+def _query_count(response):
+    db_metric = response.headers['Server-Timing'].split(',')[0]
+    return int(db_metric.split('desc="')[1].split(' ')[0])
+
+
+class TestTourFeed:
+    """Token subscription feed /tours/<id>/calendar.ics."""
+
+    def test_not_modified_with_one_query(self, app, client, feed_tour):
+        first = client.get(_feed_url(feed_tour))
+        etag = first.headers['ETag']
+
+        second = client.get(_feed_url(feed_tour), headers={'If-None-Match': etag})
+
+        assert first.status_code == 200
+        assert first.data.count(b'BEGIN:VEVENT') == 3
+        assert second.status_code == 304
+        assert second.headers['ETag'] == etag
+        assert second.data == b''
+        assert _query_count(second) == 1
+
+    def test_invalid_token_still_rejected(self, app, client, feed_tour):
+        etag = client.get(_feed_url(feed_tour)).headers['ETag']
+
+        response = client.get(f'/tours/{feed_tour.id}/calendar.ics?token=nope',
+                              headers={'If-None-Match': etag})
+
+        assert response.status_code == 403
+
+    def test_etag_changes_with_stop_venue_and_deletion(self, app, client, feed_tour):
+        url = _feed_url(feed_tour)
+        etags = [client.get(url).headers['ETag']]
+
+        feed_tour.stops[1].set_time = time(20, 0)
+        db.session.commit()
+        etags.append(client.get(url).headers['ETag'])
+
+        feed_tour.stops[0].venue.name = 'Zénith Métropole'
+        db.session.commit()
+        response = client.get(url)
+        etags.append(response.headers['ETag'])
+
+        db.session.delete(feed_tour.stops[2])
+        db.session.commit()
+        last = client.get(url)
+        etags.append(last.headers['ETag'])
+
+        assert len(set(etags)) == 4
+        assert 'Zénith Métropole'.encode() in response.data.replace(b'\r\n ', b'')
+        assert last.data.count(b'BEGIN:VEVENT') == 2
+
+    def test_unknown_tour(self, app, client, feed_tour):
+        assert client.get('/tours/999999/calendar.ics?token=x').status_code == 404
+
+
+class TestEventCache:
+    """Only the events whose rows changed are re-serialized."""
+
+    def test_changed_stop_only(self, app, feed_tour, monkeypatch):
+        import app.utils.ical as ical
+
+        rendered = []
+        original = ical.create_event
+
+        def counting(stop, *args, **kwargs):
+            rendered.append(stop.id)
+            return original(stop, *args, **kwargs)
+
+        monkeypatch.setattr(ical, 'create_event', counting)
+        first = ical.generate_tour_ical(feed_tour, include_alarms=False)
+        feed_tour.stops[1].notes = 'Parking artistes rue Boileau'
+        db.session.commit()
+        rendered.clear()
+
+        second = ical.generate_tour_ical(feed_tour, include_alarms=False)
+
+        assert rendered == [feed_tour.stops[1].id]
+        assert first.startswith(b'BEGIN:VCALENDAR') and second.endswith(b'END:VCALENDAR\r\n')
+        assert b'Parking artistes' in second.replace(b'\r\n ', b'')
+
+
+class TestExports:
+    """Logged-in exports: logistics tour schedule and crew planning."""
+
+    def test_logistics_tour_ical(self, app, client, feed_tour):
+        login(client, 'manager@test.com', 'Manager123!')
+        url = f'/logistics/tour/{feed_tour.id}/ical'
+
+        first = client.get(url)
+        second = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+
+        assert first.status_code == 200
+        assert first.data.count(b'BEGIN:VEVENT') == 3
+        assert 'attachment' in first.headers['Content-Disposition']
+        assert second.status_code == 304
+
+    def test_crew_export(self, app, client, feed_tour):
+        login(client, 'manager@test.com', 'Manager123!')
+        url = f'/stops/{feed_tour.stops[0].id}/crew/export.ics'
+        first = client.get(url)
+        etag = first.headers['ETag']
+
+        unchanged = client.get(url, headers={'If-None-Match': etag})
+        assignment = CrewAssignment.query.first()
+        assignment.notes = 'Arrive avec le camion'
+        db.session.commit()
+        changed = client.get(url, headers={'If-None-Match': etag})
+
+        assert first.status_code == 200
+        assert b'Load-in' in first.data
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+    def test_crew_export_per_user_etag(self, app, client, feed_tour):
+        url = f'/stops/{feed_tour.stops[0].id}/crew/export.ics'
+        login(client, 'manager@test.com', 'Manager123!')
+        manager_etag = client.get(url).headers['ETag']
+        client.get('/auth/logout')
+        login(client, 'musician@test.com', 'Musician123!')
+
+        response = client.get(url, headers={'If-None-Match': manager_etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != manager_etag
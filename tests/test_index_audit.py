@@ -0,0 +1,102 @@
+# =============================================================================
+# Tour Manager - Index Audit Tests
+# =============================================================================
+# Tests for app/services/index_audit.py and `flask db-index-report`.
+
+import pytest
+from sqlalchemy import inspect, select
+
+from app.extensions import db
+from app.models.notification import Notification
+from app.services.index_audit import (
+    HOT_QUERIES,
+    IndexAuditService,
+    postgres_seq_scans,
+    sqlite_seq_scans,
+)
+
+
+class TestCompositeIndexes:
+    """The hot filters are backed by an index."""
+
+    @pytest.mark.parametrize('table, name, columns', [
+        ('tour_stops', 'ix_tour_stops_tour_date', ['tour_id', 'date']),
+        ('tour_stops', 'ix_tour_stops_band_date', ['band_id', 'date']),
+        ('tour_stops', 'ix_tour_stops_venue_id', ['venue_id']),
+        ('tours', 'ix_tours_band_start_date', ['band_id', 'start_date']),
+        ('guestlist_entries', 'ix_guestlist_entries_stop_status', ['tour_stop_id', 'status']),
+        ('notifications', 'ix_notifications_user_read_created', ['user_id', 'is_read', 'created_at']),
+        ('team_member_payments', 'ix_team_member_payments_tour_status', ['tour_id', 'status']),
+        ('team_member_payments', 'ix_team_member_payments_user_work_date', ['user_id', 'work_date']),
+    ])
+    def test_index_exists(self, app, table, name, columns):
+        indexes = {ix['name']: ix['column_names'] for ix in inspect(db.engine).get_indexes(table)}
+
+        assert indexes.get(name) == columns
+
+    def test_catalog_uses_indexes(self, app):
+        for name, builder in HOT_QUERIES.items():
+            assert IndexAuditService.explain(builder())['seq_scans'] == [], name
+
+
+class TestPlanParsing:
+    """Sequential scan detection in SQLite / PostgreSQL plans."""
+
+    def test_sqlite_plan(self):
+        rows = [
+            (2, 0, 0, 'SCAN notifications'),
+            (4, 0, 0, 'SEARCH tour_stops USING INDEX ix_tour_stops_tour_date (tour_id=?)'),
+            (6, 0, 0, 'SCAN venues USING COVERING INDEX ix_venues_name'),
+            (8, 0, 0, 'USE TEMP B-TREE FOR ORDER BY'),
+        ]
+
+        assert sqlite_seq_scans(rows) == ['notifications']
+
+    def test_postgres_plan(self):
+        plan = [{'Plan': {
+            'Node Type': 'Hash Join',
+            'Plans': [
+                {'Node Type': 'Seq Scan', 'Relation Name': 'guestlist_entries'},
+                {'Node Type': 'Hash', 'Plans': [
+                    {'Node Type': 'Index Scan', 'Relation Name': 'tour_stops',
+                     'Index Name': 'ix_tour_stops_tour_date'},
+                ]},
+            ],
+        }}]
+
+        assert postgres_seq_scans(plan) == ['guestlist_entries']
+
+
+class TestReport:
+    """Large-table threshold and CLI output."""
+
+    def test_unindexed_filter_flagged_on_large_table(self, app):
+        stmt = select(Notification).where(Notification.title == 'Rappel')
+
+        assert IndexAuditService.explain(stmt)['seq_scans'] == ['notifications']
+
+    def test_small_tables_not_flagged(self, app, monkeypatch):
+        monkeypatch.setitem(HOT_QUERIES, 'notifications.by_title',
+                            lambda: select(Notification).where(Notification.title == 'Rappel'))
+
+        small = IndexAuditService.run_report(min_rows=1, only=['notifications.by_title'])
+        large = IndexAuditService.run_report(min_rows=0, only=['notifications.by_title'])
+
+        assert small[0]['seq_scans'] == ['notifications']
+        assert small[0]['flagged'] == []
+        assert large[0]['flagged'] == [{'table': 'notifications', 'rows': 0}]
+
+    def test_cli_report(self, app, runner):
+        result = runner.invoke(args=['db-index-report', '--min-rows', '0'])
+
+        assert result.exit_code == 0
+        assert f'{len(HOT_QUERIES)} requête(s) analysée(s), 0 scan(s)' in result.output
+
+    def test_cli_fails_on_flagged_scan(self, app, runner, monkeypatch):
+        monkeypatch.setitem(HOT_QUERIES, 'notifications.by_title',
+                            lambda: select(Notification).where(Notification.title == 'Rappel'))
+
+        result = runner.invoke(args=['db-index-report', '--min-rows', '0', '--query', 'notifications.by_title'])
+
+        assert result.exit_code == 1
+        assert 'SEQ SCAN  notifications.by_title: notifications (0 lignes)' in result.output
@@ -0,0 +1,320 @@
+# =============================================================================
+# Tour Manager - Persistent Job Queue Tests
+# =============================================================================
+# Tests for app/services/job_queue.py, app/services/job_tasks.py and the
+# reminder enqueueing used by `flask send-reminders` / `flask worker`.
+
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from app.extensions import db
+from app.models.band import Band
+from app.models.invoices import Invoice, InvoiceStatus
+from app.models.job import Job, JobStatus
+from app.models.organization import Organization
+from app.models.reminder import TourStopReminder
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus, EventType
+from app.models.venue import Venue
+from app.services.job_queue import JobError, JobQueue
+from app.services.job_tasks import (
+    TASK_INVOICE_EMAIL, TASK_TOUR_REMINDER, TASK_TOUR_STOP_NOTIFICATION, reminder_job_key,
+)
+from app.services.reminders import enqueue_due_reminders
+
+
+@pytest.fixture
+def recorded_task():
+    """A test task recording its payloads (fails while `failures` > 0)."""
+    calls = {'payloads': [], 'failures': 0}
+
+    @JobQueue.task('test_record')
+    def handler(payload):
+        calls['payloads'].append(payload)
+        if calls['failures'] > 0:
+            calls['failures'] -= 1
+            raise JobError('boom')
+
+    yield calls
+    JobQueue._handlers.pop('test_record', None)
+
+
+@pytest.fixture
+def j7_stop(app, manager_user):
+    """A confirmed show 7 days from now (band managed by manager_user)."""
+    org = Organization(name='Jobs Org', slug='jobs-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    band = Band(name='Jobs Band', manager=manager_user, org_id=org.id)
+    venue = Venue(name='La Cigale', city='Paris', country='France', capacity=1000, org_id=org.id)
+    db.session.add_all([band, venue])
+    db.session.flush()
+    tour = Tour(name='Jobs Tour', start_date=date.today(), end_date=date.today() + timedelta(days=30),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+    stop = TourStop(
+        tour=tour, venue=venue,
+        date=date.today() + timedelta(days=7),
+        status=TourStopStatus.CONFIRMED,
+        event_type=EventType.SHOW,
+    )
+    db.session.add(stop)
+    db.session.commit()
+    return stop
+
+
+class TestEnqueue:
+    """Tests for JobQueue.enqueue()."""
+
+    def test_creates_pending_job(self, app, recorded_task):
+        job = JobQueue.enqueue('test_record', {'a': 1})
+
+        assert job.id is not None
+        assert job.status == JobStatus.PENDING
+        assert job.attempts == 0
+        assert job.payload == {'a': 1}
+        assert job.max_attempts == app.config['JOB_MAX_ATTEMPTS']
+
+    def test_same_key_is_enqueued_once(self, app, recorded_task):
+        first = JobQueue.enqueue('test_record', {'a': 1}, key='k1')
+        second = JobQueue.enqueue('test_record', {'a': 2}, key='k1')
+
+        assert second.id == first.id
+        assert Job.query.count() == 1
+
+
+class TestClaim:
+    """Tests for JobQueue.claim()."""
+
+    def test_claims_due_jobs_once(self, app, recorded_task):
+        JobQueue.enqueue('test_record', {'n': 1})
+        JobQueue.enqueue('test_record', {'n': 2})
+
+        claimed = JobQueue.claim('w1', limit=10)
+        assert len(claimed) == 2
+        assert all(job.status == JobStatus.RUNNING and job.locked_by == 'w1' for job in claimed)
+        assert all(job.attempts == 1 for job in claimed)
+
+        # Already running: another worker gets nothing
+        assert JobQueue.claim('w2', limit=10) == []
+
+    def test_skips_jobs_not_yet_due(self, app, recorded_task):
+        JobQueue.enqueue('test_record', run_at=datetime.utcnow() + timedelta(hours=1))
+
+        assert JobQueue.claim('w1') == []
+
+    def test_respects_limit(self, app, recorded_task):
+        for n in range(5):
+            JobQueue.enqueue('test_record', {'n': n})
+
+        assert len(JobQueue.claim('w1', limit=3)) == 3
+
+    def test_requeues_stale_running_jobs(self, app, recorded_task):
+        job = JobQueue.enqueue('test_record')
+        JobQueue.claim('dead-worker')
+        job.locked_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+
+        assert JobQueue.requeue_stale(lock_timeout=60) == 1
+        assert db.session.get(Job, job.id).status == JobStatus.PENDING
+
+
+class TestRunJob:
+    """Tests for JobQueue.run_job() and retries."""
+
+    def test_success_marks_done(self, app, recorded_task):
+        JobQueue.enqueue('test_record', {'x': 'y'})
+        job = JobQueue.claim('w1')[0]
+
+        assert JobQueue.run_job(job) is True
+        assert job.status == JobStatus.DONE
+        assert job.finished_at is not None
+        assert recorded_task['payloads'] == [{'x': 'y'}]
+
+    def test_failure_is_retried_with_backoff(self, app, recorded_task):
+        recorded_task['failures'] = 1
+        JobQueue.enqueue('test_record')
+        job = JobQueue.claim('w1')[0]
+
+        assert JobQueue.run_job(job) is False
+        job = db.session.get(Job, job.id)
+        assert job.status == JobStatus.PENDING
+        assert 'boom' in job.last_error
+        assert job.run_at >= datetime.utcnow() + timedelta(seconds=app.config['JOB_RETRY_BASE_DELAY'] - 5)
+
+    def test_backoff_doubles_and_is_capped(self, app):
+        base = app.config['JOB_RETRY_BASE_DELAY']
+        assert JobQueue.retry_delay(1) == timedelta(seconds=base)
+        assert JobQueue.retry_delay(2) == timedelta(seconds=base * 2)
+        assert JobQueue.retry_delay(50) == timedelta(seconds=app.config['JOB_RETRY_MAX_DELAY'])
+
+    def test_fails_after_max_attempts(self, app, recorded_task):
+        recorded_task['failures'] = 10
+        JobQueue.enqueue('test_record', max_attempts=1)
+        job = JobQueue.claim('w1')[0]
+
+        JobQueue.run_job(job)
+        assert db.session.get(Job, job.id).status == JobStatus.FAILED
+
+    def test_unknown_task_fails(self, app):
+        JobQueue.enqueue('does_not_exist', max_attempts=1)
+        job = JobQueue.claim('w1')[0]
+
+        assert JobQueue.run_job(job) is False
+        assert 'does_not_exist' in db.session.get(Job, job.id).last_error
+
+
+class TestWork:
+    """Tests for the worker loop."""
+
+    def test_once_drains_due_jobs(self, app, recorded_task):
+        for n in range(3):
+            JobQueue.enqueue('test_record', {'n': n})
+
+        stats = JobQueue.work(worker_id='w1', batch_size=2, once=True)
+
+        assert stats['done'] == 3
+        assert [p['n'] for p in recorded_task['payloads']] == [0, 1, 2]
+        assert JobQueue.counts()[JobStatus.DONE] == 3
+
+    def test_max_jobs(self, app, recorded_task):
+        for n in range(3):
+            JobQueue.enqueue('test_record', {'n': n})
+
+        stats = JobQueue.work(worker_id='w1', max_jobs=2, once=True)
+
+        assert stats['done'] == 2
+        assert JobQueue.counts()[JobStatus.PENDING] == 1
+
+
+class TestInline:
+    """JOBS_INLINE: deployments without `flask worker` run handlers on enqueue."""
+
+    @pytest.fixture
+    def inline(self, app):
+        app.config['JOBS_INLINE'] = True
+
+    def test_runs_handler_without_job_row(self, app, recorded_task, inline):
+        assert JobQueue.enqueue('test_record', {'a': 1}, key='k1') is None
+
+        assert recorded_task['payloads'] == [{'a': 1}]
+        assert Job.query.count() == 0
+
+    def test_failure_is_logged_not_raised(self, app, recorded_task, inline, caplog):
+        recorded_task['failures'] = 1
+
+        assert JobQueue.enqueue('test_record') is None
+        assert 'test_record' in caplog.text and 'boom' in caplog.text
+
+    def test_reminders_sent_from_cli(self, app, j7_stop, manager_user, inline, no_request_context):
+        with patch('app.utils.email._send_with_retry', return_value=True) as mock_send:
+            stats = enqueue_due_reminders()
+
+        assert stats['j7'] >= 1
+        assert mock_send.called
+        assert TourStopReminder.already_sent(j7_stop.id, manager_user.id, 'j7')
+        assert Job.query.count() == 0
+
+
+class TestReminderJobs:
+    """Tests for reminder enqueueing and the tour_reminder task."""
+
+    def test_enqueues_one_job_per_user(self, app, j7_stop, manager_user):
+        stats = enqueue_due_reminders()
+
+        assert stats['j7'] >= 1
+        job = Job.query.filter_by(idempotency_key=reminder_job_key(j7_stop.id, manager_user.id, 'j7')).first()
+        assert job is not None
+        assert job.task == TASK_TOUR_REMINDER
+
+    def test_second_run_enqueues_nothing(self, app, j7_stop, manager_user):
+        enqueue_due_reminders()
+        count = Job.query.count()
+
+        stats = enqueue_due_reminders()
+
+        assert stats['j7'] == 0
+        assert stats['skipped'] >= 1
+        assert Job.query.count() == count
+
+    def test_dry_run_enqueues_nothing(self, app, j7_stop, manager_user):
+        stats = enqueue_due_reminders(dry_run=True)
+
+        assert stats['j7'] >= 1
+        assert Job.query.count() == 0
+
+    def test_worker_sends_and_records_reminder(self, app, j7_stop, manager_user):
+        enqueue_due_reminders()
+
+        with patch('app.utils.email.send_tour_reminder_email', return_value=True) as mock_send:
+            JobQueue.work(worker_id='w1', once=True)
+
+        assert mock_send.called
+        assert TourStopReminder.already_sent(j7_stop.id, manager_user.id, 'j7')
+
+    def test_failed_send_is_retried_not_recorded(self, app, j7_stop, manager_user):
+        enqueue_due_reminders()
+
+        with patch('app.utils.email.send_tour_reminder_email', return_value=False):
+            stats = JobQueue.work(worker_id='w1', once=True)
+
+        assert stats['failed'] >= 1
+        assert not TourStopReminder.already_sent(j7_stop.id, manager_user.id, 'j7')
+        assert JobQueue.counts()[JobStatus.PENDING] >= 1
+
+
+class TestEmailHandlersWithoutRequest:
+    """`flask worker` has no request: handlers render emails and pick the org SMTP without one."""
+
+    @pytest.fixture
+    def sent(self):
+        with patch('app.utils.email._send_with_retry', return_value=True) as mailman, \
+                patch('app.utils.email._send_with_retry_smtplib', return_value=True) as smtplib_send:
+            yield {'mailman': mailman, 'smtplib': smtplib_send}
+
+    def test_tour_reminder(self, app, j7_stop, manager_user, sent, no_request_context):
+        enqueue_due_reminders()
+
+        stats = JobQueue.work(worker_id='w1', once=True)
+
+        assert stats == {'done': 1, 'failed': 0, 'requeued': 0}
+        assert sent['mailman'].called
+        assert TourStopReminder.already_sent(j7_stop.id, manager_user.id, 'j7')
+
+    def test_tour_stop_notification(self, app, j7_stop, sent, no_request_context):
+        JobQueue.enqueue(TASK_TOUR_STOP_NOTIFICATION, {
+            'tour_stop_id': j7_stop.id, 'recipient': 'crew@test.com', 'notification_type': 'created',
+            'org_id': j7_stop.tour.band.org_id,
+        })
+
+        stats = JobQueue.work(worker_id='w1', once=True)
+
+        assert stats['done'] == 1
+        assert sent['mailman'].call_args[0][2] == 'crew@test.com'
+
+    def test_invoice_email(self, app, manager_user, sent, no_request_context):
+        invoice = Invoice(number='FACT-2026-00042', issuer_name='GigRoute', recipient_name='Le Bikini',
+                          recipient_email='compta@test.com', due_date=date.today() + timedelta(days=30),
+                          status=InvoiceStatus.VALIDATED, created_by_id=manager_user.id)
+        db.session.add(invoice)
+        db.session.commit()
+        JobQueue.enqueue(TASK_INVOICE_EMAIL, {'invoice_id': invoice.id})
+
+        stats = JobQueue.work(worker_id='w1', once=True)
+
+        assert stats['done'] == 1
+        assert sent['mailman'].called
+        assert db.session.get(Invoice, invoice.id).status == InvoiceStatus.SENT
+
+    def test_org_smtp_from_payload(self, app, j7_stop, manager_user, sent, no_request_context):
+        org_id = j7_stop.tour.band.org_id
+        smtp = {'MAIL_SERVER': 'smtp.jobs.test', 'MAIL_USERNAME': 'tour@jobs.test', 'MAIL_PASSWORD': 'secret'}
+        enqueue_due_reminders()
+
+        with patch('app.models.system_settings.SystemSettings.get_mail_config', return_value=smtp) as config:
+            JobQueue.work(worker_id='w1', once=True)
+
+        assert Job.query.one().payload['org_id'] == org_id
+        config.assert_called_with(org_id=org_id)
+        assert sent['smtplib'].called and not sent['mailman'].called
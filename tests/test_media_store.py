@@ -0,0 +1,145 @@
+# =============================================================================
+# Tour Manager - Media Store Tests
+# =============================================================================
+# Tests for app/services/media_store.py and the profile picture routes:
+# pre-generated variants, deduplication, negotiation and revalidation.
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import app.services.media_store as media_store
+from app.extensions import db
+from app.models.media import MediaVariant
+from app.models.user import User
+from app.services.media_store import AVATAR_SIZES, MediaStore
+from tests.conftest import login
+
+
+def make_png(color=(200, 30, 30, 255), size=(640, 480)):
+    output = BytesIO()
+    Image.new('RGBA', size, color).save(output, format='PNG')
+    return output.getvalue()
+
+
+def upload(client, data, filename='avatar.png'):
+    return client.post('/settings/profile/picture',
+                       data={'picture': (BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+@pytest.fixture
+def with_picture(app, client, manager_user):
+    """Manager logged in with an uploaded profile picture."""
+    login(client, 'manager@test.com', 'Manager123!')
+    upload(client, make_png())
+    db.session.expire_all()
+    return db.session.get(User, manager_user.id)
+
+
+class TestMediaStore:
+    """Variants and deduplication."""
+
+    def test_resize_all_sizes_and_formats(self, app):
+        variants = MediaStore.resize(make_png())
+
+        assert set(variants) == {(size, fmt) for size in AVATAR_SIZES for fmt in MediaStore.formats()}
+        for (size, fmt), data in variants.items():
+            image = Image.open(BytesIO(data))
+            assert image.format == fmt.upper()
+            assert max(image.size) == size
+
+    def test_jpeg_only_without_webp(self, app, monkeypatch):
+        monkeypatch.setattr(media_store, 'WEBP_AVAILABLE', False)
+
+        assert {fmt for _size, fmt in MediaStore.resize(make_png())} == {'jpeg'}
+        assert MediaStore.negotiate_format(None, 'webp') == 'jpeg'
+
+    def test_identical_uploads_share_variants(self, app, client, with_picture, musician_user):
+        client.get('/auth/logout')
+        login(client, 'musician@test.com', 'Musician123!')
+        upload(client, make_png())
+
+        assert db.session.get(User, musician_user.id).profile_picture_hash == with_picture.profile_picture_hash
+        assert MediaVariant.query.count() == len(AVATAR_SIZES) * len(MediaStore.formats())
+
+    def test_release_keeps_shared_image(self, app, with_picture, musician_user):
+        content_hash = with_picture.profile_picture_hash
+        musician_user.profile_picture_hash = content_hash
+        with_picture.profile_picture_hash = None
+
+        assert MediaStore.release(content_hash) == 0
+        musician_user.profile_picture_hash = None
+        assert MediaStore.release(content_hash) == len(AVATAR_SIZES) * len(MediaStore.formats())
+
+    def test_release_checks_references_in_the_delete(self, app, with_picture, assert_max_queries):
+        content_hash = with_picture.profile_picture_hash
+        db.session.commit()
+
+        with assert_max_queries(1) as statements:
+            assert MediaStore.release(content_hash) == 0
+
+        assert 'EXISTS' in statements[0].upper()
+        assert MediaVariant.query.filter_by(content_hash=content_hash).count() > 0
+
+
+class TestServePicture:
+    """Size selection, format negotiation and conditional requests."""
+
+    def test_size_and_webp_negotiation(self, app, client, with_picture):
+        url = f'/settings/profile/picture/{with_picture.id}'
+
+        webp = client.get(f'{url}?size=40', headers={'Accept': 'image/webp,image/*,*/*;q=0.8'})
+        jpeg = client.get(f'{url}?size=40', headers={'Accept': '*/*'})
+        full = client.get(url, headers={'Accept': 'image/webp,*/*'})
+
+        assert webp.content_type == 'image/webp'
+        assert jpeg.content_type == 'image/jpeg'
+        assert Image.open(BytesIO(webp.data)).size[0] == 48
+        assert Image.open(BytesIO(full.data)).size[0] == 200
+        assert 'Accept' in webp.headers['Vary'].split(', ')
+        assert webp.headers['ETag'] != jpeg.headers['ETag']
+
+    def test_not_modified_without_reading_image(self, app, client, with_picture, assert_max_queries):
+        url = f'/settings/profile/picture/{with_picture.id}?size=96&format=jpeg'
+        etag = client.get(url).headers['ETag']
+
+        with assert_max_queries(10) as statements:
+            response = client.get(url, headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.data == b''
+        assert not any('media_variants' in statement for statement in statements)
+
+    def test_delete_removes_variants(self, app, client, with_picture):
+        response = client.post('/settings/profile/picture/delete')
+
+        assert response.status_code == 302
+        assert db.session.get(User, with_picture.id).profile_picture_hash is None
+        assert MediaVariant.query.count() == 0
+        assert client.get(f'/settings/profile/picture/{with_picture.id}').status_code == 404
+
+    def test_missing_variants_clear_the_hash(self, app, client, with_picture):
+        # Variants deleted by a release racing the upload that reused them
+        MediaVariant.query.filter_by(content_hash=with_picture.profile_picture_hash).delete()
+        db.session.commit()
+
+        response = client.get(f'/settings/profile/picture/{with_picture.id}')
+
+        assert response.status_code == 404
+        db.session.expire_all()
+        assert db.session.get(User, with_picture.id).profile_picture_hash is None
+
+    def test_new_upload_releases_previous_image(self, app, client, with_picture):
+        previous_hash = with_picture.profile_picture_hash
+
+        upload(client, make_png(color=(30, 30, 200, 255)))
+
+        assert MediaVariant.query.filter_by(content_hash=previous_hash).count() == 0
+        assert db.session.get(User, with_picture.id).profile_picture_hash != previous_hash
+
+    def test_templates_request_sized_variants(self, app, client, with_picture):
+        response = client.get('/settings/profile')
+
+        assert f'size=200&amp;v={with_picture.profile_picture_hash[:12]}' in response.get_data(as_text=True)
@@ -0,0 +1,301 @@
+# =============================================================================
+# Tour Manager - Notification Dispatcher Tests
+# =============================================================================
+# Tests for app/services/notification_dispatcher.py (bounded queue, worker
+# pool, coalescing, backpressure, drain), SMTPConnectionCache and FCM
+# multicast chunking.
+
+import sys
+import threading
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask_mailman import EmailMultiAlternatives
+
+from app.services import fcm_service
+from app.services.notification_dispatcher import EmailJob, NotificationDispatcher, PushJob
+from app.utils import email as email_utils
+from app.utils.email import SMTPConnectionCache, smtp_config_key
+
+
+ORG_SMTP = {
+    'MAIL_SERVER': 'smtp.org-a.test',
+    'MAIL_PORT': '587',
+    'MAIL_USERNAME': 'tour@org-a.test',
+    'MAIL_PASSWORD': 'secret',
+    'MAIL_USE_TLS': 'true',
+}
+OTHER_SMTP = {**ORG_SMTP, 'MAIL_SERVER': 'smtp.org-b.test', 'MAIL_USERNAME': 'tour@org-b.test'}
+
+
+def _email(n, smtp_config=None):
+    return EmailJob(f'id{n}', f'guest{n}@test.com', f'[GigRoute] Test {n}', 'noreply@gigroute.app',
+                    'text', '<p>html</p>', smtp_config=smtp_config)
+
+
+class FakeSMTP:
+    """Stands in for an authenticated smtplib.SMTP connection."""
+
+    opened = []
+
+    def __init__(self, config):
+        self.config = config
+        self.sent = []
+        self.closed = False
+        FakeSMTP.opened.append(self)
+
+    def sendmail(self, sender, recipients, message):
+        self.sent.append(recipients[0])
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_smtp():
+    FakeSMTP.opened = []
+    with patch.object(email_utils, '_open_smtp', side_effect=FakeSMTP):
+        yield FakeSMTP
+
+
+@pytest.fixture
+def sent_mail(app):
+    """Capture Flask-Mailman sends (message, connection) from any thread."""
+    sent = []
+
+    def capture_send(msg_self, *args, **kwargs):
+        sent.append((msg_self.to[0], msg_self.connection))
+        return 1
+
+    with patch.object(EmailMultiAlternatives, 'send', capture_send):
+        yield sent
+
+
+@pytest.fixture
+def async_dispatcher(app):
+    """Dispatcher with real worker threads."""
+    app.config['NOTIFICATION_DISPATCH_SYNC'] = False
+    app.config['NOTIFICATION_WORKERS'] = 1
+    dispatcher = NotificationDispatcher()
+    dispatcher.init_app(app)
+    yield dispatcher
+    dispatcher.shutdown(timeout=5)
+
+
+# =============================================================================
+# SMTP connection reuse
+# =============================================================================
+
+class TestSMTPConnectionCache:
+    """Org smtplib connections reused per config."""
+
+    def test_reuses_connection_per_config(self, fake_smtp):
+        connections = SMTPConnectionCache()
+        assert connections.get(ORG_SMTP) is connections.get(dict(ORG_SMTP))
+        assert connections.get(OTHER_SMTP) is not connections.get(ORG_SMTP)
+        assert len(fake_smtp.opened) == 2
+
+    def test_discard_closes_and_reconnects(self, fake_smtp):
+        connections = SMTPConnectionCache()
+        first = connections.get(ORG_SMTP)
+        connections.discard(ORG_SMTP)
+        assert first.closed
+        assert connections.get(ORG_SMTP) is not first
+
+    def test_close_idle(self, fake_smtp):
+        connections = SMTPConnectionCache(idle_timeout=0)
+        smtp = connections.get(ORG_SMTP)
+        connections.close_idle()
+        assert smtp.closed and len(connections) == 0
+
+    def test_config_key_ignores_password(self):
+        assert smtp_config_key(ORG_SMTP) == smtp_config_key({**ORG_SMTP, 'MAIL_PASSWORD': 'other'})
+        assert smtp_config_key(None) == 'mailman'
+
+
+class TestDeliverEmails:
+    """Batch delivery used by the workers."""
+
+    def test_org_smtp_batch_uses_one_connection(self, app, fake_smtp):
+        jobs = [_email(n, ORG_SMTP) for n in range(5)]
+        connections = SMTPConnectionCache()
+
+        assert email_utils.deliver_emails(jobs, connections) == 5
+        assert len(fake_smtp.opened) == 1
+        assert len(fake_smtp.opened[0].sent) == 5
+
+    def test_send_error_reconnects_and_retries(self, app, fake_smtp):
+        connections = SMTPConnectionCache()
+        broken = connections.get(ORG_SMTP)
+        broken.sendmail = MagicMock(side_effect=OSError('connection reset'))
+
+        with patch.object(email_utils, 'RETRY_BASE_DELAY', 0):
+            assert email_utils.deliver_emails([_email(1, ORG_SMTP)], connections) == 1
+        assert broken.closed
+        assert fake_smtp.opened[-1].sent == ['guest1@test.com']
+
+    def test_mailman_batch_shares_connection(self, app, sent_mail):
+        jobs = [_email(n) for n in range(3)]
+
+        assert email_utils.deliver_emails(jobs) == 3
+        assert [to for to, _ in sent_mail] == ['guest0@test.com', 'guest1@test.com', 'guest2@test.com']
+        assert len({id(connection) for _, connection in sent_mail}) == 1
+
+
+# =============================================================================
+# Dispatcher
+# =============================================================================
+
+class TestDispatcher:
+    """Queue, workers, coalescing, backpressure and drain."""
+
+    def test_sync_mode_runs_inline(self, app, sent_mail):
+        dispatcher = NotificationDispatcher()
+        dispatcher.init_app(app)  # TestingConfig: NOTIFICATION_DISPATCH_SYNC
+
+        assert dispatcher.submit(_email(1)) is False
+        assert [to for to, _ in sent_mail] == ['guest1@test.com']
+        assert dispatcher.stats()['inline'] == 1
+        assert dispatcher.stats()['workers'] == 0
+
+    def test_workers_deliver_and_drain(self, async_dispatcher, sent_mail):
+        for n in range(20):
+            assert async_dispatcher.submit(_email(n)) is True
+
+        assert async_dispatcher.shutdown(timeout=5) is True
+        assert len(sent_mail) == 20
+        stats = async_dispatcher.stats()
+        assert stats['enqueued'] == 20 and stats['emails_sent'] == 20
+        assert stats['queue_depth'] == 0 and stats['workers'] == 0
+
+    def test_fixed_worker_pool(self, async_dispatcher, sent_mail):
+        before = threading.active_count()
+        for n in range(50):
+            async_dispatcher.submit(_email(n))
+        assert threading.active_count() <= before + 1
+        async_dispatcher.shutdown(timeout=5)
+
+    def test_coalesces_queued_emails(self, async_dispatcher, fake_smtp):
+        release = threading.Event()
+        batches = []
+        original = NotificationDispatcher._deliver
+
+        def slow_deliver(self, batch, connections=None):
+            release.wait(5)
+            batches.append(len(batch))
+            original(self, batch, connections)
+
+        with patch.object(NotificationDispatcher, '_deliver', slow_deliver):
+            async_dispatcher.submit(_email(0, ORG_SMTP))
+            for n in range(1, 10):
+                async_dispatcher.submit(_email(n, ORG_SMTP))
+            release.set()
+            async_dispatcher.shutdown(timeout=5)
+
+        # First job alone (worker was already waiting), the rest in one pass
+        assert sum(batches) == 10 and len(batches) <= 2
+        assert len(fake_smtp.opened) == 1
+
+    def test_full_queue_runs_in_caller(self, app, sent_mail):
+        app.config.update(NOTIFICATION_DISPATCH_SYNC=False, NOTIFICATION_WORKERS=1,
+                          NOTIFICATION_QUEUE_SIZE=1, NOTIFICATION_ENQUEUE_TIMEOUT=0.01)
+        dispatcher = NotificationDispatcher()
+        dispatcher.init_app(app)
+        release = threading.Event()
+        original = NotificationDispatcher._deliver
+
+        def blocking_deliver(self, batch, connections=None):
+            if threading.current_thread().name.startswith('notify-'):
+                release.wait(5)
+            original(self, batch, connections)
+
+        with patch.object(NotificationDispatcher, '_deliver', blocking_deliver):
+            results = [dispatcher.submit(_email(n)) for n in range(4)]
+            release.set()
+            dispatcher.shutdown(timeout=5)
+
+        assert results.count(False) >= 1
+        stats = dispatcher.stats()
+        assert stats['rejected'] == results.count(False)
+        assert stats['high_water'] == 1
+        assert len(sent_mail) == 4
+
+    def test_submit_after_shutdown_runs_inline(self, async_dispatcher, sent_mail):
+        async_dispatcher.submit(_email(1))
+        async_dispatcher.shutdown(timeout=5)
+
+        assert async_dispatcher.submit(_email(2)) is False
+        assert len(sent_mail) == 2
+        assert async_dispatcher.stats()['workers'] == 0
+
+    def test_push_jobs_merged_per_payload(self, app):
+        dispatcher = NotificationDispatcher()
+        dispatcher.init_app(app)
+        jobs = [
+            PushJob([1, 2], 'Nouvelle date', 'Paris', {'category': 'tour'}),
+            PushJob([2, 3], 'Nouvelle date', 'Paris', {'category': 'tour'}),
+            PushJob([4], 'Autre', None, None),
+        ]
+        with patch.object(fcm_service, 'send_push_to_users', return_value={}) as send:
+            dispatcher._deliver(jobs)
+
+        assert send.call_count == 2
+        assert send.call_args_list[0].args[0] == [1, 2, 3]
+        assert dispatcher.stats()['push_batches'] == 2
+
+
+# =============================================================================
+# FCM multicast
+# =============================================================================
+
+@pytest.fixture
+def fake_messaging(monkeypatch):
+    """Minimal firebase_admin.messaging recording multicast calls."""
+    messaging = types.SimpleNamespace(calls=[])
+
+    class UnregisteredError(Exception):
+        pass
+
+    def send_each_for_multicast(message):
+        messaging.calls.append(list(message.tokens))
+        responses = [types.SimpleNamespace(exception=UnregisteredError() if t == 'dead' else None)
+                     for t in message.tokens]
+        failures = sum(1 for r in responses if r.exception)
+        return types.SimpleNamespace(responses=responses, success_count=len(responses) - failures,
+                                     failure_count=failures)
+
+    messaging.UnregisteredError = UnregisteredError
+    messaging.Notification = lambda **kw: kw
+    messaging.AndroidConfig = lambda **kw: kw
+    messaging.AndroidNotification = lambda **kw: kw
+    messaging.MulticastMessage = lambda **kw: types.SimpleNamespace(**kw)
+    messaging.send_each_for_multicast = send_each_for_multicast
+
+    firebase_admin = types.ModuleType('firebase_admin')
+    firebase_admin.messaging = messaging
+    monkeypatch.setitem(sys.modules, 'firebase_admin', firebase_admin)
+    monkeypatch.setitem(sys.modules, 'firebase_admin.messaging', messaging)
+    monkeypatch.setattr(fcm_service, '_init_firebase', lambda: object())
+    return messaging
+
+
+class TestFcmMulticast:
+    """send_push_notification chunks tokens by MULTICAST_BATCH_SIZE."""
+
+    def test_chunks_tokens(self, fake_messaging):
+        tokens = [f't{i}' for i in range(1201)]
+        result = fcm_service.send_push_notification(tokens, 'Titre', 'Corps')
+
+        assert [len(call) for call in fake_messaging.calls] == [500, 500, 201]
+        assert result == {'success_count': 1201, 'failure_count': 0}
+
+    def test_deactivates_unregistered_tokens(self, fake_messaging):
+        with patch.object(fcm_service, '_deactivate_token') as deactivate:
+            result = fcm_service.send_push_notification(['ok', 'dead'], 'Titre', 'Corps')
+
+        deactivate.assert_called_once_with('dead')
+        assert result == {'success_count': 1, 'failure_count': 1}
@@ -1138,6 +1138,138 @@ class TestBatchPerDiems:
         assert count_after_second == count_after_first
 
 
+class TestBulkPerDiemGeneration:
+    """Tests for PaymentService.generate_tour_per_diems (bulk path)."""
+
+    @pytest.fixture
+    def crew_configs(self, app, musician_role):
+        """Five crew members with a per diem configured."""
+        configs = []
+        for n in range(5):
+            user = User(email=f'crew{n}@test.com', first_name='Crew', last_name=str(n),
+                        is_active=True, access_level=AccessLevel.STAFF)
+            user.set_password('Crew123!')
+            db.session.add(user)
+            db.session.flush()
+            config = UserPaymentConfig(user_id=user.id, staff_category=StaffCategory.TECHNICAL,
+                                       staff_role=StaffRole.FOH_ENGINEER, per_diem=Decimal('35.00'))
+            db.session.add(config)
+            configs.append(config)
+        db.session.commit()
+        return configs
+
+    @pytest.fixture
+    def long_tour(self, app, manager_user):
+        """Stops on days 0, 1, 2 (travel) and 9: days 3-8 have no stop."""
+        from app.models.organization import Organization, OrganizationMembership, OrgRole
+
+        org = Organization(name='Per Diem Org', slug='per-diem-org', created_by_id=manager_user.id)
+        db.session.add(org)
+        db.session.flush()
+        db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+        band = Band(name='Per Diem Band', manager_id=manager_user.id, org_id=org.id)
+        db.session.add(band)
+        db.session.flush()
+        tour = Tour(name='Long Tour', band_id=band.id, start_date=date.today(),
+                    end_date=date.today() + timedelta(days=9), status=TourStatus.ACTIVE)
+        db.session.add(tour)
+        db.session.flush()
+        for offset, event_type in ((0, EventType.SHOW), (1, EventType.SHOW),
+                                   (2, EventType.TRAVEL), (9, EventType.SHOW)):
+            db.session.add(TourStop(tour_id=tour.id, band_id=tour.band_id,
+                                    date=date.today() + timedelta(days=offset),
+                                    event_type=event_type, status=TourStopStatus.CONFIRMED))
+        db.session.commit()
+        return tour
+
+    def test_creates_one_per_member_per_day(self, app, long_tour, crew_configs, manager_user):
+        from app.services.payment_service import PaymentService
+
+        summary = PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id)
+
+        # 4 days with a stop (days off excluded by default) x 5 members
+        assert summary['days'] == 4
+        assert summary['created'] == 20
+        assert summary['total_amount'] == Decimal('700.00')
+        payments = TeamMemberPayment.query.filter_by(payment_type=PaymentType.PER_DIEM).all()
+        assert len(payments) == 20
+        assert len({p.reference for p in payments}) == 20
+        assert all(p.staff_category == StaffCategory.TECHNICAL for p in payments)
+
+    def test_references_are_contiguous(self, app, long_tour, crew_configs, manager_user):
+        from app.services.payment_service import PaymentService
+
+        summary = PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id)
+
+        first = int(summary['first_reference'].split('-')[-1])
+        last = int(summary['last_reference'].split('-')[-1])
+        assert first == 1
+        assert last - first + 1 == summary['created']
+        assert PaymentService.generate_reference() == f"PAY-{date.today().year}-{last + 1:05d}"
+
+    def test_preview_route_writes_nothing(self, app, client, long_tour, crew_configs, manager_user):
+        """The preview button shows the summary without creating payments."""
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.post('/payments/batch/per-diems', data={
+            'tour_id': long_tour.id,
+            'per_diem_amount': '35.00',
+            'notes': '',
+            'preview': 'Previsualiser',
+        }, follow_redirects=True)
+
+        assert response.status_code == 200
+        assert 'Aperçu - Long Tour'.encode() in response.data
+        assert TeamMemberPayment.query.count() == 0
+
+    def test_options_filter_days(self, app, long_tour, crew_configs, manager_user):
+        from app.services.payment_service import PaymentService
+
+        summary = PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id,
+                                                         include_travel_days=False, include_day_offs=True,
+                                                         dry_run=True)
+
+        # 10 days, minus the travel day
+        assert summary['days'] == 9
+
+    def test_second_run_skips_existing(self, app, long_tour, crew_configs, manager_user):
+        from app.services.payment_service import PaymentService
+
+        PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id)
+        summary = PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id)
+
+        assert summary['created'] == 0
+        assert summary['skipped'] == 20
+        assert TeamMemberPayment.query.count() == 20
+
+    def test_dry_run_writes_nothing(self, app, long_tour, crew_configs, manager_user):
+        from app.services.payment_service import PaymentService
+
+        summary = PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id,
+                                                         dry_run=True)
+
+        assert summary['created'] == 20
+        assert TeamMemberPayment.query.count() == 0
+
+    def test_query_count_is_constant(self, app, long_tour, crew_configs, manager_user):
+        from sqlalchemy import event
+        from app.services.payment_service import PaymentService
+
+        statements = []
+        engine = db.engine
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            PaymentService.generate_tour_per_diems(long_tour.id, Decimal('35.00'), manager_user.id)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT INTO TEAM_MEMBER_PAYMENTS')]
+        assert len(inserts) == 1
+        # Fixed overhead (incl. first-use seeding of the PAY counter), not one per row
+        assert len(statements) <= 15
+
+
 class TestBatchApprove:
     """Tests for batch approval (lines 559-581)."""
 
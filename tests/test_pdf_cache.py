@@ -0,0 +1,236 @@
+# =============================================================================
+# Tour Manager - PDF Render Cache Tests
+# =============================================================================
+# Tests for app/services/pdf_render_cache.py: content keys, disk LRU,
+# cached downloads and background rendering of large documents.
+
+import os
+import time as time_module
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+import app.utils.pdf_generator as pdf_generator
+from app.extensions import db
+from app.models.band import Band
+from app.models.invoices import Invoice, InvoiceStatus
+from app.models.job import Job
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.payments import PaymentStatus, PaymentType, StaffCategory, TeamMemberPayment
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import EventType, TourStop, TourStopStatus
+from app.models.venue import Venue, VenueContact
+from app.services.job_queue import JobQueue
+from app.services.pdf_render_cache import TEMPLATE_VERSIONS, PdfRenderCache
+from tests.conftest import login
+
+
+@pytest.fixture
+def pdf_cache_dir(app, tmp_path):
+    app.config['PDF_CACHE_DIR'] = str(tmp_path / 'pdf-cache')
+    return tmp_path / 'pdf-cache'
+
+
+@pytest.fixture
+def pdf_tour(app, manager_user, pdf_cache_dir):
+    """Tour of 2 stops at a venue with a contact, and 8 approved payments."""
+    org = Organization(name='PDF Org', slug='pdf-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+    band = Band(name='Les Rotatives', manager=manager_user, org_id=org.id)
+    venue = Venue(name='Le Bikini', city='Toulouse', country='France', org_id=org.id)
+    db.session.add_all([band, venue])
+    db.session.flush()
+    db.session.add(VenueContact(venue_id=venue.id, name='Régie', role='Technique', phone='0561000000'))
+    tour = Tour(name='Tournée PDF', start_date=date.today(), end_date=date.today() + timedelta(days=5),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+    for d in range(2):
+        db.session.add(TourStop(tour=tour, venue_id=venue.id, date=date.today() + timedelta(days=d),
+                                set_time=time(21, 0), status=TourStopStatus.CONFIRMED,
+                                event_type=EventType.SHOW))
+    db.session.flush()
+    for i in range(8):
+        db.session.add(TeamMemberPayment(
+            reference=f'PAY-PDF-{i:05d}', user_id=manager_user.id, tour_id=tour.id,
+            staff_category=StaffCategory.ARTISTIC, payment_type=PaymentType.CACHET,
+            amount=Decimal('180.00'), currency='EUR', work_date=date.today(),
+            status=PaymentStatus.APPROVED,
+        ))
+    db.session.commit()
+    return tour
+
+
+class TestStorage:
+    """Content keys and the on-disk LRU."""
+
+    def test_key_follows_data_and_version(self, app, monkeypatch):
+        key = PdfRenderCache.cache_key('settlement', {'gross': Decimal('10.00'), 'date': date(2026, 5, 1)})
+
+        assert key == PdfRenderCache.cache_key('settlement', {'date': date(2026, 5, 1), 'gross': Decimal('10.00')})
+        assert key != PdfRenderCache.cache_key('settlement', {'gross': Decimal('10.01'), 'date': date(2026, 5, 1)})
+        monkeypatch.setitem(TEMPLATE_VERSIONS, 'settlement', 2)
+        assert key != PdfRenderCache.cache_key('settlement', {'gross': Decimal('10.00'), 'date': date(2026, 5, 1)})
+        assert PdfRenderCache.is_key(key) and not PdfRenderCache.is_key('../etc/passwd')
+
+    def test_lru_eviction(self, app, pdf_cache_dir):
+        keys = [PdfRenderCache.cache_key('tour', i) for i in range(3)]
+        for age, key in enumerate(keys):
+            PdfRenderCache.put(key, b'%PDF' + b'x' * 996)
+            os.utime(pdf_cache_dir / f'{key}.pdf', (time_module.time() - 100 + age,) * 2)
+        PdfRenderCache.get(keys[0])  # recently used again
+
+        removed = PdfRenderCache.evict(max_bytes=2000)
+
+        assert removed == 1
+        assert PdfRenderCache.get(keys[1]) is None
+        assert PdfRenderCache.get(keys[0]) is not None and PdfRenderCache.get(keys[2]) is not None
+
+    def test_shared_paragraph_styles(self, app):
+        first = pdf_generator._paragraph_style('Cell', 'Normal', fontSize=9)
+
+        assert pdf_generator._paragraph_style('Cell', 'Normal', fontSize=9) is first
+        assert pdf_generator._paragraph_style('Cell', 'Normal', fontSize=8) is not first
+        assert pdf_generator.get_stylesheet() is pdf_generator.get_stylesheet()
+
+
+class TestCachedDownloads:
+    """Synchronous documents: rendered once per content key."""
+
+    def test_daysheet_rendered_once(self, app, client, pdf_tour, monkeypatch):
+        calls = []
+        render = pdf_generator.generate_daysheet_pdf
+        monkeypatch.setattr(pdf_generator, 'generate_daysheet_pdf', lambda stop: calls.append(stop.id) or render(stop))
+        stop_id = pdf_tour.stops[0].id
+        login(client, 'manager@test.com', 'Manager123!')
+
+        first = client.get(f'/logistics/stop/{stop_id}/pdf')
+        second = client.get(f'/logistics/stop/{stop_id}/pdf')
+        revalidated = client.get(f'/logistics/stop/{stop_id}/pdf', headers={'If-None-Match': first.headers['ETag']})
+
+        assert first.status_code == 200
+        assert first.data.startswith(b'%PDF')
+        assert second.data == first.data
+        assert revalidated.status_code == 304
+        assert calls == [stop_id]
+
+    def test_edit_changes_key(self, app, pdf_tour):
+        stop = pdf_tour.stops[0]
+        key = PdfRenderCache.document('daysheet', stop.id).key
+
+        VenueContact.query.one().phone = '0561999999'
+        db.session.commit()
+
+        assert PdfRenderCache.document('daysheet', stop.id).key != key
+        assert PdfRenderCache.document('daysheet', pdf_tour.stops[1].id).key != key
+
+
+class TestBackgroundRendering:
+    """Large documents are rendered by the job queue while the page polls."""
+
+    @pytest.fixture(autouse=True)
+    def small_threshold(self, app):
+        app.config['PDF_ASYNC_MIN_ROWS'] = 5
+
+    def test_bordereau_rendered_by_worker(self, app, client, pdf_tour):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        page = client.get(f'/reports/accounting/bordereau/{pdf_tour.id}')
+        key = PdfRenderCache.document('bordereau', pdf_tour.id).key
+        pending = client.get(f'/reports/pdf/{key}/status').get_json()
+        again = client.get(f'/reports/accounting/bordereau/{pdf_tour.id}')
+        JobQueue.work(once=True)
+        ready = client.get(f'/reports/pdf/{key}/status').get_json()
+        download = client.get(ready['download_url'])
+
+        assert page.status_code == 202
+        assert again.status_code == 202
+        assert pending == {'status': 'pending', 'progress': None, 'download_url': None}
+        assert ready['status'] == 'ready'
+        assert download.data.startswith(b'%PDF')
+        assert 'bordereau_paiement_Tournée_PDF_' in download.headers['Content-Disposition']
+        assert JobQueue.counts()['done'] == 1
+
+    def test_edit_while_pending_supersedes(self, app, client, pdf_tour):
+        login(client, 'manager@test.com', 'Manager123!')
+        client.get(f'/reports/accounting/budget/{pdf_tour.id}')
+        key = PdfRenderCache.document('budget', pdf_tour.id).key
+
+        TeamMemberPayment.query.first().amount = Decimal('200.00')
+        db.session.commit()
+        JobQueue.work(once=True)
+        status = client.get(f'/reports/pdf/{key}/status').get_json()
+
+        new_key = PdfRenderCache.document('budget', pdf_tour.id).key
+        assert new_key != key
+        assert status['status'] == 'ready'
+        assert status['download_url'] == f'/reports/pdf/{new_key}'
+
+    def test_other_users_get_404(self, app, client, pdf_tour, musician_user):
+        login(client, 'manager@test.com', 'Manager123!')
+        client.get(f'/reports/accounting/bordereau/{pdf_tour.id}')
+        key = PdfRenderCache.document('bordereau', pdf_tour.id).key
+        client.get('/auth/logout')
+        login(client, 'musician@test.com', 'Musician123!')
+
+        assert client.get(f'/reports/pdf/{key}/status').status_code == 404
+        assert client.get('/reports/pdf/not-a-key/status').status_code == 404
+
+    def test_inline_without_worker(self, app, client, pdf_tour):
+        app.config['JOBS_INLINE'] = True
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get(f'/reports/accounting/bordereau/{pdf_tour.id}')
+
+        assert response.status_code == 200
+        assert response.data.startswith(b'%PDF')
+        assert Job.query.count() == 0
+
+    @pytest.mark.parametrize('kind', ['bordereau', 'budget'])
+    def test_worker_renders_without_request_context(self, app, pdf_tour, kind, no_request_context):
+        document = PdfRenderCache.document(kind, pdf_tour.id)
+        PdfRenderCache.submit(document)
+
+        PdfRenderCache.run_render_job({'kind': kind, 'object_id': pdf_tour.id, 'key': document.key})
+
+        assert PdfRenderCache.status(document.key)[1]['status'] == 'ready'
+        assert PdfRenderCache.get(document.key).startswith(b'%PDF')
+
+    def test_render_error_marks_failed(self, app, client, pdf_tour, monkeypatch):
+        from app.services.report_service import ReportService
+
+        monkeypatch.setattr(ReportService, 'render_html_pdf', lambda template, context: 1 / 0)
+        login(client, 'manager@test.com', 'Manager123!')
+        client.get(f'/reports/accounting/bordereau/{pdf_tour.id}')
+        key = PdfRenderCache.document('bordereau', pdf_tour.id).key
+
+        stats = JobQueue.work(once=True)
+
+        assert stats['failed'] == 1
+        assert client.get(f'/reports/pdf/{key}/status').get_json()['status'] == 'failed'
+
+
+class TestInvoiceScope:
+    """Cached invoices can only be fetched from an org of their creator."""
+
+    def test_other_org_gets_404(self, app, client, pdf_tour, manager_user):
+        invoice = Invoice(number='FACT-2026-00077', issuer_name='Les Rotatives', recipient_name='Le Bikini',
+                          due_date=date.today() + timedelta(days=30), status=InvoiceStatus.VALIDATED,
+                          created_by_id=manager_user.id)
+        other_org = Organization(name='Other Org', slug='other-org', created_by_id=manager_user.id)
+        db.session.add_all([invoice, other_org])
+        db.session.commit()
+        login(client, 'manager@test.com', 'Manager123!')
+        with client.session_transaction() as session:
+            session['current_org_id'] = pdf_tour.band.org_id
+
+        assert client.get(f'/invoices/{invoice.id}/pdf').data.startswith(b'%PDF')
+        key = PdfRenderCache.document('invoice', invoice.id).key
+        assert client.get(f'/reports/pdf/{key}').status_code == 200
+
+        with client.session_transaction() as session:
+            session['current_org_id'] = other_org.id
+        assert client.get(f'/reports/pdf/{key}').status_code == 404
+        assert client.get(f'/reports/pdf/{key}/status').status_code == 404
@@ -0,0 +1,168 @@
+# =============================================================================
+# Tour Manager - Request Instrumentation Tests
+# =============================================================================
+# Tests for app/utils/perf.py: per-request query stats, Server-Timing header,
+# /admin/perf aggregate and @query_budget enforcement.
+
+import logging
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.band import Band, BandMembership
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus, EventType
+from app.models.venue import Venue
+from app.utils.perf import PerfRegistry, RequestStats, get_registry, query_budget
+from tests.conftest import login
+
+
+@pytest.fixture
+def busy_org(app, manager_user, musician_user):
+    """An org with 2 bands, 6 tours and 30 stops: enough rows to expose N+1 queries."""
+    org = Organization(name='Perf Org', slug='perf-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+    venue = Venue(name='Zénith', city='Nantes', country='France', org_id=org.id)
+    db.session.add(venue)
+    for b in range(2):
+        band = Band(name=f'Perf Band {b}', manager=manager_user, org_id=org.id)
+        db.session.add(band)
+        db.session.flush()
+        db.session.add(BandMembership(user_id=musician_user.id, band_id=band.id))
+        for t in range(3):
+            start = date.today() + timedelta(days=30 * t)
+            tour = Tour(name=f'Tour {b}-{t}', start_date=start, end_date=start + timedelta(days=10),
+                        status=TourStatus.CONFIRMED, band=band)
+            db.session.add(tour)
+            for d in range(5):
+                db.session.add(TourStop(tour=tour, venue=venue, date=start + timedelta(days=d),
+                                        status=TourStopStatus.CONFIRMED, event_type=EventType.SHOW))
+    db.session.commit()
+    return org
+
+
+def _query_count(response):
+    """Number of queries reported in the Server-Timing header."""
+    db_metric = response.headers['Server-Timing'].split(',')[0]
+    return int(db_metric.split('desc="')[1].split(' ')[0])
+
+
+class TestRequestStats:
+    """Tests for the per-request figures."""
+
+    def test_server_timing_header(self, app, client, busy_org):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get('/tours/')
+
+        assert response.status_code == 200
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        assert 'app;dur=' in response.headers['Server-Timing']
+        assert _query_count(response) > 0
+
+    def test_server_timing_disabled(self, app, client, busy_org):
+        app.config['PERF_SERVER_TIMING'] = False
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get('/tours/')
+
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response.headers
+
+    @pytest.mark.skipif('PERF_SERVER_TIMING' in os.environ, reason='set in the environment')
+    def test_server_timing_off_in_production(self):
+        from app.config import DevelopmentConfig, ProductionConfig
+
+        assert ProductionConfig.PERF_SERVER_TIMING is False
+        assert DevelopmentConfig.PERF_SERVER_TIMING is True
+
+    def test_stats_record_slowest_statement(self):
+        stats = RequestStats()
+        stats.record('SELECT 1', 0.002, -1)
+        stats.record('UPDATE tours SET name = ?', 0.010, 3)
+        stats.record('SELECT 2', 0.001, -1)
+
+        fields = stats.as_dict()
+        assert fields['db_queries'] == 3
+        assert fields['db_rows'] == 3
+        assert fields['db_time_ms'] == 13.0
+        assert fields['db_slowest'] == 'UPDATE tours SET name = ?'
+
+    def test_registry_percentiles(self):
+        registry = PerfRegistry(sample_size=100)
+        for i in range(1, 101):
+            registry.add('tours.index', float(i), i % 10, 1.0)
+
+        row = registry.summary()[0]
+        assert row['count'] == 100
+        assert row['p50_ms'] == 50.0
+        assert row['p95_ms'] == 95.0
+        assert row['max_queries'] == 9
+
+
+class TestAdminPerf:
+    """Tests for the /admin/perf aggregate view."""
+
+    def test_requires_superadmin(self, app, client, manager_user):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        assert client.get('/admin/perf').status_code == 403
+
+    def test_lists_endpoints(self, app, client, manager_user, busy_org):
+        manager_user.is_superadmin = True
+        db.session.commit()
+        login(client, 'manager@test.com', 'Manager123!')
+        client.get('/tours/')
+
+        data = client.get('/admin/perf?format=json').get_json()
+        html = client.get('/admin/perf')
+
+        assert 'tours.index' in [row['endpoint'] for row in data['endpoints']]
+        assert html.status_code == 200
+        assert b'tours.index' in html.data
+
+
+class TestQueryBudgets:
+    """Per-endpoint budgets: hot pages must not grow N+1 queries."""
+
+    @pytest.mark.parametrize('path', ['/tours/', '/documents/', '/reports/dashboard'])
+    def test_pages_within_budget(self, app, client, busy_org, path):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        response = client.get(path)
+
+        assert response.status_code == 200
+        view = app.view_functions[app.url_map.bind('localhost').match(path)[0]]
+        assert _query_count(response) <= view.query_budget
+
+    def test_overrun_is_recorded(self, app, client, busy_org, caplog):
+        @query_budget(1)
+        def too_many():
+            Tour.query.all()
+            Band.query.all()
+            return 'ok'
+
+        app.add_url_rule('/_perf/too-many', 'too_many', too_many)
+
+        with caplog.at_level(logging.WARNING, logger='app.utils.perf'):
+            client.get('/_perf/too-many')
+
+        registry = get_registry(app)
+        assert registry.violations[0]['endpoint'] == 'too_many'
+        assert registry.violations[0]['queries'] > 1
+        assert 'Budget de requêtes dépassé' in caplog.text
+        registry.violations.clear()
+
+    def test_assert_max_queries(self, app, busy_org, assert_max_queries):
+        with assert_max_queries(1):
+            Tour.query.all()
+
+        with pytest.raises(AssertionError):
+            with assert_max_queries(1):
+                Tour.query.all()
+                Band.query.all()
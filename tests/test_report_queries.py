@@ -0,0 +1,206 @@
+# =============================================================================
+# Tour Manager - Report Query Layer Tests
+# =============================================================================
+# Parity tests: app/services/report_queries.py (SQL aggregates) against
+# app/utils/reports.calculate_dashboard_kpis (Python reference implementation)
+
+import pytest
+from decimal import Decimal
+from datetime import date, time, timedelta
+
+from app.extensions import db
+from app.models.organization import Organization
+from app.models.band import Band
+from app.models.venue import Venue
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus
+from app.models.ticket_tier import TicketTier
+from app.models.logistics import LogisticsInfo, LogisticsType
+from app.services.report_queries import ReportQueries
+from app.utils.reports import calculate_dashboard_kpis, calculate_logistics_costs
+
+
+SCALAR_KEYS = (
+    'total_revenue', 'total_tickets', 'total_capacity', 'avg_fill_rate',
+    'avg_ticket_price', 'num_shows', 'total_ticket_revenue', 'formatted_ticket_revenue',
+    'stops_without_capacity', 'stops_with_capacity', 'total_guarantees',
+    'total_door_deals', 'guarantee_percentage', 'door_deal_percentage',
+    'formatted_revenue', 'formatted_guarantees', 'formatted_door_deals',
+    'logistics_unpaid', 'formatted_logistics_total', 'formatted_logistics_transport',
+    'formatted_logistics_accommodation', 'formatted_logistics_equipment',
+    'formatted_logistics_services',
+)
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def _stop(tour, venue, days, **kwargs):
+    stop = TourStop(
+        tour=tour, venue=venue, date=date.today() + timedelta(days=days),
+        doors_time=time(19, 0), status=TourStopStatus.CONFIRMED, **kwargs
+    )
+    db.session.add(stop)
+    return stop
+
+
+@pytest.fixture
+def org(app, manager_user):
+    """Organization owning the report data."""
+    organization = Organization(name='Report Org', slug='report-org', created_by_id=manager_user.id)
+    db.session.add(organization)
+    db.session.commit()
+    return organization
+
+
+@pytest.fixture
+def report_data(app, org, manager_user):
+    """Two bands, three tours and a mix of deal / tier / logistics setups."""
+    band = Band(name='Report Band', manager=manager_user, org_id=org.id)
+    other_band = Band(name='Other Band', manager=manager_user, org_id=org.id)
+    hall = Venue(name='Big Hall', city='Paris', country='France', capacity=800, org_id=org.id)
+    club = Venue(name='Small Club', city='Nantes', country='France', capacity=None, org_id=org.id)
+    db.session.add_all([band, other_band, hall, club])
+    db.session.flush()
+
+    spring = Tour(name='Spring Tour', start_date=date.today() - timedelta(days=60),
+                  end_date=date.today() + timedelta(days=10), status=TourStatus.ACTIVE, band=band)
+    autumn = Tour(name='Autumn Tour', start_date=date.today() + timedelta(days=90),
+                  end_date=date.today() + timedelta(days=150), status=TourStatus.CONFIRMED, band=band)
+    empty = Tour(name='Empty Tour', start_date=date.today() + timedelta(days=200),
+                 end_date=date.today() + timedelta(days=210), status=TourStatus.DRAFT, band=band)
+    foreign = Tour(name='Foreign Tour', start_date=date.today(),
+                   end_date=date.today() + timedelta(days=5), status=TourStatus.CONFIRMED, band=other_band)
+    db.session.add_all([spring, autumn, empty, foreign])
+    db.session.flush()
+
+    # Guarantee only, legacy ticketing
+    s1 = _stop(spring, hall, -45, guarantee=4000, ticket_price=28, sold_tickets=600, currency='EUR')
+    # Door deal, default ticketing fee (0 -> 5%)
+    s2 = _stop(spring, hall, -20, guarantee=1500, ticket_price=32, sold_tickets=700,
+               door_deal_percentage=60, ticketing_fee_percentage=0, currency='EUR')
+    # Door deal with explicit fee, venue without capacity
+    s3 = _stop(spring, club, 5, guarantee=800, ticket_price=20, sold_tickets=150,
+               door_deal_percentage=75, ticketing_fee_percentage=8, currency='EUR')
+    # Multi-tier stop
+    s4 = _stop(autumn, hall, 100, guarantee=6000, door_deal_percentage=50, currency='EUR')
+    # Tiers with nothing sold yet
+    s5 = _stop(autumn, hall, 130, guarantee=2500, currency='EUR')
+    # Out of scope
+    s6 = _stop(foreign, hall, 2, guarantee=99999, ticket_price=10, sold_tickets=10, currency='EUR')
+    db.session.flush()
+
+    db.session.add_all([
+        TicketTier(tour_stop=s4, name='Fosse', price=Decimal('39.00'), quantity_available=500, sold=480, sort_order=0),
+        TicketTier(tour_stop=s4, name='Balcon', price=Decimal('49.50'), quantity_available=200, sold=150, sort_order=1),
+        TicketTier(tour_stop=s4, name='VIP', price=Decimal('120.00'), quantity_available=20, sold=20, sort_order=2),
+        TicketTier(tour_stop=s5, name='Early', price=Decimal('25.00'), quantity_available=300, sold=0, sort_order=0),
+        LogisticsInfo(tour_stop=s1, logistics_type=LogisticsType.FLIGHT, cost=Decimal('640.00'),
+                      paid_by='band', is_paid=True),
+        LogisticsInfo(tour_stop=s1, logistics_type=LogisticsType.HOTEL, cost=Decimal('310.50'),
+                      paid_by='promoter', is_paid=False),
+        LogisticsInfo(tour_stop=s2, logistics_type=LogisticsType.EQUIPMENT, cost=Decimal('220.00'),
+                      paid_by=None, is_paid=False),
+        LogisticsInfo(tour_stop=s3, logistics_type=LogisticsType.TAXI, cost=Decimal('45.00'),
+                      paid_by='', is_paid=None),
+        LogisticsInfo(tour_stop=s4, logistics_type=LogisticsType.TRAIN, cost=None, paid_by='band'),
+        LogisticsInfo(tour_stop=s6, logistics_type=LogisticsType.HOTEL, cost=Decimal('999.00'),
+                      paid_by='band', is_paid=False),
+    ])
+    db.session.commit()
+
+    tours = Tour.query.filter(Tour.band_id == band.id).order_by(Tour.start_date.desc()).all()
+    return band, tours
+
+
+# =============================================================================
+# Parity with calculate_dashboard_kpis
+# =============================================================================
+
+class TestDashboardKpisParity:
+    """SQL aggregates return the same KPIs as the Python implementation."""
+
+    def test_scalar_kpis(self, report_data):
+        """Totals, percentages and formatted values match."""
+        band, tours = report_data
+        expected = calculate_dashboard_kpis(tours)
+        result = ReportQueries.dashboard_kpis([band.id])
+
+        for key in SCALAR_KEYS:
+            if isinstance(expected[key], str) or expected[key] is None:
+                assert result[key] == expected[key], key
+            else:
+                assert result[key] == pytest.approx(expected[key]), key
+
+    def test_same_keys(self, report_data):
+        """Result exposes exactly the same keys."""
+        band, tours = report_data
+        assert set(ReportQueries.dashboard_kpis([band.id])) == set(calculate_dashboard_kpis(tours))
+
+    def test_monthly_revenue(self, report_data):
+        """Revenue grouped by month in the same order."""
+        band, tours = report_data
+        expected = calculate_dashboard_kpis(tours)['monthly_revenue']
+        result = ReportQueries.monthly_revenue([band.id])
+
+        assert [m['month'] for m in result] == [m['month'] for m in expected]
+        assert [m['revenue'] for m in result] == pytest.approx([m['revenue'] for m in expected])
+
+    def test_revenue_by_tour(self, report_data):
+        """Per-tour revenue includes tours without stops."""
+        band, tours = report_data
+        expected = calculate_dashboard_kpis(tours)['revenue_by_tour']
+        result = ReportQueries.revenue_by_tour([band.id])
+
+        assert result == pytest.approx(expected)
+        assert result['Empty Tour'] == 0
+
+    def test_top_stops(self, report_data):
+        """Top stops are ranked identically with matching figures."""
+        band, tours = report_data
+        expected = calculate_dashboard_kpis(tours)['top_stops']
+        result = ReportQueries.top_stops([band.id])
+
+        assert len(result) == len(expected)
+        for got, exp in zip(result, expected):
+            assert got['date'] == exp['date']
+            assert got['venue_name'] == exp['venue_name']
+            assert got['venue_city'] == exp['venue_city']
+            assert got['fill_rate'] == pytest.approx(exp['fill_rate'])
+            for key in ('total_estimated_revenue', 'ticket_revenue', 'door_deal_revenue', 'guarantee'):
+                assert got[key] == pytest.approx(exp[key]), key
+
+    def test_logistics(self, report_data):
+        """Logistics categories and paid_by breakdowns match."""
+        band, tours = report_data
+        expected = calculate_dashboard_kpis(tours)
+        result = ReportQueries.dashboard_kpis([band.id])
+
+        assert result['logistics_costs'] == pytest.approx(expected['logistics_costs'])
+        assert result['logistics_by_paid_by'] == pytest.approx(expected['logistics_by_paid_by'])
+
+    def test_empty_scope(self, app):
+        """No bands gives the same empty KPIs."""
+        expected = calculate_dashboard_kpis([])
+        result = ReportQueries.dashboard_kpis([])
+
+        for key in SCALAR_KEYS:
+            assert result[key] == expected[key], key
+        assert result['monthly_revenue'] == expected['monthly_revenue']
+        assert result['top_stops'] == expected['top_stops']
+
+
+class TestLogisticsCategories:
+    """Logistics types fall into their category (transport, accommodation...)."""
+
+    def test_categories_use_enum_names(self, report_data):
+        """Flights count as transport, hotels as accommodation."""
+        band, tours = report_data
+        spring = next(t for t in tours if t.name == 'Spring Tour')
+        first_stop = spring.stops[0]
+
+        costs = calculate_logistics_costs(first_stop)
+        assert costs['transport'] == pytest.approx(640.0)
+        assert costs['accommodation'] == pytest.approx(310.5)
+        assert costs['services'] == 0
@@ -0,0 +1,228 @@
+# =============================================================================
+# Tour Manager - Routing Engine Tests
+# =============================================================================
+# Tests for app/utils/routing.py (distance matrix, NN + 2-opt optimizer),
+# app/services/route_optimization.py and GET /api/v1/tours/<id>/route-optimization
+
+import pytest
+from datetime import date, time, timedelta
+
+from app.extensions import db
+from app.models.organization import Organization
+from app.models.band import Band
+from app.models.venue import Venue
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus
+from app.services.route_optimization import RouteOptimizationService
+from app.utils import routing
+from app.utils.geo import haversine_distance
+from app.utils.routing import (
+    haversine_matrix,
+    nearest_neighbour,
+    optimize_route,
+    route_length,
+    two_opt,
+)
+
+
+# West -> east along a line of French cities
+CITIES = {
+    'Brest': (48.3904, -4.4861),
+    'Rennes': (48.1173, -1.6778),
+    'Paris': (48.8566, 2.3522),
+    'Reims': (49.2583, 4.0317),
+    'Strasbourg': (48.5734, 7.7521),
+}
+
+
+# =============================================================================
+# Engine
+# =============================================================================
+
+class TestDistanceMatrix:
+    """Vectorized haversine matrix."""
+
+    def test_matches_pairwise_haversine(self):
+        coords = list(CITIES.values())
+        matrix = haversine_matrix(coords)
+        for i, a in enumerate(coords):
+            assert matrix[i][i] == 0
+            for j, b in enumerate(coords):
+                assert matrix[i][j] == pytest.approx(haversine_distance(*a, *b), abs=0.06)
+                assert matrix[i][j] == pytest.approx(matrix[j][i])
+
+    def test_empty(self):
+        assert haversine_matrix([]) == []
+
+    def test_numpy_matches_python_fallback(self):
+        pytest.importorskip('numpy')
+        coords = list(CITIES.values())
+        fast = routing._haversine_matrix_numpy(coords)
+        slow = routing._haversine_matrix_python(coords)
+        for row_fast, row_slow in zip(fast, slow):
+            assert row_fast == pytest.approx(row_slow)
+
+
+class TestOptimizer:
+    """Nearest-neighbour + 2-opt with position windows."""
+
+    @pytest.fixture
+    def zigzag(self):
+        """Cities visited in a zigzag: Brest, Strasbourg, Rennes, Reims, Paris."""
+        names = ['Brest', 'Strasbourg', 'Rennes', 'Reims', 'Paris']
+        return names, haversine_matrix([CITIES[n] for n in names])
+
+    def test_untangles_route(self, zigzag):
+        names, matrix = zigzag
+        route = optimize_route(matrix, initial=list(range(5)))
+        ordered = [names[i] for i in route]
+        assert ordered in (['Brest', 'Rennes', 'Paris', 'Reims', 'Strasbourg'],
+                           ['Strasbourg', 'Reims', 'Paris', 'Rennes', 'Brest'])
+
+    def test_never_worse_than_initial(self, zigzag):
+        _, matrix = zigzag
+        initial = [0, 2, 4, 3, 1]
+        route = optimize_route(matrix, initial=initial)
+        assert route_length(route, matrix) <= route_length(initial, matrix) + 1e-9
+
+    def test_windows_respected(self, zigzag):
+        names, matrix = zigzag
+        # Strasbourg locked on the 2nd date
+        windows = [(0, 4), (1, 1), (0, 4), (0, 4), (0, 4)]
+        route = optimize_route(matrix, windows, initial=list(range(5)))
+        assert route[1] == names.index('Strasbourg')
+        assert sorted(route) == list(range(5))
+
+    def test_nearest_neighbour_detects_infeasible_windows(self, zigzag):
+        _, matrix = zigzag
+        # Two points both locked on position 0
+        windows = [(0, 0), (0, 0), (0, 4), (0, 4), (0, 4)]
+        assert nearest_neighbour(matrix, windows) is None
+
+    def test_two_opt_keeps_windows(self, zigzag):
+        _, matrix = zigzag
+        windows = [(i, i) for i in range(5)]
+        assert two_opt([0, 1, 2, 3, 4], matrix, windows) == [0, 1, 2, 3, 4]
+
+    def test_tiny_routes(self):
+        assert optimize_route([]) == []
+        assert optimize_route([[0.0]]) == [0]
+
+
+# =============================================================================
+# Tour service & API
+# =============================================================================
+
+@pytest.fixture
+def zigzag_tour(app, manager_user):
+    """Tour playing Brest, Strasbourg, Rennes, Reims, Paris on consecutive days."""
+    org = Organization(name='Route Org', slug='route-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    band = Band(name='Route Band', manager=manager_user, org_id=org.id)
+    db.session.add(band)
+    db.session.flush()
+    tour = Tour(name='Zigzag Tour', start_date=date.today(), end_date=date.today() + timedelta(days=10),
+                status=TourStatus.PLANNING, band=band)
+    db.session.add(tour)
+    db.session.flush()
+
+    stops = {}
+    for day, name in enumerate(['Brest', 'Strasbourg', 'Rennes', 'Reims', 'Paris']):
+        lat, lon = CITIES[name]
+        venue = Venue(name=f'Salle {name}', city=name, country='France', latitude=lat, longitude=lon,
+                      org_id=org.id)
+        stop = TourStop(tour=tour, venue=venue, date=date.today() + timedelta(days=day),
+                        doors_time=time(19, 0), status=TourStopStatus.PENDING)
+        db.session.add_all([venue, stop])
+        stops[name] = stop
+
+    # No coordinates: reported, not routed
+    stops['Nowhere'] = TourStop(tour=tour, date=date.today() + timedelta(days=6),
+                                status=TourStopStatus.PENDING, location_city='Nowhere')
+    db.session.add(stops['Nowhere'])
+    db.session.commit()
+    return tour, stops
+
+
+class TestRouteOptimizationService:
+    """Tour-level suggestions and caching."""
+
+    def test_suggests_shorter_route(self, zigzag_tour):
+        tour, stops = zigzag_tour
+        result = RouteOptimizationService.optimize_tour(tour)
+
+        assert result['suggested']['total_km'] < result['current']['total_km']
+        assert result['savings_km'] > 500
+        assert result['savings_drive_minutes'] > 0
+        cities = [leg['city'] for leg in result['suggested']['stops']]
+        assert cities in (['Brest', 'Rennes', 'Paris', 'Reims', 'Strasbourg'],
+                          ['Strasbourg', 'Reims', 'Paris', 'Rennes', 'Brest'])
+        assert result['unlocated'] == [stops['Nowhere'].id]
+
+    def test_dates_stay_the_same_set(self, zigzag_tour):
+        tour, _ = zigzag_tour
+        result = RouteOptimizationService.optimize_tour(tour)
+        current_dates = [leg['date'] for leg in result['current']['stops']]
+        suggested_dates = [leg['date'] for leg in result['suggested']['stops']]
+        assert suggested_dates == current_dates
+
+    def test_confirmed_stops_stay_put(self, zigzag_tour):
+        tour, stops = zigzag_tour
+        stops['Strasbourg'].status = TourStopStatus.CONFIRMED
+        db.session.commit()
+
+        result = RouteOptimizationService.optimize_tour(tour)
+        strasbourg = next(leg for leg in result['suggested']['stops'] if leg['city'] == 'Strasbourg')
+        assert strasbourg['moved'] is False
+        assert result['locked'] == [stops['Strasbourg'].id]
+
+    def test_window_days_limits_moves(self, zigzag_tour):
+        tour, _ = zigzag_tour
+        result = RouteOptimizationService.optimize_tour(tour, window_days=0)
+        assert result['savings_km'] == 0
+        assert not any(leg['moved'] for leg in result['suggested']['stops'])
+
+    def test_cached_per_tour_version(self, zigzag_tour):
+        tour, stops = zigzag_tour
+        first = RouteOptimizationService.optimize_tour(tour)
+        second = RouteOptimizationService.optimize_tour(tour)
+        assert first['cached'] is False
+        assert second['cached'] is True
+        assert second['version'] == first['version']
+
+        stops['Paris'].date = date.today() + timedelta(days=8)
+        db.session.commit()
+
+        third = RouteOptimizationService.optimize_tour(tour)
+        assert third['cached'] is False
+        assert third['version'] != first['version']
+
+
+class TestRouteOptimizationApi:
+    """GET /api/v1/tours/<id>/route-optimization."""
+
+    def _headers(self, client):
+        resp = client.post('/api/v1/auth/login', json={
+            'email': 'manager@test.com',
+            'password': 'Manager123!',
+        })
+        return {'Authorization': f"Bearer {resp.get_json()['data']['access_token']}"}
+
+    def test_endpoint(self, client, zigzag_tour):
+        tour, _ = zigzag_tour
+        resp = client.get(f'/api/v1/tours/{tour.id}/route-optimization', headers=self._headers(client))
+        assert resp.status_code == 200
+        data = resp.get_json()['data']
+        assert data['tour_id'] == tour.id
+        assert len(data['suggested']['stops']) == 5
+
+    def test_invalid_window(self, client, zigzag_tour):
+        tour, _ = zigzag_tour
+        resp = client.get(f'/api/v1/tours/{tour.id}/route-optimization?window_days=x',
+                          headers=self._headers(client))
+        assert resp.status_code == 422
+
+    def test_unknown_tour(self, client, zigzag_tour):
+        resp = client.get('/api/v1/tours/99999/route-optimization', headers=self._headers(client))
+        assert resp.status_code == 404
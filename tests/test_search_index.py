@@ -0,0 +1,248 @@
+# =============================================================================
+# Tour Manager - Global Search Index Tests
+# =============================================================================
+# Tests for app/services/search_index.py and GET /api/v1/search
+
+import pytest
+from datetime import date, time, timedelta
+
+from app.extensions import db
+from app.models.organization import Organization
+from app.models.band import Band
+from app.models.venue import Venue
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import TourStop, TourStopStatus
+from app.models.guestlist import GuestlistEntry, GuestlistStatus, EntryType
+from app.models.search_document import SearchDocument
+from app.services.search_index import (
+    SearchIndexService,
+    normalize_search_text,
+    word_similarity,
+)
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+@pytest.fixture
+def orgs(app, manager_user):
+    """Two organizations: the user's and a foreign one."""
+    mine = Organization(name='Mine', slug='mine', created_by_id=manager_user.id)
+    other = Organization(name='Other', slug='other', created_by_id=manager_user.id)
+    db.session.add_all([mine, other])
+    db.session.commit()
+    return mine, other
+
+
+@pytest.fixture
+def search_data(app, orgs, manager_user, musician_user):
+    """Bands, venues with accented names, a tour and guests."""
+    mine, other = orgs
+    band = Band(name='Les Étoiles', manager=manager_user, org_id=mine.id)
+    foreign_band = Band(name='Étoile Filante', manager=musician_user, org_id=other.id)
+    cafe = Venue(name='Café de la Danse', city='Paris', country='France', capacity=500, org_id=mine.id)
+    sala = Venue(name='Sala Apolo', city='Barcelona', country='Spain', capacity=900, org_id=mine.id)
+    foreign_venue = Venue(name='Café Foreign', city='Lyon', country='France', capacity=100, org_id=other.id)
+    db.session.add_all([band, foreign_band, cafe, sala, foreign_venue])
+    db.session.flush()
+
+    tour = Tour(name='Tournée Été 2026', start_date=date.today(),
+                end_date=date.today() + timedelta(days=30), status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+    db.session.flush()
+
+    stop = TourStop(tour=tour, venue=cafe, date=date.today() + timedelta(days=3),
+                    doors_time=time(19, 0), status=TourStopStatus.CONFIRMED)
+    db.session.add(stop)
+    db.session.flush()
+
+    guest = GuestlistEntry(tour_stop=stop, guest_name='José Muñoz', guest_email='jose@example.com',
+                           entry_type=EntryType.GUEST, status=GuestlistStatus.APPROVED,
+                           requested_by_id=manager_user.id)
+    db.session.add(guest)
+    db.session.commit()
+    return {'band': band, 'foreign_band': foreign_band, 'cafe': cafe, 'sala': sala,
+            'tour': tour, 'guest': guest, 'org': mine}
+
+
+def _titles(results):
+    return [doc.title for doc, _score in results]
+
+
+def _add_guests(stop, user, names):
+    for name in names:
+        db.session.add(GuestlistEntry(tour_stop=stop, guest_name=name, guest_email='guest@example.com',
+                                      entry_type=EntryType.GUEST,
+                                      status=GuestlistStatus.APPROVED, requested_by_id=user.id))
+    db.session.commit()
+
+
+def _guest_band(guest):
+    return SearchDocument.query.filter_by(entity_type='guest', entity_id=guest.id).one().band_id
+
+
+# =============================================================================
+# Text helpers
+# =============================================================================
+
+class TestNormalization:
+    """Accent / case folding and trigram similarity."""
+
+    def test_strips_accents_and_case(self):
+        assert normalize_search_text('Café  de la DANSE') == 'cafe de la danse'
+        assert normalize_search_text('José', 'Muñoz') == 'jose munoz'
+
+    def test_punctuation_becomes_space(self):
+        assert normalize_search_text("L'Olympia - Paris") == 'l olympia paris'
+
+    def test_word_similarity_exact(self):
+        assert word_similarity('apolo', 'sala apolo barcelona') == 1.0
+
+    def test_word_similarity_typo(self):
+        assert word_similarity('olympya', 'l olympia paris') >= 0.6
+        assert word_similarity('zzz', 'l olympia paris') < 0.6
+
+
+# =============================================================================
+# Index maintenance
+# =============================================================================
+
+class TestIndexMaintenance:
+    """search_documents follows the indexed models through session events."""
+
+    def test_documents_created_on_commit(self, search_data):
+        types = {(d.entity_type, d.entity_id) for d in SearchDocument.query.all()}
+        assert ('venue', search_data['cafe'].id) in types
+        assert ('tour', search_data['tour'].id) in types
+        assert ('band', search_data['band'].id) in types
+        assert ('guest', search_data['guest'].id) in types
+
+    def test_rename_updates_document(self, search_data):
+        venue = search_data['sala']
+        venue.name = 'Razzmatazz'
+        db.session.commit()
+
+        doc = SearchDocument.query.filter_by(entity_type='venue', entity_id=venue.id).one()
+        assert doc.title == 'Razzmatazz'
+        assert doc.normalized_text == 'razzmatazz barcelona'
+
+    def test_delete_removes_document(self, search_data):
+        guest = search_data['guest']
+        guest_id = guest.id
+        db.session.delete(guest)
+        db.session.commit()
+
+        assert SearchDocument.query.filter_by(entity_type='guest', entity_id=guest_id).count() == 0
+
+    def test_tour_moved_to_other_band_reindexes_guests(self, search_data, manager_user):
+        new_band = Band(name='Nouveau Groupe', manager=manager_user, org_id=search_data['org'].id)
+        db.session.add(new_band)
+        db.session.commit()
+
+        search_data['tour'].band = new_band
+        db.session.commit()
+
+        assert _guest_band(search_data['guest']) == new_band.id
+        doc = SearchDocument.query.filter_by(entity_type='tour', entity_id=search_data['tour'].id).one()
+        assert doc.band_id == new_band.id
+
+    def test_stop_moved_to_other_tour_reindexes_guests(self, search_data):
+        other_tour = Tour(name='Autre Tournée', start_date=date.today(), end_date=date.today() + timedelta(days=5),
+                          status=TourStatus.CONFIRMED, band=search_data['foreign_band'])
+        db.session.add(other_tour)
+        db.session.commit()
+
+        search_data['guest'].tour_stop.tour_id = other_tour.id
+        db.session.commit()
+
+        assert _guest_band(search_data['guest']) == search_data['foreign_band'].id
+
+    def test_rebuild_cli(self, search_data, runner):
+        SearchDocument.query.delete()
+        db.session.commit()
+
+        result = runner.invoke(args=['rebuild-search-index'])
+        assert result.exit_code == 0
+        assert SearchDocument.query.count() == 7
+
+
+# =============================================================================
+# Querying
+# =============================================================================
+
+class TestSearch:
+    """Ranked, accent-insensitive, scoped search."""
+
+    def test_accent_insensitive(self, search_data):
+        results = SearchIndexService.search('cafe', [search_data['band'].id], org_id=search_data['org'].id)
+        assert 'Café de la Danse' in _titles(results)
+
+    def test_accented_query(self, search_data):
+        results = SearchIndexService.search('ÉTÉ', [search_data['band'].id], org_id=search_data['org'].id)
+        assert _titles(results) == ['Tournée Été 2026']
+
+    def test_typo_tolerant(self, search_data):
+        results = SearchIndexService.search('appolo', [search_data['band'].id], org_id=search_data['org'].id)
+        assert 'Sala Apolo' in _titles(results)
+
+    def test_exact_match_ranked_first(self, search_data):
+        results = SearchIndexService.search('etoiles', [search_data['band'].id], org_id=search_data['org'].id)
+        assert _titles(results)[0] == 'Les Étoiles'
+
+    def test_scoped_to_org_and_bands(self, search_data):
+        results = SearchIndexService.search('cafe', [search_data['band'].id], org_id=search_data['org'].id)
+        assert 'Café Foreign' not in _titles(results)
+
+        results = SearchIndexService.search('etoile', [search_data['band'].id], org_id=search_data['org'].id)
+        assert 'Étoile Filante' not in _titles(results)
+
+    def test_guest_search(self, search_data):
+        results = SearchIndexService.search('munoz', [search_data['band'].id], org_id=search_data['org'].id)
+        assert [(d.entity_type, d.title) for d, _ in results] == [('guest', 'José Muñoz')]
+
+    def test_ranked_per_type(self, search_data, manager_user):
+        # 45 guests ranked above the band (shorter matching text)
+        _add_guests(search_data['guest'].tour_stop, manager_user, [f'Etoile {n:02d}' for n in range(45)])
+
+        results = SearchIndexService.search('etoile', [search_data['band'].id], org_id=search_data['org'].id,
+                                            per_type=10)
+
+        types = [doc.entity_type for doc, _score in results]
+        assert types.count('guest') == 10
+        assert 'Les Étoiles' in _titles(results)
+
+
+class TestSearchApi:
+    """GET /api/v1/search served from the index."""
+
+    def _token(self, client):
+        resp = client.post('/api/v1/auth/login', json={
+            'email': 'manager@test.com',
+            'password': 'Manager123!',
+        })
+        return resp.get_json()['data']['access_token']
+
+    def test_search_endpoint(self, client, search_data):
+        token = self._token(client)
+        resp = client.get('/api/v1/search?q=jose', headers={'Authorization': f'Bearer {token}'})
+        assert resp.status_code == 200
+        data = resp.get_json()['data']
+        assert data['guests'][0]['guest_name'] == 'José Muñoz'
+        assert data['guests'][0]['status'] == 'approved'
+        assert data['results'][0]['type'] == 'guest'
+        assert set(data) == {'tours', 'venues', 'bands', 'guests', 'results'}
+
+    def test_guests_do_not_hide_other_types(self, client, search_data, manager_user):
+        _add_guests(search_data['guest'].tour_stop, manager_user, [f'Etoile {n:02d}' for n in range(45)])
+        token = self._token(client)
+
+        data = client.get('/api/v1/search?q=etoile', headers={'Authorization': f'Bearer {token}'}).get_json()['data']
+
+        assert len(data['guests']) == 10
+        assert [band['name'] for band in data['bands']] == ['Les Étoiles']
+
+    def test_search_query_too_short(self, client, search_data):
+        token = self._token(client)
+        resp = client.get('/api/v1/search?q=a', headers={'Authorization': f'Bearer {token}'})
+        assert resp.status_code == 400
@@ -0,0 +1,152 @@
+# =============================================================================
+# Tour Manager - Shared Cache Tests
+# =============================================================================
+# Tests for app/utils/shared_cache.py (SQLite cross-process cache) and
+# app/utils/cache_generations.py (generation-counter invalidation).
+
+import time
+
+import pytest
+
+from app.extensions import cache, db
+from app.models.notification import Notification
+from app.utils.cache_generations import (
+    bump_cache_generation,
+    cache_generation,
+    cached_value,
+    scoped_cache_key,
+)
+from app.utils.shared_cache import SQLiteCache
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    """A SQLite cache in a temporary file."""
+    return SQLiteCache(str(tmp_path / 'cache.sqlite'), threshold=10, default_timeout=300, prune_interval=1)
+
+
+class TestSQLiteCache:
+    """Tests for the SQLiteCache backend."""
+
+    def test_set_get_roundtrip(self, sqlite_cache):
+        assert sqlite_cache.set('k', {'a': [1, 2]}) is True
+        assert sqlite_cache.get('k') == {'a': [1, 2]}
+        assert sqlite_cache.has('k') is True
+
+    def test_missing_key(self, sqlite_cache):
+        assert sqlite_cache.get('missing') is None
+        assert sqlite_cache.has('missing') is False
+
+    def test_expired_entry_is_a_miss(self, sqlite_cache):
+        sqlite_cache.set('k', 'v', timeout=1)
+        sqlite_cache._conn().execute('UPDATE cache_entries SET expires = ?', (time.time() - 1,))
+
+        assert sqlite_cache.get('k') is None
+
+    def test_add_only_when_missing(self, sqlite_cache):
+        assert sqlite_cache.add('k', 1) is True
+        assert sqlite_cache.add('k', 2) is False
+        assert sqlite_cache.get('k') == 1
+
+    def test_delete_and_clear(self, sqlite_cache):
+        sqlite_cache.set('a', 1)
+        sqlite_cache.set('b', 2)
+
+        assert sqlite_cache.delete('a') is True
+        assert sqlite_cache.delete('a') is False
+        assert sqlite_cache.clear() is True
+        assert sqlite_cache.get('b') is None
+
+    def test_inc_dec(self, sqlite_cache):
+        assert sqlite_cache.inc('n') == 1
+        assert sqlite_cache.inc('n', 5) == 6
+        assert sqlite_cache.dec('n') == 5
+
+    def test_shared_between_instances(self, tmp_path):
+        """Two instances on the same file (two workers) see the same data."""
+        path = str(tmp_path / 'shared.sqlite')
+        first, second = SQLiteCache(path), SQLiteCache(path)
+
+        first.set('k', 'v')
+        second.inc('n')
+
+        assert second.get('k') == 'v'
+        assert first.get('n') == 1
+
+    def test_lru_eviction_above_threshold(self, sqlite_cache):
+        for n in range(10):
+            sqlite_cache.set(f'k{n}', n)
+        # Recently read keys survive eviction
+        sqlite_cache._conn().execute("UPDATE cache_entries SET accessed = accessed + 100 WHERE key = 'k0'")
+
+        sqlite_cache.set('k10', 10)
+
+        (count,) = sqlite_cache._conn().execute('SELECT COUNT(*) FROM cache_entries').fetchone()
+        assert count == 10
+        assert sqlite_cache.get('k0') == 0
+        assert sqlite_cache.get('k1') is None
+
+    def test_unreadable_file_behaves_like_miss(self, tmp_path):
+        broken = SQLiteCache(str(tmp_path / 'missing-dir' / 'cache.sqlite'))
+
+        assert broken.get('k') is None
+        assert broken.set('k', 'v') is False
+
+    def test_flask_caching_factory(self, app, tmp_path):
+        app.config.update(CACHE_TYPE='app.utils.shared_cache.SQLiteCache',
+                          CACHE_SQLITE_PATH=str(tmp_path / 'app.sqlite'))
+        cache.init_app(app)
+
+        assert isinstance(cache.cache, SQLiteCache)
+        cache.set('k', 'v')
+        assert cache.get('k') == 'v'
+
+
+class TestCacheGenerations:
+    """Tests for generation-scoped keys and commit-time invalidation."""
+
+    def test_bump_changes_scoped_key(self, app):
+        before = scoped_cache_key('ctx', user_id=1, org_id=2)
+
+        bump_cache_generation('user', 1)
+
+        assert scoped_cache_key('ctx', user_id=1, org_id=2) != before
+        assert scoped_cache_key('ctx', user_id=3) == scoped_cache_key('ctx', user_id=3)
+
+    def test_generation_seeded_from_clock(self, app):
+        assert cache_generation('org', 99) >= int((time.time() - 5) * 1000)
+
+    def test_cached_value_computes_once(self, app):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'value'
+
+        assert cached_value('thing', compute, user_id=1) == 'value'
+        assert cached_value('thing', compute, user_id=1) == 'value'
+        assert len(calls) == 1
+
+    def test_new_notification_invalidates_user_scope(self, app, manager_user):
+        before = cache_generation('user', manager_user.id)
+
+        db.session.add(Notification(user_id=manager_user.id, title='Hello'))
+        db.session.commit()
+
+        assert cache_generation('user', manager_user.id) > before
+
+    def test_rollback_does_not_invalidate(self, app, manager_user):
+        before = cache_generation('user', manager_user.id)
+
+        db.session.add(Notification(user_id=manager_user.id, title='Hello'))
+        db.session.flush()
+        db.session.rollback()
+
+        assert cache_generation('user', manager_user.id) == before
+
+    def test_bulk_update_invalidates_global_scope(self, app, manager_user):
+        before = cache_generation('global', 0)
+
+        Notification.mark_all_read(manager_user.id)
+
+        assert cache_generation('global', 0) > before
@@ -0,0 +1,174 @@
+# =============================================================================
+# Tour Manager - Tour Book Tests
+# =============================================================================
+# Tests for app/services/tour_book.py and /tours/<id>/tour-book: preloading,
+# snapshot rendering (in-process and in a process pool), ZIP and merged PDF.
+
+import io
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+import app.utils.pdf_generator as pdf_generator
+from app.extensions import db
+from app.models.band import Band
+from app.models.lineup import LineupSlot, PerformerType
+from app.models.logistics import LocalContact, LogisticsInfo, LogisticsType
+from app.models.organization import Organization, OrganizationMembership, OrgRole
+from app.models.tour import Tour, TourStatus
+from app.models.tour_stop import EventType, TourStop, TourStopStatus
+from app.models.venue import Venue, VenueContact
+from app.services.job_queue import JobQueue
+from app.services.pdf_render_cache import PdfRenderCache
+from app.services.tour_book import TourBookService, render_stop_document
+from tests.conftest import login
+
+
+@pytest.fixture
+def book_tour(app, manager_user, tmp_path):
+    """Tour of 3 stops, each with logistics, a local contact and a lineup."""
+    app.config['PDF_CACHE_DIR'] = str(tmp_path / 'pdf-cache')
+    org = Organization(name='Book Org', slug='book-org', created_by_id=manager_user.id)
+    db.session.add(org)
+    db.session.flush()
+    db.session.add(OrganizationMembership(user_id=manager_user.id, org_id=org.id, role=OrgRole.OWNER))
+    band = Band(name='Les Cartographes', manager=manager_user, org_id=org.id)
+    db.session.add(band)
+    db.session.flush()
+    tour = Tour(name='Tournée Book', start_date=date.today(), end_date=date.today() + timedelta(days=5),
+                status=TourStatus.CONFIRMED, band=band)
+    db.session.add(tour)
+
+    for d, city in enumerate(['Lyon', 'Nantes', 'Lille']):
+        venue = Venue(name=f'Salle {city}', city=city, country='France', capacity=800, org_id=org.id)
+        db.session.add(venue)
+        db.session.flush()
+        db.session.add(VenueContact(venue_id=venue.id, name='Régie', role='Technique', phone='0400000000'))
+        stop = TourStop(tour=tour, venue_id=venue.id, date=date.today() + timedelta(days=d),
+                        set_time=time(21, 0), doors_time=time(19, 30), status=TourStopStatus.CONFIRMED,
+                        event_type=EventType.SHOW, guarantee=Decimal('1500.00'),
+                        ticket_price=Decimal('25.00'), sold_tickets=400)
+        db.session.add(stop)
+        db.session.flush()
+        departure = datetime.combine(stop.date, time(9, 0))
+        db.session.add_all([
+            LogisticsInfo(tour_stop_id=stop.id, logistics_type=LogisticsType.TRAIN, provider='SNCF',
+                          start_datetime=departure, end_datetime=departure + timedelta(hours=2),
+                          confirmation_number=f'TGV{d}'),
+            LogisticsInfo(tour_stop_id=stop.id, logistics_type=LogisticsType.HOTEL, provider='Hôtel & Spa',
+                          start_datetime=departure + timedelta(hours=5), city=city,
+                          check_in_time=time(15, 0)),
+            LocalContact(tour_stop_id=stop.id, name='Camille', role='Promoteur', phone='0600000000',
+                         is_primary=True),
+            LineupSlot(tour_stop_id=stop.id, performer_name='Première partie',
+                       performer_type=PerformerType.OPENING_ACT, start_time=time(20, 0), order=1),
+        ])
+    db.session.commit()
+    return tour
+
+
+class TestDocuments:
+    """Preloading and snapshot rendering."""
+
+    def test_fixed_number_of_queries(self, app, book_tour, assert_max_queries):
+        tour_id = book_tour.id
+        db.session.expire_all()
+
+        # tour + band, stops + venues, then venue contacts, logistics, local contacts,
+        # lineups, ticket tiers and promoter expenses: one query each for all stops
+        with assert_max_queries(8):
+            documents = TourBookService.stop_documents(TourBookService.load_tour(tour_id))
+
+        assert [document.kind for document in documents[:3]] == ['daysheet', 'settlement', 'itinerary']
+        assert len(documents) == 9
+
+    def test_keys_shared_with_single_downloads(self, app, book_tour):
+        stop_id = book_tour.stops[0].id
+
+        documents = TourBookService.stop_documents(TourBookService.load_tour(book_tour.id))
+
+        assert documents[0].key == PdfRenderCache.document('daysheet', stop_id).key
+        assert documents[1].key == PdfRenderCache.document('settlement', stop_id).key
+
+    def test_render_from_snapshots(self, app, book_tour):
+        documents = TourBookService.stop_documents(TourBookService.load_tour(book_tour.id))
+
+        for document in documents[:3]:
+            assert render_stop_document((document.kind, document.data)).startswith(b'%PDF')
+
+    def test_itinerary_from_model(self, app, book_tour):
+        assert pdf_generator.generate_itinerary_pdf(book_tour.stops[0]).startswith(b'%PDF')
+
+    def test_process_pool(self, app, book_tour):
+        documents = TourBookService.stop_documents(TourBookService.load_tour(book_tour.id))
+
+        rendered = list(TourBookService.rendered(documents, workers=2))
+
+        assert [document for document, _pdf in rendered] == documents
+        assert all(pdf.startswith(b'%PDF') for _document, pdf in rendered)
+        assert PdfRenderCache.get(documents[-1].key) == rendered[-1][1]
+
+
+class TestTourBookRoute:
+    """The tour book is rendered by the job queue, with progress."""
+
+    def test_zip(self, app, client, book_tour, monkeypatch):
+        login(client, 'manager@test.com', 'Manager123!')
+
+        page = client.get(f'/tours/{book_tour.id}/tour-book')
+        key = PdfRenderCache.document('tour_book', book_tour.id).key
+        JobQueue.work(once=True)
+        status = client.get(f'/reports/pdf/{key}/status').get_json()
+        download = client.get(status['download_url'])
+
+        assert page.status_code == 202
+        assert status['status'] == 'ready'
+        assert status['progress'] == [9, 9]
+        assert download.content_type == 'application/zip'
+        assert 'Tournée_Book_tour_book.zip' in download.headers['Content-Disposition']
+        with zipfile.ZipFile(io.BytesIO(download.data)) as archive:
+            names = archive.namelist()
+            assert len(names) == 9
+            assert f'{date.today():%Y-%m-%d}_Salle_Lyon/itineraire.pdf' in names
+            assert archive.read(names[0]).startswith(b'%PDF')
+
+        # Per-stop downloads reuse the documents rendered for the book
+        monkeypatch.setattr(pdf_generator, 'generate_daysheet_pdf', None)
+        assert client.get(f'/logistics/stop/{book_tour.stops[0].id}/pdf').data.startswith(b'%PDF')
+
+    def test_merged_pdf_bookmarks(self, app, client, book_tour):
+        pypdf = pytest.importorskip('pypdf')
+        login(client, 'manager@test.com', 'Manager123!')
+
+        client.get(f'/tours/{book_tour.id}/tour-book?format=pdf')
+        key = PdfRenderCache.document('tour_book_pdf', book_tour.id).key
+        JobQueue.work(once=True)
+        download = client.get(f'/reports/pdf/{key}')
+
+        assert download.content_type == 'application/pdf'
+        reader = pypdf.PdfReader(io.BytesIO(download.data))
+        stops = [item for item in reader.outline if not isinstance(item, list)]
+        children = [item for item in reader.outline if isinstance(item, list)]
+        assert [stop.title for stop in stops][0] == f'{date.today():%d/%m/%Y} - Salle Lyon (Lyon)'
+        assert len(stops) == 3
+        assert [child.title for child in children[0]] == ['Day sheet', 'Settlement', 'Itinéraire']
+
+    def test_pdf_falls_back_to_zip_without_pypdf(self, app, client, book_tour, monkeypatch):
+        import app.services.tour_book as tour_book
+
+        monkeypatch.setattr(tour_book, 'PYPDF_AVAILABLE', False)
+        login(client, 'manager@test.com', 'Manager123!')
+
+        client.get(f'/tours/{book_tour.id}/tour-book?format=pdf')
+
+        assert PdfRenderCache.status(PdfRenderCache.document('tour_book', book_tour.id).key)[1] is not None
+
+    def test_manager_only(self, app, client, book_tour, musician_user):
+        login(client, 'musician@test.com', 'Musician123!')
+
+        response = client.get(f'/tours/{book_tour.id}/tour-book')
+
+        assert response.status_code in (302, 403)
+        assert JobQueue.counts().get('pending', 0) == 0